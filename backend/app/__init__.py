@@ -1,12 +1,18 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 from .config import Config
+from .utils.compression import init_compression
+from .utils.db_pool import RoutingSession, init_db_pool
+from .utils.providers import init_providers
+from .utils.rate_limit import init_rate_limit
+from .utils.tokens import init_tokens
 from flask_migrate import Migrate
 # from flask_mail import Mail
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 migrate = Migrate()
 # mail = Mail()
 
@@ -17,8 +23,18 @@ def create_app(test_config=None):
     else:
         app.config.from_object(Config)
     
-    CORS(app)
+    # remote_addr = IP que vio el primer proxy de confianza, no la que dice el cliente
+    if app.config.get("TRUSTED_PROXY_HOPS"):
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["TRUSTED_PROXY_HOPS"])
+
+    # X-Next-Cursor: cursor de las listas paginadas que siguen siendo arrays
+    CORS(app, expose_headers=["X-Next-Cursor"])
     db.init_app(app)    
+    init_db_pool(app, db)
+    init_compression(app)
+    init_providers(app)
+    init_rate_limit(app)
+    init_tokens(app)
     # mail.init_app(app)
 
     # Importa models perquè Alembic els detecti
@@ -28,9 +44,33 @@ def create_app(test_config=None):
     from .routes.search import bp as search_bp
     from app.routes import city
     from app.routes import activity
+    from app.routes import health
+    from app.routes import moderation
+    from app.routes import jobs
 
     migrate.init_app(app, db)
 
+    # Jobs en segundo plano; importar los módulos registra sus handlers
+    from app.utils.jobs import init_jobs
+    from app.utils.deletion import init_deletion
+    from app.utils.export import init_export
+    from app.utils import workouts  # noqa: F401
+    from app.utils.trending import init_trending
+    from app.utils.activity_stats import init_activity_stats
+    from app.utils.achievements import init_achievements
+    init_jobs(app)
+    init_deletion(app)
+    init_export(app)
+    init_trending(app)
+    init_activity_stats(app)
+    init_achievements(app)
+
+    from app.utils.follow_graph import init_follow_graph
+    init_follow_graph(app)
+
+    from app.utils.clusters import init_clusters
+    init_clusters(app)
+
     # Importa y registra blueprints con prefijo
     from app.routes import users, posts, comunity, event
     app.register_blueprint(users.bp)
@@ -42,6 +82,9 @@ def create_app(test_config=None):
     app.register_blueprint(search_bp)
     app.register_blueprint(city.bp)
     app.register_blueprint(activity.bp)
+    app.register_blueprint(health.bp)
+    app.register_blueprint(moderation.bp)
+    app.register_blueprint(jobs.bp)
 
     
     #  HOME VISUAL UB FITNESS 
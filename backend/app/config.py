@@ -1,13 +1,31 @@
 import os
 from dotenv import load_dotenv
-import cloudinary
+
+from .utils.db_pool import (
+    engine_options_from_env,
+    replica_bind_from_env,
+    replica_blueprints_from_env,
+)
 load_dotenv()
 
 class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Pool por worker y réplica de lectura opcional (ver app/utils/db_pool.py)
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options_from_env(SQLALCHEMY_DATABASE_URI)
+    SQLALCHEMY_BINDS = replica_bind_from_env()
+    DB_REPLICA_BLUEPRINTS = replica_blueprints_from_env()
+    # /api/health/pools sin autenticación (sólo si no es accesible desde fuera)
+    HEALTH_METRICS_PUBLIC = os.getenv("HEALTH_METRICS_PUBLIC", "0") == "1"
     SECRET_KEY = os.environ.get("SECRET_KEY", "dev-secret-change-me")
     JWT_SECRET_KEY = os.environ.get("JWT_SECRET_KEY", SECRET_KEY)
+    # Duración en segundos de access/refresh (app/utils/tokens.py)
+    JWT_ACCESS_TTL = int(os.getenv("JWT_ACCESS_TTL", 3600))
+    JWT_REFRESH_TTL = int(os.getenv("JWT_REFRESH_TTL", 7 * 24 * 3600))
+    # Lo revocado en otro worker se ve, como mucho, a los N segundos
+    TOKEN_REVOCATION_CACHE_SECONDS = int(os.getenv("TOKEN_REVOCATION_CACHE_SECONDS", 30))
+    # Fecha UTC ISO hasta la que se aceptan tokens antiguos sin type/jti; vacía: nunca
+    LEGACY_TOKENS_UNTIL = os.getenv("LEGACY_TOKENS_UNTIL") or None
     MAIL_SERVER = "smtp.gmail.com"
     MAIL_PORT = 587
     MAIL_USE_TLS = True
@@ -16,17 +34,78 @@ class Config:
     MAIL_DEFAULT_SENDER = ("App Fitness", "no-reply@appfitness.com")
     FRONTEND_BASE_URL = os.getenv("FRONTEND_BASE_URL", "https://app-fitness-3.onrender.com")
 
-cloudinary.config(
-    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-    api_key=os.getenv("CLOUDINARY_API_KEY"),
-    api_secret=os.getenv("CLOUDINARY_API_SECRET"),
-    secure=True
-)
+    # Coste de bcrypt; los hashes antiguos se rehacen en el siguiente login
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+    BCRYPT_THREADS = int(os.getenv("BCRYPT_THREADS", 4))
+
+    # Límite de intentos en login/registro/reenvío (app/utils/rate_limit.py).
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+    # Proxies de confianza delante de la app (Render: 1). La IP del cliente
+    # es la que añadió el último de ellos a X-Forwarded-For (ProxyFix).
+    TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", 0))
+
+    # Denuncias (no descartadas) a partir de las cuales un post se oculta
+    MODERATION_HIDE_THRESHOLD = int(os.getenv("MODERATION_HIDE_THRESHOLD", 5))
+
+    # Posts con más likes+reposts que esto se borran en diferido y por lotes
+    POST_SOFT_DELETE_THRESHOLD = int(os.getenv("POST_SOFT_DELETE_THRESHOLD", 1000))
+    POST_PURGE_BATCH = int(os.getenv("POST_PURGE_BATCH", 1000))
+
+    # Jobs en segundo plano (app/utils/jobs.py) y exportaciones de datos
+    JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", 2))
+    JOBS_STALE_SECONDS = int(os.getenv("JOBS_STALE_SECONDS", 300))
+    EXPORT_DIR = os.getenv("EXPORT_DIR")
+    EXPORT_TTL_HOURS = int(os.getenv("EXPORT_TTL_HOURS", 24))
+    # Importación de entrenamientos GPX/FIT (app/utils/workouts.py)
+    WORKOUT_IMPORT_DIR = os.getenv("WORKOUT_IMPORT_DIR")
+    WORKOUT_IMPORT_MAX_MB = int(os.getenv("WORKOUT_IMPORT_MAX_MB", 50))
+
+    # Tendencias (app/utils/trending.py); cambiar la vida media exige `flask rebuild-trending`
+    TRENDING_ENABLED = os.getenv("TRENDING_ENABLED", "1") == "1"
+    TRENDING_HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", 24))
+    TRENDING_REBUILD_DAYS = int(os.getenv("TRENDING_REBUILD_DAYS", 14))
+    # Cada cuánto vuelca cada worker su búfer de temas a topic_trend
+    TRENDING_TOPIC_FLUSH_SECONDS = float(os.getenv("TRENDING_TOPIC_FLUSH_SECONDS", 5))
+
+    # Feed for_you (app/utils/ranking.py): tamaño y antigüedad de los candidatos
+    FOR_YOU_MAX_CANDIDATES = int(os.getenv("FOR_YOU_MAX_CANDIDATES", 500))
+    FOR_YOU_CANDIDATE_DAYS = int(os.getenv("FOR_YOU_CANDIDATE_DAYS", 14))
+
+    # Usuarios que aporta cada tema a las sugerencias sin grafo (app/utils/suggestions.py)
+    SUGGESTIONS_TOPIC_FANOUT = int(os.getenv("SUGGESTIONS_TOPIC_FANOUT", 200))
+
+    # Caché del grafo de follows por worker (app/utils/follow_graph.py)
+    FOLLOW_GRAPH_MAX_USERS = int(os.getenv("FOLLOW_GRAPH_MAX_USERS", 10000))
+    FOLLOW_GRAPH_TTL = int(os.getenv("FOLLOW_GRAPH_TTL", 60))
+
+    # Caché de clusters del mapa por ciudad y worker (app/utils/clusters.py)
+    CITY_CLUSTERS_MAX_CITIES = int(os.getenv("CITY_CLUSTERS_MAX_CITIES", 500))
+    CITY_CLUSTERS_TTL = int(os.getenv("CITY_CLUSTERS_TTL", 300))
+
+    # Cloudinary se configura la primera vez que se sube algo (app/utils/providers.py)
+    CLOUDINARY_CLOUD_NAME = os.getenv("CLOUDINARY_CLOUD_NAME")
+    CLOUDINARY_API_KEY = os.getenv("CLOUDINARY_API_KEY")
+    CLOUDINARY_API_SECRET = os.getenv("CLOUDINARY_API_SECRET")
+
+    # Compresión de respuestas (gzip siempre; br/zstd si están instalados)
+    COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "1") == "1"
+    COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", 6))
+    COMPRESS_BR_LEVEL = int(os.getenv("COMPRESS_BR_LEVEL", 4))
+    COMPRESS_ZSTD_LEVEL = int(os.getenv("COMPRESS_ZSTD_LEVEL", 3))
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 500))
 
 if __name__ == "__main__":
     print("CLOUDINARY CONFIG TEST ✅")
+    import cloudinary
     import cloudinary.uploader
 
+    cloudinary.config(
+        cloud_name=Config.CLOUDINARY_CLOUD_NAME,
+        api_key=Config.CLOUDINARY_API_KEY,
+        api_secret=Config.CLOUDINARY_API_SECRET,
+        secure=True
+    )
+
     try:
         result = cloudinary.uploader.upload("app/test.png")
         print("✅ Imatge pujada correctament!")
@@ -8,6 +8,9 @@ follow = db.Table(
     db.Column("follower_id", db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), primary_key=True),
     db.Column("followed_id", db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), primary_key=True),
     db.Column("created_at", db.DateTime, nullable=False, default=datetime.utcnow),
+    # Listas de seguidores/seguidos ordenadas por fecha de follow
+    db.Index("ix_follow_followed_id_created_at", "followed_id", "created_at"),
+    db.Index("ix_follow_follower_id_created_at", "follower_id", "created_at"),
 )
 
 from .user_model import User 
@@ -22,5 +25,12 @@ from .user_activity_model import UserActivity
 from .repost_model import Repost
 from .report_model import Report
 from .post_bookmark_model import Bookmark
+from .job_model import Job
+from .trend_model import PostTrend, TopicTrend
+from .user_interest_model import UserInterest
+from .user_topic_model import UserTopic
+from .activity_stat_model import ActivityStat
+from .user_achievement_model import UserAchievement
+from .token_revocation_model import TokenRevocation
 
-__all__ = ["User", "Post", "PostLike", "follow", "EmailVerification", "City", "Activity", "UserActivity","Bookmark"]
+__all__ = ["User", "Post", "PostLike", "follow", "EmailVerification", "City", "Activity", "UserActivity","Bookmark", "Job", "PostTrend", "TopicTrend", "UserInterest", "UserTopic", "ActivityStat", "UserAchievement", "TokenRevocation"]
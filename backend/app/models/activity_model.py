@@ -1,5 +1,9 @@
 from datetime import datetime
+
+from sqlalchemy.orm import validates
+
 from app import db
+from app.utils import geohash
 
 
 class Activity(db.Model):
@@ -22,7 +26,8 @@ class Activity(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     lat = db.Column(db.Numeric(9, 6))
     lng = db.Column(db.Numeric(9, 6))
-
+    # Celda geohash de (lat, lng), para buscar por cercanía con un rango indexado
+    geohash = db.Column(db.String(geohash.PRECISION), index=True)
 
     # Relaciones
     city = db.relationship("City", back_populates="activities")
@@ -34,5 +39,12 @@ class Activity(db.Model):
         lazy="dynamic",
     )
 
+    @validates("lat", "lng")
+    def _sync_geohash(self, key, value):
+        lat = value if key == "lat" else self.lat
+        lng = value if key == "lng" else self.lng
+        self.geohash = geohash.encode(lat, lng) if lat is not None and lng is not None else None
+        return value
+
     def __repr__(self) -> str:
         return f"<Activity {self.id} {self.name}>"
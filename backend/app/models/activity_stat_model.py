@@ -0,0 +1,22 @@
+from datetime import datetime
+from app import db
+
+
+class ActivityStat(db.Model):
+    """
+    Totales de entrenamiento de un usuario por periodo (día, semana ISO o
+    mes) y tipo de actividad (ver app/utils/activity_stats.py). La PK
+    (user_id, granularity, bucket, type) sirve la consulta de un rango.
+    """
+    __tablename__ = "activity_stat"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
+    granularity = db.Column(db.String(5), primary_key=True)  # day / week / month
+    # Primer día del periodo
+    bucket = db.Column(db.Date, primary_key=True)
+    # Activity.type; "" si la actividad no tiene tipo
+    type = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    distance_km = db.Column(db.Float, nullable=False, default=0.0)
+    duration_sec = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -3,14 +3,16 @@ from datetime import datetime
 
 community_members = db.Table(
     "community_members",
-    db.Column("community_id", db.Integer, db.ForeignKey("community.id"), primary_key=True),
-    db.Column("user_id", db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    db.Column("community_id", db.Integer, db.ForeignKey("community.id", ondelete="CASCADE"), primary_key=True),
+    db.Column("user_id", db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), primary_key=True),
+    # "Mis comunidades" y las sugerencias buscan por usuario
+    db.Index("ix_community_members_user_id", "user_id"),
 )
 
 community_admins = db.Table(
     "community_admins",
-    db.Column("community_id", db.Integer, db.ForeignKey("community.id"), primary_key=True),
-    db.Column("user_id", db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    db.Column("community_id", db.Integer, db.ForeignKey("community.id", ondelete="CASCADE"), primary_key=True),
+    db.Column("user_id", db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
 )
 
 class Community(db.Model):
@@ -25,7 +27,7 @@ class Community(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
-    created_by = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    created_by = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="SET NULL"), nullable=True)
     private = db.Column(db.Boolean, nullable=False, default=False)
     image_url = db.Column(db.Text)
 
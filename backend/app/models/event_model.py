@@ -4,8 +4,8 @@ from datetime import datetime
 
 event_participants = db.Table(
     "event_participants",
-    db.Column("event_id", db.Integer, db.ForeignKey("event.id"), primary_key=True),
-    db.Column("user_id", db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    db.Column("event_id", db.Integer, db.ForeignKey("event.id", ondelete="CASCADE"), primary_key=True),
+    db.Column("user_id", db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
 )
 
 class Event(db.Model):
@@ -21,9 +21,9 @@ class Event(db.Model):
     end_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     location = db.Column(db.String(200), nullable=True)
 
-    community_id = db.Column(db.Integer, db.ForeignKey("community.id"), nullable=False)
+    community_id = db.Column(db.Integer, db.ForeignKey("community.id", ondelete="CASCADE"), nullable=False)
 
-    created_by = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    created_by = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="SET NULL"), nullable=True)
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -0,0 +1,39 @@
+from datetime import datetime
+from app import db
+
+
+class Job(db.Model):
+    """
+    Tarea en segundo plano persistida (exportación, borrado de cuenta...).
+    `progress` guarda el punto de control para poder retomarla.
+    """
+    __tablename__ = "job"
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    # Sin FK: el job de borrado sobrevive al usuario que borra
+    user_id = db.Column(db.Integer, index=True)
+    status = db.Column(db.String(20), nullable=False, default="queued", index=True)  # queued/running/done/failed
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    progress = db.Column(db.JSON, nullable=False, default=dict)
+    result = db.Column(db.Text)
+    error = db.Column(db.Text)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": self.progress or {},
+            "error": self.error,
+            "attempts": self.attempts,
+            "createdAt": self.created_at.isoformat() if self.created_at else None,
+            "startedAt": self.started_at.isoformat() if self.started_at else None,
+            "finishedAt": self.finished_at.isoformat() if self.finished_at else None,
+        }
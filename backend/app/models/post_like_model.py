@@ -4,6 +4,6 @@ from .. import db
 class PostLike(db.Model):
     __tablename__ = "post_like"
 
-    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
-    post_id = db.Column(db.Integer, db.ForeignKey("post.id"), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
+    post_id = db.Column(db.Integer, db.ForeignKey("post.id", ondelete="CASCADE"), primary_key=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
@@ -6,48 +6,98 @@ class Post(db.Model):
     __tablename__ = "post"
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
     topic = db.Column(db.String(50), nullable=False)
     text = db.Column(db.Text, nullable=False)
     image_url = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     repost_count = db.Column(db.Integer, default=0)
+    # Contador desnormalizado; lo mantiene app.utils.write_paths
+    like_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # Oculto por moderación (automático al superar MODERATION_HIDE_THRESHOLD)
+    is_hidden = db.Column(db.Boolean, nullable=False, default=False, server_default="0")
+    # Borrado diferido de posts populares (ver app/utils/deletion.py)
+    deleted_at = db.Column(db.DateTime, nullable=True, index=True)
     liked_by = db.relationship(
         "User",
         secondary="post_like",
         back_populates="liked_posts",
         lazy="dynamic",
+        passive_deletes=True,
     )
     bookmarked_by = db.relationship(
         "User",
         secondary="bookmark",
         back_populates="bookmarked_posts",
         lazy="dynamic",
+        passive_deletes=True,
     )
 
-    def to_dict(self, current_user_id=None):
+    __table_args__ = (
+        # Los feeds filtran visible() y ordenan por fecha
+        db.Index("ix_post_is_hidden_created_at", "is_hidden", "created_at"),
+    )
+
+    @classmethod
+    def visible(cls):
+        """
+        Condición de los posts que se pueden mostrar: ni ocultos por
+        moderación ni borrados (pendientes de purga). is_hidden lo pueden
+        quitar los moderadores; deleted_at no.
+        """
+        return db.and_(cls.is_hidden.is_(False), cls.deleted_at.is_(None))
+
+    # Campos serializables; `id` siempre se incluye
+    FIELDS = ("id", "text", "topic", "image", "date", "user", "likes", "reposts",
+              "likedByMe", "bookmarkedByMe")
+
+    @staticmethod
+    def user_dict(user):
+        """Resumen de un usuario tal y como aparece en los posts (autor o quien reposta)."""
         return {
-            "id": self.id,
-            "text": self.text,
-            "topic": self.topic or "",
-            "image": self.image_url,
-            "date": self.created_at.isoformat() if self.created_at else None,
-            
-            "user": {
-                "id": self.author.id,
-                "username": self.author.username,
-                "name": self.author.name,
-                "avatar_url": self.author.avatar_url,
-            },
-            "likes": self.liked_by.count(),
-            "reposts":self.repost_count,
-        "likedByMe": (
-            self.liked_by.filter_by(id=current_user_id).count() > 0
-            if current_user_id else False
-        ),
-        "bookmarkedByMe": (
+            "id": user.id,
+            "username": user.username,
+            "name": user.name,
+            "avatar_url": user.avatar_url,
+        }
+
+    def author_dict(self):
+        return Post.user_dict(self.author)
+
+    def to_dict(self, current_user_id=None, fields=None, compact=False):
+        """
+        fields: subconjunto de FIELDS a devolver (None = todos). Los campos
+                que no se piden no se calculan (p.ej. el recuento de likes).
+        compact: sustituye el objeto `user` por `user_id`; el autor se envía
+                 aparte, una sola vez, en el mapa `includes`.
+        """
+        want = (lambda f: True) if fields is None else (lambda f: f in fields)
+        data = {"id": self.id}
+        if want("text"):
+            data["text"] = self.text
+        if want("topic"):
+            data["topic"] = self.topic or ""
+        if want("image"):
+            data["image"] = self.image_url
+        if want("date"):
+            data["date"] = self.created_at.isoformat() if self.created_at else None
+        if want("user"):
+            if compact:
+                data["user_id"] = self.user_id
+            else:
+                data["user"] = self.author_dict()
+        if want("likes"):
+            data["likes"] = self.like_count or 0
+        if want("reposts"):
+            data["reposts"] = self.repost_count
+        if want("likedByMe"):
+            data["likedByMe"] = (
+                self.liked_by.filter_by(id=current_user_id).count() > 0
+                if current_user_id else False
+            )
+        if want("bookmarkedByMe"):
+            data["bookmarkedByMe"] = (
                 self.bookmarked_by.filter_by(id=current_user_id).count() > 0
                 if current_user_id else False
-            ),
-        }
-    
\ No newline at end of file
+            )
+        return data
@@ -1,21 +1,24 @@
 from .. import db
 from datetime import datetime
 
+# Estados de una denuncia; Dismissed no cuenta para el umbral de ocultación
+REPORT_STATUSES = ("Pending", "Resolved", "Dismissed")
+
 class Report(db.Model):
     __tablename__ = "report"
 
     id = db.Column(db.Integer, primary_key=True)
     
     reporting_user_id = db.Column(
-        db.Integer, db.ForeignKey("user.id"), nullable=False
+        db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False
     )
     reporting_user = db.relationship(
-        "User", backref=db.backref("reports_made", lazy="dynamic"), foreign_keys=[reporting_user_id]
+        "User", backref=db.backref("reports_made", lazy="dynamic", passive_deletes=True), foreign_keys=[reporting_user_id]
     )
 
-    post_id = db.Column(db.Integer, db.ForeignKey("post.id"), nullable=False)
+    post_id = db.Column(db.Integer, db.ForeignKey("post.id", ondelete="CASCADE"), nullable=False)
     post = db.relationship(
-        "Post", backref=db.backref("reports", lazy="dynamic")
+        "Post", backref=db.backref("reports", lazy="dynamic", passive_deletes=True)
     )
 
     category = db.Column(
@@ -34,6 +37,8 @@ class Report(db.Model):
 
     __table_args__ = (
         db.UniqueConstraint("post_id", "reporting_user_id", name="uq_single_user_report"),
+        # Cola de moderación: WHERE status = ? ORDER BY created_at
+        db.Index("ix_report_status_created_at", "status", "created_at"),
     )
 
     def __repr__(self):
@@ -5,13 +5,13 @@ class Repost(db.Model):
     __tablename__ = "repost"
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
-    original_post_id = db.Column(db.Integer, db.ForeignKey("post.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
+    original_post_id = db.Column(db.Integer, db.ForeignKey("post.id", ondelete="CASCADE"), nullable=False)
     comment_text = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    original_post = db.relationship("Post", backref=db.backref("reposts", lazy="dynamic"))
-    user = db.relationship("User", backref=db.backref("reposted_posts", lazy="dynamic"))
+    original_post = db.relationship("Post", backref=db.backref("reposts", lazy="dynamic", passive_deletes=True))
+    user = db.relationship("User", backref=db.backref("reposted_posts", lazy="dynamic", passive_deletes=True))
     
     __table_args__ = (
         db.UniqueConstraint('user_id', 'original_post_id', name='_user_post_uc'),
@@ -0,0 +1,12 @@
+from app import db
+
+
+class TokenRevocation(db.Model):
+    """
+    Revocaciones de tokens compartidas entre workers (ver
+    app/utils/tokens.py): clave fam:<sesión> / jti:<token> y caducidad.
+    """
+    __tablename__ = "token_revocation"
+
+    key = db.Column(db.String(80), primary_key=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
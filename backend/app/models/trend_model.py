@@ -0,0 +1,33 @@
+from datetime import datetime
+from app import db
+
+
+class PostTrend(db.Model):
+    """
+    Puntuación de tendencia de un post (ver app/utils/trending.py).
+    `score` es el logaritmo de la suma de pesos decaídos referida a una
+    época fija, así que ordenar por score equivale a ordenar por la
+    puntuación actual y el índice (topic, score) sirve la consulta entera.
+    """
+    __tablename__ = "post_trend"
+
+    post_id = db.Column(db.Integer, db.ForeignKey("post.id", ondelete="CASCADE"), primary_key=True)
+    # Copias del post para no tener que unir antes de ordenar
+    topic = db.Column(db.String(50), nullable=False)
+    post_created_at = db.Column(db.DateTime, nullable=False)
+    score = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_post_trend_topic_score", "topic", "score"),
+        db.Index("ix_post_trend_score", "score"),
+    )
+
+
+class TopicTrend(db.Model):
+    """Puntuación de tendencia agregada por tema (misma escala que PostTrend)."""
+    __tablename__ = "topic_trend"
+
+    topic = db.Column(db.String(50), primary_key=True)
+    score = db.Column(db.Float, nullable=False, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
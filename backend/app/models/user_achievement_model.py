@@ -0,0 +1,28 @@
+from datetime import datetime
+from app import db
+
+
+class UserAchievement(db.Model):
+    """
+    Estado de logros de un usuario (ver app/utils/achievements.py): los
+    contadores que necesitan las reglas, para evaluar cada completación
+    nueva sin releer el historial, y las insignias ganadas como máscara de
+    bits (bit i = i-ésima insignia de achievements.BADGES).
+    """
+    __tablename__ = "user_achievement"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
+    badges = db.Column(db.BigInteger, nullable=False, default=0)
+
+    completions = db.Column(db.Integer, nullable=False, default=0)
+    total_km = db.Column(db.Float, nullable=False, default=0.0)
+    hard_count = db.Column(db.Integer, nullable=False, default=0)
+    # Máscara de dificultades hechas (achievements.DIFFICULTIES)
+    difficulties = db.Column(db.Integer, nullable=False, default=0)
+    current_streak = db.Column(db.Integer, nullable=False, default=0)
+    longest_streak = db.Column(db.Integer, nullable=False, default=0)
+    last_active_day = db.Column(db.Date)
+    # Ids de las ciudades con todas sus actividades completadas
+    cities = db.Column(db.JSON, nullable=False, default=list)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
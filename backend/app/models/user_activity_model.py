@@ -21,9 +21,18 @@ class UserActivity(db.Model):
 
     done_at = db.Column(db.DateTime, nullable=False)
     duration_sec = db.Column(db.Integer)
+    # Datos reales del entrenamiento importado (GPX/FIT); nulos si se marcó a mano
+    distance_km = db.Column(db.Numeric(7, 2))
+    elevation_gain_m = db.Column(db.Integer)
     notes = db.Column(db.Text)
+    # Clave del cliente (wearable) para que reintentar un lote no duplique
+    idempotency_key = db.Column(db.String(64))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "idempotency_key", name="uq_user_activity_user_id_idempotency_key"),
+    )
+
     # Relaciones
     user = db.relationship("User", back_populates="user_activities")
     activity = db.relationship("Activity", back_populates="user_activities")
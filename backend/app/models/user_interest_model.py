@@ -0,0 +1,14 @@
+from app import db
+
+
+class UserInterest(db.Model):
+    """
+    Vector de temas de un usuario: nº de likes dados a posts de cada tema.
+    Lo mantiene app.utils.write_paths; lo usa el feed "for_you"
+    (app/utils/ranking.py) junto con User.preferences.
+    """
+    __tablename__ = "user_interest"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
+    topic = db.Column(db.String(50), primary_key=True)
+    weight = db.Column(db.Integer, nullable=False, default=0)
@@ -1,15 +1,14 @@
 from .. import db
-import bcrypt
 from datetime import datetime
-from sqlalchemy.dialects.sqlite import JSON
 from . import follow
+from ..utils import passwords
 
 class User(db.Model):
     __tablename__ = "user"
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, index=True, nullable=False)
 
-    name = db.Column(db.String(15), nullable=False)
+    name = db.Column(db.String(15), index=True, nullable=False)
     avatar_url = db.Column(db.Text)
     bio = db.Column(db.String(200))
 
@@ -18,12 +17,20 @@ class User(db.Model):
     password_hash = db.Column(db.String(60), nullable=False)  # bcrypt hash
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    preferences = db.Column(JSON, default=list)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    posts = db.relationship("Post", backref="author", lazy="dynamic", cascade="all, delete-orphan")
+    posts = db.relationship("Post", backref="author", lazy="dynamic", cascade="all, delete-orphan",
+                            passive_deletes=True)
 
     ocultar_info = db.Column(db.Boolean, nullable=False, server_default="1")
+    is_moderator = db.Column(db.Boolean, nullable=False, default=False, server_default="0")
+    # Borrado de cuenta en curso (job delete_user): ya no puede autenticarse
+    deleting_at = db.Column(db.DateTime, nullable=True)
+
+    # Contadores desnormalizados; los mantienen app.utils.write_paths y app.utils.deletion
+    followers_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    following_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    posts_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     followers = db.relationship(
         "User",
@@ -46,6 +53,7 @@ class User(db.Model):
         back_populates="user",
         cascade="all, delete-orphan",
         lazy="dynamic",
+        passive_deletes=True,
     )
     bookmarked_posts = db.relationship(
         "Post",
@@ -54,11 +62,34 @@ class User(db.Model):
         lazy="dynamic",
     )
 
+    # Temas preferidos normalizados en user_topic; se exponen como lista en `preferences`
+    topics = db.relationship(
+        "UserTopic",
+        order_by="UserTopic.position",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+    @property
+    def preferences(self):
+        return [t.topic for t in self.topics]
+
+    @preferences.setter
+    def preferences(self, values):
+        from .user_topic_model import UserTopic
+        current = {t.topic: t for t in self.topics}
+        rows = []
+        for topic in dict.fromkeys(str(v) for v in values or []):
+            row = current.get(topic) or UserTopic(topic=topic)
+            row.position = len(rows)
+            rows.append(row)
+        self.topics = rows
+
     def set_password(self, password):
-        self.password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        self.password_hash = passwords.hash_password(password)
 
     def check_password(self, password):
-        return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+        return passwords.check_password(password, self.password_hash)
     
     def to_dict(self):
         return {
@@ -79,4 +110,7 @@ class User(db.Model):
             "bio": self.bio or "",
             "ocultarInfo": bool(self.ocultar_info),
             "createdAt": self.created_at.isoformat(),
+            "followersCount": self.followers_count or 0,
+            "followingCount": self.following_count or 0,
+            "postsCount": self.posts_count or 0,
         }
\ No newline at end of file
@@ -0,0 +1,26 @@
+from datetime import datetime
+from app import db
+
+
+class UserTopic(db.Model):
+    """
+    Temas preferidos de un usuario (antes, la columna JSON user.preferences).
+    User.preferences sigue siendo una lista; esta tabla permite buscar por
+    tema con el índice (topic, user_id).
+    """
+    __tablename__ = "user_topic"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
+    topic = db.Column(db.String(50), primary_key=True)
+    # Orden en que el usuario los eligió
+    position = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_user_topic_topic_user_id", "topic", "user_id"),
+    )
+
+    @classmethod
+    def audience(cls, topic):
+        """SELECT de los user_id interesados en `topic` (para usar como subconsulta)."""
+        return db.select(cls.user_id).where(cls.topic == topic)
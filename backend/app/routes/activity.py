@@ -1,29 +1,201 @@
 # app/routes/activity.py
-from datetime import datetime
-from flask import Blueprint, jsonify
+from datetime import datetime, timezone
+from flask import Blueprint, current_app, jsonify, request
+from sqlalchemy import select
+from werkzeug.exceptions import RequestEntityTooLarge
 
 from .. import db
 from ..models import Activity, UserActivity
+from ..utils import geo, jobs, workouts, write_paths
 from ..utils.auth_utils import token_required
 
 bp = Blueprint("activity", __name__, url_prefix="/api/activities")
 
+DEFAULT_RADIUS_KM = 5.0
+MAX_NEARBY_LIMIT = 200
+DEFAULT_IMPORT_MAX_MB = 50
+MAX_BATCH_COMPLETIONS = 500
+MAX_IDEMPOTENCY_KEY = 64
+
+
+def _activity_dict(act):
+    return {
+        "id": act.id,
+        "city_id": act.city_id,
+        "name": act.name,
+        "description": act.description,
+        "type": act.type,
+        "distance_km": float(act.distance_km) if act.distance_km is not None else None,
+        "difficulty": act.difficulty,
+        "lat": float(act.lat) if act.lat is not None else None,
+        "lng": float(act.lng) if act.lng is not None else None,
+    }
+
+
+@bp.get("/nearby")
+def nearby_activities():
+    """Actividades activas a menos de radius_km de (lat, lng), de más cerca a más lejos."""
+    try:
+        lat = float(request.args["lat"])
+        lng = float(request.args["lng"])
+        radius_km = float(request.args.get("radius_km", DEFAULT_RADIUS_KM))
+        limit = min(max(int(request.args.get("limit", 50)), 1), MAX_NEARBY_LIMIT)
+    except KeyError:
+        return jsonify({"error": "Faltan 'lat' y 'lng'"}), 400
+    except ValueError:
+        return jsonify({"error": "'lat', 'lng', 'radius_km' y 'limit' deben ser numéricos"}), 400
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return jsonify({"error": "Coordenadas fuera de rango"}), 400
+    if not 0 < radius_km <= geo.MAX_RADIUS_KM:
+        return jsonify({"error": f"'radius_km' debe estar entre 0 y {geo.MAX_RADIUS_KM:g}"}), 400
+
+    rows = geo.nearby(lat, lng, radius_km, request.args.get("type") or None, limit)
+    return jsonify([
+        {**_activity_dict(act), "distance_from_km": round(dist, 3)}
+        for act, dist in rows
+    ]), 200
+
+
+@bp.post("/imports")
+@token_required
+def import_workout(current_user):
+    """
+    Sube un entrenamiento (campo 'file', .gpx o .fit) y encola su importación.
+    El job registra una completación por cada actividad que recorre la traza;
+    el progreso y el resumen se consultan en /api/jobs/<id>.
+    """
+    # Límite de esta ruta: Werkzeug corta al leer el cuerpo, antes de parsearlo
+    request.max_content_length = int(
+        current_app.config.get("WORKOUT_IMPORT_MAX_MB", DEFAULT_IMPORT_MAX_MB) * 1024 * 1024
+    )
+    try:
+        file = request.files.get("file")
+    except RequestEntityTooLarge:
+        return jsonify({"error": "Fichero demasiado grande"}), 413
+    if file is None or not file.filename:
+        return jsonify({"error": "Falta el campo 'file' al formulario"}), 400
+    fmt = (request.form.get("format") or file.filename.rsplit(".", 1)[-1]).lower()
+    formats = workouts.supported_formats()
+    if fmt not in formats:
+        return jsonify({"error": f"Formato no soportado; usa {', '.join(formats)}"}), 400
+
+    path = workouts.save_upload(file, fmt)
+    job = jobs.enqueue("import_workout", user_id=current_user.id, payload={"path": path, "format": fmt})
+    return jsonify({"job": job.to_dict()}), 202
+
+
+def _parse_completion(item):
+    """Valida un elemento del lote; ValueError con el motivo si no es válido."""
+    if not isinstance(item, dict):
+        raise ValueError("debe ser un objeto")
+    try:
+        activity_id = int(item.get("activity_id"))
+    except (TypeError, ValueError):
+        raise ValueError("'activity_id' inválido")
+
+    done_at = item.get("done_at")
+    if not isinstance(done_at, str):
+        raise ValueError("'done_at' es obligatorio (ISO 8601)")
+    try:
+        done_at = datetime.fromisoformat(done_at.strip())
+    except ValueError:
+        raise ValueError("'done_at' debe ser una fecha ISO 8601")
+    if done_at.tzinfo is not None:
+        done_at = done_at.astimezone(timezone.utc).replace(tzinfo=None)
+
+    duration = item.get("duration_sec")
+    if duration is not None and (isinstance(duration, bool) or not isinstance(duration, int) or duration < 0):
+        raise ValueError("'duration_sec' debe ser un entero no negativo")
+    notes = item.get("notes")
+    if notes is not None and not isinstance(notes, str):
+        raise ValueError("'notes' debe ser texto")
+    key = item.get("idempotency_key")
+    if key is not None and (not isinstance(key, str) or not 0 < len(key) <= MAX_IDEMPOTENCY_KEY):
+        raise ValueError(f"'idempotency_key' debe ser texto de 1 a {MAX_IDEMPOTENCY_KEY} caracteres")
+
+    return {"activity_id": activity_id, "done_at": done_at, "duration_sec": duration,
+            "notes": notes, "idempotency_key": key}
+
+
+@bp.post("/completions:batch")
+@token_required
+def batch_completions(current_user):
+    """
+    POST /api/activities/completions:batch
+    Body: {"completions": [{"activity_id": 1, "done_at": "2026-05-01T08:00:00Z",
+                            "duration_sec": 1800, "notes": "...", "idempotency_key": "..."}]}
+    Todo va en una transacción y un solo INSERT. Reenviar un lote con las
+    mismas idempotency_key no duplica nada: esas entradas vuelven con
+    duplicate=true y el id que ya tenían.
+    """
+    data = request.get_json(silent=True) or {}
+    items = data.get("completions")
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "'completions' debe ser una lista no vacía"}), 400
+    if len(items) > MAX_BATCH_COMPLETIONS:
+        return jsonify({"error": f"Máximo {MAX_BATCH_COMPLETIONS} completaciones por petición"}), 400
+
+    parsed = []
+    for i, item in enumerate(items):
+        try:
+            parsed.append(_parse_completion(item))
+        except ValueError as e:
+            return jsonify({"error": f"Completación inválida en la posición {i}: {e}"}), 400
+
+    active = set(db.session.scalars(
+        select(Activity.id).where(
+            Activity.id.in_({c["activity_id"] for c in parsed}), Activity.is_active.is_(True)
+        )
+    ))
+    results, to_insert, seen_keys = [], [], set()
+    for i, c in enumerate(parsed):
+        result = {"index": i, "activity_id": c["activity_id"]}
+        if c["activity_id"] not in active:
+            result.update(ok=False, error="Actividad no encontrada")
+        elif c["idempotency_key"] is not None and c["idempotency_key"] in seen_keys:
+            result.update(ok=True, duplicate=True)
+        else:
+            if c["idempotency_key"] is not None:
+                seen_keys.add(c["idempotency_key"])
+            to_insert.append(c)
+            result.update(ok=True, duplicate=False)
+        results.append(result)
+
+    inserted = write_paths.record_completions(current_user.id, to_insert)
+    ids = {key: row_id for row_id, _, key in inserted if key is not None}
+    # Claves que ya existían: reintentos de un lote anterior
+    retried = seen_keys - set(ids)
+    if retried:
+        ids.update(db.session.execute(
+            select(UserActivity.idempotency_key, UserActivity.id).where(
+                UserActivity.user_id == current_user.id,
+                UserActivity.idempotency_key.in_(retried),
+            )
+        ).all())
+    db.session.commit()
+
+    for result, c in zip(results, parsed):
+        key = c["idempotency_key"]
+        if result["ok"] and key is not None:
+            result["id"] = ids.get(key)
+            result["duplicate"] = result["duplicate"] or key in retried
+
+    return jsonify({
+        "results": results,
+        "recorded": len(inserted),
+    }), 200
+
 
 @bp.post("/<int:activity_id>/complete")
 @token_required
 def complete_activity(current_user, activity_id):
-    activity = Activity.query.get(activity_id)
+    activity = db.session.get(Activity, activity_id)
     if not activity:
         return jsonify({"error": "Actividad no encontrada"}), 404
 
-    new_record = UserActivity(
-        user_id=current_user.id,
-        activity_id=activity_id,
-        done_at=datetime.utcnow(),
-        duration_sec=None,
-        notes=None,
-    )
-    db.session.add(new_record)
+    write_paths.record_completions(current_user.id, [
+        {"activity_id": activity_id, "done_at": datetime.utcnow()},
+    ])
     db.session.commit()
 
     return jsonify({
@@ -1,44 +1,30 @@
 from sqlite3 import IntegrityError
 from flask import Blueprint, request, jsonify, current_app, g
+from sqlalchemy import case, or_
 from sqlalchemy.exc import IntegrityError
 from flask_cors import cross_origin
 from datetime import datetime, timedelta
-import jwt, hashlib
+import hashlib
 import re
 from functools import wraps
 import os
-import requests
  
 from .. import db
 from ..models.user_model import User
+from ..utils import passwords
 from ..utils.auth_utils import token_required
+from ..utils.providers import get_provider
+from ..utils.rate_limit import rate_limit
+from ..utils import tokens
 from ..models.email_verification import EmailVerification
 
 bp = Blueprint('auth', __name__, url_prefix='/auth')
 
-def _jwt_secret():
-    secret = current_app.config.get("JWT_SECRET_KEY") or current_app.config.get("SECRET_KEY")
-    return secret or "dev-secret-change-me"
-
-def _encode_token(payload, delta):
-    payload = dict(payload)
-    payload["exp"] = datetime.utcnow() + delta
-    return jwt.encode(payload, _jwt_secret(), algorithm="HS256")
-
-def _decode_token(token):
-    return jwt.decode(token, _jwt_secret(), algorithms=["HS256"])
-
 def _mk_hash(s: str) -> str:
     return hashlib.sha256(s.encode("utf-8")).hexdigest()
 
-def _mk_access(user_id):  
-    return _encode_token({"user_id": user_id, "type": "access"}, timedelta(hours=1))
-
-def _mk_refresh(user_id): 
-    return _encode_token({"user_id": user_id, "type": "refresh"}, timedelta(days=7))
-
 def _mk_verify(user_id, jti): 
-    return _encode_token({"user_id": user_id, "type": "email_verify", "jti": jti}, timedelta(hours=24))
+    return tokens.encode(user_id, "email_verify", timedelta(hours=24), jti=jti)
 
 def _send_verification_email(to_email, verify_url):
     api_key = os.getenv("RESEND_API_KEY")
@@ -58,7 +44,7 @@ def _send_verification_email(to_email, verify_url):
     }
 
     try:
-        res = requests.post(
+        res = get_provider("http").post(
             "https://api.resend.com/emails",
             headers={
                 "Authorization": f"Bearer {api_key}",
@@ -89,23 +75,20 @@ def auth_required(fn):
             return jsonify({"error": "Falta Authorization Bearer"}), 401
         token = auth.split(" ", 1)[1].strip()
         try:
-            payload = _decode_token(token)
-            if payload.get("type") != "access":
-                return jsonify({"error": "Token inválido (no es access)"}), 401
-            user = User.query.get(payload.get("user_id"))
-            if not user:
-                return jsonify({"error": "Usuario no encontrado"}), 404
-            if not _user_is_verified(user):
-                return jsonify({"error": "Correo no verificado"}), 403
-            g.current_user = user
-        except jwt.ExpiredSignatureError:
-            return jsonify({"error": "El token ha caducado"}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({"error": "Token inválido"}), 401
+            payload = tokens.decode(token, "access")
+        except tokens.TokenError as e:
+            return jsonify({"error": str(e)}), 401
+        user = User.query.get(payload.get("user_id"))
+        if not user:
+            return jsonify({"error": "Usuario no encontrado"}), 404
+        if not _user_is_verified(user):
+            return jsonify({"error": "Correo no verificado"}), 403
+        g.current_user = user
         return fn(*args, **kwargs)
     return _wrapped
 
 @bp.route('/register', methods=['POST'])
+@rate_limit('register')
 def register():
     data = request.get_json() or {}
 
@@ -177,7 +160,7 @@ def verify_email():
     if not token:
         return jsonify({"error": "Token de verificación faltante"}), 400
     try:
-        decoded = _decode_token(token)
+        decoded = tokens.decode(token)
         if decoded.get("type") != "email_verify":
             return jsonify({"error": "Token inválido (no es de verificación)"}), 400
 
@@ -199,8 +182,7 @@ def verify_email():
             ev.token_hash = None
             db.session.commit()
 
-        access = _mk_access(user.id)
-        refresh = _mk_refresh(user.id)
+        access, refresh = tokens.issue_pair(user.id)
         return jsonify({
             "message": "Correo verificado correctamente",
             "access_token": access,
@@ -210,9 +192,9 @@ def verify_email():
             })()
         }), 200
 
-    except jwt.ExpiredSignatureError:
+    except tokens.TokenExpired:
         return jsonify({"error": "El token de verificación ha caducado"}), 400
-    except jwt.InvalidTokenError:
+    except tokens.TokenError:
         return jsonify({"error": "Token de verificación inválido"}), 400
 
 @bp.route('/resend-verification', methods=['POST', 'OPTIONS'])
@@ -227,6 +209,7 @@ def verify_email():
     methods=["POST", "OPTIONS"],
     allow_headers=["Content-Type", "Authorization"]
 )
+@rate_limit('resend_verification')
 def resend_verification():
     if request.method == "OPTIONS":
         return ("", 204)
@@ -258,33 +241,39 @@ def resend_verification():
     _send_verification_email(user.email, verify_url)
 
     return jsonify({"message": "Correo de verificación reenviado."}), 200
+def _find_login_user(ident):
+    # Si el identificador coincide con varias cuentas, prima el email,
+    # luego el username y por último el name.
+    priority = case(
+        (User.email == ident.lower(), 0),
+        (User.username == ident, 1),
+        else_=2,
+    )
+    return (User.query
+            .filter(or_(User.email == ident.lower(), User.username == ident, User.name == ident))
+            .order_by(priority, User.id)
+            .first())
+
 @bp.route('/login', methods=['POST'])
+@rate_limit('login')
 def login():
-    data = request.get_json()
-    secret = current_app.config.get("JWT_SECRET_KEY") or current_app.config.get("SECRET_KEY")
-    if not isinstance(secret, (str, bytes)) or not secret:
-        secret = "dev-secret-change-me"  
-    user_or_email = str(data.get('email'))
-    password = str(data.get('password'))
-    user = User.query.filter_by(email=user_or_email).first()
-    user2 = User.query.filter_by(name = user_or_email).first()
-    if not user or not user.check_password(password):
-        if not user2 or not user2.check_password(password):
-            return jsonify({"error": "Credenciales inválidas"}), 401
-        user = user2
+    data = request.get_json(silent=True) or {}
+    ident = str(data.get('email') or '').strip()
+    password = str(data.get('password') or '')
+
+    # Una sola consulta indexada (email, username o name) y como mucho una
+    # comprobación bcrypt, exista o no el usuario.
+    user = _find_login_user(ident) if ident else None
+    if not passwords.check_password(password, user.password_hash if user else None):
+        return jsonify({"error": "Credenciales inválidas"}), 401
+    if user.deleting_at:
+        return jsonify({"error": "Cuenta en proceso de borrado"}), 403
+
+    if passwords.needs_rehash(user.password_hash):
+        user.set_password(password)
+        db.session.commit()
     
-    token = jwt.encode(
-        {"user_id": user.id, "type": "access",
-        "exp": datetime.utcnow() + timedelta(hours=1)},
-        secret,
-        algorithm="HS256"
-    )
-    refresh_token = jwt.encode(
-        {"user_id": user.id, "type": "refresh",
-        "exp": datetime.utcnow() + timedelta(days=7)},
-        secret,
-        algorithm="HS256"
-    )
+    token, refresh_token = tokens.issue_pair(user.id)
 
     return jsonify({
         "message": "Inicio de sesión correcto",
@@ -301,29 +290,36 @@ def login():
 
 @bp.route('/refresh', methods=['POST'])
 def refresh():
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
     refresh_token = data.get('refresh_token')
 
     if not refresh_token:
         return jsonify({"error": "Token de refresco faltante"}), 401
 
+    # Rotación: el refresh usado deja de valer y se devuelve un par nuevo
     try:
-        decoded = jwt.decode(refresh_token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
-        if decoded.get("type") != "refresh":
-            return jsonify({"error": "Token no es de tipo refresh"}), 401
-        user_id = decoded.get("user_id")
+        access_token, new_refresh = tokens.rotate(refresh_token)
+    except tokens.TokenError as e:
+        return jsonify({"error": str(e)}), 401
 
-        new_access_token = jwt.encode({
-            "user_id": user_id,
-            "exp": datetime.utcnow() + timedelta(hours=1)
-        }, current_app.config['SECRET_KEY'], algorithm="HS256")
+    return jsonify({"access_token": access_token, "refresh_token": new_refresh}), 200
 
-        return jsonify({"access_token": new_access_token}), 200
+@bp.route('/logout', methods=['POST'])
+def logout():
+    """Revoca la sesión (familia de tokens) del refresh o del Bearer recibido."""
+    data = request.get_json(silent=True) or {}
+    token = data.get('refresh_token')
+    auth = request.headers.get("Authorization", "")
+    if not token and auth.startswith("Bearer "):
+        token = auth.split(" ", 1)[1].strip()
+    if not token:
+        return jsonify({"error": "Token faltante"}), 401
 
-    except jwt.ExpiredSignatureError:
-        return jsonify({"error": "El refresh token ha caducado"}), 401
-    except jwt.InvalidTokenError:
-        return jsonify({"error": "Token inválido"}), 401
+    try:
+        tokens.revoke(token)
+    except tokens.TokenError as e:
+        return jsonify({"error": str(e)}), 401
+    return jsonify({"message": "Sesión cerrada"}), 200
 
 def _get_current_user():
     """Obtiene el usuario a partir del Bearer access token."""
@@ -332,22 +328,16 @@ def _get_current_user():
         return None, ("Falta Authorization Bearer", 401)
     token = auth.split(" ", 1)[1].strip()
 
-    secret = current_app.config.get("JWT_SECRET_KEY") or current_app.config.get("SECRET_KEY")
-    if not isinstance(secret, (str, bytes)) or not secret:
-        secret = "dev-secret-change-me"
-
     try:
-        payload = jwt.decode(token, secret, algorithms=["HS256"])
-        if payload.get("type") != "access":
-            return None, ("Token inválido (no es access)", 401)
-        user = User.query.get(payload.get("user_id"))
-        if not user:
-            return None, ("Usuario no encontrado", 404)
-        return user, None
-    except jwt.ExpiredSignatureError:
-        return None, ("El token ha caducado", 401)
-    except jwt.InvalidTokenError:
-        return None, ("Token inválido", 401)
+        payload = tokens.decode(token, "access")
+    except tokens.TokenError as e:
+        return None, (str(e), 401)
+    user = User.query.get(payload.get("user_id"))
+    if not user:
+        return None, ("Usuario no encontrado", 404)
+    if user.deleting_at:
+        return None, ("Cuenta en proceso de borrado", 401)
+    return user, None
     
 @bp.route('/me', methods=['GET', 'PATCH'])
 def me():
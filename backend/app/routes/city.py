@@ -1,10 +1,11 @@
 # app/routes/city.py
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from sqlalchemy import func
 
 from app import db
 from app.models import City, Activity, UserActivity, User
-from app.utils.auth_utils import token_required
+from app.utils import clusters, follow_graph
+from app.utils.auth_utils import optional_user_id, token_required
 
 bp = Blueprint("city", __name__, url_prefix="/api/cities")
 
@@ -153,6 +154,33 @@ def get_city_progress(current_user, city_id):
     payload = calculate_user_city_progress(current_user.id, city_id)
     return jsonify(payload), 200
 
+@bp.get("/<int:city_id>/activities/clusters")
+def get_activity_clusters(city_id):
+    """
+    Actividades de la ciudad agrupadas para el mapa.
+    - zoom: 0..20 (obligatorio)
+    - bbox: minLng,minLat,maxLng,maxLat (opcional)
+    Con token, cada cluster lleva completed y completion_ratio del usuario.
+    """
+    try:
+        zoom = int(request.args["zoom"])
+        bbox = request.args.get("bbox")
+        bbox = tuple(float(x) for x in bbox.split(",")) if bbox else None
+    except KeyError:
+        return jsonify({"error": "Falta 'zoom'"}), 400
+    except ValueError:
+        return jsonify({"error": "'zoom' debe ser un entero y 'bbox' cuatro números"}), 400
+    if not 0 <= zoom <= clusters.MAX_ZOOM:
+        return jsonify({"error": f"'zoom' debe estar entre 0 y {clusters.MAX_ZOOM}"}), 400
+    if bbox is not None and (len(bbox) != 4 or bbox[0] > bbox[2] or bbox[1] > bbox[3]):
+        return jsonify({"error": "'bbox' debe ser minLng,minLat,maxLng,maxLat"}), 400
+
+    result = clusters.clusters(city_id, zoom, bbox, optional_user_id())
+    if result is None:
+        return jsonify({"error": "Ciudad no encontrada"}), 404
+    return jsonify({"city_id": city_id, "zoom": zoom, "clusters": result}), 200
+
+
 @bp.get("/<int:city_id>/friends-leaderboard")
 @token_required
 def friends_leaderboard(current_user, city_id):
@@ -164,12 +192,8 @@ def friends_leaderboard(current_user, city_id):
     # Asegura que la ciudad existe
     City.query.get_or_404(city_id)
 
-    # IDs de seguidores y seguidos
-    followers_ids = {u.id for u in current_user.followers}
-    following_ids = {u.id for u in current_user.following}
-
-    # Amigos mutuos = intersección
-    mutual_ids = followers_ids & following_ids
+    # Amigos mutuos = seguidores ∩ seguidos (grafo en memoria)
+    mutual_ids = set(follow_graph.mutuals(current_user.id))
 
     # Opcional: incluimos al propio usuario en el ranking
     mutual_ids.add(current_user.id)
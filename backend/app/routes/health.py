@@ -0,0 +1,35 @@
+# app/routes/health.py
+from flask import Blueprint, jsonify, current_app
+
+from .. import db
+from ..utils.auth_utils import moderator_required
+from ..utils.db_pool import pool_stats
+
+bp = Blueprint("health", __name__, url_prefix="/api/health")
+
+
+@bp.get("/")
+def health():
+    """Liveness: sólo el estado, sin detalles internos."""
+    return jsonify({"status": "ok"}), 200
+
+
+@moderator_required
+def _pool_metrics_protected(current_user):
+    return _pool_metrics()
+
+
+def _pool_metrics():
+    return jsonify({"db_pools": pool_stats(current_app._get_current_object(), db)}), 200
+
+
+@bp.get("/pools")
+def pool_metrics():
+    """
+    Métricas del pool de conexiones (checkouts, conexiones en uso, tiempo
+    de espera...). Sólo moderadores, salvo HEALTH_METRICS_PUBLIC (p. ej.
+    si el scraper de métricas está en la red interna).
+    """
+    if current_app.config.get("HEALTH_METRICS_PUBLIC"):
+        return _pool_metrics()
+    return _pool_metrics_protected()
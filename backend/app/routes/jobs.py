@@ -0,0 +1,43 @@
+# app/routes/jobs.py
+import os
+
+from flask import Blueprint, jsonify, send_file
+
+from app import db
+from app.models import Job
+from app.utils import export
+from app.utils.auth_utils import token_required
+
+bp = Blueprint("jobs", __name__, url_prefix="/api/jobs")
+
+
+def _own_job(current_user, job_id):
+    job = db.session.get(Job, job_id)
+    if not job or job.user_id != current_user.id:
+        return None
+    return job
+
+
+@bp.get("/<int:job_id>")
+@token_required
+def job_status(current_user, job_id):
+    """Estado y progreso de un job del usuario."""
+    job = _own_job(current_user, job_id)
+    if not job:
+        return jsonify({"error": "Job no encontrado"}), 404
+    return jsonify(job.to_dict()), 200
+
+
+@bp.get("/<int:job_id>/download")
+@token_required
+def job_download(current_user, job_id):
+    """Descarga el ZIP de una exportación terminada."""
+    job = _own_job(current_user, job_id)
+    if not job or job.kind != "export_user":
+        return jsonify({"error": "Job no encontrado"}), 404
+    if job.status != "done" or not job.result:
+        return jsonify({"error": "La exportación aún no está lista", "status": job.status}), 409
+    if export.is_expired(job) or not os.path.exists(job.result):
+        return jsonify({"error": "La exportación ha caducado; solicita otra"}), 410
+    return send_file(job.result, mimetype="application/zip", as_attachment=True,
+                     download_name=f"ubfitness-export-{job.id}.zip")
@@ -0,0 +1,165 @@
+# app/routes/moderation.py
+from flask import Blueprint, jsonify, request
+from sqlalchemy import and_, func, or_, select
+
+from app import db
+from app.models import Post, Report
+from app.models.report_model import REPORT_STATUSES
+from app.utils.auth_utils import moderator_required
+from app.utils.cursor import decode_cursor, encode_cursor
+
+bp = Blueprint("moderation", __name__, url_prefix="/api/moderation")
+
+MAX_QUEUE_LIMIT = 100
+MAX_BULK_IDS = 500
+
+# Los posts borrados esperan la purga (app/utils/deletion.py): su cola y sus
+# denuncias quedan fuera del alcance de los moderadores
+_LIVE_POSTS = select(Post.id).where(Post.deleted_at.is_(None))
+
+
+def _int_list(value, name):
+    if not isinstance(value, list) or not all(isinstance(x, int) for x in value):
+        raise ValueError(f"'{name}' debe ser una lista de enteros")
+    if len(value) > MAX_BULK_IDS:
+        raise ValueError(f"Máximo {MAX_BULK_IDS} ids en '{name}'")
+    return value
+
+
+@bp.get("/queue")
+@moderator_required
+def queue(current_user):
+    """
+    GET /api/moderation/queue?status=Pending&limit=20&cursor=...
+    Denuncias agregadas por post (nº total, nº por categoría, primera y
+    última denuncia), de la más antigua a la más reciente. Paginación por
+    cursor sobre (first_seen, post_id). Los posts borrados no salen.
+    """
+    status = request.args.get("status", "Pending")
+    if status not in REPORT_STATUSES:
+        return jsonify({"error": f"'status' debe ser uno de {', '.join(REPORT_STATUSES)}"}), 400
+    try:
+        limit = min(max(int(request.args.get("limit", 20)), 1), MAX_QUEUE_LIMIT)
+    except ValueError:
+        return jsonify({"error": "'limit' debe ser un entero"}), 400
+
+    first_seen = func.min(Report.created_at)
+    rows_q = (
+        db.session.query(
+            Report.post_id,
+            func.count(Report.id).label("report_count"),
+            first_seen.label("first_seen"),
+            func.max(Report.created_at).label("last_seen"),
+        )
+        .filter(Report.status == status, Report.post_id.in_(_LIVE_POSTS))
+        .group_by(Report.post_id)
+    )
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            after_seen, after_id = decode_cursor(cursor, size=2)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        rows_q = rows_q.having(or_(
+            first_seen > after_seen,
+            and_(first_seen == after_seen, Report.post_id > after_id),
+        ))
+    rows = rows_q.order_by(first_seen, Report.post_id).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    post_ids = [r.post_id for r in rows]
+
+    # Recuento por categoría y posts de la página: una consulta cada uno
+    categories = {pid: {} for pid in post_ids}
+    if post_ids:
+        for pid, category, n in (
+            db.session.query(Report.post_id, Report.category, func.count(Report.id))
+            .filter(Report.status == status, Report.post_id.in_(post_ids))
+            .group_by(Report.post_id, Report.category)
+        ):
+            categories[pid][category] = n
+    posts = {p.id: p for p in Post.query.filter(Post.id.in_(post_ids))} if post_ids else {}
+
+    items = []
+    for r in rows:
+        post = posts.get(r.post_id)
+        items.append({
+            "post_id": r.post_id,
+            "post": {
+                **post.to_dict(fields=("text", "topic", "image", "date", "user")),
+                "is_hidden": post.is_hidden,
+            } if post else None,
+            "report_count": r.report_count,
+            "categories": categories[r.post_id],
+            "first_seen": r.first_seen.isoformat() if r.first_seen else None,
+            "last_seen": r.last_seen.isoformat() if r.last_seen else None,
+        })
+
+    next_cursor = encode_cursor(rows[-1].first_seen, rows[-1].post_id) if has_more else None
+    return jsonify({"items": items, "next_cursor": next_cursor}), 200
+
+
+@bp.get("/posts/<int:post_id>/reports")
+@moderator_required
+def post_reports(current_user, post_id):
+    """Denuncias individuales de un post (con comentario), más recientes primero."""
+    reports = (Report.query
+               .filter(Report.post_id == post_id, Report.post_id.in_(_LIVE_POSTS))
+               .order_by(Report.created_at.desc(), Report.id.desc())
+               .all())
+    return jsonify([r.to_dict() for r in reports]), 200
+
+
+@bp.post("/reports/status")
+@moderator_required
+def bulk_status(current_user):
+    """
+    POST /api/moderation/reports/status
+    Body: {"status": "Resolved", "report_ids": [..]} o {"status": .., "post_ids": [..]}
+          "from_status" (opcional) limita el cambio a denuncias en ese estado.
+          "hide" (opcional, bool) oculta o muestra los posts afectados.
+    Cada cambio es un único UPDATE, sin cargar las filas. Las denuncias y
+    los posts borrados (pendientes de purga) no se tocan.
+    """
+    data = request.get_json(silent=True) or {}
+    status = data.get("status")
+    if status not in REPORT_STATUSES:
+        return jsonify({"error": f"'status' debe ser uno de {', '.join(REPORT_STATUSES)}"}), 400
+    from_status = data.get("from_status")
+    if from_status is not None and from_status not in REPORT_STATUSES:
+        return jsonify({"error": "'from_status' no es un estado válido"}), 400
+    hide = data.get("hide")
+    if hide is not None and not isinstance(hide, bool):
+        return jsonify({"error": "'hide' debe ser booleano"}), 400
+
+    try:
+        if "report_ids" in data:
+            ids = _int_list(data["report_ids"], "report_ids")
+            target = Report.id.in_(ids)
+            affected_posts = select(Report.post_id).where(Report.id.in_(ids))
+        elif "post_ids" in data:
+            ids = _int_list(data["post_ids"], "post_ids")
+            target = Report.post_id.in_(ids)
+            affected_posts = ids
+        else:
+            return jsonify({"error": "Falta 'report_ids' o 'post_ids'"}), 400
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    q = Report.query.filter(target, Report.post_id.in_(_LIVE_POSTS))
+    if from_status:
+        q = q.filter(Report.status == from_status)
+    updated = q.update({Report.status: status}, synchronize_session=False)
+
+    hidden = None
+    if hide is not None:
+        hidden = (Post.query
+                  .filter(Post.id.in_(affected_posts), Post.deleted_at.is_(None), Post.is_hidden != hide)
+                  .update({Post.is_hidden: hide}, synchronize_session=False))
+    db.session.commit()
+
+    payload = {"updated": updated, "status": status}
+    if hidden is not None:
+        payload["posts_updated"] = hidden
+    return jsonify(payload), 200
@@ -1,13 +1,77 @@
 from datetime import timezone
-from flask import Blueprint, jsonify, request, g, current_app
-import jwt
+from flask import Blueprint, jsonify, request, g
 from app.models import Repost, User, Post, Report, Bookmark, PostLike
 from app import db
-from app.utils.auth_utils import token_required
+from app.utils.auth_utils import optional_user_id, token_required
+from app.utils.post_serializer import FeedSerializer
+from app.utils import deletion, moderation, ranking, trending, write_paths
+from sqlalchemy import exists
+from sqlalchemy.orm import joinedload
 from sqlalchemy.exc import IntegrityError
 
 bp = Blueprint("posts", __name__, url_prefix="/api/posts")
 
+MAX_BATCH_ACTIONS = 100
+MAX_STATE_IDS = 100
+MAX_TRENDING_LIMIT = 50
+FEED_MODES = ("latest", "for_you")
+BATCH_ACTIONS = ("like", "unlike", "bookmark", "unbookmark", "repost")
+
+
+def _live_post(post_id):
+    """El post si existe y no está borrado (los borrados en diferido siguen en la tabla)."""
+    post = db.session.get(Post, post_id)
+    return post if post and post.deleted_at is None else None
+
+
+def _post_states(post_ids, user_id=None):
+    """
+    Estado de varios posts en una sola consulta:
+    {post_id: {likes, reposts, likedByMe, bookmarkedByMe, repostedByMe}}
+    """
+    if not post_ids:
+        return {}
+
+    columns = [Post.id, Post.like_count, Post.repost_count]
+    if user_id:
+        columns += [
+            exists().where(PostLike.post_id == Post.id, PostLike.user_id == user_id),
+            exists().where(Bookmark.post_id == Post.id, Bookmark.user_id == user_id),
+            exists().where(Repost.original_post_id == Post.id, Repost.user_id == user_id),
+        ]
+
+    states = {}
+    for row in db.session.query(*columns).filter(Post.id.in_(post_ids), Post.deleted_at.is_(None)):
+        liked, bookmarked, reposted = row[3:] if user_id else (False, False, False)
+        states[row[0]] = {
+            "likes": row[1] or 0,
+            "reposts": row[2] or 0,
+            "likedByMe": bool(liked),
+            "bookmarkedByMe": bool(bookmarked),
+            "repostedByMe": bool(reposted),
+        }
+    return states
+
+
+def _for_you_feed(serializer, user_id, page, limit):
+    """Feed ordenado por app/utils/ranking.py; sólo posts originales."""
+    ranked = ranking.rank_for_you(user_id)
+
+    start = (page - 1) * limit
+    page_ids = ranked[start:start + limit]
+    posts = {p.id: p for p in Post.query.options(joinedload(Post.author)).filter(Post.id.in_(page_ids))}
+    payload = {
+        "items": [serializer.original(posts[pid]) for pid in page_ids if pid in posts],
+        "page": page,
+        "limit": limit,
+        "has_more": start + limit < len(ranked),
+        "total": len(ranked),
+        "mode": "for_you",
+    }
+    if serializer.compact:
+        payload["includes"] = serializer.includes()
+    return jsonify(payload)
+
 
 # 🔹 1️⃣ Llistar posts
 @bp.get("/")
@@ -17,6 +81,7 @@ def list_posts():
     - Si viene Authorization: Bearer <token>, intenta decodificar y usar user_id
       para calcular likedByMe.
     - Si no viene o es inválido, responde igualmente con 200 y likedByMe=False.
+    - ?mode=for_you ordena por afinidad (temas, autores, recencia) en vez de por fecha.
     """
     page = int(request.args.get("page", 1))
     limit = int(request.args.get("limit", 10))
@@ -24,92 +89,92 @@ def list_posts():
         limit = 50
     if page < 1:
         page = 1
-    current_user_id = None
+    current_user_id = optional_user_id()
 
-    auth_header = request.headers.get("Authorization", "")
-    if auth_header.startswith("Bearer "):
-        token = auth_header.split(" ", 1)[1].strip()
-        try:
-            payload = jwt.decode(
-                token,
-                current_app.config["SECRET_KEY"],
-                algorithms=["HS256"],
-            )
-            current_user_id = payload.get("user_id")
-        except Exception as e:
-            current_app.logger.debug(f"Invalid token in /api/posts/: {e}")
-            # seguimos con current_user_id = None
-
-    original_items = Post.query.all()
+    try:
+        serializer = FeedSerializer.from_args(request.args, current_user_id=current_user_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    mode = request.args.get("mode", "latest")
+    if mode not in FEED_MODES:
+        return jsonify({"error": f"'mode' debe ser uno de {', '.join(FEED_MODES)}"}), 400
+    if mode == "for_you":
+        return _for_you_feed(serializer, current_user_id, page, limit)
+
+    # Los posts ocultos por moderación o borrados no salen en el feed
+    original_items = Post.query.filter(Post.visible()).all()
     
     # 2. Carregar Reposts
-    repost_items = Repost.query.all()
+    repost_items = (Repost.query
+                    .join(Post, Repost.original_post_id == Post.id)
+                    .filter(Post.visible())
+                    .all())
 
     all_items = []
 
 
     for post in original_items:
-        item_dict = post.to_dict(current_user_id=current_user_id)
-        item_dict['type'] = 'original'
-        item_dict['sort_date'] = post.created_at
-        all_items.append(item_dict)
+        all_items.append((post.created_at, post))
 
     for repost in repost_items:
-        original_post = repost.original_post
-        if original_post:
-            item_dict = repost.to_dict()
-            
-            item_dict['original_content'] = original_post.to_dict(current_user_id=current_user_id)
-            item_dict['type'] = 'repost'
-            item_dict['sort_date'] = repost.created_at
-            all_items.append(item_dict)
-
-    all_items.sort(key=lambda x: x['sort_date'], reverse=True)
-    final_payload = [{k: v for k, v in item.items() if k != 'sort_date'} for item in all_items]
-    
+        if repost.original_post:
+            all_items.append((repost.created_at, repost))
+
+    all_items.sort(key=lambda x: x[0], reverse=True)
+
     start = (page - 1) * limit
     end = start + limit
-    slice_payload = final_payload[start:end]
-    has_more = end < len(final_payload)
-
-    return jsonify({
+    # Sólo se serializa la página pedida
+    slice_payload = [
+        serializer.repost(obj) if isinstance(obj, Repost) else serializer.original(obj)
+        for _, obj in all_items[start:end]
+    ]
+    has_more = end < len(all_items)
+
+    payload = {
         "items": slice_payload,
         "page": page,
         "limit": limit,
         "has_more": has_more,
-        "total": len(final_payload),
-    })
+        "total": len(all_items),
+    }
+    if serializer.compact:
+        payload["includes"] = serializer.includes()
+    return jsonify(payload)
 
 
 # 🔹 2️⃣ Llistar posts d’un usuari concret
 @bp.get("/user/<int:user_id>")
 def posts_by_user(user_id):
 
-    original_posts = Post.query.filter_by(user_id=user_id).all()
+    try:
+        serializer = FeedSerializer.from_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    original_posts = Post.query.filter(Post.user_id == user_id, Post.visible()).all()
     
-    reposts_by_user = Repost.query.filter_by(user_id=user_id).all()
+    reposts_by_user = (Repost.query
+                       .join(Post, Repost.original_post_id == Post.id)
+                       .filter(Repost.user_id == user_id, Post.visible())
+                       .all())
 
     all_items = []
 
     for post in original_posts:
-        item_dict = post.to_dict()
-        item_dict['type'] = 'original'
-        item_dict['sort_date'] = post.created_at
-        all_items.append(item_dict)
+        all_items.append((post.created_at, serializer.original(post)))
 
     for repost in reposts_by_user:
-        original_post = repost.original_post
-        if original_post:
-            item_dict = repost.to_dict()
-            item_dict['original_content'] = original_post.to_dict()
-            item_dict['type'] = 'repost'
-            item_dict['sort_date'] = repost.created_at
-            all_items.append(item_dict)
-
-    all_items.sort(key=lambda x: x['sort_date'], reverse=True)
-    
-    final_payload = [{k: v for k, v in item.items() if k != 'sort_date'} for item in all_items]
+        if repost.original_post:
+            all_items.append((repost.created_at, serializer.repost(repost)))
+
+    all_items.sort(key=lambda x: x[0], reverse=True)
     
+    final_payload = [item for _, item in all_items]
+
+    if serializer.compact:
+        return jsonify({"items": final_payload, "includes": serializer.includes()})
     return jsonify(final_payload)
 
 # 🔹 3️⃣ Crear un nou post (💥 aquest és el que faltava)
@@ -137,14 +202,155 @@ def create_post(current_user):
     )
 
     db.session.add(post)
+    db.session.flush()
+    write_paths.bump_users(User.posts_count, [current_user.id], +1)
+    trending.record_post(post)
     db.session.commit()
     return jsonify(post.to_dict()), 201
 
 
+@bp.get("/trending")
+def trending_posts():
+    """
+    GET /api/posts/trending?topic=Running&window=48&limit=20
+    Posts con más actividad reciente (likes y reposts con decaimiento
+    temporal). `window` (horas) limita la antigüedad del post. Una sola
+    consulta sobre la tabla de tendencias (ver app/utils/trending.py).
+    """
+    try:
+        limit = min(max(int(request.args.get("limit", 20)), 1), MAX_TRENDING_LIMIT)
+        window = float(request.args["window"]) if request.args.get("window") else None
+    except ValueError:
+        return jsonify({"error": "'limit' y 'window' deben ser numéricos"}), 400
+    if window is not None and window <= 0:
+        return jsonify({"error": "'window' debe ser positivo"}), 400
+
+    try:
+        serializer = FeedSerializer.from_args(request.args, current_user_id=optional_user_id())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    rows = trending.trending_posts(request.args.get("topic") or None, window, limit)
+    items = []
+    for post, score in rows:
+        item = serializer.original(post)
+        item["trendingScore"] = round(score, 4)
+        items.append(item)
+
+    payload = {"items": items}
+    if serializer.compact:
+        payload["includes"] = serializer.includes()
+    return jsonify(payload), 200
+
+
+@bp.get("/trending/topics")
+def trending_topics():
+    """GET /api/posts/trending/topics?limit=10 — temas con más actividad reciente."""
+    try:
+        limit = min(max(int(request.args.get("limit", 10)), 1), MAX_TRENDING_LIMIT)
+    except ValueError:
+        return jsonify({"error": "'limit' debe ser un entero"}), 400
+    return jsonify([
+        {"topic": topic, "trendingScore": round(score, 4)}
+        for topic, score in trending.trending_topics(limit)
+    ]), 200
+
+
+@bp.get("/state")
+def posts_state():
+    """
+    GET /api/posts/state?ids=1,2,3
+    Devuelve likes/reposts y los flags likedByMe/bookmarkedByMe/repostedByMe
+    de varios posts a la vez (p.ej. al rehidratar un feed cacheado).
+    """
+    try:
+        ids = [int(x) for x in (request.args.get("ids") or "").split(",") if x.strip()]
+    except ValueError:
+        return jsonify({"error": "'ids' debe ser una lista de enteros separada por comas"}), 400
+    if not ids:
+        return jsonify({"error": "Falta el parámetro 'ids'"}), 400
+    if len(ids) > MAX_STATE_IDS:
+        return jsonify({"error": f"Máximo {MAX_STATE_IDS} ids por petición"}), 400
+
+    states = _post_states(set(ids), optional_user_id())
+    return jsonify({"states": {str(pid): st for pid, st in states.items()}}), 200
+
+
+@bp.post("/batch")
+@token_required
+def batch_actions(current_user):
+    """
+    POST /api/posts/batch
+    Body: {"actions": [{"action": "like", "post_id": 1}, ...]}
+    Acciones: like, unlike, bookmark, unbookmark, repost (con comment_text opcional).
+    Todo se aplica en una única transacción. Si un mismo post recibe acciones
+    contradictorias (like y unlike), gana la última.
+    """
+    data = request.get_json(silent=True) or {}
+    actions = data.get("actions")
+    if not isinstance(actions, list) or not actions:
+        return jsonify({"error": "'actions' debe ser una lista no vacía"}), 400
+    if len(actions) > MAX_BATCH_ACTIONS:
+        return jsonify({"error": f"Máximo {MAX_BATCH_ACTIONS} acciones por petición"}), 400
+
+    parsed = []
+    for i, a in enumerate(actions):
+        if not isinstance(a, dict) or a.get("action") not in BATCH_ACTIONS:
+            return jsonify({"error": f"Acción inválida en la posición {i}"}), 400
+        try:
+            post_id = int(a.get("post_id"))
+        except (TypeError, ValueError):
+            return jsonify({"error": f"'post_id' inválido en la posición {i}"}), 400
+        parsed.append((a["action"], post_id, (a.get("comment_text") or "").strip() or None))
+
+    post_ids = {pid for _, pid, _ in parsed}
+    owners = dict(
+        db.session.query(Post.id, Post.user_id)
+        .filter(Post.id.in_(post_ids), Post.deleted_at.is_(None)).all()
+    )
+
+    # Estado final deseado por post (la última acción gana)
+    like_target, bookmark_target, repost_comments = {}, {}, {}
+    results = []
+    for action, pid, comment in parsed:
+        if pid not in owners:
+            results.append({"action": action, "post_id": pid, "ok": False, "error": "Post not found"})
+            continue
+        if action in ("like", "unlike"):
+            like_target[pid] = action == "like"
+        elif action in ("bookmark", "unbookmark"):
+            bookmark_target[pid] = action == "bookmark"
+        else:
+            if owners[pid] == current_user.id:
+                results.append({"action": action, "post_id": pid, "ok": False,
+                                "error": "No pots fer Repost del teu propi post"})
+                continue
+            repost_comments[pid] = comment
+        results.append({"action": action, "post_id": pid, "ok": True})
+
+    uid = current_user.id
+    try:
+        write_paths.like_many(uid, [pid for pid, on in like_target.items() if on])
+        write_paths.unlike_many(uid, [pid for pid, on in like_target.items() if not on])
+        write_paths.bookmark_many(uid, [pid for pid, on in bookmark_target.items() if on])
+        write_paths.unbookmark_many(uid, [pid for pid, on in bookmark_target.items() if not on])
+        write_paths.repost_many(uid, repost_comments)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "Conflicte concurrent; torna-ho a provar"}), 409
+
+    states = _post_states(set(owners), uid)
+    return jsonify({
+        "results": results,
+        "states": {str(pid): st for pid, st in states.items()},
+    }), 200
+
+
 @bp.post("/<int:post_id>/repost")
 @token_required
 def repost_post(current_user, post_id):
-    original_post = Post.query.get(post_id)
+    original_post = _live_post(post_id)
     if not original_post:
         return jsonify({"error": "Post original no trobat"}), 404
 
@@ -153,33 +359,13 @@ def repost_post(current_user, post_id):
 
     data = request.get_json(silent=True) or {}
     comment_text = data.get("comment_text", "").strip() or None
-    
-    existing_repost = Repost.query.filter_by(
-        user_id=current_user.id,
-        original_post_id=post_id
-    ).first()
-    
-    if existing_repost:
-        return jsonify({"message": "Aquest post ja ha estat reposteat per tu", "reposted": True}), 200
 
-    try:
-        new_repost = Repost(
-            user_id=current_user.id,
-            original_post_id=post_id,
-            comment_text=comment_text
-        )
-        db.session.add(new_repost)
-        
-        original_post.repost_count = (original_post.repost_count or 0) + 1
-        
-        db.session.commit()
-        
-        
-        return jsonify({"message": "Repost creat amb èxit!", "repost_id": new_repost.id}), 201
+    repost_id = write_paths.repost(current_user.id, post_id, comment_text)
+    db.session.commit()
 
-    except IntegrityError:
-        db.session.rollback()
-        return jsonify({"error": "Error de base de dades. Ja has reposteat aquest post?"}), 500
+    if repost_id is None:
+        return jsonify({"message": "Aquest post ja ha estat reposteat per tu", "reposted": True}), 200
+    return jsonify({"message": "Repost creat amb èxit!", "repost_id": repost_id}), 201
 
 
 @bp.delete("/<int:post_id>/repost")
@@ -188,127 +374,76 @@ def delete_repost(current_user, post_id):
     """
     Elimina el Repost d'un post si existeix.
     """
-    original_post = Post.query.get(post_id)
+    original_post = _live_post(post_id)
     if not original_post:
         return jsonify({"error": "Post original no trobat"}), 404
 
-    repost_to_delete = Repost.query.filter_by(
-        user_id=current_user.id,
-        original_post_id=post_id
-    ).first()
+    removed = write_paths.unrepost(current_user.id, post_id)
+    db.session.commit()
 
-    if not repost_to_delete:
+    if not removed:
         return jsonify({"message": "No hi ha cap Repost teu per eliminar en aquest post"}), 200
-
-    db.session.delete(repost_to_delete)
-
-    if original_post.repost_count > 0:
-        original_post.repost_count -= 1
-        
-    db.session.commit()
-    
     return jsonify({"message": "Repost eliminat amb èxit!"}), 200
 
 @bp.post("/<int:post_id>/like")
 @token_required
 def like_post(current_user, post_id):
-    post = Post.query.get(post_id)
+    post = _live_post(post_id)
     if not post:
         return jsonify({"error": "Post not found"}), 404
 
-    existing = PostLike.query.filter_by(user_id=current_user.id, post_id=post_id).first()
-    if existing:
-        # ya estaba likeado → devolvemos estado consistente
-        likes = PostLike.query.filter_by(post_id=post_id).count()
-        return jsonify({"liked": True, "likes": likes}), 200
-
-    db.session.add(PostLike(user_id=current_user.id, post_id=post_id))
-    try:
-        db.session.commit()
-    except IntegrityError:
-        db.session.rollback()
-        # por si carrera de dos clicks rápidos
-        likes = PostLike.query.filter_by(post_id=post_id).count()
-        return jsonify({"liked": True, "likes": likes}), 200
-
-    likes = PostLike.query.filter_by(post_id=post_id).count()
+    # idempotente: si ya estaba likeado no cambia nada
+    _, likes = write_paths.like(current_user.id, post_id)
+    db.session.commit()
     return jsonify({"liked": True, "likes": likes}), 200
 
 
 @bp.delete("/<int:post_id>/like")
 @token_required
 def unlike_post(current_user, post_id):
-    post = Post.query.get(post_id)
+    post = _live_post(post_id)
     if not post:
         return jsonify({"error": "Post not found"}), 404
 
-    PostLike.query.filter_by(user_id=current_user.id, post_id=post_id).delete(synchronize_session=False)
+    _, likes = write_paths.unlike(current_user.id, post_id)
     db.session.commit()
-
-    likes = PostLike.query.filter_by(post_id=post_id).count()
     return jsonify({"liked": False, "likes": likes}), 200
 
 
 @bp.get("/me/likes")
 @token_required
 def get_my_liked_posts(current_user):
-    liked_posts = current_user.liked_posts.order_by(Post.created_at.desc()).all()
+    liked_posts = current_user.liked_posts.filter(Post.visible()).order_by(Post.created_at.desc()).all()
     return jsonify([p.to_dict(current_user_id=current_user.id) for p in liked_posts]), 200
 
 @bp.post("/<int:post_id>/bookmark")
 @token_required
 def bookmark_post(current_user, post_id):
-    post = Post.query.get(post_id)
+    post = _live_post(post_id)
     if not post:
         return jsonify({"error": "Post not found"}), 404
 
-    # 1) Check if it already exists
-    existing = Bookmark.query.filter_by(
-        user_id=current_user.id,
-        post_id=post_id
-    ).first()
-
-    if existing:
-        # Already bookmarked → no error, just confirm state
-        return jsonify({"bookmarked": True}), 200
-
-    # 2) Create new bookmark
-    bm = Bookmark(user_id=current_user.id, post_id=post_id)
-    db.session.add(bm)
-
-    try:
-        db.session.commit()
-    except IntegrityError:
-        db.session.rollback()
-        # In case of a race condition, just return "bookmarked"
-        return jsonify({"bookmarked": True}), 200
-
+    # Already bookmarked → no error, just confirm state
+    write_paths.bookmark(current_user.id, post_id)
+    db.session.commit()
     return jsonify({"bookmarked": True}), 200
 
 @bp.delete("/<int:post_id>/bookmark")
 @token_required
 def unbookmark_post(current_user, post_id):
-    post = Post.query.get(post_id)
+    post = _live_post(post_id)
     if not post:
         return jsonify({"error": "Post not found"}), 404
 
-    existing = Bookmark.query.filter_by(
-        user_id=current_user.id,
-        post_id=post_id
-    ).first()
-
-    if not existing:
-        # Nothing to delete, but that's fine
-        return jsonify({"bookmarked": False}), 200
-
-    db.session.delete(existing)
+    # Nothing to delete is fine too
+    write_paths.unbookmark(current_user.id, post_id)
     db.session.commit()
     return jsonify({"bookmarked": False}), 200
 
 
 @bp.route("/posts", methods=["GET"])
 def get_posts():
-    posts = Post.query.all()
+    posts = Post.query.filter(Post.visible()).all()
     data = []
     for post in posts:
         user = User.query.get(post.user_id)
@@ -325,28 +460,23 @@ def get_posts():
 @bp.delete("/<int:post_id>")
 @token_required
 def delete_post(current_user, post_id):
-    post = Post.query.get(post_id)
+    post = _live_post(post_id)
     if not post:
         return jsonify({"error": "Post no encontrado"}), 404
 
     if post.user_id != current_user.id:
         return jsonify({"error": "No tienes permiso para eliminar este post"}), 403
 
-    try:
-        # Reposts que apuntan a este post
-        Repost.query.filter_by(original_post_id=post_id).delete(synchronize_session=False)
-
-        # Guardados (bookmarks)
-        Bookmark.query.filter_by(post_id=post_id).delete(synchronize_session=False)
-
-        # Reports (si existen)
-        Report.query.filter_by(post_id=post_id).delete(synchronize_session=False)
-
-        # Likes (tabla asociación) -> vaciamos relación
-        for u in post.liked_by.all():
-            post.liked_by.remove(u)
+    # Posts muy populares: se ocultan ya y sus likes/reposts se purgan por lotes
+    if deletion.is_popular(post):
+        deletion.soft_delete_post(post)
+        db.session.commit()
+        deletion.schedule_purge(post_id)
+        return jsonify({"message": "Post eliminado correctamente", "pending_purge": True}), 202
 
-        db.session.delete(post)
+    try:
+        # Likes, guardados, denuncias y reposts caen por ON DELETE CASCADE
+        deletion.delete_post(post_id)
         db.session.commit()
         return jsonify({"message": "Post eliminado correctamente"}), 200
 
@@ -366,7 +496,7 @@ def report_post(current_user, post_id):
     """
     data = request.get_json(force=True) or {}
     
-    post = Post.query.get(post_id)
+    post = _live_post(post_id)
     if not post:
         return jsonify({"error": "Post no trobat"}), 404
         
@@ -392,6 +522,8 @@ def report_post(current_user, post_id):
     )
 
     db.session.add(report)
+    db.session.flush()
+    moderation.hide_if_over_threshold(post_id)
     db.session.commit()
     
 
@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
-import cloudinary.uploader
+
+from ..utils.providers import get_provider
 
 bp = Blueprint("upload", __name__, url_prefix="/api/upload")
 
@@ -12,7 +13,7 @@ def upload_image():
     file = request.files["image"]
 
     try:
-        upload_result = cloudinary.uploader.upload(file)
+        upload_result = get_provider("cloudinary").upload(file)
         image_url = upload_result.get("secure_url")
         return jsonify({
             "message": "Imatge pujada correctament",
@@ -1,12 +1,23 @@
+from datetime import date, datetime
+
 from flask import Blueprint, jsonify, request, abort, current_app
-import jwt
-from app.utils.auth_utils import token_required
+from sqlalchemy import and_, func, or_, select
+from app.utils.auth_utils import optional_user_id, token_required
+from app.utils import achievements, activity_stats, follow_graph, jobs, suggestions, tokens, write_paths
+from app.utils.cursor import decode_cursor, encode_cursor
 
-from ..models import User, Post, Repost
+from ..models import User, Post, Repost, UserTopic, follow
 from app.models import db
 
 bp = Blueprint("users", __name__, url_prefix="/api/users")
 
+MAX_SUGGESTIONS = 50
+DEFAULT_FOLLOW_PAGE = 50
+MAX_FOLLOW_PAGE = 100
+DEFAULT_STATS_BUCKETS = {"day": 30, "week": 12, "month": 12}
+MAX_STATS_BUCKETS = 366
+MAX_TOPIC_LENGTH = 50  # user_topic.topic es String(50)
+
 @bp.route("/")
 def get_users():
     users = User.query.all()
@@ -27,17 +38,22 @@ def add_preferences(user_id):
     if not user:
         return jsonify({"error": "Usuario no encontrado"}), 404
 
-    data = request.json
+    data = request.get_json(silent=True) or {}
     new_prefs = data.get("preferences", [])
 
     if not isinstance(new_prefs, list):
         return jsonify({"error": "Las preferencias deben ser una lista"}), 400
+    if not all(isinstance(t, str) and t.strip() and len(t) <= MAX_TOPIC_LENGTH for t in new_prefs):
+        return jsonify({"error": f"Cada preferencia debe ser un texto de 1 a {MAX_TOPIC_LENGTH} caracteres"}), 400
 
-    # Evita duplicados
-    current = set(user.preferences or [])
-    current.update(new_prefs)
-    user.preferences = list(current)
-
+    # Sólo se insertan los temas nuevos; los repetidos se ignoran en la BD
+    start = db.session.scalar(select(func.count()).where(UserTopic.user_id == user.id))
+    write_paths.insert_ignore(
+        UserTopic,
+        [{"user_id": user.id, "topic": t, "position": start + i}
+         for i, t in enumerate(dict.fromkeys(new_prefs))],
+        returning=(UserTopic.topic,),
+    )
     db.session.commit()
     return jsonify(user.to_dict()), 200
 
@@ -47,26 +63,20 @@ def get_profile(user_id):
     profile_data = user.to_profile_dict()
 
     # Check if current user is following
-    auth_header = request.headers.get("Authorization")
-    if auth_header and "Bearer " in auth_header:
-        try:
-            token = auth_header.split(" ")[1]
-            data = jwt.decode(token, current_app.config.get("JWT_SECRET_KEY") or current_app.config['SECRET_KEY'], algorithms=["HS256"])
-            current_user_id = data["user_id"]
-            current_user = User.query.get(current_user_id)
-            if current_user:
-                is_following = current_user.following.filter_by(id=user_id).first() is not None
-                profile_data["is_following"] = is_following
-        except:
-            pass
+    viewer_id = optional_user_id()
+    if viewer_id:
+        profile_data["is_following"] = follow_graph.is_following(viewer_id, user_id)
 
     return jsonify(profile_data)
 
 @bp.route("/<int:user_id>/posts")
 def get_user_posts(user_id):
 
-    original_posts = Post.query.filter_by(user_id=user_id).all()
-    reposts_by_user = Repost.query.filter_by(user_id=user_id).all()
+    original_posts = Post.query.filter(Post.user_id == user_id, Post.visible()).all()
+    reposts_by_user = (Repost.query
+                       .join(Post, Repost.original_post_id == Post.id)
+                       .filter(Repost.user_id == user_id, Post.visible())
+                       .all())
 
     all_items = []
 
@@ -117,17 +127,110 @@ def update_profile(user_id):
     db.session.commit()
     return jsonify(user.to_profile_dict())
 
+@bp.delete("/me")
+@token_required
+def delete_account(current_user):
+    """
+    Borra la cuenta del usuario autenticado. Pide la contraseña en el body.
+    El borrado se hace por lotes en un job; el progreso se consulta en
+    GET /api/jobs/<id>.
+    """
+    data = request.get_json(silent=True) or {}
+    password = data.get("password")
+    if not password:
+        return jsonify({"error": "Falta la contraseña"}), 400
+    if not current_user.check_password(password):
+        return jsonify({"error": "Contraseña incorrecta"}), 403
+
+    # Antes de encolar: mientras corren los lotes la cuenta no puede
+    # autenticarse ni crear likes/reposts/follows que el job ya no vería
+    current_user.deleting_at = datetime.utcnow()
+    db.session.commit()
+    tokens.revoke_user(current_user.id)
+
+    job = jobs.enqueue("delete_user", user_id=current_user.id)
+    return jsonify({"message": "Borrado de cuenta en curso", "job": job.to_dict()}), 202
+
+@bp.post("/me/export")
+@token_required
+def export_account(current_user):
+    """Encola la exportación de los datos del usuario (ZIP con NDJSON)."""
+    job = jobs.enqueue("export_user", user_id=current_user.id)
+    return jsonify({"job": job.to_dict()}), 202
+
+@bp.get("/suggestions")
+@token_required
+def follow_suggestions(current_user):
+    """
+    GET /api/users/suggestions?limit=10
+    A quién seguir: seguidos en común, comunidades y temas compartidos
+    (ver app/utils/suggestions.py).
+    """
+    try:
+        limit = min(max(int(request.args.get("limit", 10)), 1), MAX_SUGGESTIONS)
+    except ValueError:
+        return jsonify({"error": "'limit' debe ser un entero"}), 400
+    return jsonify([
+        {"id": u.id, "username": u.username, "name": u.name, "avatarUrl": u.avatar_url, **reasons}
+        for u, reasons in suggestions.suggest(current_user, limit)
+    ])
+
+def _follow_page(user_id, mine, theirs):
+    """
+    Una página de seguidores (mine=followed_id) o seguidos (mine=follower_id),
+    del follow más reciente al más antiguo. Paginación por cursor sobre
+    (follow.created_at, id del otro usuario); el cursor siguiente va en la
+    cabecera X-Next-Cursor para que la respuesta siga siendo una lista.
+    Si hay token, cada elemento lleva isFollowing (del grafo en memoria).
+    """
+    if not db.session.query(User.id).filter_by(id=user_id).first():
+        abort(404)
+    try:
+        limit = min(max(int(request.args.get("limit", DEFAULT_FOLLOW_PAGE)), 1), MAX_FOLLOW_PAGE)
+    except ValueError:
+        return jsonify({"error": "'limit' debe ser un entero"}), 400
+
+    q = (
+        db.session.query(User, follow.c.created_at)
+        .join(follow, theirs == User.id)
+        .filter(mine == user_id)
+    )
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            after_at, after_id = decode_cursor(cursor, size=2)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        q = q.filter(or_(
+            follow.c.created_at < after_at,
+            and_(follow.c.created_at == after_at, User.id < after_id),
+        ))
+    rows = q.order_by(follow.c.created_at.desc(), User.id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    items = [{"id": u.id, "username": u.username, "name": u.name, "avatarUrl": u.avatar_url} for u, _ in rows]
+    viewer_id = optional_user_id()
+    if viewer_id and items:
+        followed = follow_graph.following_of(viewer_id)
+        for item in items:
+            item["isFollowing"] = item["id"] in followed
+
+    response = jsonify(items)
+    if has_more:
+        last_user, last_at = rows[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last_at, last_user.id)
+    return response
+
 @bp.get("/<int:user_id>/followers")
 def followers(user_id):
-    user = User.query.get_or_404(user_id)
-    items = [{"id": u.id, "username": u.username, "name": u.name, "avatarUrl": u.avatar_url} for u in user.followers]
-    return jsonify(items)
+    """GET /api/users/<id>/followers?limit=50&cursor=..."""
+    return _follow_page(user_id, follow.c.followed_id, follow.c.follower_id)
 
 @bp.get("/<int:user_id>/following")
 def following(user_id):
-    user = User.query.get_or_404(user_id)
-    items = [{"id": u.id, "username": u.username, "name": u.name, "avatarUrl": u.avatar_url} for u in user.following]
-    return jsonify(items)
+    """GET /api/users/<id>/following?limit=50&cursor=..."""
+    return _follow_page(user_id, follow.c.follower_id, follow.c.followed_id)
 
 @bp.post("/<int:user_id>/follow")
 @token_required
@@ -136,9 +239,8 @@ def follow_user(current_user, user_id):
     if current_user.id == target.id:
         return jsonify({"error": "No puedes seguirte a ti mismo."}), 400
     
-    if not current_user.following.filter_by(id=target.id).first():
-        current_user.following.append(target)
-        db.session.commit()
+    write_paths.follow_user(current_user.id, target.id)
+    db.session.commit()
     return jsonify({"ok": True, "is_following": True})
 
 @bp.delete("/<int:user_id>/follow")
@@ -146,9 +248,8 @@ def follow_user(current_user, user_id):
 def unfollow_user(current_user, user_id):
     target = User.query.get_or_404(user_id)
     
-    if current_user.following.filter_by(id=target.id).first():
-        current_user.following.remove(target)
-        db.session.commit()
+    write_paths.unfollow_user(current_user.id, target.id)
+    db.session.commit()
     return jsonify({"ok": True, "is_following": False})
 
 @bp.get("/<int:user_id>/bookmarks")
@@ -161,8 +262,52 @@ def get_user_bookmarks(current_user, user_id):
     if current_user.id != user_id:
         return jsonify({"error": "No tienes permiso para ver estos guardados"}), 403
 
-    posts = current_user.bookmarked_posts.order_by(Post.created_at.desc()).all()
+    posts = current_user.bookmarked_posts.filter(Post.visible()).order_by(Post.created_at.desc()).all()
     return jsonify([
         p.to_dict(current_user_id=current_user.id)
         for p in posts
-    ]), 200
\ No newline at end of file
+    ]), 200
+
+@bp.get("/<int:user_id>/stats")
+def get_user_stats(user_id):
+    """
+    GET /api/users/<id>/stats?granularity=week&from=2026-01-01&to=2026-03-31
+    Totales de entrenamiento por periodo (day/week/month) y tipo, leídos de
+    activity_stat. Sin fechas: los últimos 30 días / 12 semanas / 12 meses.
+    """
+    granularity = request.args.get("granularity", "week")
+    if granularity not in activity_stats.GRANULARITIES:
+        return jsonify({"error": f"'granularity' debe ser uno de {', '.join(activity_stats.GRANULARITIES)}"}), 400
+    try:
+        end = date.fromisoformat(request.args["to"]) if request.args.get("to") else datetime.utcnow().date()
+        start = (
+            date.fromisoformat(request.args["from"]) if request.args.get("from")
+            else activity_stats.first_of_last(end, granularity, DEFAULT_STATS_BUCKETS[granularity])
+        )
+    except ValueError:
+        return jsonify({"error": "'from' y 'to' deben ser fechas YYYY-MM-DD"}), 400
+    if start > end:
+        return jsonify({"error": "'from' no puede ser posterior a 'to'"}), 400
+    if activity_stats.first_of_last(end, granularity, MAX_STATS_BUCKETS) > start:
+        return jsonify({"error": f"Máximo {MAX_STATS_BUCKETS} periodos por petición"}), 400
+    if not db.session.get(User, user_id):
+        return jsonify({"error": "Usuario no encontrado"}), 404
+
+    return jsonify({
+        "user_id": user_id,
+        "granularity": granularity,
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "buckets": activity_stats.user_stats(user_id, granularity, start, end),
+    }), 200
+
+
+@bp.get("/<int:user_id>/achievements")
+def get_user_achievements(user_id):
+    """
+    GET /api/users/<id>/achievements
+    Insignias ganadas, rachas y totales, leídos de user_achievement.
+    """
+    if not db.session.get(User, user_id):
+        return jsonify({"error": "Usuario no encontrado"}), 404
+    return jsonify({"user_id": user_id, **achievements.summary(user_id)}), 200
@@ -0,0 +1,247 @@
+# app/utils/achievements.py
+"""
+Rachas y logros.
+
+Por usuario se guarda en user_achievement el estado que necesitan las
+reglas (completaciones, km, rachas, dificultades hechas, ciudades
+completadas) y las insignias ganadas como máscara de bits sobre BADGES.
+
+- write_paths.record_completions llama a record() con cada lote recién
+  insertado: se lee la fila del usuario (FOR UPDATE), se aplican las
+  completaciones en orden de fecha y se reevalúan las reglas. Sólo se
+  consulta user_activity para las ciudades tocadas que aún no estaban
+  completadas (una consulta agrupada).
+- Las rachas avanzan con días consecutivos (UTC). Una completación con
+  fecha anterior al último día activo (sincronización atrasada) cuenta
+  para km, dificultades y ciudades, pero no mueve la racha; rebuild() la
+  recalcula exacta.
+- rebuild() aplica las mismas reglas a todo el historial en streaming:
+  backfill al migrar y corrección (job rebuild_achievements o
+  `flask rebuild-achievements`).
+
+Las insignias no se pierden nunca. BADGES sólo puede crecer por el final:
+la posición de cada una es su bit.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from .. import db
+from ..models import Activity, UserAchievement, UserActivity
+from . import write_paths
+from .jobs import checkpoint, job_handler
+
+DIFFICULTIES = ("easy", "medium", "hard")
+ALL_DIFFICULTIES = (1 << len(DIFFICULTIES)) - 1
+
+BADGES = (
+    ("first_activity", lambda s: s.completions >= 1),
+    ("streak_3", lambda s: s.longest_streak >= 3),
+    ("streak_7", lambda s: s.longest_streak >= 7),
+    ("streak_30", lambda s: s.longest_streak >= 30),
+    ("km_10", lambda s: s.total_km >= 10),
+    ("km_100", lambda s: s.total_km >= 100),
+    ("km_500", lambda s: s.total_km >= 500),
+    ("city_1", lambda s: len(s.cities) >= 1),
+    ("city_3", lambda s: len(s.cities) >= 3),
+    ("hard_1", lambda s: s.hard_count >= 1),
+    ("hard_10", lambda s: s.hard_count >= 10),
+    ("all_difficulties", lambda s: s.difficulties == ALL_DIFFICULTIES),
+)
+
+_STATE_COLUMNS = ("badges", "completions", "total_km", "hard_count", "difficulties",
+                  "current_streak", "longest_streak", "last_active_day", "cities")
+
+
+def new_state(user_id):
+    return UserAchievement(
+        user_id=user_id, badges=0, completions=0, total_km=0.0, hard_count=0, difficulties=0,
+        current_streak=0, longest_streak=0, last_active_day=None, cities=[],
+    )
+
+
+def decode(mask):
+    """Códigos de las insignias de la máscara, en el orden de BADGES."""
+    return [code for i, (code, _) in enumerate(BADGES) if mask >> i & 1]
+
+
+# --- reglas ------------------------------------------------------------------------
+
+def apply(state, day, distance_km, difficulty):
+    """Suma una completación del día `day` al estado."""
+    state.completions += 1
+    state.total_km += float(distance_km or 0)
+    if difficulty in DIFFICULTIES:
+        state.difficulties |= 1 << DIFFICULTIES.index(difficulty)
+    if difficulty == "hard":
+        state.hard_count += 1
+
+    last = state.last_active_day
+    if last is None or day > last + timedelta(days=1):
+        state.current_streak = 1
+    elif day == last + timedelta(days=1):
+        state.current_streak += 1
+    else:  # el mismo día, o atrasada
+        return
+    state.last_active_day = day
+    state.longest_streak = max(state.longest_streak, state.current_streak)
+
+
+def evaluate(state):
+    """Marca las insignias cuyas reglas se cumplen. Devuelve los códigos nuevos."""
+    earned = 0
+    for i, (_, rule) in enumerate(BADGES):
+        if rule(state):
+            earned |= 1 << i
+    new = earned & ~state.badges
+    state.badges |= earned
+    return decode(new)
+
+
+# --- registro incremental ------------------------------------------------------
+
+def _completed_cities(user_id, city_ids):
+    """De city_ids, las que tienen hechas todas sus actividades activas."""
+    if not city_ids:
+        return []
+    active = (Activity.city_id.in_(city_ids), Activity.is_active.is_(True))
+    totals = dict(db.session.execute(
+        select(Activity.city_id, func.count()).where(*active).group_by(Activity.city_id)
+    ).all())
+    done = dict(db.session.execute(
+        select(Activity.city_id, func.count(func.distinct(UserActivity.activity_id)))
+        .join(Activity, Activity.id == UserActivity.activity_id)
+        .where(UserActivity.user_id == user_id, *active)
+        .group_by(Activity.city_id)
+    ).all())
+    return sorted(c for c in city_ids if totals.get(c) and done.get(c, 0) >= totals[c])
+
+
+def _load_for_update(user_id):
+    # Crear la fila si falta sin leer antes: dos lotes a la vez no chocan
+    write_paths.insert_ignore(
+        UserAchievement.__table__,
+        [{"user_id": user_id, **{c: getattr(new_state(user_id), c) for c in _STATE_COLUMNS}}],
+        returning=(UserAchievement.user_id,),
+    )
+    return db.session.execute(
+        select(UserAchievement).where(UserAchievement.user_id == user_id)
+        .with_for_update().execution_options(populate_existing=True)
+    ).scalar_one()
+
+
+def record(user_id, completions, activities):
+    """
+    Aplica las completaciones recién insertadas (dicts de record_completions).
+    activities: {activity_id: fila con city_id, difficulty y distance_km}.
+    Devuelve los códigos de las insignias ganadas con este lote.
+    """
+    completions = [c for c in completions if c["activity_id"] in activities]
+    if not completions:
+        return []
+    state = _load_for_update(user_id)
+    for c in sorted(completions, key=lambda c: c["done_at"]):
+        act = activities[c["activity_id"]]
+        distance = c.get("distance_km") if c.get("distance_km") is not None else act.distance_km
+        apply(state, c["done_at"].date(), distance, act.difficulty)
+
+    touched = {activities[c["activity_id"]].city_id for c in completions} - set(state.cities)
+    completed = _completed_cities(user_id, touched)
+    if completed:
+        state.cities = sorted(set(state.cities) | set(completed))
+    return evaluate(state)
+
+
+# --- lectura -----------------------------------------------------------------------
+
+def summary(user_id, today=None):
+    """Insignias y rachas del usuario; la racha actual es 0 si ya se ha roto (días UTC)."""
+    today = today or datetime.utcnow().date()
+    state = db.session.get(UserAchievement, user_id) or new_state(user_id)
+    alive = state.last_active_day is not None and state.last_active_day >= today - timedelta(days=1)
+    return {
+        "badges": decode(state.badges),
+        "current_streak": state.current_streak if alive else 0,
+        "longest_streak": state.longest_streak,
+        "last_active_day": state.last_active_day.isoformat() if state.last_active_day else None,
+        "completions": state.completions,
+        "total_km": round(state.total_km, 2),
+        "cities_completed": len(state.cities),
+    }
+
+
+# --- reconstrucción ----------------------------------------------------------------
+
+def rebuild(user_ids=None, on_phase=None):
+    """
+    Recalcula user_achievement desde user_activity (de todos los usuarios o
+    de user_ids), recorriendo el historial en orden (usuario, fecha) en
+    streaming. Las insignias ya ganadas se conservan (OR con la máscara
+    anterior), aunque el historial ya no las justifique. Hace commit al
+    final. Devuelve el nº de usuarios.
+    """
+    earned = select(UserAchievement.user_id, UserAchievement.badges).where(UserAchievement.badges != 0)
+    if user_ids:
+        earned = earned.where(UserAchievement.user_id.in_(user_ids))
+    earned = dict(db.session.execute(earned).all())
+    city_totals = dict(db.session.execute(
+        select(Activity.city_id, func.count()).where(Activity.is_active.is_(True)).group_by(Activity.city_id)
+    ).all())
+    stmt = (
+        select(UserActivity.user_id, UserActivity.done_at, UserActivity.activity_id, Activity.city_id,
+               Activity.is_active, Activity.difficulty,
+               func.coalesce(UserActivity.distance_km, Activity.distance_km))
+        .join(Activity, Activity.id == UserActivity.activity_id)
+        .order_by(UserActivity.user_id, UserActivity.done_at, UserActivity.id)
+        .execution_options(yield_per=write_paths.REBUILD_YIELD_PER)
+    )
+    if user_ids:
+        stmt = stmt.where(UserActivity.user_id.in_(user_ids))
+
+    rows, state, per_city = [], None, {}
+
+    def finish(state):
+        state.badges = earned.pop(state.user_id, 0)
+        state.cities = sorted(c for c, done in per_city.items()
+                              if city_totals.get(c) and len(done) >= city_totals[c])
+        evaluate(state)
+        rows.append({"user_id": state.user_id, **{c: getattr(state, c) for c in _STATE_COLUMNS}})
+
+    for uid, done_at, activity_id, city_id, is_active, difficulty, distance in db.session.execute(stmt):
+        if state is None or state.user_id != uid:
+            if state is not None:
+                finish(state)
+            state, per_city = new_state(uid), {}
+        apply(state, done_at.date(), distance, difficulty)
+        if is_active:
+            per_city.setdefault(city_id, set()).add(activity_id)
+    if state is not None:
+        finish(state)
+    # Sin historial pero con insignias: la fila se queda con ellas
+    for uid in sorted(earned):
+        per_city = {}
+        finish(new_state(uid))
+    if on_phase:
+        on_phase("read", len(rows))
+
+    only = [UserAchievement.user_id.in_(user_ids)] if user_ids else []
+    write_paths.replace_rows(UserAchievement, rows, *only)
+    db.session.commit()
+    if on_phase:
+        on_phase("written", len(rows))
+    return len(rows)
+
+
+@job_handler("rebuild_achievements")
+def _rebuild_achievements_job(job):
+    def on_phase(phase, n):
+        checkpoint(job, phase=phase, users=n)
+
+    return str(rebuild(job.payload.get("user_ids"), on_phase))
+
+
+def init_achievements(app):
+    @app.cli.command("rebuild-achievements")
+    def rebuild_achievements_command():
+        """Recalcula rachas y logros desde el historial (backfill y corrección)."""
+        print(f"Usuarios evaluados: {rebuild()}")
@@ -0,0 +1,209 @@
+# app/utils/activity_stats.py
+"""
+Estadísticas de entrenamiento por usuario: totales por día, semana ISO y
+mes, y por tipo de actividad, en la tabla activity_stat.
+
+- Al registrar completaciones (write_paths.record_completions) el lote se
+  agrega en memoria y se suma con un único UPSERT, así que un lote de
+  wearable actualiza cada periodo una vez.
+- La distancia es la real del entrenamiento importado si la hay; si no, la
+  de la actividad.
+- GET /api/users/<id>/stats lee un rango de periodos por la PK, sin tocar
+  user_activity.
+- rebuild() recalcula desde user_activity (backfill y corrección), leyendo
+  en streaming y agregando cada partición por columnas; también como job
+  rebuild_activity_stats o `flask rebuild-activity-stats`.
+
+Las funciones de registro no hacen commit: lo decide la ruta.
+"""
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, select
+
+from .. import db
+from ..models import Activity, ActivityStat, UserActivity
+from . import write_paths
+from .jobs import checkpoint, job_handler
+
+GRANULARITIES = ("day", "week", "month")
+
+
+# --- periodos ------------------------------------------------------------------
+
+def bucket_start(day, granularity):
+    """Primer día del periodo que contiene `day`."""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(bucket, granularity):
+    if granularity == "week":
+        return bucket + timedelta(days=7)
+    if granularity == "month":
+        return date(bucket.year + bucket.month // 12, bucket.month % 12 + 1, 1)
+    return bucket + timedelta(days=1)
+
+
+def first_of_last(end, granularity, n):
+    """Inicio del periodo que, contando el de `end`, deja n periodos hasta end."""
+    if granularity == "month":
+        m = end.year * 12 + end.month - n
+        return date(m // 12, m % 12 + 1, 1)
+    step = 7 if granularity == "week" else 1
+    return bucket_start(end, granularity) - timedelta(days=step * (n - 1))
+
+
+def buckets(start, end, granularity):
+    """Periodos de start a end (ambos incluidos)."""
+    b = bucket_start(start, granularity)
+    while b <= end:
+        yield b
+        b = next_bucket(b, granularity)
+
+
+# --- agregación ------------------------------------------------------------------
+
+def aggregate(user_ids, done_ats, types, distances, durations, into=None):
+    """
+    Suma por (user_id, granularity, bucket, type) unas columnas de
+    completaciones. Devuelve {clave: [count, distance_km, duration_sec]}.
+    """
+    totals = {} if into is None else into
+    days = [d.date() for d in done_ats]
+    types = [t or "" for t in types]
+    distances = [float(x or 0) for x in distances]
+    durations = [int(x or 0) for x in durations]
+    for g in GRANULARITIES:
+        starts = [bucket_start(d, g) for d in days]
+        for uid, bucket, t, dist, dur in zip(user_ids, starts, types, distances, durations):
+            acc = totals.get((uid, g, bucket, t))
+            if acc is None:
+                totals[(uid, g, bucket, t)] = [1, dist, dur]
+            else:
+                acc[0] += 1
+                acc[1] += dist
+                acc[2] += dur
+    return totals
+
+
+def _rows(totals):
+    return [
+        {"user_id": uid, "granularity": g, "bucket": bucket, "type": t,
+         "count": n, "distance_km": dist, "duration_sec": dur}
+        for (uid, g, bucket, t), (n, dist, dur) in totals.items()
+    ]
+
+
+def _accumulate(rows):
+    """UPSERT que suma count/distance_km/duration_sec a lo que ya hubiera."""
+    write_paths.upsert_accumulate(
+        ActivityStat, rows, keys=("user_id", "granularity", "bucket", "type"),
+        combine=lambda new: {"count": ActivityStat.count + new.count,
+                             "distance_km": ActivityStat.distance_km + new.distance_km,
+                             "duration_sec": ActivityStat.duration_sec + new.duration_sec,
+                             "updated_at": datetime.utcnow()},
+    )
+
+
+def record(user_id, completions, activities):
+    """
+    Suma las completaciones recién insertadas (dicts de record_completions).
+    activities: {activity_id: fila con type y distance_km}.
+    """
+    completions = [c for c in completions if c["activity_id"] in activities]
+    if not completions:
+        return
+    totals = aggregate(
+        [user_id] * len(completions),
+        [c["done_at"] for c in completions],
+        [activities[c["activity_id"]].type for c in completions],
+        [c.get("distance_km") if c.get("distance_km") is not None else activities[c["activity_id"]].distance_km
+         for c in completions],
+        [c.get("duration_sec") for c in completions],
+    )
+    _accumulate(_rows(totals))
+
+
+# --- lectura -----------------------------------------------------------------------
+
+def _totals(count=0, distance_km=0.0, duration_sec=0):
+    return {"count": count, "distance_km": round(distance_km, 2), "duration_sec": duration_sec}
+
+
+def user_stats(user_id, granularity, start, end):
+    """
+    Un elemento por periodo de start a end (también los vacíos), con los
+    totales y el desglose por tipo. Una consulta por la PK.
+    """
+    rows = db.session.execute(
+        select(ActivityStat.bucket, ActivityStat.type, ActivityStat.count,
+               ActivityStat.distance_km, ActivityStat.duration_sec)
+        .where(ActivityStat.user_id == user_id,
+               ActivityStat.granularity == granularity,
+               ActivityStat.bucket.between(bucket_start(start, granularity), end))
+        .order_by(ActivityStat.bucket, ActivityStat.type)
+    ).all()
+    by_bucket = {}
+    for bucket, t, n, dist, dur in rows:
+        by_bucket.setdefault(bucket, []).append((t or None, n, dist, dur))
+
+    result = []
+    for bucket in buckets(start, end, granularity):
+        per_type = by_bucket.get(bucket, [])
+        result.append({
+            "bucket": bucket.isoformat(),
+            **_totals(sum(r[1] for r in per_type), sum(r[2] for r in per_type), sum(r[3] for r in per_type)),
+            "by_type": [{"type": t, **_totals(n, dist, dur)} for t, n, dist, dur in per_type],
+        })
+    return result
+
+
+# --- reconstrucción ----------------------------------------------------------------
+
+def rebuild(user_ids=None, on_phase=None):
+    """
+    Recalcula activity_stat desde user_activity (de todos los usuarios o de
+    user_ids), leyendo en streaming. Hace commit al final. Devuelve el nº
+    de completaciones agregadas.
+    """
+    stmt = (
+        select(UserActivity.user_id, UserActivity.done_at, Activity.type,
+               func.coalesce(UserActivity.distance_km, Activity.distance_km), UserActivity.duration_sec)
+        .join(Activity, Activity.id == UserActivity.activity_id)
+        .execution_options(yield_per=write_paths.REBUILD_YIELD_PER)
+    )
+    if user_ids:
+        stmt = stmt.where(UserActivity.user_id.in_(user_ids))
+
+    totals, n = {}, 0
+    for part in db.session.execute(stmt).partitions():
+        aggregate(*zip(*part), into=totals)
+        n += len(part)
+    if on_phase:
+        on_phase("read", n)
+
+    rows = _rows(totals)
+    only = [ActivityStat.user_id.in_(user_ids)] if user_ids else []
+    write_paths.replace_rows(ActivityStat, rows, *only)
+    db.session.commit()
+    if on_phase:
+        on_phase("written", len(rows))
+    return n
+
+
+@job_handler("rebuild_activity_stats")
+def _rebuild_activity_stats_job(job):
+    def on_phase(phase, n):
+        checkpoint(job, phase=phase, rows=n)
+
+    return str(rebuild(job.payload.get("user_ids"), on_phase))
+
+
+def init_activity_stats(app):
+    @app.cli.command("rebuild-activity-stats")
+    def rebuild_activity_stats_command():
+        """Recalcula las estadísticas de entrenamiento (backfill y corrección)."""
+        print(f"Completaciones agregadas: {rebuild()}")
@@ -1,7 +1,22 @@
 from functools import wraps
 from flask import request, jsonify, current_app
-import jwt
 from ..models.user_model import User
+from . import tokens
+
+
+def optional_user_id():
+    """
+    Devuelve el user_id del Bearer token si viene y es válido; si no, None.
+    """
+    auth_header = request.headers.get("Authorization", "")
+    if not auth_header.startswith("Bearer "):
+        return None
+    token = auth_header.split(" ", 1)[1].strip()
+    try:
+        return tokens.decode(token, "access").get("user_id")
+    except tokens.TokenError as e:
+        current_app.logger.debug(f"Invalid token in {request.path}: {e}")
+        return None
 
 
 def token_required(f):
@@ -13,16 +28,27 @@ def token_required(f):
         if not token:
             return jsonify({"error": "Token faltante"}), 401
         try:
-            data = jwt.decode(token, current_app.config.get("JWT_SECRET_KEY") or current_app.config['SECRET_KEY'],
-                              algorithms=["HS256"])
+            data = tokens.decode(token, "access")
             user_id = data["user_id"]
-        except jwt.ExpiredSignatureError:
+        except tokens.TokenExpired:
             return jsonify({"error": "Token expirado"}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({"error": "Token inválido"}), 401
+        except tokens.TokenError as e:
+            return jsonify({"error": str(e)}), 401
 
         user = User.query.get(user_id)
         if not user:
             return jsonify({"error": "Usuario no encontrado"}), 404
+        if user.deleting_at:
+            return jsonify({"error": "Cuenta en proceso de borrado"}), 401
         return f(user, *args, **kwargs)
-    return decorated
\ No newline at end of file
+    return decorated
+
+def moderator_required(f):
+    """Como token_required, pero sólo para usuarios con is_moderator."""
+    @token_required
+    @wraps(f)
+    def decorated(current_user, *args, **kwargs):
+        if not current_user.is_moderator:
+            return jsonify({"error": "Solo moderadores"}), 403
+        return f(current_user, *args, **kwargs)
+    return decorated
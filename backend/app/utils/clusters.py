@@ -0,0 +1,205 @@
+# app/utils/clusters.py
+"""
+Clusters del mapa de actividades de una ciudad
+(GET /api/cities/<id>/activities/clusters?bbox=&zoom=).
+
+Por ciudad se precalculan, con una sola consulta, los clusters de todos los
+niveles de zoom: una rejilla de celdas de CELL_PX píxeles (en grados,
+90 / 2^zoom) y, por celda, el centroide y los ids de sus actividades. El
+resultado se guarda en una LRU acotada a CITY_CLUSTERS_MAX_CITIES
+ciudades.
+
+Cualquier flush que cree, modifique o borre una Activity apunta su ciudad
+(la de antes y la de después) en session.info con queue_invalidation(); se
+olvida al confirmarse la transacción y un rollback descarta la cola. Los
+UPDATE masivos (query.update) no pasan por el flush: tras ellos hay que
+llamar a queue_invalidation() a mano. Cada worker tiene su copia, así que
+las entradas caducan además a los CITY_CLUSTERS_TTL segundos.
+
+Lo que depende de quién mira (cuántas ha completado) se calcula al vuelo
+cruzando los ids de cada cluster visible con las actividades completadas
+del usuario en esa ciudad (una consulta).
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from itertools import chain
+
+from flask import current_app
+from sqlalchemy import event, inspect, select
+
+from .. import db
+from ..models import Activity, City, UserActivity
+from .db_pool import RoutingSession
+
+CELL_PX = 64
+TILE_PX = 256
+MAX_ZOOM = 20
+# Por encima de este zoom las celdas (~40 m) ya no agrupan nada útil
+MAX_CLUSTER_ZOOM = 18
+DEFAULT_MAX_CITIES = 500
+DEFAULT_TTL = 300
+
+
+def cell_degrees(zoom):
+    return CELL_PX * 360.0 / (TILE_PX * 2 ** zoom)
+
+
+def build_levels(points):
+    """
+    points: [(id, lat, lng)]. Devuelve una lista por zoom (0..MAX_CLUSTER_ZOOM)
+    de clusters (lat, lng, ids), con lat/lng el centroide.
+    """
+    levels = []
+    for zoom in range(MAX_CLUSTER_ZOOM + 1):
+        size = cell_degrees(zoom)
+        cells = {}
+        for activity_id, lat, lng in points:
+            cell = cells.setdefault((math.floor(lat / size), math.floor(lng / size)), [0.0, 0.0, []])
+            cell[0] += lat
+            cell[1] += lng
+            cell[2].append(activity_id)
+        levels.append([
+            (sum_lat / len(ids), sum_lng / len(ids), tuple(ids))
+            for sum_lat, sum_lng, ids in cells.values()
+        ])
+    return levels
+
+
+class ClusterCache:
+    def __init__(self, max_cities=DEFAULT_MAX_CITIES, ttl=DEFAULT_TTL, clock=time.monotonic):
+        self.max_cities = max_cities
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()  # city_id -> (caduca, niveles)
+        self._lock = threading.Lock()
+
+    def _load(self, city_id):
+        if db.session.get(City, city_id) is None:
+            return None
+        rows = db.session.execute(
+            select(Activity.id, Activity.lat, Activity.lng).where(
+                Activity.city_id == city_id,
+                Activity.is_active.is_(True),
+                Activity.lat.is_not(None),
+                Activity.lng.is_not(None),
+            )
+        ).all()
+        return build_levels([(i, float(lat), float(lng)) for i, lat, lng in rows])
+
+    def levels(self, city_id):
+        """Clusters precalculados de la ciudad, o None si no existe."""
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(city_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(city_id)
+                return entry[1]
+        levels = self._load(city_id)
+        if levels is None:
+            return None
+        with self._lock:
+            self._entries[city_id] = (now + self.ttl, levels)
+            self._entries.move_to_end(city_id)
+            while len(self._entries) > self.max_cities:
+                self._entries.popitem(last=False)
+        return levels
+
+    def invalidate(self, city_id):
+        with self._lock:
+            self._entries.pop(city_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def cache():
+    return current_app.extensions["city_clusters"]
+
+
+def invalidate(city_id):
+    cache().invalidate(city_id)
+
+
+def queue_invalidation(*city_ids, session=None):
+    """Apunta para el próximo commit las ciudades cuyos clusters cambian."""
+    session = session if session is not None else db.session
+    session.info.setdefault("city_clusters", set()).update(
+        city_id for city_id in city_ids if city_id is not None
+    )
+
+
+def _before_flush(session, flush_context, instances):
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(obj, Activity):
+            continue
+        queue_invalidation(obj.city_id, session=session)
+        history = inspect(obj).attrs.city_id.history
+        if obj in session.dirty and history.added:
+            # Si cambia de ciudad, también la de antes; si no estaba cargada
+            # (objeto expirado por un commit) se lee de la BD, aún sin este flush
+            previous = history.deleted or [session.scalar(
+                select(Activity.city_id).where(Activity.id == obj.id)
+            )]
+            queue_invalidation(*previous, session=session)
+
+
+def _after_commit(session):
+    city_ids = session.info.pop("city_clusters", None)
+    for city_id in city_ids or ():
+        invalidate(city_id)
+
+
+def _after_rollback(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop("city_clusters", None)
+
+
+def completed_ids(user_id, city_id):
+    return set(db.session.scalars(
+        select(UserActivity.activity_id)
+        .join(Activity, UserActivity.activity_id == Activity.id)
+        .where(UserActivity.user_id == user_id, Activity.city_id == city_id)
+        .distinct()
+    ))
+
+
+def clusters(city_id, zoom, bbox=None, user_id=None):
+    """
+    Clusters visibles de la ciudad a ese zoom, o None si la ciudad no existe.
+    bbox = (min_lng, min_lat, max_lng, max_lat) filtra por centroide.
+    """
+    levels = cache().levels(city_id)
+    if levels is None:
+        return None
+    level = levels[min(zoom, MAX_CLUSTER_ZOOM)]
+    if bbox:
+        min_lng, min_lat, max_lng, max_lat = bbox
+        level = [c for c in level if min_lat <= c[0] <= max_lat and min_lng <= c[1] <= max_lng]
+    done = completed_ids(user_id, city_id) if user_id and level else None
+
+    result = []
+    for lat, lng, ids in level:
+        item = {"lat": round(lat, 6), "lng": round(lng, 6), "count": len(ids)}
+        if len(ids) == 1:
+            item["activity_id"] = ids[0]
+        if done is not None:
+            completed = sum(1 for i in ids if i in done)
+            item["completed"] = completed
+            item["completion_ratio"] = round(completed / len(ids), 4)
+        result.append(item)
+    result.sort(key=lambda c: (-c["count"], c["lat"], c["lng"]))
+    return result
+
+
+def init_clusters(app):
+    app.extensions["city_clusters"] = ClusterCache(
+        max_cities=app.config.get("CITY_CLUSTERS_MAX_CITIES", DEFAULT_MAX_CITIES),
+        ttl=app.config.get("CITY_CLUSTERS_TTL", DEFAULT_TTL),
+    )
+    if not event.contains(RoutingSession, "after_commit", _after_commit):
+        event.listen(RoutingSession, "before_flush", _before_flush)
+        event.listen(RoutingSession, "after_commit", _after_commit)
+        event.listen(RoutingSession, "after_soft_rollback", _after_rollback)
@@ -0,0 +1,151 @@
+# app/utils/compression.py
+"""
+Compresión de respuestas negociada por Accept-Encoding.
+
+Siempre hay gzip (stdlib); brotli y zstd se usan sólo si sus paquetes
+están instalados. Se saltan cuerpos pequeños, tipos no comprimibles y
+respuestas que ya traen Content-Encoding. Las respuestas en streaming
+se comprimen trozo a trozo sin cargarlas enteras en memoria.
+"""
+import gzip
+import zlib
+
+from flask import current_app, request
+
+try:  # opcional
+    import brotli
+except ImportError:  # pragma: no cover - depende del entorno
+    brotli = None
+
+try:  # opcional
+    import zstandard
+except ImportError:  # pragma: no cover - depende del entorno
+    zstandard = None
+
+
+DEFAULTS = {
+    "COMPRESS_ENABLED": True,
+    "COMPRESS_LEVEL": 6,          # gzip 1-9
+    "COMPRESS_BR_LEVEL": 4,       # brotli 0-11
+    "COMPRESS_ZSTD_LEVEL": 3,     # zstd 1-22
+    "COMPRESS_MIN_SIZE": 500,     # bytes
+    "COMPRESS_ALGORITHMS": ("br", "zstd", "gzip"),
+    "COMPRESS_MIMETYPES": (
+        "application/json",
+        "text/html",
+        "text/plain",
+        "text/css",
+        "text/javascript",
+        "application/javascript",
+    ),
+}
+
+
+def available_algorithms():
+    algos = ["gzip"]
+    if brotli is not None:
+        algos.append("br")
+    if zstandard is not None:
+        algos.append("zstd")
+    return algos
+
+
+def choose_encoding(accept_encodings, preferred):
+    """
+    Escoge la codificación con mayor q aceptada por el cliente.
+    En caso de empate gana el orden de `preferred`.
+    """
+    available = set(available_algorithms())
+    best, best_q = None, 0
+    for algo in preferred:
+        if algo not in available:
+            continue
+        q = accept_encodings.quality(algo)
+        if q > best_q:
+            best, best_q = algo, q
+    return best
+
+
+def _compress(algo, data, config):
+    if algo == "br":
+        return brotli.compress(data, quality=config["COMPRESS_BR_LEVEL"])
+    if algo == "zstd":
+        return zstandard.ZstdCompressor(level=config["COMPRESS_ZSTD_LEVEL"]).compress(data)
+    return gzip.compress(data, compresslevel=config["COMPRESS_LEVEL"], mtime=0)
+
+
+def _stream_compressor(algo, config):
+    """Devuelve (compress(chunk), finish()) para comprimir por trozos."""
+    if algo == "br":
+        c = brotli.Compressor(quality=config["COMPRESS_BR_LEVEL"])
+        return c.process, c.finish
+    if algo == "zstd":
+        c = zstandard.ZstdCompressor(level=config["COMPRESS_ZSTD_LEVEL"]).compressobj()
+        return c.compress, c.flush
+    c = zlib.compressobj(config["COMPRESS_LEVEL"], zlib.DEFLATED, 31)  # 31 = cabecera gzip
+    return c.compress, c.flush
+
+
+def _compress_stream(chunks, algo, config):
+    compress, finish = _stream_compressor(algo, config)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            out = compress(chunk)
+            if out:
+                yield out
+        tail = finish()
+        if tail:
+            yield tail
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def _add_vary(response):
+    vary = response.headers.get("Vary", "")
+    if "accept-encoding" not in vary.lower():
+        response.headers["Vary"] = f"{vary}, Accept-Encoding" if vary else "Accept-Encoding"
+
+
+def compress_response(response):
+    config = _config()
+    if not config["COMPRESS_ENABLED"]:
+        return response
+    if request.method == "HEAD" or response.direct_passthrough:
+        return response
+    if response.status_code < 200 or response.status_code in (204, 304):
+        return response
+    if "Content-Encoding" in response.headers:
+        return response
+    if response.mimetype not in config["COMPRESS_MIMETYPES"]:
+        return response
+
+    _add_vary(response)
+    algo = choose_encoding(request.accept_encodings, config["COMPRESS_ALGORITHMS"])
+    if not algo:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, algo, config)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < config["COMPRESS_MIN_SIZE"]:
+            return response
+        response.set_data(_compress(algo, data, config))
+
+    response.headers["Content-Encoding"] = algo
+    return response
+
+
+def _config():
+    return {key: current_app.config.get(key, default) for key, default in DEFAULTS.items()}
+
+
+def init_compression(app):
+    for key, default in DEFAULTS.items():
+        app.config.setdefault(key, default)
+    app.after_request(compress_response)
@@ -0,0 +1,42 @@
+# app/utils/cursor.py
+"""
+Cursores opacos para paginación por clave (keyset).
+
+Un cursor codifica los valores de ordenación de la última fila devuelta;
+la siguiente página filtra con (col1, col2) > cursor en lugar de OFFSET,
+así que el coste no crece con la profundidad de la página.
+"""
+import base64
+import json
+from datetime import datetime
+
+_DT_TAG = "$dt"
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return {_DT_TAG: value.isoformat()}
+    raise TypeError(f"No serializable en cursor: {type(value).__name__}")
+
+
+def _hook(obj):
+    if _DT_TAG in obj:
+        return datetime.fromisoformat(obj[_DT_TAG])
+    return obj
+
+
+def encode_cursor(*values):
+    raw = json.dumps(list(values), default=_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, size=None):
+    """Devuelve la lista de valores; ValueError si el cursor no es válido."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")), object_hook=_hook)
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError("Cursor inválido")
+    if not isinstance(values, list) or (size is not None and len(values) != size):
+        raise ValueError("Cursor inválido")
+    return values
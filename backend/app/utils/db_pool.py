@@ -0,0 +1,229 @@
+# app/utils/db_pool.py
+"""
+Pool de conexiones: opciones desde el entorno, métricas y réplica de lectura.
+
+Variables de entorno (todas opcionales):
+- DB_POOL_SIZE / DB_MAX_OVERFLOW / DB_POOL_TIMEOUT
+- DB_POOL_PRE_PING (1/0), DB_POOL_RECYCLE (segundos)
+- DB_STATEMENT_TIMEOUT_MS (sólo PostgreSQL)
+- DB_MAX_CONNECTIONS: presupuesto total de conexiones del servicio; se
+  reparte entre los workers de gunicorn (WEB_CONCURRENCY / GUNICORN_WORKERS)
+  y sus hilos (GUNICORN_THREADS) si no se fija DB_POOL_SIZE.
+- DATABASE_REPLICA_URL + DB_REPLICA_BLUEPRINTS: los GET de esos blueprints
+  leen de la réplica.
+"""
+import os
+import threading
+import time
+
+import sqlalchemy as sa
+from flask import current_app, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy.pool import QueuePool
+
+REPLICA_BIND = "replica"
+
+
+def _env_int(env, key, default=None):
+    value = env.get(key)
+    return int(value) if value not in (None, "") else default
+
+
+def _is_sqlite(url):
+    return (url or "").startswith("sqlite")
+
+
+def per_worker_pool_size(env=os.environ):
+    """
+    (pool_size, max_overflow) de un worker.
+
+    Cada hilo de un worker usa como mucho una conexión a la vez, así que el
+    pool base es el nº de hilos; el overflow reparte lo que quede del
+    presupuesto DB_MAX_CONNECTIONS entre los workers.
+    """
+    threads = max(_env_int(env, "GUNICORN_THREADS", 1), 1)
+    workers = max(_env_int(env, "GUNICORN_WORKERS") or _env_int(env, "WEB_CONCURRENCY", 1), 1)
+    pool_size = _env_int(env, "DB_POOL_SIZE", threads)
+
+    budget = _env_int(env, "DB_MAX_CONNECTIONS")
+    if budget is None:
+        max_overflow = _env_int(env, "DB_MAX_OVERFLOW", 5)
+    else:
+        per_worker = max(budget // workers, 1)
+        pool_size = min(pool_size, per_worker)
+        max_overflow = _env_int(env, "DB_MAX_OVERFLOW", per_worker - pool_size)
+    return pool_size, max(max_overflow, 0)
+
+
+def engine_options_from_env(url, env=os.environ):
+    """Construye SQLALCHEMY_ENGINE_OPTIONS para `url`."""
+    options = {
+        "pool_pre_ping": env.get("DB_POOL_PRE_PING", "1") == "1",
+    }
+    if _is_sqlite(url):
+        # SQLite usa pools propios (Static/SingletonThread); no admiten tamaño
+        return options
+
+    pool_size, max_overflow = per_worker_pool_size(env)
+    options.update(
+        poolclass=TimedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=_env_int(env, "DB_POOL_TIMEOUT", 30),
+        pool_recycle=_env_int(env, "DB_POOL_RECYCLE", 1800),
+    )
+    timeout_ms = _env_int(env, "DB_STATEMENT_TIMEOUT_MS")
+    if timeout_ms and (url or "").startswith("postgres"):
+        options["connect_args"] = {"options": f"-c statement_timeout={timeout_ms}"}
+    return options
+
+
+def replica_bind_from_env(env=os.environ):
+    """SQLALCHEMY_BINDS con la réplica, o {} si no hay DATABASE_REPLICA_URL."""
+    url = env.get("DATABASE_REPLICA_URL")
+    if not url:
+        return {}
+    return {REPLICA_BIND: {"url": url, **engine_options_from_env(url, env)}}
+
+
+def replica_blueprints_from_env(env=os.environ):
+    raw = env.get("DB_REPLICA_BLUEPRINTS", "search,communities,events")
+    return tuple(b.strip() for b in raw.split(",") if b.strip())
+
+
+# --- Métricas ----------------------------------------------------------------
+
+class TimedQueuePool(QueuePool):
+    """QueuePool que mide cuánto se espera para obtener una conexión."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wait_lock = threading.Lock()
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            with self._wait_lock:
+                self.wait_count += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.in_use = 0
+        self.max_in_use = 0
+
+    def attach(self, engine):
+        sa.event.listen(engine, "connect", self._on_connect)
+        sa.event.listen(engine, "checkout", self._on_checkout)
+        sa.event.listen(engine, "checkin", self._on_checkin)
+        sa.event.listen(engine, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, *_):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, *_):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+
+    def _on_checkin(self, *_):
+        with self._lock:
+            self.checkins += 1
+            self.in_use = max(self.in_use - 1, 0)
+
+    def _on_invalidate(self, *_):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self, engine):
+        pool = engine.pool
+        data = {
+            "pool": type(pool).__name__,
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "invalidations": self.invalidations,
+            "in_use": self.in_use,
+            "max_in_use": self.max_in_use,
+        }
+        if isinstance(pool, QueuePool):
+            data.update(size=pool.size(), overflow=pool.overflow(), checked_out=pool.checkedout())
+        if isinstance(pool, TimedQueuePool):
+            data.update(
+                wait_count=pool.wait_count,
+                wait_ms_total=round(pool.wait_total * 1000, 3),
+                wait_ms_max=round(pool.wait_max * 1000, 3),
+            )
+        return data
+
+
+def pool_stats(app, db):
+    metrics = app.extensions.get("db_pool_metrics", {})
+    with app.app_context():
+        return {
+            (key or "default"): metrics[key].snapshot(engine)
+            for key, engine in db.engines.items()
+            if key in metrics
+        }
+
+
+# --- Réplica de lectura ------------------------------------------------------
+
+class RoutingSession(Session):
+    """
+    Envía a la réplica las lecturas de peticiones GET/HEAD de los blueprints
+    listados en DB_REPLICA_BLUEPRINTS. El resto (y cualquier flush) va al
+    primario.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and self._use_replica(mapper, clause):
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_replica(self, mapper, clause):
+        if not has_request_context() or request.method not in ("GET", "HEAD"):
+            return False
+        if request.blueprint not in current_app.config.get("DB_REPLICA_BLUEPRINTS", ()):
+            return False
+        if isinstance(clause, sa.sql.dml.UpdateBase):
+            return False
+        if REPLICA_BIND not in self._db.engines:
+            return False
+        # Sólo modelos del bind por defecto
+        table = sa.inspect(mapper).local_table if mapper is not None else None
+        return table is None or table.metadata.info.get("bind_key") is None
+
+
+def _sqlite_foreign_keys(dbapi_conn, _record):
+    # SQLite ignora las FK (y sus ON DELETE CASCADE) si no se activan por conexión
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def init_db_pool(app, db):
+    app.config.setdefault("DB_REPLICA_BLUEPRINTS", ())
+    metrics = {}
+    with app.app_context():
+        for key, engine in db.engines.items():
+            metrics[key] = PoolMetrics()
+            metrics[key].attach(engine)
+            if engine.dialect.name == "sqlite" and not sa.event.contains(engine, "connect", _sqlite_foreign_keys):
+                sa.event.listen(engine, "connect", _sqlite_foreign_keys)
+    app.extensions["db_pool_metrics"] = metrics
@@ -0,0 +1,269 @@
+# app/utils/deletion.py
+"""
+Borrado de posts y cuentas por conjuntos.
+
+Las FK hacia post y user llevan ON DELETE CASCADE, así que borrar la fila
+padre arrastra likes, guardados, denuncias, reposts, follows... en la
+propia BD, sin cargar nada en memoria.
+
+Un post muy popular puede tener cientos de miles de likes; borrarlo de
+golpe mantiene bloqueadas muchas filas. Esos posts se marcan como borrados
+(deleted_at; Post.visible() los deja fuera de los feeds al momento) y se
+purgan después en lotes pequeños, en un job (app/utils/jobs.py).
+
+Ninguna función hace commit salvo las de purga, que confirman cada lote.
+"""
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import delete, func, select, update
+
+from .. import db
+from ..models import Bookmark, Post, PostLike, Report, Repost, User, UserActivity, follow
+from ..models.comunity_model import community_admins, community_members
+from ..models.event_model import event_participants
+from . import follow_graph, write_paths
+from .jobs import checkpoint, enqueue, job_handler
+
+DEFAULT_SOFT_DELETE_THRESHOLD = 1000
+DEFAULT_PURGE_BATCH = 1000
+
+# (FK hacia post, columna que identifica la fila dentro del post)
+_POST_CHILDREN = (
+    (PostLike.post_id, PostLike.user_id),
+    (Bookmark.post_id, Bookmark.user_id),
+    (Report.post_id, Report.id),
+    (Repost.original_post_id, Repost.id),
+)
+
+
+def is_popular(post):
+    threshold = current_app.config.get("POST_SOFT_DELETE_THRESHOLD", DEFAULT_SOFT_DELETE_THRESHOLD)
+    return (post.like_count or 0) + (post.repost_count or 0) >= threshold
+
+
+def _uncount_post(post_id):
+    """Descuenta el post de posts_count del autor, salvo si ya se descontó al marcarlo borrado."""
+    owner = select(Post.user_id).where(Post.id == post_id, Post.deleted_at.is_(None)).scalar_subquery()
+    db.session.execute(
+        update(User).where(User.id == owner)
+        .values(posts_count=func.coalesce(User.posts_count, 1) - 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def delete_post(post_id):
+    """
+    Un único DELETE (más el contador del autor y el vector de temas de
+    quienes le dieron like); la BD borra en cascada el resto.
+    """
+    _uncount_post(post_id)
+    write_paths.drop_liked_topic(post_id)
+    return db.session.execute(
+        delete(Post).where(Post.id == post_id).execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def soft_delete_post(post):
+    _uncount_post(post.id)
+    post.deleted_at = datetime.utcnow()
+
+
+def _batch_size(batch_size=None):
+    return batch_size or current_app.config.get("POST_PURGE_BATCH", DEFAULT_PURGE_BATCH)
+
+
+def delete_in_batches(fk, key, value, batch_size, on_batch=None, before_delete=None):
+    """
+    DELETE ... WHERE fk = value en lotes de batch_size filas (identificadas
+    por `key`), con commit tras cada lote para no retener bloqueos.
+    before_delete(keys), si se pasa, recibe las claves de cada lote antes
+    de borrarlo.
+    """
+    removed = 0
+    while True:
+        batch = select(key).where(fk == value).limit(batch_size)
+        if before_delete is not None:
+            batch = db.session.scalars(batch).all()
+            before_delete(batch)
+        n = db.session.execute(
+            delete(fk.table).where(fk == value, key.in_(batch))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        removed += n
+        if on_batch:
+            on_batch(n)
+        db.session.commit()
+        if n < batch_size:
+            return removed
+
+
+def purge_post(post_id, batch_size=None):
+    """Borra los hijos del post en lotes (commit por lote) y después el post."""
+    batch_size = _batch_size(batch_size)
+
+    def drop_likers(user_ids):
+        write_paths.drop_liked_topic(post_id, user_ids)
+
+    removed = sum(
+        delete_in_batches(fk, key, post_id, batch_size,
+                          before_delete=drop_likers if fk is PostLike.post_id else None)
+        for fk, key in _POST_CHILDREN
+    )
+    delete_post(post_id)
+    db.session.commit()
+    return removed
+
+
+def purge_deleted_posts(batch_size=None):
+    """Purga todos los posts marcados como borrados. Devuelve cuántos."""
+    ids = db.session.scalars(select(Post.id).where(Post.deleted_at.isnot(None))).all()
+    for post_id in ids:
+        purge_post(post_id, batch_size)
+    return len(ids)
+
+
+@job_handler("purge_post")
+def _purge_post_job(job):
+    removed = purge_post(job.payload["post_id"])
+    checkpoint(job, removed=removed)
+
+
+def schedule_purge(post_id):
+    """Encola la purga; si el proceso muere a medias, `flask run-jobs` la retoma."""
+    return enqueue("purge_post", payload={"post_id": post_id})
+
+
+def delete_user(user_id):
+    """
+    Borra la cuenta. Antes descuenta sus likes, reposts y follows de los
+    contadores de posts y usuarios ajenos (un UPDATE por contador); el resto
+    lo hace la cascada. Las entradas del grafo de follows del usuario y de
+    sus seguidores y seguidos se olvidan al confirmarse.
+    """
+    followed = select(follow.c.followed_id).where(follow.c.follower_id == user_id)
+    followers = select(follow.c.follower_id).where(follow.c.followed_id == user_id)
+    follow_graph.queue_invalidation(
+        following=[user_id, *db.session.scalars(followers)],
+        followers=[user_id, *db.session.scalars(followed)],
+    )
+    db.session.execute(
+        update(User).where(User.id.in_(followed))
+        .values(followers_count=func.coalesce(User.followers_count, 1) - 1)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        update(User).where(User.id.in_(followers))
+        .values(following_count=func.coalesce(User.following_count, 1) - 1)
+        .execution_options(synchronize_session=False)
+    )
+    liked = select(PostLike.post_id).where(PostLike.user_id == user_id)
+    reposted = select(Repost.original_post_id).where(Repost.user_id == user_id)
+    db.session.execute(
+        update(Post).where(Post.id.in_(liked), Post.user_id != user_id)
+        .values(like_count=Post.like_count - 1)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        update(Post).where(Post.id.in_(reposted), Post.user_id != user_id)
+        .values(repost_count=func.coalesce(Post.repost_count, 1) - 1)
+        .execution_options(synchronize_session=False)
+    )
+    return db.session.execute(
+        delete(User).where(User.id == user_id).execution_options(synchronize_session=False)
+    ).rowcount
+
+
+# Filas del usuario que ajustan un contador ajeno:
+# (nombre, FK al usuario, fila ajena, contador en esa fila)
+_COUNTED_ROWS = (
+    ("likes", PostLike.user_id, PostLike.post_id, Post.like_count),
+    ("reposts", Repost.user_id, Repost.original_post_id, Post.repost_count),
+    ("followers", follow.c.followed_id, follow.c.follower_id, User.following_count),
+    ("following", follow.c.follower_id, follow.c.followed_id, User.followers_count),
+)
+
+# Filas del usuario sin contadores asociados: (nombre, FK al usuario, clave)
+_USER_ROWS = (
+    ("bookmarks", Bookmark.user_id, Bookmark.post_id),
+    ("reports", Report.reporting_user_id, Report.id),
+    ("activities", UserActivity.user_id, UserActivity.id),
+    ("communities", community_members.c.user_id, community_members.c.community_id),
+    ("community_admins", community_admins.c.user_id, community_admins.c.community_id),
+    ("events", event_participants.c.user_id, event_participants.c.event_id),
+)
+
+
+def _undo_in_batches(user_fk, other_col, counter, user_id, batch_size, on_batch, before_delete=None):
+    """
+    Borra por lotes las filas del usuario (likes, reposts, follows)
+    descontando el contador de la fila ajena (post o usuario).
+    before_delete(other_ids), si se pasa, recibe los ids ajenos de cada lote.
+    """
+    model = counter.class_
+    while True:
+        other_ids = db.session.scalars(
+            select(other_col).where(user_fk == user_id).limit(batch_size)
+        ).all()
+        if not other_ids:
+            return
+        if before_delete is not None:
+            before_delete(other_ids)
+        db.session.execute(
+            update(model).where(model.id.in_(other_ids))
+            .values({counter: func.coalesce(counter, 1) - 1})
+            .execution_options(synchronize_session=False)
+        )
+        db.session.execute(
+            delete(user_fk.table).where(user_fk == user_id, other_col.in_(other_ids))
+            .execution_options(synchronize_session=False)
+        )
+        on_batch(len(other_ids))
+        db.session.commit()
+
+
+@job_handler("delete_user")
+def _delete_user_job(job):
+    """
+    Borra la cuenta por lotes (commit por lote) antes del DELETE final, para
+    que ninguna sentencia bloquee muchas filas. Cada lote deja un punto de
+    control; si el job se retoma, los pasos ya hechos no encuentran filas.
+    """
+    user_id = job.user_id
+    batch_size = _batch_size(job.payload.get("batch_size"))
+    deleted = dict((job.progress or {}).get("deleted") or {})
+
+    def counter(step):
+        def on_batch(n):
+            deleted[step] = deleted.get(step, 0) + n
+            checkpoint(job, step=step, deleted=dict(deleted))
+        return on_batch
+
+    # Cada lote de follows cambia el grafo de los usuarios del otro extremo
+    forget = {
+        "followers": lambda ids: follow_graph.queue_invalidation(following=ids, followers=[user_id]),
+        "following": lambda ids: follow_graph.queue_invalidation(following=[user_id], followers=ids),
+    }
+    for step, fk, other, col in _COUNTED_ROWS:
+        _undo_in_batches(fk, other, col, user_id, batch_size, counter(step), forget.get(step))
+    for step, fk, key in _USER_ROWS:
+        delete_in_batches(fk, key, user_id, batch_size, counter(step))
+
+    on_post = counter("posts")
+    while True:
+        post_ids = db.session.scalars(select(Post.id).where(Post.user_id == user_id).limit(batch_size)).all()
+        if not post_ids:
+            break
+        for post_id in post_ids:
+            purge_post(post_id, batch_size)
+        on_post(len(post_ids))
+
+    delete_user(user_id)
+    checkpoint(job, step="done", deleted=deleted)
+
+
+def init_deletion(app):
+    @app.cli.command("purge-deleted-posts")
+    def purge_deleted_posts_command():
+        """Purga los posts marcados como borrados (p.ej. desde un cron)."""
+        print(f"Posts purgados: {purge_deleted_posts()}")
@@ -0,0 +1,150 @@
+# app/utils/export.py
+"""
+Exportación de los datos de un usuario a un ZIP con un NDJSON por sección.
+
+Cada sección se lee con yield_per (cursor de servidor en PostgreSQL) y se
+escribe fila a fila a un fichero parcial, así que la memoria no depende del
+volumen del usuario. Al acabar cada sección se guarda un punto de control;
+si el job se retoma, las secciones ya escritas no se repiten. Al final los
+parciales se empaquetan en el ZIP (copiado por bloques) y se borran.
+
+Los ZIP caducan a las EXPORT_TTL_HOURS: purge_expired_exports() los borra
+(al empezar cada exportación y con `flask purge-exports` desde un cron) y
+la descarga de uno caducado responde 410.
+"""
+import json
+import os
+import shutil
+import time
+import zipfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from flask import current_app
+from sqlalchemy import select
+
+from .. import db
+from ..models import Bookmark, Post, PostLike, Report, Repost, User, UserActivity, UserTopic, follow
+from ..models.comunity_model import community_members
+from ..models.event_model import event_participants
+from .jobs import checkpoint, job_handler
+
+DEFAULT_YIELD_PER = 500
+DEFAULT_TTL_HOURS = 24
+
+
+def _sections(user_id):
+    """(nombre, SELECT) en el orden en que se exportan."""
+    return (
+        ("profile", select(User.id, User.username, User.name, User.email, User.bio,
+                           User.avatar_url, User.created_at)
+         .where(User.id == user_id)),
+        ("topics", select(UserTopic.topic, UserTopic.created_at)
+         .where(UserTopic.user_id == user_id).order_by(UserTopic.position)),
+        ("posts", select(Post.id, Post.topic, Post.text, Post.image_url, Post.created_at,
+                         Post.like_count, Post.repost_count)
+         .where(Post.user_id == user_id).order_by(Post.id)),
+        ("likes", select(PostLike.post_id, PostLike.created_at)
+         .where(PostLike.user_id == user_id).order_by(PostLike.post_id)),
+        ("bookmarks", select(Bookmark.post_id, Bookmark.created_at)
+         .where(Bookmark.user_id == user_id).order_by(Bookmark.post_id)),
+        ("reposts", select(Repost.id, Repost.original_post_id, Repost.comment_text, Repost.created_at)
+         .where(Repost.user_id == user_id).order_by(Repost.id)),
+        ("reports", select(Report.id, Report.post_id, Report.category, Report.comment,
+                           Report.status, Report.created_at)
+         .where(Report.reporting_user_id == user_id).order_by(Report.id)),
+        ("activities", select(UserActivity.id, UserActivity.activity_id, UserActivity.done_at,
+                              UserActivity.duration_sec, UserActivity.distance_km,
+                              UserActivity.elevation_gain_m, UserActivity.notes)
+         .where(UserActivity.user_id == user_id).order_by(UserActivity.id)),
+        ("followers", select(follow.c.follower_id.label("user_id"), follow.c.created_at)
+         .where(follow.c.followed_id == user_id).order_by(follow.c.follower_id)),
+        ("following", select(follow.c.followed_id.label("user_id"), follow.c.created_at)
+         .where(follow.c.follower_id == user_id).order_by(follow.c.followed_id)),
+        ("communities", select(community_members.c.community_id)
+         .where(community_members.c.user_id == user_id).order_by(community_members.c.community_id)),
+        ("events", select(event_participants.c.event_id)
+         .where(event_participants.c.user_id == user_id).order_by(event_participants.c.event_id)),
+    )
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"No serializable: {type(value).__name__}")
+
+
+def export_dir():
+    path = current_app.config.get("EXPORT_DIR") or os.path.join(current_app.instance_path, "exports")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def write_section(stmt, path, yield_per=DEFAULT_YIELD_PER):
+    """Vuelca el SELECT a NDJSON sin materializar el resultado. Devuelve nº de filas."""
+    rows = 0
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        result = db.session.execute(stmt.execution_options(yield_per=yield_per))
+        for row in result.mappings():
+            f.write(json.dumps(dict(row), default=_json_default, ensure_ascii=False))
+            f.write("\n")
+            rows += 1
+    os.replace(tmp, path)
+    return rows
+
+
+def archive_path(job_id):
+    return os.path.join(export_dir(), f"export_{job_id}.zip")
+
+
+def is_expired(job, now=None):
+    ttl = timedelta(hours=current_app.config.get("EXPORT_TTL_HOURS", DEFAULT_TTL_HOURS))
+    return job.finished_at is not None and job.finished_at + ttl <= (now or datetime.utcnow())
+
+
+def purge_expired_exports():
+    """Borra los ZIP con más de EXPORT_TTL_HOURS. Devuelve cuántos."""
+    cutoff = time.time() - current_app.config.get("EXPORT_TTL_HOURS", DEFAULT_TTL_HOURS) * 3600
+    removed = 0
+    for entry in os.scandir(export_dir()):
+        # Los parciales (job_<id>/) son de jobs aún por retomar: no se tocan
+        if entry.is_file() and entry.name.startswith("export_") and entry.stat().st_mtime < cutoff:
+            os.remove(entry.path)
+            removed += 1
+    return removed
+
+
+@job_handler("export_user")
+def _export_user_job(job):
+    purge_expired_exports()
+    yield_per = current_app.config.get("EXPORT_YIELD_PER", DEFAULT_YIELD_PER)
+    work_dir = os.path.join(export_dir(), f"job_{job.id}")
+    os.makedirs(work_dir, exist_ok=True)
+
+    done = list((job.progress or {}).get("sections_done") or [])
+    counts = dict((job.progress or {}).get("rows") or {})
+    for name, stmt in _sections(job.user_id):
+        if name in done:
+            continue
+        counts[name] = write_section(stmt, os.path.join(work_dir, f"{name}.ndjson"), yield_per)
+        done.append(name)
+        checkpoint(job, sections_done=list(done), rows=dict(counts))
+
+    archive = archive_path(job.id)
+    with zipfile.ZipFile(archive + ".tmp", "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, _ in _sections(job.user_id):
+            zf.write(os.path.join(work_dir, f"{name}.ndjson"), arcname=f"{name}.ndjson")
+    os.replace(archive + ".tmp", archive)
+    shutil.rmtree(work_dir, ignore_errors=True)
+    checkpoint(job, archive_bytes=os.path.getsize(archive))
+    return archive
+
+
+def init_export(app):
+    @app.cli.command("purge-exports")
+    def purge_exports_command():
+        """Borra las exportaciones caducadas (p.ej. desde un cron)."""
+        print(f"Exportaciones borradas: {purge_expired_exports()}")
@@ -0,0 +1,141 @@
+# app/utils/follow_graph.py
+"""
+Grafo de follows en memoria para comprobar relaciones sin ir a la BD.
+
+Por usuario se guardan dos conjuntos inmutables (a quién sigue y quién le
+sigue) en una LRU acotada a FOLLOW_GRAPH_MAX_USERS usuarios. Un fallo de
+caché carga el conjunto con una sola consulta sobre la PK / el índice de
+follow; después is_following es O(1) y mutuals una intersección.
+
+Las escrituras (write_paths en cada follow/unfollow, deletion al borrar una
+cuenta) apuntan las entradas afectadas en session.info con
+queue_invalidation(); se olvidan al confirmarse la transacción, para que
+ninguna lectura concurrente vuelva a cargar el estado anterior al commit.
+Un rollback descarta la cola. Cada worker de gunicorn tiene su propia caché, así que las entradas caducan
+además a los FOLLOW_GRAPH_TTL segundos: un cambio hecho en otro proceso se
+ve, como mucho, con ese retraso.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from sqlalchemy import event, select
+
+from .. import db
+from ..models import follow
+from .db_pool import RoutingSession
+
+DEFAULT_MAX_USERS = 10000
+DEFAULT_TTL = 60
+
+_FOLLOWING, _FOLLOWERS = "following", "followers"
+
+
+class FollowGraph:
+    def __init__(self, max_users=DEFAULT_MAX_USERS, ttl=DEFAULT_TTL, clock=time.monotonic):
+        self.max_users = max_users
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()  # (dirección, user_id) -> (caduca, frozenset)
+        self._lock = threading.Lock()
+
+    def _load(self, direction, user_id):
+        if direction == _FOLLOWING:
+            stmt = select(follow.c.followed_id).where(follow.c.follower_id == user_id)
+        else:
+            stmt = select(follow.c.follower_id).where(follow.c.followed_id == user_id)
+        return frozenset(db.session.scalars(stmt))
+
+    def _get(self, direction, user_id):
+        key = (direction, user_id)
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                return entry[1]
+        ids = self._load(direction, user_id)
+        with self._lock:
+            self._entries[key] = (now + self.ttl, ids)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_users * 2:
+                self._entries.popitem(last=False)
+        return ids
+
+    def following(self, user_id):
+        return self._get(_FOLLOWING, user_id)
+
+    def followers(self, user_id):
+        return self._get(_FOLLOWERS, user_id)
+
+    def is_following(self, follower_id, followed_id):
+        return followed_id in self.following(follower_id)
+
+    def mutuals(self, user_id):
+        return self.following(user_id) & self.followers(user_id)
+
+    def invalidate(self, follower_id, followed_id):
+        """Olvida lo que cambia al seguir/dejar de seguir."""
+        self.discard([(_FOLLOWING, follower_id), (_FOLLOWERS, followed_id)])
+
+    def discard(self, keys):
+        """Olvida las entradas (dirección, user_id) dadas."""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def graph():
+    return current_app.extensions["follow_graph"]
+
+
+def is_following(follower_id, followed_id):
+    return graph().is_following(follower_id, followed_id)
+
+
+def following_of(user_id):
+    return graph().following(user_id)
+
+
+def followers_of(user_id):
+    return graph().followers(user_id)
+
+
+def mutuals(user_id):
+    return graph().mutuals(user_id)
+
+
+def queue_invalidation(following=(), followers=()):
+    """
+    Apunta para el próximo commit los usuarios cuyo conjunto de seguidos
+    (following) o de seguidores (followers) cambia en esta transacción.
+    """
+    keys = db.session.info.setdefault("follow_graph", set())
+    keys.update((_FOLLOWING, user_id) for user_id in following)
+    keys.update((_FOLLOWERS, user_id) for user_id in followers)
+
+
+def _after_commit(session):
+    keys = session.info.pop("follow_graph", None)
+    if keys:
+        graph().discard(keys)
+
+
+def _after_rollback(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop("follow_graph", None)
+
+
+def init_follow_graph(app):
+    app.extensions["follow_graph"] = FollowGraph(
+        max_users=app.config.get("FOLLOW_GRAPH_MAX_USERS", DEFAULT_MAX_USERS),
+        ttl=app.config.get("FOLLOW_GRAPH_TTL", DEFAULT_TTL),
+    )
+    if not event.contains(RoutingSession, "after_commit", _after_commit):
+        event.listen(RoutingSession, "after_commit", _after_commit)
+        event.listen(RoutingSession, "after_soft_rollback", _after_rollback)
@@ -0,0 +1,90 @@
+# app/utils/geo.py
+"""
+Actividades cercanas a un punto (GET /api/activities/nearby), en cualquier
+ciudad.
+
+1. Celdas: prefijos geohash que cubren la caja del círculo (como mucho 4),
+   cada uno un rango sobre ix_activity_geohash.
+2. Caja: lat/lng entre los límites de la caja, en la misma consulta, para
+   descartar lo que cae en la celda pero lejos del círculo.
+3. Haversine por columnas en Python sobre lo que queda; sólo se cargan como
+   objetos las actividades que están dentro del radio.
+
+Los candidatos se piden de más cercano a más lejano (distancia plana en
+grados, con la longitud escalada por cos(lat)) antes del LIMIT
+MAX_CANDIDATES: en una zona muy densa se quedan fuera los más lejanos, no
+unos cualesquiera.
+"""
+import math
+
+from sqlalchemy import and_, case, or_, select
+
+from .. import db
+from ..models import Activity
+from . import geohash
+
+MAX_RADIUS_KM = 50.0
+MAX_CANDIDATES = 5000
+
+
+def _lng_filter(lng_min, lng_max):
+    """Rango de longitud; si la caja cruza el antimeridiano, son dos."""
+    if lng_max - lng_min >= 360:
+        return None
+    if lng_min < -180:
+        return or_(Activity.lng >= lng_min + 360, Activity.lng <= lng_max)
+    if lng_max > 180:
+        return or_(Activity.lng >= lng_min, Activity.lng <= lng_max - 360)
+    return Activity.lng.between(lng_min, lng_max)
+
+
+def _distance_proxy(lat, lng):
+    """Distancia plana al cuadrado (grados), creciente con la real dentro del radio."""
+    dlng = Activity.lng - lng
+    # Al otro lado del antimeridiano la diferencia se da la vuelta
+    dlng = case((dlng > 180, dlng - 360), (dlng < -180, dlng + 360), else_=dlng)
+    dlng = dlng * math.cos(math.radians(lat))
+    dlat = Activity.lat - lat
+    return dlat * dlat + dlng * dlng
+
+
+def candidates(lat, lng, radius_km, type_=None):
+    """
+    (id, lat, lng) de las actividades activas dentro de la caja del círculo;
+    como mucho MAX_CANDIDATES, las más cercanas.
+    """
+    box = geohash.bounding_box(lat, lng, radius_km)
+    lat_min, lat_max, lng_min, lng_max = box
+    q = (
+        select(Activity.id, Activity.lat, Activity.lng)
+        .where(Activity.is_active.is_(True), Activity.lat.between(lat_min, lat_max))
+        .order_by(_distance_proxy(lat, lng), Activity.id)
+        .limit(MAX_CANDIDATES)
+    )
+    prefixes = geohash.covering_prefixes(box)
+    if prefixes:
+        q = q.where(or_(*(
+            and_(Activity.geohash >= p, Activity.geohash < p + geohash.RANGE_END) for p in prefixes
+        )))
+    else:
+        q = q.where(Activity.lat.is_not(None), Activity.lng.is_not(None))
+    lng_filter = _lng_filter(lng_min, lng_max)
+    if lng_filter is not None:
+        q = q.where(lng_filter)
+    if type_:
+        q = q.where(Activity.type == type_)
+    return db.session.execute(q).all()
+
+
+def nearby(lat, lng, radius_km, type_=None, limit=50):
+    """[(Activity, distancia_km)] dentro del radio, de la más cercana a la más lejana."""
+    rows = candidates(lat, lng, radius_km, type_)
+    if not rows:
+        return []
+    ids, lats, lngs = zip(*rows)
+    dist = geohash.haversine_km(lat, lng, lats, lngs)
+    inside = sorted((d, i) for d, i in zip(dist, ids) if d <= radius_km)[:limit]
+    if not inside:
+        return []
+    by_id = {a.id: a for a in Activity.query.filter(Activity.id.in_([i for _, i in inside]))}
+    return [(by_id[i], d) for d, i in inside if i in by_id]
@@ -0,0 +1,112 @@
+# app/utils/geohash.py
+"""
+Geohash y distancias, sin dependencias (ni de la app ni de numpy).
+
+Un geohash de n caracteres es una celda de la rejilla lat/lng: todos los
+puntos de la celda comparten ese prefijo, así que "qué hay en esta celda"
+es un rango sobre un índice B-tree normal:
+    geohash >= prefijo AND geohash < prefijo || '{'
+('{' es el carácter siguiente a 'z', el último del alfabeto base32).
+"""
+import math
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+PRECISION = 9          # ~5 m; lo que se guarda en activity.geohash
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG_LAT = 111.32
+RANGE_END = "{"
+
+
+def encode(lat, lng, precision=PRECISION):
+    """Geohash de (lat, lng) con `precision` caracteres."""
+    lat, lng = float(lat), float(lng)
+    lat_lo, lat_hi, lng_lo, lng_hi = -90.0, 90.0, -180.0, 180.0
+    chars, bits, ch, even = [], 0, 0, True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                ch, lng_lo = ch << 1 | 1, mid
+            else:
+                ch, lng_hi = ch << 1, mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                ch, lat_lo = ch << 1 | 1, mid
+            else:
+                ch, lat_hi = ch << 1, mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[ch])
+            bits, ch = 0, 0
+    return "".join(chars)
+
+
+def cell_size(precision):
+    """(alto, ancho) en grados de una celda de `precision` caracteres."""
+    bits = 5 * precision
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ((bits + 1) // 2)
+
+
+def wrap_lng(lng):
+    return (lng + 180.0) % 360.0 - 180.0
+
+
+def bounding_box(lat, lng, radius_km):
+    """(lat_min, lat_max, lng_min, lng_max) que contiene el círculo; lng puede salir de ±180."""
+    dlat = radius_km / KM_PER_DEG_LAT
+    cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+    dlng = min(radius_km / (KM_PER_DEG_LAT * cos_lat), 180.0)
+    return max(lat - dlat, -90.0), min(lat + dlat, 90.0), lng - dlng, lng + dlng
+
+
+def covering_prefixes(box):
+    """
+    Prefijos geohash cuyas celdas cubren la caja: se usa la precisión más fina
+    cuya celda es al menos tan grande como la caja, así bastan las 4 esquinas
+    (2x2 celdas como mucho). Lista vacía = la caja es demasiado grande.
+    """
+    lat_min, lat_max, lng_min, lng_max = box
+    precision = 0
+    while precision < PRECISION:
+        height, width = cell_size(precision + 1)
+        if height < lat_max - lat_min or width < lng_max - lng_min:
+            break
+        precision += 1
+    if precision == 0:
+        return []
+    return sorted({
+        encode(la, wrap_lng(ln), precision)
+        for la in (lat_min, lat_max) for ln in (lng_min, lng_max)
+    })
+
+
+def haversine_km(lat, lng, lats, lngs):
+    """Distancias desde (lat, lng) a cada punto de las columnas lats/lngs."""
+    phi = math.radians(lat)
+    cos_phi = math.cos(phi)
+    rad_lats = [math.radians(float(x)) for x in lats]
+    dphi = [x - phi for x in rad_lats]
+    dlmb = [math.radians(float(x) - lng) for x in lngs]
+    return [
+        2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(
+            math.sin(dp / 2) ** 2 + cos_phi * math.cos(p2) * math.sin(dl / 2) ** 2
+        )))
+        for dp, dl, p2 in zip(dphi, dlmb, rad_lats)
+    ]
+
+
+def segments_km(lats, lngs):
+    """Distancia de cada tramo entre puntos consecutivos de una traza (len - 1 valores)."""
+    rad_lats = [math.radians(float(x)) for x in lats]
+    rad_lngs = [math.radians(float(x)) for x in lngs]
+    cos_lats = [math.cos(x) for x in rad_lats]
+    return [
+        2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(
+            math.sin((p2 - p1) / 2) ** 2 + c1 * c2 * math.sin((l2 - l1) / 2) ** 2
+        )))
+        for p1, p2, l1, l2, c1, c2 in zip(
+            rad_lats, rad_lats[1:], rad_lngs, rad_lngs[1:], cos_lats, cos_lats[1:]
+        )
+    ]
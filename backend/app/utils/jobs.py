@@ -0,0 +1,139 @@
+# app/utils/jobs.py
+"""
+Tareas en segundo plano persistidas en la tabla job.
+
+- enqueue(kind, ...) guarda el job y lo lanza en un pool de hilos del
+  proceso (JOBS_WORKERS). Con JOBS_EAGER se ejecuta en línea (tests).
+- Cada handler recibe el Job y llama a checkpoint(job, **estado) tras cada
+  lote: se guarda el progreso y el latido (heartbeat_at) y se hace commit.
+  Si el proceso muere, `flask run-jobs` retoma los jobs pendientes o
+  abandonados desde su último punto de control.
+- Un job sólo lo ejecuta quien lo reclama con un UPDATE condicional, así que
+  dos procesos no pueden correr el mismo job a la vez.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import or_, update
+
+from .. import db
+from ..models.job_model import Job
+
+HANDLERS = {}
+DEFAULT_WORKERS = 2
+DEFAULT_STALE_SECONDS = 300
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def job_handler(kind):
+    def decorator(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return decorator
+
+
+def _get_executor(app):
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=app.config.get("JOBS_WORKERS", DEFAULT_WORKERS),
+                    thread_name_prefix="job",
+                )
+    return _executor
+
+
+def enqueue(kind, user_id=None, payload=None):
+    """Crea el job (commit incluido) y lo lanza. Devuelve el Job."""
+    if kind not in HANDLERS:
+        raise KeyError(f"Tipo de job desconocido: {kind}")
+    job = Job(kind=kind, user_id=user_id, payload=payload or {}, progress={})
+    db.session.add(job)
+    db.session.commit()
+
+    app = current_app._get_current_object()
+    if app.config.get("JOBS_EAGER"):
+        run_job(job.id)
+        db.session.refresh(job)
+    else:
+        _get_executor(app).submit(_run_in_context, app, job.id)
+    return job
+
+
+def _run_in_context(app, job_id):
+    with app.app_context():
+        try:
+            run_job(job_id)
+        finally:
+            db.session.remove()
+
+
+def _claim(job_id, stale_before=None):
+    """Pasa el job a running si está libre (o abandonado). True si lo reclama."""
+    free = Job.status == "queued"
+    if stale_before is not None:
+        free = or_(free, (Job.status == "running") & (Job.heartbeat_at < stale_before))
+    now = datetime.utcnow()
+    claimed = db.session.execute(
+        update(Job)
+        .where(Job.id == job_id, free)
+        .values(status="running", started_at=now, heartbeat_at=now, attempts=Job.attempts + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return claimed > 0
+
+
+def checkpoint(job, **progress):
+    """Guarda el progreso acumulado y el latido; confirma el lote en curso."""
+    job.progress = {**(job.progress or {}), **progress}
+    job.heartbeat_at = datetime.utcnow()
+    db.session.commit()
+
+
+def run_job(job_id, stale_before=None):
+    if not _claim(job_id, stale_before):
+        return None
+    job = db.session.get(Job, job_id)
+    db.session.refresh(job)
+    try:
+        job.result = HANDLERS[job.kind](job)
+        job.status = "done"
+        job.error = None
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.exception("Job %s (%s) fallido", job_id, job.kind)
+        job = db.session.get(Job, job_id)
+        job.status = "failed"
+        job.error = str(e)[:1000]
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return job
+
+
+def run_pending():
+    """Ejecuta los jobs en cola y retoma los que llevan tiempo sin latido."""
+    stale = current_app.config.get("JOBS_STALE_SECONDS", DEFAULT_STALE_SECONDS)
+    stale_before = datetime.utcnow() - timedelta(seconds=stale)
+    ids = db.session.scalars(
+        db.select(Job.id)
+        .where(or_(Job.status == "queued",
+                   (Job.status == "running") & (Job.heartbeat_at < stale_before)))
+        .order_by(Job.id)
+    ).all()
+    return [job for job in (run_job(i, stale_before) for i in ids) if job is not None]
+
+
+def init_jobs(app):
+    app.config.setdefault("JOBS_EAGER", False)
+
+    @app.cli.command("run-jobs")
+    def run_jobs_command():
+        """Ejecuta jobs pendientes y retoma los abandonados."""
+        for job in run_pending():
+            print(f"Job {job.id} ({job.kind}): {job.status}")
@@ -0,0 +1,35 @@
+# app/utils/moderation.py
+"""
+Ocultación automática de posts denunciados.
+
+Un post se oculta cuando acumula MODERATION_HIDE_THRESHOLD denuncias que no
+han sido descartadas. Se hace con un único UPDATE condicional, sin cargar
+las denuncias ni el post.
+"""
+from flask import current_app
+from sqlalchemy import func, select, update
+
+from .. import db
+from ..models import Post, Report
+
+DEFAULT_HIDE_THRESHOLD = 5
+
+
+def hide_threshold():
+    return current_app.config.get("MODERATION_HIDE_THRESHOLD", DEFAULT_HIDE_THRESHOLD)
+
+
+def hide_if_over_threshold(post_id):
+    """Devuelve True si el post ha pasado a estar oculto. No hace commit."""
+    active = (
+        select(func.count(Report.id))
+        .where(Report.post_id == post_id, Report.status != "Dismissed")
+        .scalar_subquery()
+    )
+    result = db.session.execute(
+        update(Post)
+        .where(Post.id == post_id, Post.is_hidden.is_(False), active >= hide_threshold())
+        .values(is_hidden=True)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount > 0
@@ -0,0 +1,90 @@
+# app/utils/passwords.py
+"""
+Hash de contraseñas con bcrypt.
+
+- El coste (BCRYPT_ROUNDS) es configurable; los hashes con otro coste se
+  rehacen de forma transparente en el siguiente login (needs_rehash).
+- bcrypt se ejecuta en un pool de hilos acotado (BCRYPT_THREADS) para que
+  un pico de logins no acapare todos los hilos de un worker. Con gevent se
+  usa el threadpool nativo del hub, de modo que el loop no se bloquea.
+"""
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+from flask import current_app, has_app_context
+
+DEFAULT_ROUNDS = 12
+DEFAULT_THREADS = 4
+
+_executor = None
+_dummy_hashes = {}
+_executor_lock = threading.Lock()
+
+
+def _config(key, default):
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=_config("BCRYPT_THREADS", DEFAULT_THREADS),
+                    thread_name_prefix="bcrypt",
+                )
+    return _executor
+
+
+def _gevent_patched():
+    monkey = sys.modules.get("gevent.monkey")
+    return monkey is not None and monkey.is_module_patched("threading")
+
+
+def _run(fn, *args):
+    if _gevent_patched():
+        import gevent
+        return gevent.get_hub().threadpool.apply(fn, args)
+    return _get_executor().submit(fn, *args).result()
+
+
+def rounds_of(password_hash):
+    """Coste de un hash bcrypt ($2b$12$...)."""
+    try:
+        return int(password_hash.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def _dummy_hash():
+    """
+    Hash válido (con el coste actual) contra el que comparar cuando el
+    usuario no existe, para que el tiempo de respuesta no delate qué
+    cuentas existen.
+    """
+    rounds = _config("BCRYPT_ROUNDS", DEFAULT_ROUNDS)
+    if rounds not in _dummy_hashes:
+        _dummy_hashes[rounds] = bcrypt.hashpw(b"dummy-password", bcrypt.gensalt(rounds=rounds))
+    return _dummy_hashes[rounds]
+
+
+def hash_password(password, rounds=None):
+    rounds = rounds or _config("BCRYPT_ROUNDS", DEFAULT_ROUNDS)
+    salt = bcrypt.gensalt(rounds=rounds)
+    return _run(bcrypt.hashpw, password.encode("utf-8"), salt).decode("utf-8")
+
+
+def check_password(password, password_hash):
+    """Una única comprobación bcrypt. Con password_hash=None compara contra un hash ficticio."""
+    target = password_hash.encode("utf-8") if password_hash else _dummy_hash()
+    ok = _run(bcrypt.checkpw, password.encode("utf-8"), target)
+    return ok and password_hash is not None
+
+
+def needs_rehash(password_hash):
+    return rounds_of(password_hash) != _config("BCRYPT_ROUNDS", DEFAULT_ROUNDS)
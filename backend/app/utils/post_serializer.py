@@ -0,0 +1,88 @@
+# app/utils/post_serializer.py
+"""
+Serialización de feeds (posts originales + reposts).
+
+Query params soportados:
+- ?fields=text,likes,...  -> sparse fieldset sobre los campos del post
+- ?compact=1              -> autores y posts originales deduplicados en
+                             un mapa `includes` (estilo JSON:API)
+"""
+from ..models.post_model import Post
+
+
+def parse_fields(raw):
+    """
+    Convierte "a,b,c" en un set validado. None si no se pide nada.
+    Lanza ValueError si aparece un campo desconocido.
+    """
+    if not raw:
+        return None
+    fields = {f.strip() for f in raw.split(",") if f.strip()}
+    unknown = fields - set(Post.FIELDS)
+    if unknown:
+        raise ValueError(f"Campos desconocidos en 'fields': {', '.join(sorted(unknown))}")
+    return fields
+
+
+def parse_compact(raw):
+    return (raw or "").lower() in ("1", "true", "yes")
+
+
+class FeedSerializer:
+    def __init__(self, current_user_id=None, fields=None, compact=False):
+        self.current_user_id = current_user_id
+        self.fields = fields
+        self.compact = compact
+        self._users = {}
+        self._posts = {}
+
+    @classmethod
+    def from_args(cls, args, current_user_id=None):
+        return cls(
+            current_user_id=current_user_id,
+            fields=parse_fields(args.get("fields")),
+            compact=parse_compact(args.get("compact")),
+        )
+
+    def _post_dict(self, post):
+        data = post.to_dict(
+            current_user_id=self.current_user_id,
+            fields=self.fields,
+            compact=self.compact,
+        )
+        if self.compact and "user_id" in data:
+            self._include_user(post.author)
+        return data
+
+    def _include_user(self, user):
+        key = str(user.id)
+        if key not in self._users:
+            self._users[key] = Post.user_dict(user)
+
+    def original(self, post):
+        item = self._post_dict(post)
+        item["type"] = "original"
+        return item
+
+    def repost(self, repost):
+        original = repost.original_post
+        if self.compact:
+            item = {
+                "id": repost.id,
+                "original_post_id": repost.original_post_id,
+                "comment_text": repost.comment_text or "",
+                "created_at": repost.created_at.isoformat() if repost.created_at else None,
+                "reposted_by_id": repost.user_id,
+            }
+            self._include_user(repost.user)
+            key = str(original.id)
+            if key not in self._posts:
+                self._posts[key] = self._post_dict(original)
+        else:
+            item = repost.to_dict()
+            item["original_content"] = self._post_dict(original)
+        item["type"] = "repost"
+        return item
+
+    def includes(self):
+        return {"users": self._users, "posts": self._posts}
@@ -0,0 +1,71 @@
+# app/utils/providers.py
+"""
+Registro de proveedores externos con inicialización diferida.
+
+Los SDK pesados (cloudinary, requests) no se importan al arrancar: cada
+proveedor registra una factory que se ejecuta la primera vez que una ruta
+lo pide con get_provider(nombre), y el resultado se reutiliza después.
+"""
+import threading
+
+from flask import current_app
+
+
+class ProviderRegistry:
+    def __init__(self, app):
+        self._app = app
+        self._factories = {}
+        self._instances = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, factory):
+        """factory(app) -> instancia; se llama como mucho una vez."""
+        self._factories[name] = factory
+        self._instances.pop(name, None)
+
+    def get(self, name):
+        try:
+            return self._instances[name]
+        except KeyError:
+            pass
+        with self._lock:
+            if name not in self._instances:
+                if name not in self._factories:
+                    raise KeyError(f"Proveedor no registrado: {name}")
+                self._instances[name] = self._factories[name](self._app)
+            return self._instances[name]
+
+    def initialized(self, name):
+        return name in self._instances
+
+
+def _cloudinary_uploader(app):
+    import cloudinary
+    import cloudinary.uploader
+
+    cloudinary.config(
+        cloud_name=app.config.get("CLOUDINARY_CLOUD_NAME"),
+        api_key=app.config.get("CLOUDINARY_API_KEY"),
+        api_secret=app.config.get("CLOUDINARY_API_SECRET"),
+        secure=True,
+    )
+    return cloudinary.uploader
+
+
+def _http_session(app):
+    import requests
+
+    # Sesión compartida: reutiliza conexiones TLS entre envíos de correo
+    return requests.Session()
+
+
+def init_providers(app):
+    registry = ProviderRegistry(app)
+    registry.register("cloudinary", _cloudinary_uploader)
+    registry.register("http", _http_session)
+    app.extensions["providers"] = registry
+    return registry
+
+
+def get_provider(name):
+    return current_app.extensions["providers"].get(name)
@@ -0,0 +1,197 @@
+# app/utils/rate_limit.py
+"""
+Limitador de peticiones con contadores de ventana deslizante.
+
+Cada regla limita un endpoint por IP y, si el cuerpo trae un email o
+identificador, también por cuenta. La comprobación se hace en el
+decorador, antes de tocar la BD o calcular un hash, así que una ráfaga de
+credential stuffing se corta con un 429 + Retry-After sin gastar CPU.
+
+El estado vive en un backend intercambiable (RateLimitBackend). Por
+defecto es MemoryBackend, propio de cada app y de cada proceso; para
+compartirlo entre workers basta con otra implementación de hit()/reset().
+"""
+import math
+import threading
+from abc import ABC, abstractmethod
+import time
+from functools import wraps
+
+from flask import current_app, jsonify, request
+
+# endpoint -> {ámbito: (límite, ventana en segundos)}. Holgados a propósito:
+# sólo deben saltar ante ráfagas, no con un usuario que se equivoca.
+DEFAULT_LIMITS = {
+    "login": {"ip": (60, 60), "account": (20, 300)},
+    "register": {"ip": (30, 3600)},
+    "resend_verification": {"ip": (20, 600), "account": (5, 600)},
+}
+
+
+class RateLimitBackend(ABC):
+    """Interfaz común de los backends."""
+
+    @abstractmethod
+    def hit(self, entries):
+        """
+        entries: [(clave, límite, ventana), ...]. Registra un intento en
+        todas las claves sólo si cabe en todos los límites, de forma
+        atómica, para que un intento rechazado no gaste el cupo de otra regla.
+        Devuelve (permitido, segundos hasta poder reintentar).
+        """
+
+    @abstractmethod
+    def reset(self, key=None):
+        """Olvida una clave, o todas si key es None."""
+
+
+class MemoryBackend(RateLimitBackend):
+    """
+    Contador de ventana deslizante aproximado: guarda el recuento de la
+    ventana fija actual y de la anterior, y pondera la anterior por la
+    fracción que aún solapa. Memoria O(1) por clave.
+    """
+
+    PRUNE_EVERY = 1000
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._counters = {}  # key -> [nº de ventana, actual, anterior]
+        self._hits = 0
+
+    def hit(self, entries):
+        now = self._clock()
+        with self._lock:
+            self._hits += 1
+            if self._hits % self.PRUNE_EVERY == 0:
+                self._prune(now)
+            slots, wait = [], 0
+            for key, limit, window in entries:
+                current = int(now // window)
+                elapsed = now - current * window
+                slot = self._counters.get(key)
+                if slot is None or slot[0] < current - 1:
+                    slot = [current, 0, 0]
+                elif slot[0] == current - 1:
+                    slot = [current, 0, slot[1]]
+                self._counters[key] = slot
+                slots.append(slot)
+
+                _, count, previous = slot
+                if previous * (1 - elapsed / window) + count + 1 > limit:
+                    wait = max(wait, _retry_after(count, previous, limit, window, elapsed))
+            if wait:
+                return False, wait
+            for slot in slots:
+                slot[1] += 1
+            return True, 0
+
+    def reset(self, key=None):
+        with self._lock:
+            if key is None:
+                self._counters.clear()
+            else:
+                self._counters.pop(key, None)
+
+    def _prune(self, now):
+        # Las claves con más de una ventana de antigüedad ya no cuentan
+        stale = [k for k, (w, _, _) in self._counters.items()
+                 if w < int(now // _window_of(k)) - 1]
+        for k in stale:
+            del self._counters[k]
+
+
+class FakeBackend(MemoryBackend):
+    """Backend para tests: reloj manual y registro de las claves consultadas."""
+
+    def __init__(self, start=0.0):
+        self.now = start
+        self.calls = []
+        super().__init__(clock=lambda: self.now)
+
+    def advance(self, seconds):
+        self.now += seconds
+
+    def hit(self, entries):
+        self.calls.extend(key for key, _, _ in entries)
+        return super().hit(entries)
+
+
+def _retry_after(count, previous, limit, window, elapsed):
+    # Momento en que el recuento ponderado deja sitio a un intento más
+    if count + 1 <= limit and previous:
+        fraction = 1 - (limit - count - 1) / previous
+        return max(1, math.ceil(fraction * window - elapsed))
+    # La ventana actual ya está llena: en la siguiente pasa a ser la "anterior"
+    fraction = 1 - (limit - 1) / count if count else 0
+    return max(1, math.ceil(window - elapsed + max(fraction, 0) * window))
+
+
+def _window_of(key):
+    return int(key.rsplit(":", 1)[1])
+
+
+def _client_ip():
+    # Detrás de proxies, ProxyFix (TRUSTED_PROXY_HOPS, app/__init__.py) ya ha
+    # puesto en remote_addr la IP que vio el primero de confianza; las
+    # entradas de X-Forwarded-For que manda el cliente no cuentan.
+    return request.remote_addr or "unknown"
+
+
+def _account_of():
+    data = request.get_json(silent=True) or {}
+    ident = data.get("email") or data.get("username")
+    return str(ident).strip().lower() if ident else None
+
+
+class RateLimiter:
+    def __init__(self, app, backend=None):
+        self.backend = backend or MemoryBackend()
+        self.limits = {name: dict(rules) for name, rules in DEFAULT_LIMITS.items()}
+        for name, rules in (app.config.get("RATE_LIMITS") or {}).items():
+            self.limits.setdefault(name, {}).update(rules)
+
+    def check(self, name):
+        """Devuelve None si se permite la petición o los segundos de espera."""
+        rules = self.limits.get(name) or {}
+        subjects = {"ip": _client_ip()}
+        if "account" in rules:
+            subjects["account"] = _account_of()
+
+        entries = [
+            (f"{name}:{scope}:{subjects[scope]}:{window}", limit, window)
+            for scope, (limit, window) in rules.items()
+            if subjects.get(scope) is not None
+        ]
+        if not entries:
+            return None
+        allowed, retry_after = self.backend.hit(entries)
+        return None if allowed else retry_after
+
+
+def rate_limit(name):
+    """Aplica la regla `name` antes de ejecutar la vista."""
+    def decorator(fn):
+        @wraps(fn)
+        def _wrapped(*args, **kwargs):
+            limiter = current_app.extensions.get("rate_limiter")
+            if request.method != "OPTIONS" and limiter is not None:
+                wait = limiter.check(name)
+                if wait:
+                    resp = jsonify({"error": "Demasiados intentos. Inténtalo más tarde."})
+                    resp.headers["Retry-After"] = str(wait)
+                    return resp, 429
+            return fn(*args, **kwargs)
+        return _wrapped
+    return decorator
+
+
+def init_rate_limit(app, backend=None):
+    app.config.setdefault("RATE_LIMIT_ENABLED", True)
+    if not app.config["RATE_LIMIT_ENABLED"]:
+        app.extensions.pop("rate_limiter", None)
+        return None
+    limiter = RateLimiter(app, backend=backend or app.config.get("RATE_LIMIT_BACKEND"))
+    app.extensions["rate_limiter"] = limiter
+    return limiter
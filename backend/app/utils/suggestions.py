@@ -0,0 +1,146 @@
+# app/utils/suggestions.py
+"""
+Sugerencias de a quién seguir ("amigos de amigos").
+
+Los candidatos salen de una única consulta agrupada a dos saltos:
+- follow → follow: usuarios seguidos por quienes sigo (seguidos en común)
+- community_members → community_members: miembros de mis comunidades
+UNION ALL de los dos, GROUP BY candidato, sin los que ya sigo ni yo mismo,
+ordenada por la puntuación y limitada a la página. Cada salto usa un
+índice: la PK de follow e ix_community_members_user_id.
+
+Los temas en común sólo puntúan a esos candidatos (subconsulta por
+candidato sobre la PK de user_topic): un salto user_topic → user_topic
+recorrería a todos los interesados en cada uno de mis temas, que en un
+tema popular son casi todos los usuarios.
+
+Sin candidatos sociales se prueba con los usuarios de mis temas, tomando
+como mucho SUGGESTIONS_TOPIC_FANOUT por tema (un recorrido acotado de
+ix_user_topic_topic_user_id por tema), y si tampoco hay, con los usuarios
+con más seguidores.
+
+Después se cargan los usuarios de la página y los nombres de los temas
+compartidos (una consulta IN cada uno).
+"""
+from collections import defaultdict
+
+from flask import current_app
+from sqlalchemy import func, literal, select, union_all
+
+from .. import db
+from ..models import User, UserTopic, follow
+from ..models.comunity_model import community_members
+
+WEIGHTS = {"mutual": 3.0, "community": 2.0, "topic": 1.0}
+DEFAULT_TOPIC_FANOUT = 200
+
+
+def _flags(kind):
+    return [literal(1 if k == kind else 0).label(k) for k in ("m", "c")]
+
+
+def _graph_candidates(user_id, limit):
+    """[(candidato, seguidos_en_común, comunidades_en_común, temas_en_común)]."""
+    f1, f2 = follow.alias("f1"), follow.alias("f2")
+    cm1, cm2 = community_members.alias("cm1"), community_members.alias("cm2")
+    ut1, ut2 = UserTopic.__table__.alias("ut1"), UserTopic.__table__.alias("ut2")
+    mutual = (
+        select(f2.c.followed_id.label("uid"), *_flags("m"))
+        .select_from(f1.join(f2, f2.c.follower_id == f1.c.followed_id))
+        .where(f1.c.follower_id == user_id)
+    )
+    communities = (
+        select(cm2.c.user_id.label("uid"), *_flags("c"))
+        .select_from(cm1.join(cm2, cm2.c.community_id == cm1.c.community_id))
+        .where(cm1.c.user_id == user_id)
+    )
+    hops = union_all(mutual, communities).subquery()
+    already = select(follow.c.followed_id).where(follow.c.follower_id == user_id)
+    m, c = func.sum(hops.c.m), func.sum(hops.c.c)
+    # Temas en común sólo de este candidato: PK de user_topic (user_id, topic)
+    t = (
+        select(func.count())
+        .select_from(ut2.join(ut1, ut1.c.topic == ut2.c.topic))
+        .where(ut2.c.user_id == hops.c.uid, ut1.c.user_id == user_id)
+        .scalar_subquery()
+    )
+    score = WEIGHTS["mutual"] * m + WEIGHTS["community"] * c + WEIGHTS["topic"] * t
+    return db.session.execute(
+        select(hops.c.uid, m, c, t)
+        .where(hops.c.uid != user_id, hops.c.uid.not_in(already))
+        .group_by(hops.c.uid)
+        .order_by(score.desc(), hops.c.uid)
+        .limit(limit)
+    ).all()
+
+
+def _topic_candidates(user_id, limit):
+    """
+    Usuarios con temas en común cuando no hay candidatos sociales. Cada tema
+    aporta como mucho SUGGESTIONS_TOPIC_FANOUT usuarios (los más recientes).
+    """
+    topics = db.session.scalars(select(UserTopic.topic).where(UserTopic.user_id == user_id)).all()
+    if not topics:
+        return []
+    fanout = current_app.config.get("SUGGESTIONS_TOPIC_FANOUT", DEFAULT_TOPIC_FANOUT)
+    already = select(follow.c.followed_id).where(follow.c.follower_id == user_id)
+    samples = [
+        select(UserTopic.user_id.label("uid"))
+        .where(UserTopic.topic == topic, UserTopic.user_id != user_id, UserTopic.user_id.not_in(already))
+        .order_by(UserTopic.user_id.desc())
+        .limit(fanout)
+        .subquery()
+        for topic in topics
+    ]
+    hops = union_all(*(select(sample.c.uid) for sample in samples)).subquery()
+    t = func.count()
+    return [
+        (uid, 0, 0, shared)
+        for uid, shared in db.session.execute(
+            select(hops.c.uid, t).group_by(hops.c.uid).order_by(t.desc(), hops.c.uid).limit(limit)
+        )
+    ]
+
+
+def _popular_candidates(user_id, limit):
+    """Usuarios con más seguidores que aún no sigo (arranque en frío)."""
+    already = select(follow.c.followed_id).where(follow.c.follower_id == user_id)
+    n = func.count(follow.c.follower_id)
+    ids = db.session.execute(
+        select(User.id)
+        .outerjoin(follow, follow.c.followed_id == User.id)
+        .where(User.id != user_id, User.id.not_in(already))
+        .group_by(User.id)
+        .order_by(n.desc(), User.id)
+        .limit(limit)
+    ).scalars()
+    return [(uid, 0, 0, 0) for uid in ids]
+
+
+def suggest(user, limit=10):
+    """[(User, {mutual_follows, shared_communities, shared_topics})] de mejor a peor."""
+    rows = (_graph_candidates(user.id, limit) or _topic_candidates(user.id, limit)
+            or _popular_candidates(user.id, limit))
+    if not rows:
+        return []
+    ids = [r[0] for r in rows]
+    users = {u.id: u for u in User.query.filter(User.id.in_(ids))}
+
+    shared = defaultdict(list)
+    if any(r[3] for r in rows):
+        mine = select(UserTopic.topic).where(UserTopic.user_id == user.id)
+        for uid, topic in db.session.execute(
+            select(UserTopic.user_id, UserTopic.topic)
+            .where(UserTopic.user_id.in_(ids), UserTopic.topic.in_(mine))
+            .order_by(UserTopic.topic)
+        ):
+            shared[uid].append(topic)
+
+    return [
+        (users[uid], {
+            "mutual_follows": int(mutual or 0),
+            "shared_communities": int(communities or 0),
+            "shared_topics": shared[uid],
+        })
+        for uid, mutual, communities, _ in rows if uid in users
+    ]
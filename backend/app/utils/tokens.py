@@ -0,0 +1,356 @@
+# app/utils/tokens.py
+"""
+Emisión y validación de JWT con un conjunto de claims común.
+
+Todos los tokens llevan user_id, type, jti, iat y exp; los de sesión
+(access y refresh) llevan además fam, el identificador de la sesión.
+
+- Los refresh tokens rotan: cada /auth/refresh invalida el jti usado y
+  devuelve un par nuevo de la misma familia.
+- Si llega un refresh ya usado (robado y reutilizado) se revoca la familia
+  entera; los access tokens de esa sesión dejan de valer al momento.
+- revoke_user() invalida todas las sesiones de un usuario (borrado de cuenta).
+- Las revocaciones viven en un TTL set (RevocationStore) compartido por
+  todos los workers: por defecto la tabla token_revocation
+  (DbRevocationStore) detrás de una caché por proceso
+  (CachedRevocationStore): cada clave se consulta en BD como mucho una vez
+  cada TOKEN_REVOCATION_CACHE_SECONDS, así que una petición autenticada
+  normalmente no toca la BD. Lo revocado en el propio worker se ve al
+  momento; en otro, con ese retraso como mucho. MemoryRevocationStore, sin
+  BD pero propio de cada proceso, sólo sirve con un único proceso (tests,
+  desarrollo). Cada entrada caduca cuando ya no podría existir un token
+  válido al que afectara.
+- Los tokens antiguos, sin type o sin jti, no se pueden revocar: se
+  rechazan salvo hasta la fecha LEGACY_TOKENS_UNTIL (UTC), pensada para
+  desplegar sin cerrar las sesiones ya abiertas. Hasta entonces un refresh
+  antiguo se canjea una sola vez (se marca por el hash del token).
+"""
+import hashlib
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import jwt
+from flask import current_app
+
+ACCESS_TTL = timedelta(hours=1)
+REFRESH_TTL = timedelta(days=7)
+ALGORITHM = "HS256"
+DEFAULT_CACHE_SECONDS = 30
+
+
+class TokenError(Exception):
+    """Token rechazado; el mensaje se devuelve tal cual al cliente."""
+
+
+class TokenExpired(TokenError):
+    pass
+
+
+class RevocationStore(ABC):
+    """Interfaz común: conjunto de claves con caducidad."""
+
+    @abstractmethod
+    def add(self, key, ttl):
+        """Añade key durante ttl segundos (o alarga su caducidad)."""
+
+    @abstractmethod
+    def claim(self, key, ttl):
+        """Añade key si no estaba; devuelve False si ya estaba (atómico)."""
+
+    @abstractmethod
+    def __contains__(self, key):
+        pass
+
+    def revoked(self, keys):
+        """Las claves de `keys` que están en el conjunto."""
+        return {key for key in keys if key in self}
+
+    def contains_any(self, keys):
+        return bool(self.revoked(keys))
+
+
+class MemoryRevocationStore(RevocationStore):
+    PRUNE_EVERY = 1000
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._expires = {}
+        self._adds = 0
+
+    def add(self, key, ttl):
+        now = self._clock()
+        with self._lock:
+            self._adds += 1
+            if self._adds % self.PRUNE_EVERY == 0:
+                self._expires = {k: t for k, t in self._expires.items() if t > now}
+            self._expires[key] = max(self._expires.get(key, 0), now + max(ttl, 0))
+
+    def claim(self, key, ttl):
+        with self._lock:
+            if key in self:
+                return False
+            self._expires[key] = self._clock() + max(ttl, 0)
+            return True
+
+    def __contains__(self, key):
+        expires = self._expires.get(key)
+        return expires is not None and expires > self._clock()
+
+    def __len__(self):
+        now = self._clock()
+        return sum(1 for t in self._expires.values() if t > now)
+
+
+class DbRevocationStore(RevocationStore):
+    """
+    Revocaciones en la tabla token_revocation, visibles para todos los
+    workers. add() y claim() escriben en su propia transacción
+    (db.engine.begin()): una revocación no se pierde si la petición que la
+    pidió hace rollback después, ni confirma de rebote lo que la petición
+    tuviera a medias en la sesión.
+    """
+    PRUNE_EVERY = 1000
+
+    def __init__(self):
+        self._adds = 0
+
+    def add(self, key, ttl):
+        from sqlalchemy import delete, update
+        from .. import db
+        from ..models import TokenRevocation
+        from .write_paths import insert_ignore
+
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=max(ttl, 0))
+        self._adds += 1
+        with db.engine.begin() as conn:
+            if not insert_ignore(TokenRevocation.__table__, [{"key": key, "expires_at": expires_at}],
+                                 returning=(TokenRevocation.key,), conn=conn):
+                conn.execute(
+                    update(TokenRevocation)
+                    .where(TokenRevocation.key == key, TokenRevocation.expires_at < expires_at)
+                    .values(expires_at=expires_at)
+                )
+            if self._adds % self.PRUNE_EVERY == 0:
+                conn.execute(delete(TokenRevocation).where(TokenRevocation.expires_at <= now))
+
+    def claim(self, key, ttl):
+        from sqlalchemy import delete
+        from .. import db
+        from ..models import TokenRevocation
+        from .write_paths import insert_ignore
+
+        now = datetime.utcnow()
+        with db.engine.begin() as conn:
+            # Una entrada caducada ya no cuenta como usada
+            conn.execute(
+                delete(TokenRevocation).where(TokenRevocation.key == key, TokenRevocation.expires_at <= now)
+            )
+            claimed = insert_ignore(
+                TokenRevocation.__table__,
+                [{"key": key, "expires_at": now + timedelta(seconds=max(ttl, 0))}],
+                returning=(TokenRevocation.key,),
+                conn=conn,
+            )
+        return bool(claimed)
+
+    def __contains__(self, key):
+        return bool(self.revoked([key]))
+
+    def revoked(self, keys):
+        from sqlalchemy import select
+        from .. import db
+        from ..models import TokenRevocation
+
+        return set(db.session.scalars(
+            select(TokenRevocation.key)
+            .where(TokenRevocation.key.in_(keys), TokenRevocation.expires_at > datetime.utcnow())
+        ))
+
+
+class CachedRevocationStore(RevocationStore):
+    """
+    Caché por proceso delante de otro store: recuerda durante `ttl`
+    segundos si cada clave estaba revocada (LRU de max_keys claves). Las
+    escrituras van siempre al store de debajo.
+    """
+
+    def __init__(self, store, ttl=DEFAULT_CACHE_SECONDS, max_keys=10000, clock=time.monotonic):
+        self.store = store
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # clave -> (válida hasta, revocada)
+
+    def _remember(self, keys, revoked):
+        until = self._clock() + self.ttl
+        with self._lock:
+            for key in keys:
+                self._entries[key] = (until, key in revoked)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+
+    def add(self, key, ttl):
+        self.store.add(key, ttl)
+        self._remember([key], {key})
+
+    def claim(self, key, ttl):
+        claimed = self.store.claim(key, ttl)
+        self._remember([key], {key})
+        return claimed
+
+    def __contains__(self, key):
+        return bool(self.revoked([key]))
+
+    def revoked(self, keys):
+        now = self._clock()
+        found, missing = set(), []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    if entry[1]:
+                        found.add(key)
+                else:
+                    missing.append(key)
+        if missing:
+            fresh = self.store.revoked(missing)
+            self._remember(missing, fresh)
+            found |= fresh
+        return found
+
+
+def secret():
+    value = current_app.config.get("JWT_SECRET_KEY") or current_app.config.get("SECRET_KEY")
+    if not isinstance(value, (str, bytes)) or not value:
+        value = "dev-secret-change-me"
+    return value
+
+
+def _store():
+    return current_app.extensions["token_revocations"]
+
+
+def _ttl(key, default):
+    value = current_app.config.get(key)
+    return timedelta(seconds=value) if value else default
+
+
+def encode(user_id, token_type, ttl, **claims):
+    now = datetime.utcnow()
+    payload = {
+        "user_id": user_id,
+        "type": token_type,
+        "jti": claims.pop("jti", None) or uuid.uuid4().hex,
+        "iat": now,
+        "exp": now + ttl,
+    }
+    payload.update(claims)
+    return jwt.encode(payload, secret(), algorithm=ALGORITHM)
+
+
+def _legacy_allowed():
+    """True mientras no haya pasado LEGACY_TOKENS_UNTIL (vacío: nunca)."""
+    until = current_app.config.get("LEGACY_TOKENS_UNTIL")
+    if not until:
+        return False
+    if isinstance(until, str):
+        until = datetime.fromisoformat(until)
+    return datetime.utcnow() < until
+
+
+def decode(token, expected_type=None):
+    """
+    Decodifica y valida firma, caducidad, tipo y revocación.
+    Los tokens antiguos (sin type o sin jti) sólo valen antes de
+    LEGACY_TOKENS_UNTIL; los sin type cuentan entonces como access.
+    """
+    try:
+        payload = jwt.decode(token, secret(), algorithms=[ALGORITHM])
+    except jwt.ExpiredSignatureError:
+        raise TokenExpired("El token ha caducado")
+    except jwt.InvalidTokenError:
+        raise TokenError("Token inválido")
+
+    token_type = payload.get("type")
+    if token_type is None or not payload.get("jti"):
+        if not _legacy_allowed():
+            raise TokenError("Token antiguo; inicia sesión de nuevo")
+        token_type = token_type or "access"
+    if expected_type and token_type != expected_type:
+        raise TokenError(f"Token inválido (no es {expected_type})")
+    keys = [f"fam:{payload['fam']}"] if payload.get("fam") else []
+    if payload.get("jti"):
+        keys.append(f"jti:{payload['jti']}")
+    if payload.get("user_id") is not None:
+        keys.append(f"user:{payload['user_id']}")
+    if keys and _store().contains_any(keys):
+        raise TokenError("Sesión revocada")
+    return payload
+
+
+def issue_access(user_id, family=None):
+    claims = {"fam": family} if family else {}
+    return encode(user_id, "access", _ttl("JWT_ACCESS_TTL", ACCESS_TTL), **claims)
+
+
+def issue_pair(user_id, family=None):
+    """Par access + refresh; sin family abre una sesión nueva."""
+    family = family or uuid.uuid4().hex
+    refresh = encode(user_id, "refresh", _ttl("JWT_REFRESH_TTL", REFRESH_TTL), fam=family)
+    return issue_access(user_id, family), refresh
+
+
+def revoke_family(family):
+    _store().add(f"fam:{family}", _ttl("JWT_REFRESH_TTL", REFRESH_TTL).total_seconds())
+
+
+def revoke_user(user_id):
+    """Invalida todos los tokens ya emitidos del usuario (p. ej. al borrar la cuenta)."""
+    _store().add(f"user:{user_id}", _ttl("JWT_REFRESH_TTL", REFRESH_TTL).total_seconds())
+
+
+def rotate(refresh_token):
+    """
+    Canjea un refresh token por un par nuevo de la misma sesión.
+    Reutilizar un refresh ya canjeado revoca toda la sesión.
+    """
+    payload = decode(refresh_token, "refresh")
+    family = payload.get("fam")
+    # Un refresh antiguo sin jti se identifica por el hash del propio token
+    jti = payload.get("jti") or hashlib.sha256(refresh_token.encode()).hexdigest()[:32]
+    # used:<jti> marca el refresh canjeado; jti:<jti> es un token revocado
+    if not _store().claim(f"used:{jti}", payload["exp"] - time.time()):
+        if family:
+            revoke_family(family)
+        raise TokenError("Refresh token reutilizado; sesión revocada")
+    return issue_pair(payload["user_id"], family)
+
+
+def revoke(token):
+    """Cierra la sesión de un access o refresh token (logout)."""
+    payload = decode(token)
+    if payload.get("fam"):
+        revoke_family(payload["fam"])
+    elif payload.get("jti"):
+        _store().add(f"jti:{payload['jti']}", payload["exp"] - time.time())
+    return payload
+
+
+def init_tokens(app, store=None):
+    """Por defecto, revocaciones en BD con caché por proceso; en tests (TESTING), en memoria."""
+    if store is None:
+        store = app.config.get("TOKEN_REVOCATION_STORE")
+    if store is None:
+        store = MemoryRevocationStore() if app.config.get("TESTING") else CachedRevocationStore(
+            DbRevocationStore(),
+            ttl=app.config.get("TOKEN_REVOCATION_CACHE_SECONDS", DEFAULT_CACHE_SECONDS),
+        )
+    app.extensions["token_revocations"] = store
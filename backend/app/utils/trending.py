@@ -0,0 +1,337 @@
+# app/utils/trending.py
+"""
+Tendencias de posts y temas con puntuación que decae con el tiempo.
+
+Cada evento (publicar, like, repost) suma su peso multiplicado por
+exp(-λ·edad), con λ = ln 2 / TRENDING_HALF_LIFE_HOURS. Como todas las
+puntuaciones decaen al mismo ritmo, se guardan referidas a una época fija
+y en escala logarítmica:
+
+    score = ln Σ w·exp(λ·(t_evento - EPOCH))
+
+Así un evento nuevo se acumula con un único UPSERT (score' = logaddexp
+(score, x), sin leer la fila), y ordenar por score es ordenar por la
+puntuación actual: la consulta de tendencias es un recorrido del índice
+(topic, score). La puntuación "de hoy" se obtiene con current_score().
+
+Un tema popular recibiría un UPSERT por cada like sobre la misma fila de
+topic_trend, que serializaría todos esos likes tras su bloqueo. Por eso los
+temas no se escriben en la transacción del like: al confirmarse, sus
+términos se suman en un búfer del worker (TopicBuffer) y se vuelcan con un
+UPSERT por tema cada TRENDING_TOPIC_FLUSH_SECONDS (tras una petición) y
+antes de leer los temas. Si el proceso muere se pierde como mucho ese
+intervalo de eventos de tema; rebuild() lo corrige.
+
+Los unlikes no restan (un evento ya ocurrido sigue contando mientras
+decae); rebuild() recalcula todo desde post_like/repost y sirve de
+backfill y de corrección periódica (`flask rebuild-trending` o el job
+rebuild_trending). Cambiar la vida media exige reconstruir.
+
+rebuild() sólo mira los posts de los últimos TRENDING_REBUILD_DAYS días:
+los más antiguos pierden su fila (y su aporte al tema), mientras que el
+registro incremental la conserva. Con la vida media por defecto (24 h) su
+peso ya es menor que 2^-14, así que reconstruido e incremental coinciden
+dentro de esa ventana y fuera sólo difieren en puntuaciones despreciables.
+
+Las funciones de registro no hacen commit: lo decide la ruta.
+"""
+import math
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import case, event, func, select
+from sqlalchemy.orm import joinedload
+
+from .. import db
+from ..models import Post, PostLike, Repost
+from .db_pool import RoutingSession
+from ..models.trend_model import PostTrend, TopicTrend
+from . import write_paths
+from .jobs import checkpoint, job_handler
+
+EPOCH = datetime(2025, 1, 1)
+DEFAULT_HALF_LIFE_HOURS = 24
+DEFAULT_WEIGHTS = {"post": 1.0, "like": 1.0, "repost": 3.0}
+DEFAULT_REBUILD_DAYS = 14
+DEFAULT_TOPIC_FLUSH_SECONDS = 5
+
+
+def enabled():
+    return current_app.config.get("TRENDING_ENABLED", True)
+
+
+def decay_rate():
+    """λ por segundo."""
+    hours = current_app.config.get("TRENDING_HALF_LIFE_HOURS", DEFAULT_HALF_LIFE_HOURS)
+    return math.log(2) / (hours * 3600)
+
+
+def _weight(kind):
+    return {**DEFAULT_WEIGHTS, **current_app.config.get("TRENDING_WEIGHTS", {})}[kind]
+
+
+def log_term(at, weight, rate=None):
+    """ln(weight·exp(λ·(at - EPOCH)))."""
+    rate = decay_rate() if rate is None else rate
+    return math.log(weight) + rate * (at - EPOCH).total_seconds()
+
+
+def logaddexp(a, b):
+    if a is None:
+        return b
+    hi, lo = (a, b) if a >= b else (b, a)
+    return hi + math.log1p(math.exp(lo - hi))
+
+
+def current_score(score, now=None):
+    """Puntuación decaída hasta `now` (escala lineal)."""
+    now = now or datetime.utcnow()
+    return math.exp(score - decay_rate() * (now - EPOCH).total_seconds())
+
+
+# --- registro incremental ----------------------------------------------------
+
+def _log_sum(a, b):
+    """logaddexp en SQL: exp() sólo recibe valores <= 0 y nunca desborda."""
+    return case(
+        (a >= b, a + func.ln(1 + func.exp(b - a))),
+        else_=b + func.ln(1 + func.exp(a - b)),
+    )
+
+
+def _accumulate(model, key, rows, conn=None):
+    """
+    UPSERT de rows ({key: ..., "score": x, ...}) sumando en escala log.
+    Con conn se ejecuta en esa conexión en lugar de en la sesión.
+    """
+    write_paths.upsert_accumulate(
+        model, rows, keys=(key,), conn=conn,
+        combine=lambda new: {"score": _log_sum(model.score, new.score), "updated_at": datetime.utcnow()},
+    )
+
+
+# --- búfer de temas ------------------------------------------------------------
+
+class TopicBuffer:
+    """Términos de tema ya confirmados y aún sin volcar: {topic: score log}."""
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._since = None
+
+    def add(self, terms):
+        with self._lock:
+            for topic, x in terms.items():
+                self._pending[topic] = logaddexp(self._pending.get(topic), x)
+            if self._pending and self._since is None:
+                self._since = self._clock()
+
+    def due(self, seconds):
+        since = self._since
+        return since is not None and self._clock() - since >= seconds
+
+    def drain(self):
+        with self._lock:
+            pending, self._pending, self._since = self._pending, {}, None
+        return pending
+
+
+def _buffer():
+    return current_app.extensions["trending_topics"]
+
+
+def _queue_topics(terms):
+    """Términos de tema de la transacción en curso; al buffer cuando se confirme."""
+    pending = db.session.info.setdefault("trending_topics", {})
+    for topic, x in terms.items():
+        pending[topic] = logaddexp(pending.get(topic), x)
+
+
+def _after_commit(session):
+    terms = session.info.pop("trending_topics", None)
+    if terms:
+        _buffer().add(terms)
+
+
+def _after_rollback(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop("trending_topics", None)
+
+
+def flush_topics():
+    """Vuelca el búfer del worker a topic_trend en su propia transacción."""
+    buffer = _buffer()
+    pending = buffer.drain()
+    if not pending:
+        return 0
+    try:
+        with db.engine.begin() as conn:
+            _accumulate(TopicTrend, "topic", [{"topic": t, "score": x} for t, x in pending.items()], conn)
+    except Exception:
+        buffer.add(pending)
+        raise
+    return len(pending)
+
+
+def _flush_if_due(response):
+    seconds = current_app.config.get("TRENDING_TOPIC_FLUSH_SECONDS", DEFAULT_TOPIC_FLUSH_SECONDS)
+    if _buffer().due(seconds):
+        try:
+            flush_topics()
+        except Exception:
+            current_app.logger.exception("No se pudo volcar el búfer de temas")
+    return response
+
+
+def record(post_ids, kind, at=None):
+    """Suma un evento `kind` (like/repost) en cada post de post_ids y en su tema."""
+    if not post_ids or not enabled():
+        return
+    at = at or datetime.utcnow()
+    weight = _weight(kind)
+    posts = db.session.execute(
+        select(Post.id, Post.topic, Post.created_at).where(Post.id.in_(post_ids))
+    ).all()
+    x = log_term(at, weight)
+    _accumulate(PostTrend, "post_id", [
+        {"post_id": pid, "topic": topic, "post_created_at": created or at, "score": x}
+        for pid, topic, created in posts
+    ])
+    per_topic = defaultdict(int)
+    for _, topic, _ in posts:
+        per_topic[topic] += 1
+    _queue_topics({topic: log_term(at, weight * n) for topic, n in per_topic.items()})
+
+
+def record_post(post):
+    """Alta del post recién creado (con id ya asignado): su peso inicial es la recencia."""
+    if not enabled():
+        return
+    at = post.created_at or datetime.utcnow()
+    x = log_term(at, _weight("post"))
+    _accumulate(PostTrend, "post_id", [
+        {"post_id": post.id, "topic": post.topic, "post_created_at": at, "score": x}
+    ])
+    _queue_topics({post.topic: x})
+
+
+# --- lectura -------------------------------------------------------------------
+
+def trending_posts(topic=None, window_hours=None, limit=20, now=None):
+    """
+    [(Post, puntuación_actual)] de mayor a menor, en una consulta sobre
+    ix_post_trend_topic_score (o ix_post_trend_score sin tema).
+    """
+    q = (
+        select(Post, PostTrend.score)
+        .join(PostTrend, PostTrend.post_id == Post.id)
+        .where(Post.visible())
+        .options(joinedload(Post.author))
+        .order_by(PostTrend.score.desc(), PostTrend.post_id.desc())
+        .limit(limit)
+    )
+    if topic:
+        q = q.where(PostTrend.topic == topic)
+    now = now or datetime.utcnow()
+    if window_hours:
+        q = q.where(PostTrend.post_created_at >= now - timedelta(hours=window_hours))
+    return [(post, current_score(score, now)) for post, score in db.session.execute(q).all()]
+
+
+def trending_topics(limit=10, now=None):
+    flush_topics()
+    now = now or datetime.utcnow()
+    rows = db.session.execute(
+        select(TopicTrend.topic, TopicTrend.score).order_by(TopicTrend.score.desc()).limit(limit)
+    ).all()
+    return [(topic, current_score(score, now)) for topic, score in rows]
+
+
+# --- reconstrucción ------------------------------------------------------------
+
+def rebuild(days=None, on_phase=None):
+    """
+    Recalcula las tablas desde cero con los posts de los últimos `days` días
+    y sus likes/reposts, leídos en streaming (yield_per); las filas de posts
+    más antiguos se borran. Hace commit al final. Devuelve el nº de posts
+    puntuados.
+    """
+    days = days or current_app.config.get("TRENDING_REBUILD_DAYS", DEFAULT_REBUILD_DAYS)
+    # Lo pendiente de este worker ya está en post_like/repost
+    _buffer().drain()
+    since = datetime.utcnow() - timedelta(days=days)
+    rate = decay_rate()
+    in_window = (Post.created_at >= since, Post.deleted_at.is_(None))
+
+    scores, topics, created = {}, {}, {}
+    w_post = _weight("post")
+    for pid, topic, at in db.session.execute(
+        select(Post.id, Post.topic, Post.created_at).where(*in_window)
+        .execution_options(yield_per=write_paths.REBUILD_YIELD_PER)
+    ):
+        scores[pid] = log_term(at, w_post, rate)
+        topics[pid] = topic
+        created[pid] = at
+    if on_phase:
+        on_phase("posts", len(scores))
+
+    events = (
+        ("like", select(PostLike.post_id, PostLike.created_at)
+         .join(Post, Post.id == PostLike.post_id).where(*in_window)),
+        ("repost", select(Repost.original_post_id, Repost.created_at)
+         .join(Post, Post.id == Repost.original_post_id).where(*in_window)),
+    )
+    for kind, stmt in events:
+        log_w = math.log(_weight(kind))
+        n = 0
+        for pid, at in db.session.execute(stmt.execution_options(yield_per=write_paths.REBUILD_YIELD_PER)):
+            x = log_w + rate * ((at or created[pid]) - EPOCH).total_seconds()
+            scores[pid] = logaddexp(scores[pid], x)
+            n += 1
+        if on_phase:
+            on_phase(kind, n)
+
+    per_topic = {}
+    for pid, score in scores.items():
+        per_topic[topics[pid]] = logaddexp(per_topic.get(topics[pid]), score)
+
+    now = datetime.utcnow()
+    write_paths.replace_rows(PostTrend, [
+        {"post_id": pid, "topic": topics[pid], "post_created_at": created[pid],
+         "score": score, "updated_at": now}
+        for pid, score in scores.items()
+    ])
+    write_paths.replace_rows(TopicTrend, [
+        {"topic": topic, "score": score, "updated_at": now} for topic, score in per_topic.items()
+    ])
+    db.session.commit()
+    return len(scores)
+
+
+@job_handler("rebuild_trending")
+def _rebuild_trending_job(job):
+    counts = {}
+
+    def on_phase(phase, n):
+        counts[phase] = n
+        checkpoint(job, phase=phase, counts=dict(counts))
+
+    return str(rebuild(job.payload.get("days"), on_phase))
+
+
+def init_trending(app):
+    app.extensions["trending_topics"] = TopicBuffer()
+    app.after_request(_flush_if_due)
+    if not event.contains(RoutingSession, "after_commit", _after_commit):
+        event.listen(RoutingSession, "after_commit", _after_commit)
+        event.listen(RoutingSession, "after_soft_rollback", _after_rollback)
+
+    @app.cli.command("rebuild-trending")
+    def rebuild_trending_command():
+        """Recalcula las tendencias (backfill y corrección periódica, p.ej. desde un cron)."""
+        print(f"Posts puntuados: {rebuild()}")
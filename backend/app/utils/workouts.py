@@ -0,0 +1,282 @@
+# app/utils/workouts.py
+"""
+Importación de entrenamientos (GPX, y FIT si está instalado fitdecode).
+
+La petición sólo guarda el fichero en disco y encola el job import_workout;
+el job:
+1. Lee la traza en streaming (iterparse / FitReader), por trozos de CHUNK
+   puntos: la memoria no depende del tamaño del fichero.
+2. Acumula por columnas distancia (haversine por tramos), desnivel, tiempo
+   y la caja de la traza, y guarda una muestra de puntos separados al menos
+   SAMPLE_SPACING_KM para el emparejado.
+3. Empareja la traza con las actividades activas cuyo punto queda a menos
+   de MATCH_RADIUS_KM de la muestra (una consulta por la caja).
+4. Escribe un UserActivity por actividad emparejada, en el mismo commit
+   que el punto de control. La distancia y la duración reales de la traza
+   se reparten entre las actividades emparejadas (la suma es la de la
+   traza, no n veces ella); el desnivel se guarda en cada una.
+"""
+import json
+import os
+import uuid
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+
+from flask import current_app
+from sqlalchemy import select
+
+from .. import db
+from ..models import Activity
+from . import geohash, write_paths
+from .jobs import checkpoint, job_handler
+
+try:  # opcional
+    import fitdecode
+except ImportError:  # pragma: no cover - depende del entorno
+    fitdecode = None
+
+FORMATS = ("gpx", "fit")
+CHUNK = 1000
+SAMPLE_SPACING_KM = 0.05
+MAX_SAMPLE = 5000
+MATCH_RADIUS_KM = 0.2
+FIT_SEMICIRCLE = 180.0 / 2 ** 31
+
+
+def supported_formats():
+    return tuple(f for f in FORMATS if f != "fit" or fitdecode is not None)
+
+
+def import_dir():
+    path = current_app.config.get("WORKOUT_IMPORT_DIR") or os.path.join(current_app.instance_path, "imports")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def save_upload(file, fmt):
+    """Copia el fichero subido a import_dir (por bloques) y devuelve la ruta."""
+    path = os.path.join(import_dir(), f"{uuid.uuid4().hex}.{fmt}")
+    file.save(path)
+    return path
+
+
+def _utc(value):
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def iter_gpx(fileobj):
+    """(lat, lng, ele|None, time|None) de cada <trkpt>, sin cargar el documento."""
+    segment = None
+    for event, elem in ET.iterparse(fileobj, events=("start", "end")):
+        tag = _local(elem.tag)
+        if event == "start":
+            if tag == "trkseg":
+                segment = elem
+            continue
+        if tag != "trkpt":
+            continue
+        ele = at = None
+        for child in elem:
+            name = _local(child.tag)
+            if name == "ele" and child.text:
+                ele = float(child.text)
+            elif name == "time" and child.text:
+                at = _utc(datetime.fromisoformat(child.text.strip()))
+        yield float(elem.get("lat")), float(elem.get("lon")), ele, at
+        # Los puntos ya leídos no se quedan colgando del árbol
+        elem.clear()
+        if segment is not None:
+            segment.clear()
+
+
+def iter_fit(fileobj):
+    """(lat, lng, ele|None, time|None) de cada mensaje record con posición."""
+    if fitdecode is None:
+        raise ValueError("Importar FIT requiere el paquete fitdecode")
+    with fitdecode.FitReader(fileobj) as fit:
+        for frame in fit:
+            if frame.frame_type != fitdecode.FIT_FRAME_DATA or frame.name != "record":
+                continue
+            lat = frame.get_value("position_lat", fallback=None)
+            lng = frame.get_value("position_long", fallback=None)
+            if lat is None or lng is None:
+                continue
+            ele = frame.get_value("enhanced_altitude", fallback=None)
+            if ele is None:
+                ele = frame.get_value("altitude", fallback=None)
+            yield lat * FIT_SEMICIRCLE, lng * FIT_SEMICIRCLE, ele, _utc(frame.get_value("timestamp", fallback=None))
+
+
+def chunks(points, size=CHUNK):
+    """Agrupa los puntos en columnas (lats, lngs, eles, times) de `size` filas."""
+    batch = []
+    for point in points:
+        batch.append(point)
+        if len(batch) == size:
+            yield tuple(zip(*batch))
+            batch = []
+    if batch:
+        yield tuple(zip(*batch))
+
+
+class TrackStats:
+    """Resumen acumulado de una traza; se alimenta por trozos de columnas."""
+
+    def __init__(self):
+        self.points = 0
+        self.distance_km = 0.0
+        self.elevation_gain_m = 0.0
+        self.elevation_loss_m = 0.0
+        self.started_at = None
+        self.finished_at = None
+        self.box = None  # [lat_min, lat_max, lng_min, lng_max]
+        self.sample_lats, self.sample_lngs = [], []
+        self._last = None  # último punto del trozo anterior (lat, lng, ele)
+
+    def add(self, lats, lngs, eles, times):
+        if self._last is not None:
+            lats, lngs, eles = (self._last[0],) + lats, (self._last[1],) + lngs, (self._last[2],) + eles
+        self.distance_km += sum(geohash.segments_km(lats, lngs))
+
+        known = [e for e in eles if e is not None]
+        diffs = [b - a for a, b in zip(known, known[1:])]
+        self.elevation_gain_m += sum(d for d in diffs if d > 0)
+        self.elevation_loss_m -= sum(d for d in diffs if d < 0)
+
+        stamps = [t for t in times if t is not None]
+        if stamps:
+            self.started_at = self.started_at or stamps[0]
+            self.finished_at = stamps[-1]
+
+        box = [min(lats), max(lats), min(lngs), max(lngs)]
+        if self.box is not None:
+            box = [min(box[0], self.box[0]), max(box[1], self.box[1]),
+                   min(box[2], self.box[2]), max(box[3], self.box[3])]
+        self.box = box
+
+        self._sample(lats, lngs)
+        last_ele = known[-1] if known else (self._last[2] if self._last else None)
+        self._last = (lats[-1], lngs[-1], last_ele)
+        self.points += len(times)
+
+    def _sample(self, lats, lngs):
+        for lat, lng in zip(lats, lngs):
+            if len(self.sample_lats) >= MAX_SAMPLE:
+                return
+            if self.sample_lats and geohash.haversine_km(
+                lat, lng, self.sample_lats[-1:], self.sample_lngs[-1:]
+            )[0] < SAMPLE_SPACING_KM:
+                continue
+            self.sample_lats.append(lat)
+            self.sample_lngs.append(lng)
+
+    @property
+    def duration_sec(self):
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return int((self.finished_at - self.started_at).total_seconds())
+
+    def to_dict(self):
+        return {
+            "points": self.points,
+            "distance_km": round(self.distance_km, 3),
+            "duration_sec": self.duration_sec,
+            "elevation_gain_m": round(self.elevation_gain_m),
+            "elevation_loss_m": round(self.elevation_loss_m),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+        }
+
+
+def match_activities(stats, radius_km=MATCH_RADIUS_KM):
+    """Ids de las actividades activas cuyo punto queda a menos de radius_km de la traza."""
+    if stats.box is None:
+        return []
+    lat_min, lat_max, lng_min, lng_max = stats.box
+    pad_lat = radius_km / geohash.KM_PER_DEG_LAT
+    # El margen en longitud crece con la latitud: se usa la más alejada del ecuador
+    _, _, _, pad_lng = geohash.bounding_box(max(abs(lat_min), abs(lat_max)), 0.0, radius_km)
+    rows = db.session.execute(
+        select(Activity.id, Activity.lat, Activity.lng).where(
+            Activity.is_active.is_(True),
+            Activity.lat.between(lat_min - pad_lat, lat_max + pad_lat),
+            Activity.lng.between(lng_min - pad_lng, lng_max + pad_lng),
+        ).order_by(Activity.id)
+    ).all()
+    return [
+        activity_id for activity_id, lat, lng in rows
+        if min(geohash.haversine_km(float(lat), float(lng), stats.sample_lats, stats.sample_lngs)) <= radius_km
+    ]
+
+
+def read_track(path, fmt, on_chunk=None):
+    """Lee el fichero por trozos y devuelve su TrackStats."""
+    stats = TrackStats()
+    reader = iter_fit if fmt == "fit" else iter_gpx
+    with open(path, "rb") as f:
+        for lats, lngs, eles, times in chunks(reader(f)):
+            stats.add(lats, lngs, eles, times)
+            if on_chunk:
+                on_chunk(stats)
+    return stats
+
+
+def _split(total, n, digits=None):
+    """Reparte total en n partes iguales; el resto del redondeo va a la primera."""
+    if not n or total is None:
+        return [None] * n
+    share = round(total / n, digits) if digits is not None else total // n
+    first = total - share * (n - 1)
+    return [round(first, digits) if digits is not None else first] + [share] * (n - 1)
+
+
+def _discard(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+@job_handler("import_workout")
+def _import_workout_job(job):
+    path, fmt = job.payload["path"], job.payload["format"]
+    progress = job.progress or {}
+    if "recorded" in progress:  # retomado tras escribir: no duplicar
+        return json.dumps(progress["summary"])
+
+    try:
+        stats = read_track(path, fmt, on_chunk=lambda s: checkpoint(job, points=s.points))
+    except (ET.ParseError, ValueError, TypeError) as e:
+        _discard(path)
+        raise ValueError(f"Fichero {fmt.upper()} no válido: {e}") from e
+    if not stats.points:
+        _discard(path)
+        raise ValueError("El fichero no contiene puntos de track")
+
+    matched = match_activities(stats)
+    done_at = stats.started_at or datetime.utcnow()
+    distances = _split(round(stats.distance_km, 2), len(matched), digits=2)
+    durations = _split(stats.duration_sec, len(matched))
+    write_paths.record_completions(job.user_id, [
+        {
+            "activity_id": activity_id,
+            "done_at": done_at,
+            "duration_sec": duration,
+            "distance_km": distance,
+            "elevation_gain_m": round(stats.elevation_gain_m),
+            "notes": f"Importado de {fmt.upper()}",
+            "idempotency_key": f"import:{job.id}:{activity_id}",
+        }
+        for activity_id, distance, duration in zip(matched, distances, durations)
+    ])
+    summary = {**stats.to_dict(), "matched_activity_ids": matched}
+    checkpoint(job, recorded=len(matched), summary=summary)
+    _discard(path)
+    return json.dumps(summary)
@@ -0,0 +1,384 @@
+# app/utils/write_paths.py
+"""
+Escrituras idempotentes para likes, bookmarks, reposts, follows y
+completaciones de actividades.
+
+Cada toggle es un par de sentencias: INSERT ... ON CONFLICT DO NOTHING
+RETURNING (o DELETE ... RETURNING) y, sólo si ha cambiado algo, el UPDATE
+del contador. No hay SELECT previo ni se depende de capturar
+IntegrityError, así que dos clics simultáneos no provocan rollbacks.
+
+Los likes y reposts nuevos también suman en las tendencias
+(app/utils/trending.py), y los likes en el vector de temas del usuario
+(user_interest, que usa el feed for_you). Las completaciones de
+actividades suman en las estadísticas (app/utils/activity_stats.py) y
+en los logros (app/utils/achievements.py).
+
+upsert_accumulate() y replace_rows() son las piezas comunes de los
+contadores agregados (tendencias, estadísticas, logros): sumar sobre la
+fila existente sin leerla y reconstruir una tabla en lotes.
+
+Las funciones no hacen commit: lo decide la ruta que las llama.
+"""
+from datetime import datetime
+from types import SimpleNamespace
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from .. import db
+from ..models import Activity, Post, PostLike, Bookmark, Repost, User, UserActivity, follow
+from ..models.user_interest_model import UserInterest
+from . import achievements, activity_stats, follow_graph, trending
+
+_DIALECT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+REBUILD_YIELD_PER = 5000
+REBUILD_INSERT_BATCH = 1000
+
+
+def _dialect():
+    return db.session.get_bind().dialect
+
+
+def insert_ignore(table, rows, returning, conn=None):
+    """
+    Inserta `rows` ignorando las que chocan con una restricción única.
+    Devuelve las filas realmente insertadas (columnas de `returning`).
+    Con conn se ejecuta en esa conexión en lugar de en la sesión.
+    """
+    if not rows:
+        return []
+    target = conn if conn is not None else db.session
+    dialect = conn.dialect if conn is not None else _dialect()
+    dialect_insert = _DIALECT_INSERTS.get(dialect.name)
+    if dialect_insert is not None:
+        stmt = (
+            dialect_insert(table)
+            .values(rows)
+            .on_conflict_do_nothing()
+            .returning(*returning)
+        )
+        return target.execute(stmt).all()
+
+    # Otros motores: fila a fila dentro de un savepoint
+    inserted = []
+    for row in rows:
+        try:
+            with target.begin_nested():
+                inserted.extend(target.execute(insert(table).values(row).returning(*returning)).all())
+        except IntegrityError:
+            pass
+    return inserted
+
+
+def upsert_accumulate(model, rows, keys, combine, conn=None):
+    """
+    INSERT de rows que, si ya hay una fila con las mismas `keys`, la combina
+    con la nueva sin leerla: combine(new) devuelve {columna: expresión},
+    donde new.<columna> es el valor que se intentaba insertar.
+    Con conn se ejecuta en esa conexión en lugar de en la sesión.
+    """
+    if not rows:
+        return
+    target = conn if conn is not None else db.session
+    dialect = conn.dialect if conn is not None else _dialect()
+    dialect_insert = _DIALECT_INSERTS.get(dialect.name)
+    if dialect_insert is not None:
+        stmt = dialect_insert(model).values(rows)
+        target.execute(stmt.on_conflict_do_update(index_elements=list(keys), set_=combine(stmt.excluded)))
+        return
+
+    # Otros motores: UPDATE y, si no había fila, INSERT
+    for row in rows:
+        n = target.execute(
+            update(model)
+            .where(*(getattr(model, k) == row[k] for k in keys))
+            .values(combine(SimpleNamespace(**row)))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not n:
+            target.execute(insert(model).values(row))
+
+
+def insert_in_batches(model, rows):
+    """INSERT de rows en lotes de REBUILD_INSERT_BATCH filas (executemany)."""
+    for i in range(0, len(rows), REBUILD_INSERT_BATCH):
+        db.session.execute(insert(model), rows[i:i + REBUILD_INSERT_BATCH])
+
+
+def replace_rows(model, rows, *where):
+    """Borra las filas de model que cumplen where (todas, sin where) e inserta rows."""
+    db.session.execute(delete(model).where(*where))
+    insert_in_batches(model, rows)
+
+
+def delete_returning(table, where, returning):
+    """DELETE que devuelve las filas borradas (columnas de `returning`)."""
+    if _dialect().delete_returning:
+        return db.session.execute(delete(table).where(*where).returning(*returning)).all()
+    rows = db.session.execute(select(*returning).where(*where)).all()
+    db.session.execute(delete(table).where(*where))
+    return rows
+
+
+def _bump_posts(column, post_ids, delta):
+    if post_ids:
+        db.session.execute(
+            update(Post)
+            .where(Post.id.in_(post_ids))
+            .values({column: func.coalesce(column, 0) + delta})
+        )
+
+
+def bump_users(column, user_ids, delta):
+    """Suma delta a un contador de User (followers/following/posts_count)."""
+    if user_ids:
+        db.session.execute(
+            update(User)
+            .where(User.id.in_(user_ids))
+            .values({column: func.coalesce(column, 0) + delta})
+        )
+
+
+def _bump_interest(user_id, post_ids, delta):
+    """Suma delta al peso de cada tema de post_ids en el vector del usuario."""
+    if not post_ids:
+        return
+    per_topic = db.session.execute(
+        select(Post.topic, func.count()).where(Post.id.in_(post_ids)).group_by(Post.topic)
+    ).all()
+    if delta < 0:
+        for topic, n in per_topic:
+            db.session.execute(
+                update(UserInterest)
+                .where(UserInterest.user_id == user_id, UserInterest.topic == topic)
+                .values(weight=UserInterest.weight - n)
+                .execution_options(synchronize_session=False)
+            )
+        return
+    upsert_accumulate(
+        UserInterest,
+        [{"user_id": user_id, "topic": topic, "weight": n} for topic, n in per_topic],
+        keys=("user_id", "topic"),
+        combine=lambda new: {"weight": UserInterest.weight + new.weight},
+    )
+
+
+def drop_liked_topic(post_id, user_ids=None):
+    """
+    Resta el tema del post del vector de quienes le dieron like (todos, o
+    sólo user_ids) antes de borrar esos likes. Equivale a _bump_interest(u,
+    [post_id], -1) por cada u, en una sola sentencia.
+    """
+    likers = select(PostLike.user_id).where(PostLike.post_id == post_id)
+    if user_ids is not None:
+        likers = likers.where(PostLike.user_id.in_(user_ids))
+    topic = select(Post.topic).where(Post.id == post_id).scalar_subquery()
+    db.session.execute(
+        update(UserInterest)
+        .where(UserInterest.topic == topic, UserInterest.user_id.in_(likers))
+        .values(weight=UserInterest.weight - 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _like_count(post_id):
+    return db.session.execute(select(Post.like_count).where(Post.id == post_id)).scalar() or 0
+
+
+# --- likes -------------------------------------------------------------------
+
+def _live_post_ids(post_ids):
+    """De post_ids, los que existen y no están borrados en diferido."""
+    if not post_ids:
+        return []
+    return db.session.scalars(
+        select(Post.id).where(Post.id.in_(set(post_ids)), Post.deleted_at.is_(None))
+    ).all()
+
+
+def like_many(user_id, post_ids):
+    """Marca like en varios posts. Devuelve los post_id que eran nuevos."""
+    post_ids = _live_post_ids(post_ids)
+    rows = insert_ignore(
+        PostLike,
+        [{"user_id": user_id, "post_id": pid} for pid in post_ids],
+        returning=(PostLike.post_id,),
+    )
+    inserted = [r[0] for r in rows]
+    _bump_posts(Post.like_count, inserted, +1)
+    _bump_interest(user_id, inserted, +1)
+    trending.record(inserted, "like")
+    return inserted
+
+
+def unlike_many(user_id, post_ids):
+    if not post_ids:
+        return []
+    rows = delete_returning(
+        PostLike,
+        (PostLike.user_id == user_id, PostLike.post_id.in_(post_ids)),
+        returning=(PostLike.post_id,),
+    )
+    removed = [r[0] for r in rows]
+    _bump_posts(Post.like_count, removed, -1)
+    _bump_interest(user_id, removed, -1)
+    return removed
+
+
+def like(user_id, post_id):
+    """Devuelve (cambiado, likes_actuales)."""
+    changed = bool(like_many(user_id, [post_id]))
+    return changed, _like_count(post_id)
+
+
+def unlike(user_id, post_id):
+    changed = bool(unlike_many(user_id, [post_id]))
+    return changed, _like_count(post_id)
+
+
+# --- bookmarks ---------------------------------------------------------------
+
+def bookmark_many(user_id, post_ids):
+    post_ids = _live_post_ids(post_ids)
+    rows = insert_ignore(
+        Bookmark,
+        [{"user_id": user_id, "post_id": pid} for pid in post_ids],
+        returning=(Bookmark.post_id,),
+    )
+    return [r[0] for r in rows]
+
+
+def unbookmark_many(user_id, post_ids):
+    if not post_ids:
+        return []
+    rows = delete_returning(
+        Bookmark,
+        (Bookmark.user_id == user_id, Bookmark.post_id.in_(post_ids)),
+        returning=(Bookmark.post_id,),
+    )
+    return [r[0] for r in rows]
+
+
+def bookmark(user_id, post_id):
+    return bool(bookmark_many(user_id, [post_id]))
+
+
+def unbookmark(user_id, post_id):
+    return bool(unbookmark_many(user_id, [post_id]))
+
+
+# --- reposts -----------------------------------------------------------------
+
+def repost_many(user_id, comments_by_post):
+    """
+    comments_by_post: {post_id: comment_text|None}.
+    Devuelve {post_id: repost_id} de los reposts creados.
+    """
+    live = set(_live_post_ids(list(comments_by_post)))
+    comments_by_post = {pid: c for pid, c in comments_by_post.items() if pid in live}
+    rows = insert_ignore(
+        Repost,
+        [
+            {"user_id": user_id, "original_post_id": pid, "comment_text": comment}
+            for pid, comment in comments_by_post.items()
+        ],
+        returning=(Repost.original_post_id, Repost.id),
+    )
+    created = {pid: rid for pid, rid in rows}
+    _bump_posts(Post.repost_count, list(created), +1)
+    trending.record(list(created), "repost")
+    return created
+
+
+def repost(user_id, post_id, comment_text=None):
+    """Devuelve el id del repost creado, o None si ya existía."""
+    return repost_many(user_id, {post_id: comment_text}).get(post_id)
+
+
+def unrepost(user_id, post_id):
+    rows = delete_returning(
+        Repost,
+        (Repost.user_id == user_id, Repost.original_post_id == post_id),
+        returning=(Repost.original_post_id,),
+    )
+    _bump_posts(Post.repost_count, [r[0] for r in rows], -1)
+    return bool(rows)
+
+
+# --- follows -----------------------------------------------------------------
+
+def _follow_changed(follower_id, followed_id, changed, delta):
+    if changed:
+        bump_users(User.following_count, [follower_id], delta)
+        bump_users(User.followers_count, [followed_id], delta)
+        follow_graph.queue_invalidation(following=[follower_id], followers=[followed_id])
+
+
+def follow_user(follower_id, followed_id):
+    rows = insert_ignore(
+        follow,
+        [{"follower_id": follower_id, "followed_id": followed_id}],
+        returning=(follow.c.followed_id,),
+    )
+    _follow_changed(follower_id, followed_id, rows, +1)
+    return bool(rows)
+
+
+def unfollow_user(follower_id, followed_id):
+    rows = delete_returning(
+        follow,
+        (follow.c.follower_id == follower_id, follow.c.followed_id == followed_id),
+        returning=(follow.c.followed_id,),
+    )
+    _follow_changed(follower_id, followed_id, rows, -1)
+    return bool(rows)
+
+
+# --- completaciones de actividades -------------------------------------------
+
+COMPLETION_FIELDS = ("activity_id", "done_at", "duration_sec", "distance_km",
+                     "elevation_gain_m", "notes", "idempotency_key")
+
+
+def record_completions(user_id, completions):
+    """
+    Registra completaciones de actividades del usuario en un solo INSERT.
+    `completions`: dicts con activity_id y done_at (y, opcionales, el resto
+    de COMPLETION_FIELDS). Las que repiten una idempotency_key ya usada por el
+    usuario se ignoran. Devuelve las filas insertadas
+    (id, activity_id, idempotency_key).
+
+    Es el único camino de escritura de user_activity (completar a mano,
+    lotes de wearables, importación GPX/FIT).
+    """
+    now = datetime.utcnow()
+    rows = [
+        {"user_id": user_id, "created_at": now, **{f: c.get(f) for f in COMPLETION_FIELDS}}
+        for c in completions
+    ]
+    inserted = insert_ignore(
+        UserActivity.__table__,
+        rows,
+        returning=(UserActivity.id, UserActivity.activity_id, UserActivity.idempotency_key),
+    )
+    # Las estadísticas se actualizan una vez por lote y sólo con lo insertado
+    # (sin clave siempre se inserta; con clave, la primera vez)
+    new_keys = {key for _, _, key in inserted if key is not None}
+    counted = []
+    for row in rows:
+        key = row["idempotency_key"]
+        if key is None or key in new_keys:
+            counted.append(row)
+            new_keys.discard(key)
+    if counted:
+        activities = {
+            row.id: row for row in db.session.execute(
+                select(Activity.id, Activity.city_id, Activity.type, Activity.difficulty, Activity.distance_km)
+                .where(Activity.id.in_({c["activity_id"] for c in counted}))
+            )
+        }
+        activity_stats.record(user_id, counted, activities)
+        achievements.record(user_id, counted, activities)
+    return inserted
@@ -0,0 +1,81 @@
+# backend/benchmarks/login_bench.py
+"""
+Throughput de /auth/login con varios hilos concurrentes.
+
+    cd backend
+    python benchmarks/login_bench.py --threads 8 --requests 200 --rounds 12
+
+Crea usuarios en una SQLite temporal y lanza logins (válidos e inválidos)
+desde un pool de hilos contra el test client. BCRYPT_THREADS limita cuántos
+hashes se calculan a la vez; con --bcrypt-threads se puede comparar.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "bench")
+
+from app import create_app, db  # noqa: E402
+from app.models.user_model import User  # noqa: E402
+
+N_USERS = 20
+PASSWORD = "bench-pass"
+
+
+def _setup(rounds, bcrypt_threads):
+    path = os.path.join(tempfile.mkdtemp(), "login_bench.db")
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}",
+        "BCRYPT_ROUNDS": rounds,
+        "BCRYPT_THREADS": bcrypt_threads,
+        "COMPRESS_ENABLED": False,
+    })
+    with app.app_context():
+        db.create_all()
+        for i in range(N_USERS):
+            user = User(username=f"bench{i}", name=f"Bench{i}", email=f"bench{i}@example.com")
+            user.set_password(PASSWORD)
+            db.session.add(user)
+        db.session.commit()
+    return app
+
+
+def run(threads, total, rounds, bcrypt_threads):
+    app = _setup(rounds, bcrypt_threads)
+    client = app.test_client()
+
+    def one(i):
+        ident = f"bench{i % N_USERS}@example.com" if i % 2 else f"bench{i % N_USERS}"
+        password = PASSWORD if i % 5 else "wrong"
+        t0 = time.perf_counter()
+        rv = client.post("/auth/login", json={"email": ident, "password": password})
+        assert rv.status_code in (200, 401), rv.status_code
+        return time.perf_counter() - t0
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = [t * 1000 for t in pool.map(one, range(total))]
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"rounds={rounds} threads={threads} bcrypt_threads={bcrypt_threads}")
+    print(f"  {total / elapsed:8.1f} logins/s")
+    print(f"  latencia: median {statistics.median(latencies):.1f} ms   p95 {p95:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--bcrypt-threads", type=int, default=4)
+    args = parser.parse_args()
+    run(args.threads, args.requests, args.rounds, args.bcrypt_threads)
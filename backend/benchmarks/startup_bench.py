@@ -0,0 +1,102 @@
+# backend/benchmarks/startup_bench.py
+"""
+Tiempo hasta la primera petición (time-to-first-request).
+
+    cd backend
+    python benchmarks/startup_bench.py                # proceso nuevo + test client
+    python benchmarks/startup_bench.py --gunicorn     # gunicorn -c gunicorn.conf.py real
+
+Cada repetición arranca un intérprete limpio, así que mide imports,
+create_app() y la primera respuesta tal como los vería un host recién
+escalado.
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+_CHILD = r"""
+import time
+t0 = time.perf_counter()
+from app import create_app
+t1 = time.perf_counter()
+app = create_app()
+t2 = time.perf_counter()
+rv = app.test_client().get("/api/health/")
+t3 = time.perf_counter()
+assert rv.status_code == 200, rv.status_code
+print(f"{t1 - t0:.6f} {t2 - t1:.6f} {t3 - t2:.6f}")
+"""
+
+
+def _env():
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite:///:memory:")
+    env.setdefault("SECRET_KEY", "bench")
+    return env
+
+
+def bench_in_process(repeats):
+    rows = []
+    for _ in range(repeats):
+        out = subprocess.run(
+            [sys.executable, "-c", _CHILD],
+            cwd=BACKEND_DIR, env=_env(), check=True, capture_output=True, text=True,
+        ).stdout.split()
+        rows.append([float(x) for x in out])
+    for i, label in enumerate(("import", "create_app", "first request")):
+        values = [r[i] * 1000 for r in rows]
+        print(f"{label:>14}: median {statistics.median(values):8.1f} ms   max {max(values):8.1f} ms")
+    totals = [sum(r) * 1000 for r in rows]
+    print(f"{'total':>14}: median {statistics.median(totals):8.1f} ms   max {max(totals):8.1f} ms")
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def bench_gunicorn(repeats, timeout=60):
+    samples = []
+    for _ in range(repeats):
+        port = _free_port()
+        env = _env()
+        env.update(PORT=str(port), WEB_CONCURRENCY=env.get("WEB_CONCURRENCY", "1"))
+        start = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"],
+            cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            while True:
+                if time.perf_counter() - start > timeout:
+                    raise RuntimeError("gunicorn no respondió a tiempo")
+                try:
+                    with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health/", timeout=1) as r:
+                        if r.status == 200:
+                            break
+                except OSError:
+                    time.sleep(0.02)
+            samples.append((time.perf_counter() - start) * 1000)
+        finally:
+            proc.terminate()
+            proc.wait()
+    print(f"gunicorn time-to-first-request: median {statistics.median(samples):.1f} ms   max {max(samples):.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--gunicorn", action="store_true")
+    args = parser.parse_args()
+    if args.gunicorn:
+        bench_gunicorn(args.repeats)
+    else:
+        bench_in_process(args.repeats)
@@ -0,0 +1,141 @@
+# backend/benchmarks/trending_bench.py
+"""
+Tendencias sobre un dataset sintético (por defecto 1M likes).
+
+    cd backend
+    python benchmarks/trending_bench.py --likes 1000000 --posts 50000 --users 20000
+
+Genera en una SQLite temporal posts de los últimos 14 días con popularidad
+de cola larga (Pareto) y mide:
+  - rebuild(): recálculo completo en streaming (backfill / cron)
+  - registro incremental: likes nuevos vía write_paths (UPSERT log-space)
+  - GET /api/posts/trending?topic=...: latencia de la consulta indexada
+  - como referencia, el GROUP BY equivalente sobre post_like
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "bench")
+
+from app import create_app, db  # noqa: E402
+from app.utils import trending, write_paths  # noqa: E402
+
+TOPICS = ("Running", "Gym", "Yoga", "Cycling", "Swimming", "Nutrition", "Hiking", "General")
+DAYS = 14
+
+
+def _populate(path, n_users, n_posts, n_likes, seed):
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    con = sqlite3.connect(path)
+    con.executemany(
+        "INSERT INTO user (id, username, name, email, password_hash, ocultar_info, created_at, updated_at) "
+        "VALUES (?, ?, ?, ?, 'x', 1, ?, ?)",
+        ((i, f"u{i}", f"U{i}", f"u{i}@example.com", now, now) for i in range(1, n_users + 1)),
+    )
+
+    created = []
+    posts = []
+    for pid in range(1, n_posts + 1):
+        at = now - timedelta(seconds=rng.randrange(DAYS * 86400))
+        created.append(at)
+        posts.append((pid, rng.randrange(1, n_users + 1), rng.choice(TOPICS), f"post {pid}", at))
+    con.executemany(
+        "INSERT INTO post (id, user_id, topic, text, created_at, like_count, repost_count, is_hidden) "
+        "VALUES (?, ?, ?, ?, ?, 0, 0, 0)", posts)
+
+    # Popularidad de cola larga, normalizada a n_likes y acotada por n_users
+    weights = [rng.paretovariate(1.2) for _ in range(n_posts)]
+    scale = n_likes / sum(weights)
+    counts = [min(n_users, int(w * scale)) for w in weights]
+
+    def likes():
+        for idx, k in enumerate(counts):
+            pid, start = idx + 1, rng.randrange(n_users)
+            span = (now - created[idx]).total_seconds()
+            for j in range(k):
+                yield ((start + j) % n_users + 1, pid,
+                       created[idx] + timedelta(seconds=rng.random() * span))
+
+    t0 = time.perf_counter()
+    con.executemany("INSERT INTO post_like (user_id, post_id, created_at) VALUES (?, ?, ?)", likes())
+    con.commit()
+    total = con.execute("SELECT COUNT(*) FROM post_like").fetchone()[0]
+    con.close()
+    print(f"dataset: {n_users} usuarios, {n_posts} posts, {total} likes "
+          f"({time.perf_counter() - t0:.1f} s de carga)")
+
+
+def _percentiles(samples):
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def run(n_users, n_posts, n_likes, queries, incremental, seed):
+    path = os.path.join(tempfile.mkdtemp(), "trending_bench.db")
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}",
+        "COMPRESS_ENABLED": False,
+        "RATE_LIMIT_ENABLED": False,
+    })
+    with app.app_context():
+        db.create_all()
+    _populate(path, n_users, n_posts, n_likes, seed)
+
+    with app.app_context():
+        t0 = time.perf_counter()
+        scored = trending.rebuild(DAYS)
+        print(f"rebuild():        {time.perf_counter() - t0:8.2f} s ({scored} posts)")
+
+        rng = random.Random(seed + 1)
+        t0 = time.perf_counter()
+        for _ in range(incremental):
+            write_paths.like_many(rng.randrange(1, n_users + 1), [rng.randrange(1, n_posts + 1)])
+            db.session.commit()
+        elapsed = time.perf_counter() - t0
+        print(f"incremental:      {incremental / elapsed:8.1f} likes/s (con commit por like)")
+
+        since = datetime.utcnow() - timedelta(hours=48)
+        con = db.session.connection().connection.driver_connection
+        naive = []
+        for topic in TOPICS[:3]:
+            t0 = time.perf_counter()
+            con.execute(
+                "SELECT post_like.post_id, COUNT(*) AS n FROM post_like JOIN post ON post.id = post_like.post_id "
+                "WHERE post.topic = ? AND post_like.created_at >= ? "
+                "GROUP BY post_like.post_id ORDER BY n DESC LIMIT 20", (topic, since)).fetchall()
+            naive.append((time.perf_counter() - t0) * 1000)
+        print(f"GROUP BY naive:   median {statistics.median(naive):8.1f} ms")
+
+    client = app.test_client()
+    latencies = []
+    for i in range(queries):
+        url = f"/api/posts/trending?topic={TOPICS[i % len(TOPICS)]}&limit=20&fields=text,likes"
+        t0 = time.perf_counter()
+        rv = client.get(url)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        assert rv.status_code == 200, rv.status_code
+    median, p95 = _percentiles(latencies)
+    print(f"GET /trending:    median {median:8.2f} ms   p95 {p95:.2f} ms ({queries} peticiones)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--posts", type=int, default=50000)
+    parser.add_argument("--likes", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--incremental", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=39)
+    args = parser.parse_args()
+    run(args.users, args.posts, args.likes, args.queries, args.incremental, args.seed)
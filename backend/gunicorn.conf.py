@@ -0,0 +1,99 @@
+# backend/gunicorn.conf.py
+"""
+Perfil de despliegue de gunicorn.
+
+    cd backend && gunicorn -c gunicorn.conf.py
+
+Variables de entorno:
+- PORT                    puerto (5000)
+- WEB_CONCURRENCY         nº de workers (2)
+- GUNICORN_THREADS        hilos por worker con gthread (4)
+- GUNICORN_WORKER_CLASS   gthread | gevent | sync (gthread). gevent conviene
+                          cuando pesan las rutas de E/S (email, upload).
+- GUNICORN_PRELOAD        1 = importar la app una vez en el master y
+                          compartirla por fork (1)
+- GUNICORN_MAX_REQUESTS   reciclar el worker tras N peticiones (1000)
+- GUNICORN_MAX_RSS_MB     reciclar el worker si su RSS supera este valor (0 = off)
+- GUNICORN_WARMUP         1 = conectar a la BD y servir una petición interna
+                          antes de aceptar tráfico (1)
+"""
+import os
+
+wsgi_app = "run:app"
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 100))  # gevent
+
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 100))
+max_rss_mb = int(os.environ.get("GUNICORN_MAX_RSS_MB", 0))
+
+warmup = os.environ.get("GUNICORN_WARMUP", "1") == "1"
+
+# El pool de la BD se dimensiona a partir de estos valores (app/utils/db_pool.py)
+os.environ.setdefault("GUNICORN_WORKERS", str(workers))
+os.environ.setdefault("GUNICORN_THREADS", str(threads if worker_class == "gthread" else 1))
+
+
+def _rss_mb():
+    """RSS actual del proceso en MB (Linux); pico de RSS como alternativa."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _flask_app(worker):
+    return worker.app.wsgi()
+
+
+def post_fork(server, worker):
+    if worker_class == "gevent":
+        try:
+            from psycogreen.gevent import patch_psycopg
+            patch_psycopg()
+        except ImportError:
+            server.log.warning("psycogreen no instalado: psycopg2 bloqueará el loop de gevent")
+
+    if preload_app:
+        # Las conexiones abiertas en el master no se pueden compartir entre
+        # procesos: cada worker empieza con pools vacíos.
+        from app import db
+        app = _flask_app(worker)
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    if not warmup:
+        return
+    from sqlalchemy import text
+    from app import db
+
+    app = _flask_app(worker)
+    try:
+        with app.app_context():
+            db.session.execute(text("SELECT 1"))
+            db.session.remove()
+        app.test_client().get("/api/health/")
+    except Exception:
+        worker.log.exception("Warm-up del worker fallido")
+
+
+def post_request(worker, req, environ, resp):
+    if max_rss_mb and _rss_mb() > max_rss_mb:
+        worker.log.info("Worker %s supera %s MB de RSS; se recicla", worker.pid, max_rss_mb)
+        worker.alive = False
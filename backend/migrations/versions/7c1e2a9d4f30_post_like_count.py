@@ -0,0 +1,32 @@
+"""post.like_count counter
+
+Revision ID: 7c1e2a9d4f30
+Revises: 45684e8bd106
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1e2a9d4f30'
+down_revision = '45684e8bd106'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('like_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill desde post_like
+    op.execute(
+        "UPDATE post SET like_count = "
+        "(SELECT COUNT(*) FROM post_like WHERE post_like.post_id = post.id)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.drop_column('like_count')
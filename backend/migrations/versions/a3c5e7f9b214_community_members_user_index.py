@@ -0,0 +1,25 @@
+"""community_members.user_id index for follow suggestions
+
+Revision ID: a3c5e7f9b214
+Revises: f2b4d6e8a1c3
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c5e7f9b214'
+down_revision = 'f2b4d6e8a1c3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('community_members', schema=None) as batch_op:
+        batch_op.create_index('ix_community_members_user_id', ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('community_members', schema=None) as batch_op:
+        batch_op.drop_index('ix_community_members_user_id')
@@ -0,0 +1,36 @@
+"""activity_stat rollups for per-user training statistics
+
+Revision ID: a9c1e3f5b870
+Revises: f8b0c2d4e769
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9c1e3f5b870'
+down_revision = 'f8b0c2d4e769'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('activity_stat',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('granularity', sa.String(length=5), nullable=False),
+    sa.Column('bucket', sa.Date(), nullable=False),
+    sa.Column('type', sa.String(length=50), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('distance_km', sa.Float(), nullable=False),
+    sa.Column('duration_sec', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'granularity', 'bucket', 'type')
+    )
+    # Backfill: `flask rebuild-activity-stats` (se agrega en Python, en streaming)
+
+
+def downgrade():
+    op.drop_table('activity_stat')
@@ -0,0 +1,39 @@
+"""user_achievement state for incremental streaks and badges
+
+Revision ID: b0d2f4a6c981
+Revises: a9c1e3f5b870
+Create Date: 2026-10-19 23:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b0d2f4a6c981'
+down_revision = 'a9c1e3f5b870'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_achievement',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('badges', sa.BigInteger(), nullable=False),
+    sa.Column('completions', sa.Integer(), nullable=False),
+    sa.Column('total_km', sa.Float(), nullable=False),
+    sa.Column('hard_count', sa.Integer(), nullable=False),
+    sa.Column('difficulties', sa.Integer(), nullable=False),
+    sa.Column('current_streak', sa.Integer(), nullable=False),
+    sa.Column('longest_streak', sa.Integer(), nullable=False),
+    sa.Column('last_active_day', sa.Date(), nullable=True),
+    sa.Column('cities', sa.JSON(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    # Backfill: `flask rebuild-achievements` (recorre el historial en streaming)
+
+
+def downgrade():
+    op.drop_table('user_achievement')
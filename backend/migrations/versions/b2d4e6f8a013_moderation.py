@@ -0,0 +1,40 @@
+"""moderation: post.is_hidden, user.is_moderator, report queue index
+
+Revision ID: b2d4e6f8a013
+Revises: 9b3f6d2e1a47
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2d4e6f8a013'
+down_revision = '9b3f6d2e1a47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('is_hidden', sa.Boolean(), server_default='0', nullable=False))
+        batch_op.create_index('ix_post_is_hidden_created_at', ['is_hidden', 'created_at'], unique=False)
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('is_moderator', sa.Boolean(), server_default='0', nullable=False))
+
+    with op.batch_alter_table('report', schema=None) as batch_op:
+        batch_op.create_index('ix_report_status_created_at', ['status', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('report', schema=None) as batch_op:
+        batch_op.drop_index('ix_report_status_created_at')
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('is_moderator')
+
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.drop_index('ix_post_is_hidden_created_at')
+        batch_op.drop_column('is_hidden')
@@ -0,0 +1,46 @@
+"""user followers/following/posts counters and follow list indexes
+
+Revision ID: b4d6f8a0c325
+Revises: a3c5e7f9b214
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4d6f8a0c325'
+down_revision = 'a3c5e7f9b214'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('followers_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('following_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('posts_count', sa.Integer(), server_default='0', nullable=False))
+
+    with op.batch_alter_table('follow', schema=None) as batch_op:
+        batch_op.create_index('ix_follow_followed_id_created_at', ['followed_id', 'created_at'], unique=False)
+        batch_op.create_index('ix_follow_follower_id_created_at', ['follower_id', 'created_at'], unique=False)
+
+    # Backfill desde follow y post (los posts pendientes de purga no cuentan)
+    op.execute(
+        'UPDATE "user" SET '
+        'followers_count = (SELECT COUNT(*) FROM follow WHERE follow.followed_id = "user".id), '
+        'following_count = (SELECT COUNT(*) FROM follow WHERE follow.follower_id = "user".id), '
+        'posts_count = (SELECT COUNT(*) FROM post WHERE post.user_id = "user".id AND post.deleted_at IS NULL)'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('follow', schema=None) as batch_op:
+        batch_op.drop_index('ix_follow_follower_id_created_at')
+        batch_op.drop_index('ix_follow_followed_id_created_at')
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('posts_count')
+        batch_op.drop_column('following_count')
+        batch_op.drop_column('followers_count')
@@ -0,0 +1,30 @@
+"""token_revocation table shared by all workers
+
+Revision ID: c1e3a5b7d092
+Revises: b0d2f4a6c981
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c1e3a5b7d092'
+down_revision = 'b0d2f4a6c981'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('token_revocation',
+    sa.Column('key', sa.String(length=80), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index('ix_token_revocation_expires_at', 'token_revocation', ['expires_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_token_revocation_expires_at', table_name='token_revocation')
+    op.drop_table('token_revocation')
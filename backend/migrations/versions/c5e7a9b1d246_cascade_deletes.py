@@ -0,0 +1,99 @@
+"""ON DELETE CASCADE on user/post foreign keys, post.deleted_at
+
+Revision ID: c5e7a9b1d246
+Revises: b2d4e6f8a013
+Create Date: 2026-10-19 13:00:00.000000
+
+Las FK se recrean con el nombre por defecto de PostgreSQL
+(<tabla>_<columna>_fkey). En SQLite las FK no tienen nombre ni se pueden
+alterar: cada tabla se recrea con batch_alter_table (recreate="always"),
+nombrando las FK reflejadas con NAMING_CONVENTION para poder cambiarlas.
+app/utils/deletion.py cuenta con estas cascadas también en SQLite, donde
+db_pool activa PRAGMA foreign_keys en cada conexión.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e7a9b1d246'
+down_revision = 'b2d4e6f8a013'
+branch_labels = None
+depends_on = None
+
+# (tabla, columna, tabla referenciada, ondelete)
+FOREIGN_KEYS = [
+    ('post', 'user_id', 'user', 'CASCADE'),
+    ('post_like', 'user_id', 'user', 'CASCADE'),
+    ('post_like', 'post_id', 'post', 'CASCADE'),
+    ('bookmark', 'user_id', 'user', 'CASCADE'),
+    ('bookmark', 'post_id', 'post', 'CASCADE'),
+    ('report', 'reporting_user_id', 'user', 'CASCADE'),
+    ('report', 'post_id', 'post', 'CASCADE'),
+    ('repost', 'user_id', 'user', 'CASCADE'),
+    ('repost', 'original_post_id', 'post', 'CASCADE'),
+    ('email_verifications', 'user_id', 'user', 'CASCADE'),
+    ('community_members', 'community_id', 'community', 'CASCADE'),
+    ('community_members', 'user_id', 'user', 'CASCADE'),
+    ('community_admins', 'community_id', 'community', 'CASCADE'),
+    ('community_admins', 'user_id', 'user', 'CASCADE'),
+    ('community', 'created_by', 'user', 'SET NULL'),
+    ('event_participants', 'event_id', 'event', 'CASCADE'),
+    ('event_participants', 'user_id', 'user', 'CASCADE'),
+    ('event', 'community_id', 'community', 'CASCADE'),
+    ('event', 'created_by', 'user', 'SET NULL'),
+]
+NULLABLE_CREATORS = [('community', 'created_by'), ('event', 'created_by')]
+# Nombres para las FK sin nombre que refleja SQLite
+NAMING_CONVENTION = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+
+def _recreate_fks(ondelete_for):
+    for table, column, target, ondelete in FOREIGN_KEYS:
+        name = f'{table}_{column}_fkey'
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(name, table, target, [column], ['id'], ondelete=ondelete_for(ondelete))
+
+
+def _recreate_fks_sqlite(ondelete_for, nullable):
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    tables = {}
+    for table, column, target, ondelete in FOREIGN_KEYS:
+        tables.setdefault(table, []).append((column, target, ondelete))
+    for table, fks in tables.items():
+        if table not in existing:
+            continue
+        with op.batch_alter_table(table, recreate='always', naming_convention=NAMING_CONVENTION) as batch_op:
+            for column, target, ondelete in fks:
+                name = f'fk_{table}_{column}_{target}'
+                batch_op.drop_constraint(name, type_='foreignkey')
+                batch_op.create_foreign_key(name, target, [column], ['id'], ondelete=ondelete_for(ondelete))
+            for creator_table, column in NULLABLE_CREATORS:
+                if creator_table == table:
+                    batch_op.alter_column(column, existing_type=sa.Integer(), nullable=nullable)
+
+
+def upgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('deleted_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_post_deleted_at'), ['deleted_at'], unique=False)
+
+    if op.get_bind().dialect.name == 'sqlite':
+        _recreate_fks_sqlite(lambda ondelete: ondelete, nullable=True)
+        return
+    for table, column in NULLABLE_CREATORS:
+        op.alter_column(table, column, existing_type=sa.Integer(), nullable=True)
+    _recreate_fks(lambda ondelete: ondelete)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        _recreate_fks_sqlite(lambda ondelete: None, nullable=False)
+    else:
+        _recreate_fks(lambda ondelete: None)
+        for table, column in NULLABLE_CREATORS:
+            op.alter_column(table, column, existing_type=sa.Integer(), nullable=False)
+
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_post_deleted_at'))
+        batch_op.drop_column('deleted_at')
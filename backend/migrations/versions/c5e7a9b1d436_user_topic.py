@@ -0,0 +1,75 @@
+"""user_topic table replaces the user.preferences JSON column
+
+Revision ID: c5e7a9b1d436
+Revises: b4d6f8a0c325
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+import json
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e7a9b1d436'
+down_revision = 'b4d6f8a0c325'
+branch_labels = None
+depends_on = None
+
+
+def _load(raw):
+    if raw is None:
+        return []
+    values = json.loads(raw) if isinstance(raw, str) else raw
+    return list(dict.fromkeys(str(v) for v in values or []))
+
+
+def upgrade():
+    user_topic = op.create_table('user_topic',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('topic', sa.String(length=50), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'topic')
+    )
+    with op.batch_alter_table('user_topic', schema=None) as batch_op:
+        batch_op.create_index('ix_user_topic_topic_user_id', ['topic', 'user_id'], unique=False)
+
+    # Backfill desde la columna JSON
+    conn = op.get_bind()
+    now = datetime.utcnow()
+    rows = [
+        {"user_id": user_id, "topic": topic, "position": i, "created_at": now}
+        for user_id, raw in conn.execute(sa.text('SELECT id, preferences FROM "user"'))
+        for i, topic in enumerate(_load(raw))
+    ]
+    if rows:
+        op.bulk_insert(user_topic, rows)
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('preferences')
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('preferences', sa.JSON(), nullable=True))
+
+    conn = op.get_bind()
+    prefs = {}
+    for user_id, topic in conn.execute(
+        sa.text('SELECT user_id, topic FROM user_topic ORDER BY user_id, position')
+    ):
+        prefs.setdefault(user_id, []).append(topic)
+    for user_id, topics in prefs.items():
+        conn.execute(
+            sa.text('UPDATE "user" SET preferences = :prefs WHERE id = :id'),
+            {"prefs": json.dumps(topics), "id": user_id},
+        )
+
+    with op.batch_alter_table('user_topic', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_topic_topic_user_id')
+
+    op.drop_table('user_topic')
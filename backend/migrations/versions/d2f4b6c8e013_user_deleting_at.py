@@ -0,0 +1,26 @@
+"""user.deleting_at: account deletion in progress
+
+Revision ID: d2f4b6c8e013
+Revises: c1e3a5b7d092
+Create Date: 2026-10-20 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f4b6c8e013'
+down_revision = 'c1e3a5b7d092'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('deleting_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('deleting_at')
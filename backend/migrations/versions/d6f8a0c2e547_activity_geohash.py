@@ -0,0 +1,41 @@
+"""activity.geohash column for nearby queries
+
+Revision ID: d6f8a0c2e547
+Revises: c5e7a9b1d436
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.geohash import PRECISION, encode
+
+
+# revision identifiers, used by Alembic.
+revision = 'd6f8a0c2e547'
+down_revision = 'c5e7a9b1d436'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('activity', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('geohash', sa.String(length=PRECISION), nullable=True))
+        batch_op.create_index('ix_activity_geohash', ['geohash'], unique=False)
+
+    # Backfill desde lat/lng
+    conn = op.get_bind()
+    rows = [
+        {"gh": encode(lat, lng), "id": activity_id}
+        for activity_id, lat, lng in conn.execute(sa.text(
+            'SELECT id, lat, lng FROM activity WHERE lat IS NOT NULL AND lng IS NOT NULL'
+        ))
+    ]
+    if rows:
+        conn.execute(sa.text('UPDATE activity SET geohash = :gh WHERE id = :id'), rows)
+
+
+def downgrade():
+    with op.batch_alter_table('activity', schema=None) as batch_op:
+        batch_op.drop_index('ix_activity_geohash')
+        batch_op.drop_column('geohash')
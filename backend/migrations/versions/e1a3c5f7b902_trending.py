@@ -0,0 +1,54 @@
+"""post_trend / topic_trend rollups for trending
+
+Revision ID: e1a3c5f7b902
+Revises: d8f0b2c4e357
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1a3c5f7b902'
+down_revision = 'd8f0b2c4e357'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('post_trend',
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('topic', sa.String(length=50), nullable=False),
+    sa.Column('post_created_at', sa.DateTime(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['post.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('post_id')
+    )
+    with op.batch_alter_table('post_trend', schema=None) as batch_op:
+        batch_op.create_index('ix_post_trend_topic_score', ['topic', 'score'], unique=False)
+        batch_op.create_index('ix_post_trend_score', ['score'], unique=False)
+
+    op.create_table('topic_trend',
+    sa.Column('topic', sa.String(length=50), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('topic')
+    )
+    with op.batch_alter_table('topic_trend', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_topic_trend_score'), ['score'], unique=False)
+
+    # Backfill: `flask rebuild-trending` (se calcula en Python, en streaming)
+
+
+def downgrade():
+    with op.batch_alter_table('topic_trend', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_topic_trend_score'))
+
+    op.drop_table('topic_trend')
+    with op.batch_alter_table('post_trend', schema=None) as batch_op:
+        batch_op.drop_index('ix_post_trend_score')
+        batch_op.drop_index('ix_post_trend_topic_score')
+
+    op.drop_table('post_trend')
@@ -0,0 +1,28 @@
+"""user_activity distance/elevation from imported workouts
+
+Revision ID: e7a9b1d3f658
+Revises: d6f8a0c2e547
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a9b1d3f658'
+down_revision = 'd6f8a0c2e547'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user_activity', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('distance_km', sa.Numeric(precision=7, scale=2), nullable=True))
+        batch_op.add_column(sa.Column('elevation_gain_m', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('user_activity', schema=None) as batch_op:
+        batch_op.drop_column('elevation_gain_m')
+        batch_op.drop_column('distance_km')
@@ -0,0 +1,38 @@
+"""user_interest topic vectors for the for_you feed
+
+Revision ID: f2b4d6e8a1c3
+Revises: e1a3c5f7b902
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b4d6e8a1c3'
+down_revision = 'e1a3c5f7b902'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_interest',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('topic', sa.String(length=50), nullable=False),
+    sa.Column('weight', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'topic')
+    )
+
+    # Backfill desde post_like
+    op.execute(
+        "INSERT INTO user_interest (user_id, topic, weight) "
+        "SELECT post_like.user_id, post.topic, COUNT(*) FROM post_like "
+        "JOIN post ON post.id = post_like.post_id "
+        "GROUP BY post_like.user_id, post.topic"
+    )
+
+
+def downgrade():
+    op.drop_table('user_interest')
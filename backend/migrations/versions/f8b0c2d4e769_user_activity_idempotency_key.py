@@ -0,0 +1,30 @@
+"""user_activity.idempotency_key for batch completion sync
+
+Revision ID: f8b0c2d4e769
+Revises: e7a9b1d3f658
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f8b0c2d4e769'
+down_revision = 'e7a9b1d3f658'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user_activity', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('idempotency_key', sa.String(length=64), nullable=True))
+        batch_op.create_unique_constraint(
+            'uq_user_activity_user_id_idempotency_key', ['user_id', 'idempotency_key']
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('user_activity', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_user_activity_user_id_idempotency_key', type_='unique')
+        batch_op.drop_column('idempotency_key')
@@ -2,6 +2,7 @@ import os
 import sys
 import pytest
 from datetime import datetime
+from sqlalchemy import event
 
 # Ensure backend package is importable
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -45,7 +46,11 @@ def app():
         'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
         'TESTING': True,
         'SECRET_KEY': 'test-secret',
-        'FRONTEND_BASE_URL': 'http://localhost:3000'
+        'FRONTEND_BASE_URL': 'http://localhost:3000',
+        # Coste mínimo de bcrypt: los tests no miden seguridad del hash
+        'BCRYPT_ROUNDS': 4,
+        # Los jobs en segundo plano se ejecutan en línea
+        'JOBS_EAGER': True,
     })
     
     # Create app context for DB operations
@@ -99,3 +104,19 @@ def verify_user_email(email):
     db.session.commit()
     return True
 
+
+def auth_headers(client, email, password='secret1'):
+    rv = client.post('/auth/login', json={'email': email, 'password': password})
+    return {'Authorization': f"Bearer {rv.get_json()['access_token']}"}
+
+
+def count_queries(_db, fn):
+    """Ejecuta fn() y devuelve (resultado, nº de sentencias SQL emitidas)."""
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(_db.engine, 'before_cursor_execute', listener)
+    try:
+        result = fn()
+    finally:
+        event.remove(_db.engine, 'before_cursor_execute', listener)
+    return result, len(statements)
@@ -1,8 +1,8 @@
-import jwt
 import pytest
 from datetime import datetime, timedelta
 
 from app.models import City, Activity, UserActivity, User
+from app.utils import tokens
 
 
 # Helpers locales para este módulo
@@ -25,8 +25,8 @@ def create_user(_db, username="user1", name="User One", email="user1@example.com
 
 
 def make_token(app, user_id: int) -> str:
-    secret = app.config.get("JWT_SECRET_KEY") or app.config["SECRET_KEY"]
-    return jwt.encode({"user_id": user_id}, secret, algorithm="HS256")
+    with app.app_context():
+        return tokens.issue_access(user_id)
 
 
 def create_city(_db, name="Barcelona", country="España", slug="barcelona"):
@@ -0,0 +1,76 @@
+"""
+US26 - Compresión de respuestas
+Acceptance criteria tested:
+- Respuestas JSON grandes se comprimen con gzip si el cliente lo acepta
+- Sin Accept-Encoding (o con cuerpo pequeño) la respuesta va sin comprimir
+- Las respuestas en streaming se comprimen por trozos
+- El nivel y el umbral son configurables
+"""
+
+import gzip
+
+from flask import Response, stream_with_context
+
+from conftest import create_user, create_post
+
+
+def _seed_feed(_db, n=20):
+    user = create_user(_db, username='gzuser', name='Gz', email='gz@example.com')
+    for i in range(n):
+        create_post(_db, user_id=user.id, text=f"Post comprimible número {i} " * 5)
+    return user
+
+
+def test_feed_is_gzipped_when_accepted(client, _db):
+    _seed_feed(_db)
+    plain = client.get('/api/posts/?limit=20')
+    assert 'Content-Encoding' not in plain.headers
+
+    rv = client.get('/api/posts/?limit=20', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert rv.status_code == 200
+    assert rv.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in rv.headers['Vary']
+    body = gzip.decompress(rv.data)
+    assert body == plain.data
+    assert len(rv.data) < len(plain.data)
+
+
+def test_small_bodies_are_not_compressed(client, _db):
+    rv = client.get('/api/users/', headers={'Accept-Encoding': 'gzip'})
+    assert rv.status_code == 200
+    assert 'Content-Encoding' not in rv.headers
+
+
+def test_gzip_refused_with_q_zero(client, _db):
+    _seed_feed(_db)
+    rv = client.get('/api/posts/?limit=20', headers={'Accept-Encoding': 'gzip;q=0, identity'})
+    assert 'Content-Encoding' not in rv.headers
+
+
+def test_streamed_response_is_compressed(app, _db):
+    @app.get('/_test/stream')
+    def _stream():
+        def gen():
+            for i in range(50):
+                yield f'{{"chunk": {i}}}\n'
+        return Response(stream_with_context(gen()), mimetype='application/json')
+
+    client = app.test_client()
+    rv = client.get('/_test/stream', headers={'Accept-Encoding': 'gzip'})
+    assert rv.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in rv.headers
+    lines = gzip.decompress(rv.data).decode().splitlines()
+    assert len(lines) == 50
+
+
+def test_threshold_and_level_are_configurable(app, client, _db):
+    _seed_feed(_db, n=2)
+    app.config['COMPRESS_MIN_SIZE'] = 10 ** 7
+    rv = client.get('/api/posts/', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in rv.headers
+
+    app.config['COMPRESS_MIN_SIZE'] = 0
+    app.config['COMPRESS_LEVEL'] = 1
+    rv = client.get('/api/posts/', headers={'Accept-Encoding': 'gzip'})
+    assert rv.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(rv.data)
@@ -0,0 +1,80 @@
+"""
+US27 - Sparse fieldsets y modo compacto en el feed
+Acceptance criteria tested:
+- ?fields= limita los campos de cada post (id y type siempre presentes)
+- Un campo desconocido devuelve 400
+- ?compact=1 deduplica autores y posts originales en `includes`
+- Sin parámetros la forma de la respuesta no cambia
+"""
+
+import pytest
+
+from conftest import create_user, create_post
+from app.models import Repost
+
+
+def _seed(_db):
+    author = create_user(_db, username='autor', name='Autor', email='autor@example.com')
+    fan = create_user(_db, username='fan', name='Fan', email='fan@example.com')
+    p1 = create_post(_db, user_id=author.id, text='uno')
+    p2 = create_post(_db, user_id=author.id, text='dos')
+    _db.session.add(Repost(user_id=fan.id, original_post_id=p1.id))
+    _db.session.commit()
+    return author, fan, p1, p2
+
+
+def test_sparse_fields(client, _db):
+    _seed(_db)
+    rv = client.get('/api/posts/?fields=text,likes')
+    assert rv.status_code == 200
+    items = rv.get_json()['items']
+    originals = [i for i in items if i['type'] == 'original']
+    assert originals
+    for item in originals:
+        assert set(item) == {'id', 'text', 'likes', 'type'}
+    repost = next(i for i in items if i['type'] == 'repost')
+    assert set(repost['original_content']) == {'id', 'text', 'likes'}
+
+
+def test_unknown_field_is_rejected(client, _db):
+    rv = client.get('/api/posts/?fields=text,password_hash')
+    assert rv.status_code == 400
+    assert 'password_hash' in rv.get_json()['error']
+
+
+def test_compact_mode_deduplicates_authors_and_originals(client, _db):
+    author, fan, p1, p2 = _seed(_db)
+    rv = client.get('/api/posts/?compact=1')
+    assert rv.status_code == 200
+    data = rv.get_json()
+
+    includes = data['includes']
+    assert set(includes['users']) == {str(author.id), str(fan.id)}
+    assert includes['users'][str(author.id)]['username'] == 'autor'
+    assert set(includes['posts']) == {str(p1.id)}
+
+    for item in data['items']:
+        assert 'user' not in item
+        assert 'original_content' not in item
+        if item['type'] == 'original':
+            assert item['user_id'] == author.id
+        else:
+            assert item['original_post_id'] == p1.id
+            assert item['reposted_by_id'] == fan.id
+
+
+def test_compact_user_feed(client, _db):
+    author, fan, p1, p2 = _seed(_db)
+    rv = client.get(f'/api/posts/user/{fan.id}?compact=1&fields=text')
+    data = rv.get_json()
+    assert len(data['items']) == 1
+    assert data['includes']['posts'][str(p1.id)] == {'id': p1.id, 'text': 'uno'}
+
+
+def test_default_shape_unchanged(client, _db):
+    author, fan, p1, p2 = _seed(_db)
+    rv = client.get(f'/api/posts/user/{author.id}')
+    data = rv.get_json()
+    assert isinstance(data, list)
+    assert data[0]['user']['username'] == 'autor'
+    assert 'likedByMe' in data[0]
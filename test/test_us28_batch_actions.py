@@ -0,0 +1,84 @@
+"""
+US28 - Acciones en lote y estado de varios posts
+Acceptance criteria tested:
+- POST /api/posts/batch aplica like/bookmark/repost en una sola petición
+- Acciones contradictorias sobre el mismo post: gana la última
+- Posts inexistentes y reposts propios se reportan por acción sin abortar el lote
+- GET /api/posts/state?ids= devuelve flags y contadores de varios posts
+"""
+
+import pytest
+
+from conftest import create_user, create_post, verify_user_email
+from app.models import Post, PostLike, Bookmark, Repost
+
+
+def _auth(client, _db, email, username, password='app-fitness1'):
+    user = create_user(_db, username=username, name=username, email=email, password=password)
+    assert verify_user_email(email)
+    rv = client.post('/auth/login', json={'email': email, 'password': password})
+    return user, {'Authorization': f"Bearer {rv.get_json()['access_token']}"}
+
+
+def test_batch_actions_and_state(client, _db):
+    author = create_user(_db, username='autor28', name='Autor', email='autor28@example.com')
+    user, headers = _auth(client, _db, 'batch@example.com', 'batchuser')
+    p1 = create_post(_db, user_id=author.id, text='p1')
+    p2 = create_post(_db, user_id=author.id, text='p2')
+    own = create_post(_db, user_id=user.id, text='mío')
+
+    rv = client.post('/api/posts/batch', headers=headers, json={'actions': [
+        {'action': 'like', 'post_id': p1.id},
+        {'action': 'like', 'post_id': p2.id},
+        {'action': 'unlike', 'post_id': p2.id},
+        {'action': 'bookmark', 'post_id': p1.id},
+        {'action': 'repost', 'post_id': p2.id, 'comment_text': 'mira'},
+        {'action': 'repost', 'post_id': own.id},
+        {'action': 'like', 'post_id': 9999},
+    ]})
+    assert rv.status_code == 200
+    data = rv.get_json()
+
+    results = data['results']
+    assert [r['ok'] for r in results] == [True, True, True, True, True, False, False]
+    assert results[-1]['error'] == 'Post not found'
+
+    states = data['states']
+    assert states[str(p1.id)]['likedByMe'] is True
+    assert states[str(p1.id)]['bookmarkedByMe'] is True
+    assert states[str(p1.id)]['likes'] == 1
+    assert states[str(p2.id)]['likedByMe'] is False
+    assert states[str(p2.id)]['repostedByMe'] is True
+    assert states[str(p2.id)]['reposts'] == 1
+
+    assert PostLike.query.filter_by(user_id=user.id).count() == 1
+    assert Bookmark.query.filter_by(user_id=user.id).count() == 1
+    assert Repost.query.filter_by(user_id=user.id).one().comment_text == 'mira'
+
+    # Repetir el lote es idempotente
+    rv = client.post('/api/posts/batch', headers=headers, json={'actions': [
+        {'action': 'like', 'post_id': p1.id},
+        {'action': 'repost', 'post_id': p2.id},
+    ]})
+    assert rv.status_code == 200
+    assert PostLike.query.filter_by(user_id=user.id).count() == 1
+    assert _db.session.get(Post, p2.id).repost_count == 1
+
+    # Estado con y sin token
+    rv = client.get(f'/api/posts/state?ids={p1.id},{p2.id}', headers=headers)
+    st = rv.get_json()['states']
+    assert st[str(p1.id)]['likedByMe'] is True
+    rv = client.get(f'/api/posts/state?ids={p1.id},{p2.id}')
+    st = rv.get_json()['states']
+    assert st[str(p1.id)]['likedByMe'] is False
+    assert st[str(p1.id)]['likes'] == 1
+
+
+def test_batch_validation(client, _db):
+    _, headers = _auth(client, _db, 'batchv@example.com', 'batchv')
+    assert client.post('/api/posts/batch', headers=headers, json={}).status_code == 400
+    rv = client.post('/api/posts/batch', headers=headers, json={'actions': [{'action': 'explode', 'post_id': 1}]})
+    assert rv.status_code == 400
+    assert client.post('/api/posts/batch', json={'actions': []}).status_code == 401
+    assert client.get('/api/posts/state?ids=a,b').status_code == 400
+    assert client.get('/api/posts/state').status_code == 400
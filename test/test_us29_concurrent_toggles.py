@@ -0,0 +1,106 @@
+"""
+US29 - Toggles idempotentes (likes, bookmarks, reposts, follows) bajo concurrencia
+Acceptance criteria tested:
+- Muchos hilos golpeando los mismos endpoints no producen errores ni duplicados
+- Los contadores (like_count, repost_count) quedan consistentes con las filas
+"""
+
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import jwt
+import pytest
+
+from app import create_app, db
+from app.models import Post, PostLike, Bookmark, Repost, follow
+from conftest import create_user, create_post
+
+THREADS = 8
+ROUNDS = 5
+
+
+@pytest.fixture()
+def file_app(tmp_path):
+    # SQLite en fichero: cada hilo tiene su propia conexión real
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'concurrency.db'}",
+        'TESTING': True,
+        'SECRET_KEY': 'test-secret',
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _headers(user_id):
+    token = jwt.encode({'user_id': user_id, 'type': 'access', 'jti': uuid.uuid4().hex},
+                       'test-secret', algorithm='HS256')
+    return {'Authorization': f'Bearer {token}'}
+
+
+def _hammer(app, jobs):
+    def run(job):
+        method, url, headers = job
+        rv = getattr(app.test_client(), method)(url, headers=headers)
+        return rv.status_code
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        return list(pool.map(run, jobs))
+
+
+def test_concurrent_toggles_are_idempotent(file_app):
+    author = create_user(db, username='autor29', name='Autor', email='a29@example.com')
+    fans = [
+        create_user(db, username=f'fan{i}', name=f'Fan{i}', email=f'fan{i}@example.com')
+        for i in range(THREADS)
+    ]
+    post = create_post(db, user_id=author.id, text='popular')
+    post_id, author_id = post.id, author.id
+
+    jobs = []
+    for _ in range(ROUNDS):
+        for fan in fans:
+            h = _headers(fan.id)
+            jobs += [
+                ('post', f'/api/posts/{post_id}/like', h),
+                ('post', f'/api/posts/{post_id}/bookmark', h),
+                ('post', f'/api/posts/{post_id}/repost', h),
+                ('post', f'/api/users/{author_id}/follow', h),
+            ]
+    statuses = _hammer(file_app, jobs)
+    assert set(statuses) <= {200, 201}
+
+    db.session.expire_all()
+    post = db.session.get(Post, post_id)
+    assert PostLike.query.filter_by(post_id=post_id).count() == THREADS
+    assert post.like_count == THREADS
+    assert Bookmark.query.filter_by(post_id=post_id).count() == THREADS
+    assert Repost.query.filter_by(original_post_id=post_id).count() == THREADS
+    assert post.repost_count == THREADS
+    follows = db.session.execute(
+        db.select(db.func.count()).select_from(follow).where(follow.c.followed_id == author_id)
+    ).scalar()
+    assert follows == THREADS
+
+
+def test_concurrent_like_unlike_keeps_counter_consistent(file_app):
+    author = create_user(db, username='autor29b', name='Autor', email='a29b@example.com')
+    fans = [
+        create_user(db, username=f'lk{i}', name=f'Lk{i}', email=f'lk{i}@example.com')
+        for i in range(THREADS)
+    ]
+    post_id = create_post(db, user_id=author.id, text='vaivén').id
+
+    jobs = []
+    for r in range(ROUNDS * 2):
+        for fan in fans:
+            method = 'post' if r % 2 == 0 else 'delete'
+            jobs.append((method, f'/api/posts/{post_id}/like', _headers(fan.id)))
+    statuses = _hammer(file_app, jobs)
+    assert set(statuses) == {200}
+
+    db.session.expire_all()
+    likes = PostLike.query.filter_by(post_id=post_id).count()
+    assert db.session.get(Post, post_id).like_count == likes
@@ -0,0 +1,123 @@
+"""
+US30 - Configuración del pool de conexiones y réplica de lectura
+Acceptance criteria tested:
+- Las opciones del pool salen del entorno (tamaño, overflow, pre_ping, recycle, timeout)
+- El tamaño por worker se deriva de workers/hilos de gunicorn y DB_MAX_CONNECTIONS
+- /api/health es sólo liveness; las métricas del pool van en /api/health/pools (moderadores o HEALTH_METRICS_PUBLIC)
+- Los GET de blueprints configurados leen de la réplica; el resto del primario
+"""
+
+import pytest
+
+from conftest import create_user, auth_headers
+from app import create_app, db
+from app.models import City
+from app.utils.db_pool import (
+    TimedQueuePool,
+    engine_options_from_env,
+    per_worker_pool_size,
+    replica_bind_from_env,
+)
+
+
+def test_engine_options_from_env_postgres():
+    env = {
+        'DB_POOL_SIZE': '4',
+        'DB_MAX_OVERFLOW': '2',
+        'DB_POOL_RECYCLE': '600',
+        'DB_POOL_PRE_PING': '0',
+        'DB_STATEMENT_TIMEOUT_MS': '5000',
+    }
+    opts = engine_options_from_env('postgresql://u:p@db/app', env)
+    assert opts['pool_size'] == 4
+    assert opts['max_overflow'] == 2
+    assert opts['pool_recycle'] == 600
+    assert opts['pool_pre_ping'] is False
+    assert opts['poolclass'] is TimedQueuePool
+    assert opts['connect_args'] == {'options': '-c statement_timeout=5000'}
+
+
+def test_engine_options_sqlite_skip_pool_sizing():
+    opts = engine_options_from_env('sqlite:///:memory:', {'DB_POOL_SIZE': '10'})
+    assert 'pool_size' not in opts
+    assert opts['pool_pre_ping'] is True
+
+
+def test_per_worker_pool_size_from_gunicorn():
+    # 4 hilos por worker, 3 workers, presupuesto de 30 conexiones -> 10 por worker
+    env = {'GUNICORN_THREADS': '4', 'WEB_CONCURRENCY': '3', 'DB_MAX_CONNECTIONS': '30'}
+    assert per_worker_pool_size(env) == (4, 6)
+    # Presupuesto menor que los hilos: el pool se recorta
+    env = {'GUNICORN_THREADS': '8', 'GUNICORN_WORKERS': '4', 'DB_MAX_CONNECTIONS': '12'}
+    assert per_worker_pool_size(env) == (3, 0)
+    assert per_worker_pool_size({}) == (1, 5)
+
+
+def test_replica_bind_from_env():
+    assert replica_bind_from_env({}) == {}
+    binds = replica_bind_from_env({'DATABASE_REPLICA_URL': 'sqlite:///replica.db'})
+    assert binds['replica']['url'] == 'sqlite:///replica.db'
+
+
+def test_health_is_liveness_only(client, _db):
+    rv = client.get('/api/health/')
+    assert rv.status_code == 200
+    assert rv.get_json() == {'status': 'ok'}
+
+
+def test_pool_metrics_require_moderator(client, _db, app):
+    mod = create_user(_db)
+    mod.is_moderator = True
+    create_user(_db, username='other', email='other@example.com')
+    _db.session.commit()
+
+    assert client.get('/api/health/pools').status_code == 401
+    assert client.get('/api/health/pools', headers=auth_headers(client, 'other@example.com')).status_code == 403
+    rv = client.get('/api/health/pools', headers=auth_headers(client, 'test@example.com'))
+    assert rv.status_code == 200
+    pools = rv.get_json()['db_pools']
+    assert pools['default']['checkouts'] >= 1
+    assert pools['default']['in_use'] >= 0
+
+    app.config['HEALTH_METRICS_PUBLIC'] = True
+    assert client.get('/api/health/pools').status_code == 200
+
+
+@pytest.fixture()
+def replica_app(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'primary.db'}",
+        'SQLALCHEMY_BINDS': {'replica': f"sqlite:///{tmp_path / 'replica.db'}"},
+        'DB_REPLICA_BLUEPRINTS': ('city',),
+        'TESTING': True,
+        'SECRET_KEY': 'test-secret',
+    })
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(db.engines['replica'])
+        yield app
+        db.session.remove()
+        db.drop_all()
+        db.metadata.drop_all(db.engines['replica'])
+    # El objeto `db` es global: que el bind no se filtre a otros tests
+    db.metadatas.pop('replica', None)
+
+
+def test_get_blueprints_read_from_replica(replica_app):
+    db.session.add(City(name='Primaria', slug='primaria'))
+    db.session.commit()
+    with db.engines['replica'].begin() as conn:
+        conn.execute(City.__table__.insert().values(name='Replica', slug='replica'))
+
+    client = replica_app.test_client()
+
+    # Blueprint "city" en GET -> réplica
+    names = [c['name'] for c in client.get('/api/cities/').get_json()]
+    assert names == ['Replica']
+
+    # Otros blueprints -> primario
+    rv = client.get('/api/search/?q=a')
+    assert [c['name'] for c in rv.get_json()['cities']] == ['Primaria']
+
+    # Fuera de una petición -> primario
+    assert [c.name for c in City.query.all()] == ['Primaria']
@@ -0,0 +1,74 @@
+"""
+US31 - Perfil de despliegue de gunicorn
+Acceptance criteria tested:
+- preload_app y la clase de worker se configuran por entorno
+- post_fork descarta las conexiones heredadas del master
+- post_request recicla el worker al superar el umbral de memoria
+- post_worker_init calienta la app antes de aceptar tráfico
+"""
+
+import importlib.util
+import logging
+import os
+
+import pytest
+
+from app import db
+
+CONF_PATH = os.path.join(os.path.dirname(__file__), '..', 'backend', 'gunicorn.conf.py')
+
+
+def load_conf(monkeypatch, **env):
+    # El fichero hace setdefault de estas dos; así monkeypatch las restaura
+    env.setdefault('GUNICORN_WORKERS', '1')
+    env.setdefault('GUNICORN_THREADS', '1')
+    for key, value in env.items():
+        monkeypatch.setenv(key, value)
+    spec = importlib.util.spec_from_file_location('gunicorn_conf_test', CONF_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeWorker:
+    def __init__(self, app):
+        self.alive = True
+        self.pid = os.getpid()
+        self.log = logging.getLogger('fake-worker')
+        self.app = type('WSGIApp', (), {'wsgi': lambda _self: app})()
+
+
+def test_settings_from_env(monkeypatch):
+    conf = load_conf(monkeypatch, GUNICORN_WORKER_CLASS='gevent', GUNICORN_PRELOAD='0',
+                     WEB_CONCURRENCY='3', PORT='8123')
+    assert conf.worker_class == 'gevent'
+    assert conf.preload_app is False
+    assert conf.workers == 3
+    assert conf.bind == '0.0.0.0:8123'
+    assert conf.wsgi_app == 'run:app'
+
+
+def test_post_fork_disposes_inherited_pool(monkeypatch, app):
+    conf = load_conf(monkeypatch, GUNICORN_PRELOAD='1', GUNICORN_WORKER_CLASS='gthread')
+    old_pool = db.engine.pool
+    conf.post_fork(server=None, worker=FakeWorker(app))
+    assert db.engine.pool is not old_pool
+
+
+def test_post_request_recycles_on_memory(monkeypatch, app):
+    conf = load_conf(monkeypatch, GUNICORN_MAX_RSS_MB='1')
+    worker = FakeWorker(app)
+    conf.post_request(worker, None, {}, None)
+    assert worker.alive is False
+
+    conf = load_conf(monkeypatch, GUNICORN_MAX_RSS_MB='0')
+    worker = FakeWorker(app)
+    conf.post_request(worker, None, {}, None)
+    assert worker.alive is True
+
+
+def test_post_worker_init_warms_up(monkeypatch, app):
+    conf = load_conf(monkeypatch, GUNICORN_WARMUP='1')
+    before = app.extensions['db_pool_metrics'][None].checkouts
+    conf.post_worker_init(FakeWorker(app))
+    assert app.extensions['db_pool_metrics'][None].checkouts > before
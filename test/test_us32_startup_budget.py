@@ -0,0 +1,82 @@
+"""
+US32 - Arranque rápido: imports diferidos y presupuesto de arranque
+Acceptance criteria tested:
+- create_app() no importa cloudinary ni requests
+- El import de `app` y create_app() caben en un presupuesto (python -X importtime)
+- Los proveedores se inicializan una sola vez y sólo cuando una ruta los usa
+"""
+
+import io
+import os
+import subprocess
+import sys
+
+from app.utils.providers import ProviderRegistry
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+# Presupuestos holgados para CI; se pueden ajustar por entorno
+IMPORT_BUDGET_MS = float(os.environ.get('STARTUP_IMPORT_BUDGET_MS', 2000))
+CREATE_APP_BUDGET_MS = float(os.environ.get('STARTUP_CREATE_APP_BUDGET_MS', 1500))
+LAZY_MODULES = ('cloudinary', 'requests')
+
+_CHILD = """
+import time
+from app import create_app
+t0 = time.perf_counter()
+create_app()
+print((time.perf_counter() - t0) * 1000)
+"""
+
+
+def _run_importtime():
+    env = dict(os.environ, DATABASE_URL='sqlite:///:memory:', SECRET_KEY='test-secret')
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _CHILD],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|')
+        try:
+            modules[name.strip()] = int(cumulative) / 1000
+        except ValueError:  # cabecera
+            continue
+    return modules, float(proc.stdout.strip().splitlines()[-1])
+
+
+def test_create_app_within_import_budget():
+    modules, create_app_ms = _run_importtime()
+
+    loaded_lazy = [m for m in modules if m.split('.')[0] in LAZY_MODULES]
+    assert loaded_lazy == [], f"Imports que deberían ser diferidos: {loaded_lazy}"
+
+    assert modules['app'] < IMPORT_BUDGET_MS, f"import app: {modules['app']:.0f} ms"
+    assert create_app_ms < CREATE_APP_BUDGET_MS, f"create_app(): {create_app_ms:.0f} ms"
+
+
+def test_provider_registry_initializes_once(app):
+    calls = []
+    registry = ProviderRegistry(app)
+    registry.register('fake', lambda a: calls.append(a) or object())
+    assert not registry.initialized('fake')
+    first = registry.get('fake')
+    assert registry.get('fake') is first
+    assert calls == [app]
+
+
+def test_upload_uses_lazy_provider(app, client):
+    class FakeUploader:
+        def upload(self, file):
+            return {'secure_url': 'https://cdn.example.com/img.png'}
+
+    registry = app.extensions['providers']
+    assert not registry.initialized('cloudinary')
+    registry.register('cloudinary', lambda a: FakeUploader())
+
+    rv = client.post('/api/upload/', data={'image': (io.BytesIO(b'png'), 'img.png')},
+                     content_type='multipart/form-data')
+    assert rv.status_code == 200
+    assert rv.get_json()['url'] == 'https://cdn.example.com/img.png'
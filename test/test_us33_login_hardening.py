@@ -0,0 +1,83 @@
+"""
+US33 - Login: una sola consulta y coste de bcrypt configurable
+Acceptance criteria tested:
+- El login resuelve el identificador con una única consulta a user
+- Se puede iniciar sesión con email, username o name
+- Como mucho una comprobación bcrypt por intento, también si el usuario no existe
+- Los hashes con otro coste se rehacen de forma transparente al iniciar sesión
+"""
+
+from sqlalchemy import event
+
+from conftest import create_user
+from app.models.user_model import User
+from app.utils import passwords
+
+
+def _count_user_selects(_db):
+    statements = []
+
+    def before(conn, cursor, statement, params, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and 'FROM user' in statement:
+            statements.append(statement)
+
+    event.listen(_db.engine, 'before_cursor_execute', before)
+    return statements, lambda: event.remove(_db.engine, 'before_cursor_execute', before)
+
+
+def test_login_single_user_query(client, _db):
+    create_user(_db, username='single', name='Single', email='single@example.com', password='pwd123')
+    statements, stop = _count_user_selects(_db)
+    try:
+        rv = client.post('/auth/login', json={'email': 'single@example.com', 'password': 'pwd123'})
+    finally:
+        stop()
+    assert rv.status_code == 200
+    assert len(statements) == 1
+
+
+def test_login_with_username_and_name(client, _db):
+    create_user(_db, username='handle', name='Display', email='handle@example.com', password='pwd123')
+    for ident in ('handle', 'Display', 'HANDLE@example.com'):
+        rv = client.post('/auth/login', json={'email': ident, 'password': 'pwd123'})
+        assert rv.status_code == 200, ident
+        assert rv.get_json()['user']['username'] == 'handle'
+
+
+def test_email_takes_priority_over_name(client, _db):
+    create_user(_db, username='first', name='shared@example.com', email='other@example.com', password='pwd-a')
+    create_user(_db, username='second', name='Second', email='shared@example.com', password='pwd-b')
+    rv = client.post('/auth/login', json={'email': 'shared@example.com', 'password': 'pwd-b'})
+    assert rv.status_code == 200
+    assert rv.get_json()['user']['username'] == 'second'
+
+
+def test_at_most_one_hash_check(client, _db, monkeypatch):
+    create_user(_db, username='once', name='Once', email='once@example.com', password='pwd123')
+    calls = []
+    original = passwords.check_password
+    monkeypatch.setattr(passwords, 'check_password', lambda p, h: calls.append(h) or original(p, h))
+
+    rv = client.post('/auth/login', json={'email': 'once@example.com', 'password': 'wrong'})
+    assert rv.status_code == 401
+    rv = client.post('/auth/login', json={'email': 'nobody@example.com', 'password': 'wrong'})
+    assert rv.status_code == 401
+    rv = client.post('/auth/login', json={})
+    assert rv.status_code == 401
+    # Una comprobación por intento; el usuario inexistente usa el hash ficticio
+    assert len(calls) == 3
+    assert calls[1] is None and calls[2] is None
+
+
+def test_rehash_on_login_when_cost_changes(app, client, _db):
+    user = create_user(_db, username='rehash', name='Rehash', email='rehash@example.com', password='pwd123')
+    assert passwords.rounds_of(user.password_hash) == 4
+
+    app.config['BCRYPT_ROUNDS'] = 5
+    rv = client.post('/auth/login', json={'email': 'rehash@example.com', 'password': 'pwd123'})
+    assert rv.status_code == 200
+
+    user = _db.session.get(User, user.id)
+    assert passwords.rounds_of(user.password_hash) == 5
+    assert user.check_password('pwd123')
+    assert not passwords.needs_rehash(user.password_hash)
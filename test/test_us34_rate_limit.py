@@ -0,0 +1,163 @@
+"""
+US34 - Límite de intentos en login, registro y reenvío de verificación
+Acceptance criteria tested:
+- Una ráfaga desde la misma IP recibe 429 con Retry-After
+- El rechazo ocurre antes de consultar la BD o calcular un hash
+- El límite por cuenta se aplica aunque cambie la IP
+- La ventana es deslizante: la ventana anterior pesa según lo que aún solapa
+- register y resend-verification también están limitados
+- Detrás de proxies sólo cuenta la IP que añadió el de confianza, no la que manda el cliente
+"""
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app, db
+from app.utils import passwords
+from app.utils.rate_limit import FakeBackend, MemoryBackend
+
+
+@pytest.fixture()
+def limited_app(request):
+    backend = FakeBackend(start=1000.0)
+    app = create_app({
+        'TRUSTED_PROXY_HOPS': getattr(request, 'param', 0),
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'TESTING': True,
+        'SECRET_KEY': 'test-secret',
+        'BCRYPT_ROUNDS': 4,
+        'RATE_LIMIT_BACKEND': backend,
+        'RATE_LIMITS': {
+            'login': {'ip': (3, 60), 'account': (5, 300)},
+            'register': {'ip': (2, 3600)},
+            'resend_verification': {'ip': (10, 600), 'account': (1, 600)},
+        },
+    })
+    with app.app_context():
+        db.create_all()
+        yield app, backend
+        db.session.remove()
+        db.drop_all()
+
+
+def _login(client, email='x@example.com', ip='10.0.0.1'):
+    return client.post('/auth/login', json={'email': email, 'password': 'wrong'},
+                       environ_overrides={'REMOTE_ADDR': ip})
+
+
+def test_login_flood_gets_429_with_retry_after(limited_app):
+    app, backend = limited_app
+    client = app.test_client()
+    for _ in range(3):
+        assert _login(client).status_code == 401
+    rv = _login(client)
+    assert rv.status_code == 429
+    assert int(rv.headers['Retry-After']) >= 1
+    # Otra IP no se ve afectada
+    assert _login(client, ip='10.0.0.2').status_code == 401
+
+
+@pytest.mark.parametrize('limited_app', [1], indirect=True)
+def test_spoofed_forwarded_for_does_not_reset_counter(limited_app):
+    app, backend = limited_app
+    client = app.test_client()
+
+    def attempt(i, real='203.0.113.7'):
+        # El proxy añade la IP real tras lo que mandó el cliente
+        return client.post('/auth/login', json={'email': f'u{i}@example.com', 'password': 'wrong'},
+                           headers={'X-Forwarded-For': f'10.9.{i}.1, {real}'},
+                           environ_overrides={'REMOTE_ADDR': '10.0.0.254'})
+
+    for i in range(3):
+        assert attempt(i).status_code == 401
+    assert attempt(3).status_code == 429
+    assert attempt(4, real='203.0.113.8').status_code == 401
+
+
+def test_rejection_skips_db_and_hash(limited_app, monkeypatch):
+    app, backend = limited_app
+    client = app.test_client()
+    for _ in range(3):
+        _login(client)
+
+    statements, hashes = [], []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    monkeypatch.setattr(passwords, 'check_password', lambda *a: hashes.append(a) or False)
+    try:
+        assert _login(client).status_code == 429
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    assert statements == []
+    assert hashes == []
+
+
+def test_account_limit_across_ips(limited_app):
+    app, backend = limited_app
+    client = app.test_client()
+    for i in range(5):
+        assert _login(client, email='Victim@example.com', ip=f'10.1.0.{i}').status_code == 401
+    assert _login(client, email='victim@example.com', ip='10.1.0.99').status_code == 429
+
+
+def test_sliding_window_recovers_gradually(limited_app):
+    app, backend = limited_app
+    client = app.test_client()
+    backend.now = 1200.0  # inicio de ventana
+    for _ in range(3):
+        _login(client)
+    assert _login(client).status_code == 429
+
+    # Media ventana después la anterior aún pesa 3 * 0.5 = 1.5 intentos
+    backend.advance(90)
+    assert _login(client).status_code == 401
+    assert _login(client).status_code == 429
+
+    backend.advance(60)
+    assert _login(client).status_code == 401
+
+
+def test_register_and_resend_are_limited(limited_app):
+    app, backend = limited_app
+    client = app.test_client()
+    for i in range(2):
+        rv = client.post('/auth/register', json={'username': f'r{i}'})
+        assert rv.status_code == 400
+    assert client.post('/auth/register', json={'username': 'r3'}).status_code == 429
+
+    body = {'email': 'nobody@example.com'}
+    assert client.post('/auth/resend-verification', json=body).status_code == 200
+    assert client.post('/auth/resend-verification', json=body).status_code == 429
+    assert client.options('/auth/resend-verification').status_code != 429
+
+
+def test_memory_backend_weights_previous_window():
+    clock = [0.0]
+    backend = MemoryBackend(clock=lambda: clock[0])
+    rule = [('k', 4, 10)]
+    assert all(backend.hit(rule)[0] for _ in range(4))
+    allowed, retry_after = backend.hit(rule)
+    assert not allowed and retry_after >= 1
+
+    clock[0] = 15.0  # la ventana anterior pesa 4 * 0.5 = 2
+    assert backend.hit(rule) == (True, 0)
+    assert backend.hit(rule) == (True, 0)
+    assert backend.hit(rule)[0] is False
+
+    backend.reset('k')
+    assert backend.hit(rule) == (True, 0)
+
+
+def test_rejected_attempt_does_not_consume_other_rules():
+    backend = MemoryBackend(clock=lambda: 0.0)
+    assert backend.hit([('ip', 1, 60), ('account', 2, 60)]) == (True, 0)
+    assert backend.hit([('ip', 1, 60), ('account', 2, 60)])[0] is False
+    # La cuenta sólo registró el intento aceptado
+    assert backend.hit([('account', 2, 60)]) == (True, 0)
+
+
+def test_limits_are_per_app(app, client):
+    # Cada app tiene su propio limitador con límites por defecto holgados
+    assert app.extensions['rate_limiter'].limits['login']['ip'][0] >= 30
+    for _ in range(10):
+        assert client.post('/auth/login', json={'email': 'a@b.c', 'password': 'x'}).status_code == 401
@@ -0,0 +1,239 @@
+"""
+US35 - Rotación de refresh tokens y revocación de sesiones
+Acceptance criteria tested:
+- Login emite tokens con el mismo conjunto de claims (user_id, type, jti, iat, exp, fam)
+- /auth/refresh devuelve un access válido para auth_required y un refresh nuevo
+- Reutilizar un refresh ya canjeado revoca la sesión entera
+- /auth/logout invalida access y refresh de esa sesión sin tocar otras
+- Con el store en memoria la comprobación de revocación no consulta la BD
+- Con el de BD, una caché por proceso evita consultarla en cada petición
+- El store por defecto (token_revocation) se comparte entre workers y escribe en su
+  propia transacción, sin confirmar lo que la petición tenga a medias
+- Logout de un token sin familia revoca ese token (jti)
+- Los tokens antiguos sin type o jti se rechazan salvo antes de LEGACY_TOKENS_UNTIL,
+  y un refresh antiguo sólo se canjea una vez
+"""
+
+from datetime import datetime, timedelta
+
+import jwt
+from sqlalchemy import event
+
+from conftest import create_user, verify_user_email
+from app import db
+from app.utils import tokens
+from app.models import User
+from app.utils.tokens import CachedRevocationStore, DbRevocationStore, MemoryRevocationStore
+
+
+def _login(client, _db, email='tok@example.com'):
+    create_user(_db, username=email.split('@')[0], name='Tok', email=email, password='pwd123')
+    verify_user_email(email)
+    rv = client.post('/auth/login', json={'email': email, 'password': 'pwd123'})
+    assert rv.status_code == 200
+    return rv.get_json()
+
+
+def _claims(token):
+    return jwt.decode(token, 'test-secret', algorithms=['HS256'])
+
+
+def test_consistent_claim_set(client, _db):
+    data = _login(client, _db)
+    access, refresh = _claims(data['access_token']), _claims(data['refresh_token'])
+    for claims in (access, refresh):
+        assert {'user_id', 'type', 'jti', 'iat', 'exp', 'fam'} <= set(claims)
+    assert access['type'] == 'access' and refresh['type'] == 'refresh'
+    assert access['fam'] == refresh['fam']
+    assert access['jti'] != refresh['jti']
+
+
+def test_refresh_rotates_and_access_is_usable(client, _db):
+    data = _login(client, _db)
+    rv = client.post('/auth/refresh', json={'refresh_token': data['refresh_token']})
+    assert rv.status_code == 200
+    body = rv.get_json()
+    assert body['refresh_token'] != data['refresh_token']
+    assert _claims(body['refresh_token'])['fam'] == _claims(data['refresh_token'])['fam']
+
+    rv = client.get('/auth/me', headers={'Authorization': f"Bearer {body['access_token']}"})
+    assert rv.status_code == 200
+
+    rv = client.post('/auth/refresh', json={'refresh_token': body['refresh_token']})
+    assert rv.status_code == 200
+
+
+def test_refresh_reuse_revokes_family(client, _db):
+    data = _login(client, _db)
+    first = client.post('/auth/refresh', json={'refresh_token': data['refresh_token']}).get_json()
+
+    rv = client.post('/auth/refresh', json={'refresh_token': data['refresh_token']})
+    assert rv.status_code == 401
+
+    # Los tokens emitidos tras la rotación también caen
+    rv = client.post('/auth/refresh', json={'refresh_token': first['refresh_token']})
+    assert rv.status_code == 401
+    rv = client.get('/auth/me', headers={'Authorization': f"Bearer {first['access_token']}"})
+    assert rv.status_code == 401
+
+
+def test_access_token_cannot_refresh(client, _db):
+    data = _login(client, _db)
+    rv = client.post('/auth/refresh', json={'refresh_token': data['access_token']})
+    assert rv.status_code == 401
+
+
+def test_logout_revokes_only_that_session(client, _db):
+    data = _login(client, _db)
+    other = client.post('/auth/login', json={'email': 'tok@example.com', 'password': 'pwd123'}).get_json()
+
+    rv = client.post('/auth/logout', json={'refresh_token': data['refresh_token']})
+    assert rv.status_code == 200
+
+    rv = client.get('/auth/me', headers={'Authorization': f"Bearer {data['access_token']}"})
+    assert rv.status_code == 401
+    rv = client.post('/api/posts/', json={'text': 'hola', 'topic': 'general'},
+                     headers={'Authorization': f"Bearer {data['access_token']}"})
+    assert rv.status_code == 401
+    assert client.post('/auth/refresh', json={'refresh_token': data['refresh_token']}).status_code == 401
+
+    rv = client.get('/auth/me', headers={'Authorization': f"Bearer {other['access_token']}"})
+    assert rv.status_code == 200
+
+
+def test_revocation_check_skips_db(app, client, _db):
+    data = _login(client, _db)
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        rv = client.post('/auth/refresh', json={'refresh_token': data['refresh_token']})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    assert rv.status_code == 200
+    assert statements == []
+
+
+def test_memory_store_entries_expire():
+    clock = [0.0]
+    store = MemoryRevocationStore(clock=lambda: clock[0])
+    store.add('fam:a', 10)
+    assert store.claim('jti:x', 5) is True
+    assert store.claim('jti:x', 5) is False
+    assert 'fam:a' in store and len(store) == 2
+    clock[0] = 11
+    assert 'fam:a' not in store and len(store) == 0
+
+
+def test_db_store_is_shared_between_workers(app, client, _db):
+    # Cada worker tiene su propia instancia; la BD es lo compartido
+    tokens.init_tokens(app, DbRevocationStore())
+    data = _login(client, _db)
+    first = client.post('/auth/refresh', json={'refresh_token': data['refresh_token']}).get_json()
+    other = client.post('/auth/login', json={'email': 'tok@example.com', 'password': 'pwd123'}).get_json()
+    assert client.post('/auth/logout', json={'refresh_token': other['refresh_token']}).status_code == 200
+
+    tokens.init_tokens(app, DbRevocationStore())
+    # Reutilizar el refresh canjeado en otro worker revoca la sesión
+    assert client.post('/auth/refresh', json={'refresh_token': data['refresh_token']}).status_code == 401
+    tokens.init_tokens(app, DbRevocationStore())
+    rv = client.get('/auth/me', headers={'Authorization': f"Bearer {first['access_token']}"})
+    assert rv.status_code == 401
+    rv = client.get('/auth/me', headers={'Authorization': f"Bearer {other['access_token']}"})
+    assert rv.status_code == 401
+
+
+def test_db_store_entries_expire(app, _db):
+    store = DbRevocationStore()
+    store.add('fam:a', 60)
+    store.add('fam:a', 10)  # no acorta la caducidad
+    assert store.claim('used:x', 60) is True
+    assert store.claim('used:x', 60) is False
+    assert 'fam:a' in store and store.contains_any(['fam:b', 'used:x'])
+    store.add('fam:old', -1)
+    assert 'fam:old' not in store
+    assert store.claim('fam:old', 60) is True
+
+
+def test_db_store_does_not_commit_the_session(app, _db):
+    store = DbRevocationStore()
+    pending = User(username='half', name='Half', email='half@example.com', password_hash='x')
+    _db.session.add(pending)
+    store.add('user:1', 60)
+    assert store.claim('used:y', 60) is True
+    assert pending in _db.session.new
+    _db.session.rollback()
+    assert User.query.filter_by(username='half').count() == 0
+    assert store.contains_any(['user:1']) and 'used:y' in store
+
+
+def test_default_store_outside_tests_is_db(app):
+    app.config['TESTING'] = False
+    tokens.init_tokens(app)
+    store = app.extensions['token_revocations']
+    assert isinstance(store, CachedRevocationStore) and isinstance(store.store, DbRevocationStore)
+
+
+def test_cached_store_skips_db_per_request(app, client, _db):
+    clock = [0.0]
+    mine = CachedRevocationStore(DbRevocationStore(), ttl=30, clock=lambda: clock[0])
+    tokens.init_tokens(app, mine)
+    data = _login(client, _db)
+    headers = {'Authorization': f"Bearer {data['access_token']}"}
+    assert client.get('/auth/me', headers=headers).status_code == 200
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        assert client.get('/auth/me', headers=headers).status_code == 200
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    assert not any('token_revocation' in s for s in statements)
+
+    # Revocado en otro worker: se ve al caducar la caché
+    DbRevocationStore().add(f"fam:{_claims(data['access_token'])['fam']}", 3600)
+    assert client.get('/auth/me', headers=headers).status_code == 200
+    clock[0] = 31
+    assert client.get('/auth/me', headers=headers).status_code == 401
+
+    # Revocado en este worker: al momento
+    other = client.post('/auth/login', json={'email': 'tok@example.com', 'password': 'pwd123'}).get_json()
+    headers = {'Authorization': f"Bearer {other['access_token']}"}
+    assert client.get('/auth/me', headers=headers).status_code == 200
+    assert client.post('/auth/logout', headers=headers).status_code == 200
+    assert client.get('/auth/me', headers=headers).status_code == 401
+
+
+def test_logout_revokes_token_without_family(app, client, _db):
+    user = create_user(_db)
+    legacy = tokens.encode(user.id, 'access', tokens.ACCESS_TTL)
+    headers = {'Authorization': f'Bearer {legacy}'}
+    assert client.get('/auth/me', headers=headers).status_code == 200
+    assert client.post('/auth/logout', headers=headers).status_code == 200
+    assert client.get('/auth/me', headers=headers).status_code == 401
+
+
+def test_legacy_tokens_rejected_after_cutoff(app, client, _db):
+    user = create_user(_db)
+    untyped = jwt.encode({'user_id': user.id}, 'test-secret', algorithm='HS256')
+    no_jti = jwt.encode({'user_id': user.id, 'type': 'access'}, 'test-secret', algorithm='HS256')
+    for legacy in (untyped, no_jti):
+        rv = client.get('/auth/me', headers={'Authorization': f'Bearer {legacy}'})
+        assert rv.status_code == 401
+
+    app.config['LEGACY_TOKENS_UNTIL'] = (datetime.utcnow() + timedelta(days=1)).isoformat()
+    for legacy in (untyped, no_jti):
+        assert client.get('/auth/me', headers={'Authorization': f'Bearer {legacy}'}).status_code == 200
+
+    app.config['LEGACY_TOKENS_UNTIL'] = (datetime.utcnow() - timedelta(seconds=1)).isoformat()
+    assert client.get('/auth/me', headers={'Authorization': f'Bearer {untyped}'}).status_code == 401
+
+
+def test_legacy_refresh_redeemed_once(app, client, _db):
+    user = create_user(_db)
+    app.config['LEGACY_TOKENS_UNTIL'] = (datetime.utcnow() + timedelta(days=1)).isoformat()
+    legacy = jwt.encode({'user_id': user.id, 'type': 'refresh',
+                         'exp': datetime.utcnow() + timedelta(days=1)}, 'test-secret', algorithm='HS256')
+    assert client.post('/auth/refresh', json={'refresh_token': legacy}).status_code == 200
+    assert client.post('/auth/refresh', json={'refresh_token': legacy}).status_code == 401
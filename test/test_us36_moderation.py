@@ -0,0 +1,163 @@
+"""
+US36 - Cola de moderación de denuncias
+Acceptance criteria tested:
+- Sólo los moderadores acceden a /api/moderation
+- La cola agrega denuncias por post (total, por categoría, primera/última)
+- La cola se pagina por cursor sin repetir ni saltar posts
+- El cambio de estado masivo es un único UPDATE y puede ocultar los posts
+- Un post se oculta solo al superar el umbral y desaparece de los feeds
+- Los posts borrados (pendientes de purga) no salen en la cola ni se pueden mostrar
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from conftest import create_user, create_post, verify_user_email, auth_headers
+from app.models import Post, Report
+from app.utils import deletion
+
+
+def _moderator(client, _db):
+    mod = create_user(_db, username='mod', name='Mod', email='mod@example.com')
+    mod.is_moderator = True
+    _db.session.commit()
+    return auth_headers(client, 'mod@example.com')
+
+
+def _reporters(_db, n):
+    return [create_user(_db, username=f'rep{i}', name=f'Rep{i}', email=f'rep{i}@example.com')
+            for i in range(n)]
+
+
+def _report(_db, post, user, category='Spam', when=None):
+    r = Report(post_id=post.id, reporting_user_id=user.id, category=category,
+               created_at=when or datetime.utcnow())
+    _db.session.add(r)
+    _db.session.commit()
+    return r
+
+
+def test_queue_requires_moderator(client, _db):
+    create_user(_db, username='plain', name='Plain', email='plain@example.com')
+    rv = client.get('/api/moderation/queue', headers=auth_headers(client, 'plain@example.com'))
+    assert rv.status_code == 403
+    assert client.get('/api/moderation/queue').status_code == 401
+
+
+def test_queue_aggregates_per_post(client, _db):
+    headers = _moderator(client, _db)
+    author = create_user(_db, username='author', name='Author', email='author@example.com')
+    post = create_post(_db, author.id, text='malo')
+    users = _reporters(_db, 3)
+    t0 = datetime(2026, 1, 1, 12, 0)
+    _report(_db, post, users[0], 'Spam', t0)
+    _report(_db, post, users[1], 'Spam', t0 + timedelta(hours=1))
+    _report(_db, post, users[2], 'Odio', t0 + timedelta(hours=2))
+
+    rv = client.get('/api/moderation/queue', headers=headers)
+    assert rv.status_code == 200
+    item = rv.get_json()['items'][0]
+    assert item['post_id'] == post.id
+    assert item['report_count'] == 3
+    assert item['categories'] == {'Spam': 2, 'Odio': 1}
+    assert item['first_seen'].startswith('2026-01-01T12:00')
+    assert item['last_seen'].startswith('2026-01-01T14:00')
+    assert item['post']['text'] == 'malo'
+
+
+def test_queue_cursor_pagination(client, _db):
+    headers = _moderator(client, _db)
+    author = create_user(_db, username='author', name='Author', email='author@example.com')
+    reporter = _reporters(_db, 1)[0]
+    t0 = datetime(2026, 1, 1)
+    posts = [create_post(_db, author.id, text=f'p{i}') for i in range(5)]
+    for i, p in enumerate(posts):
+        # Dos posts con la misma fecha para probar el desempate por id
+        _report(_db, p, reporter, when=t0 + timedelta(minutes=min(i, 3)))
+
+    seen, cursor = [], None
+    while True:
+        url = '/api/moderation/queue?limit=2' + (f'&cursor={cursor}' if cursor else '')
+        body = client.get(url, headers=headers).get_json()
+        seen += [it['post_id'] for it in body['items']]
+        cursor = body['next_cursor']
+        if not cursor:
+            break
+    assert seen == [p.id for p in posts]
+
+    rv = client.get('/api/moderation/queue?cursor=garbage', headers=headers)
+    assert rv.status_code == 400
+
+
+def test_bulk_status_single_update(app, client, _db):
+    headers = _moderator(client, _db)
+    author = create_user(_db, username='author', name='Author', email='author@example.com')
+    posts = [create_post(_db, author.id, text=f'p{i}') for i in range(3)]
+    users = _reporters(_db, 2)
+    for p in posts:
+        for u in users:
+            _report(_db, p, u)
+
+    updates = []
+    listener = lambda *args: updates.append(args[2]) if args[2].lstrip().upper().startswith('UPDATE') else None
+    event.listen(_db.engine, 'before_cursor_execute', listener)
+    try:
+        rv = client.post('/api/moderation/reports/status', headers=headers, json={
+            'status': 'Resolved', 'post_ids': [posts[0].id, posts[1].id], 'hide': True,
+        })
+    finally:
+        event.remove(_db.engine, 'before_cursor_execute', listener)
+    assert rv.status_code == 200
+    assert rv.get_json() == {'updated': 4, 'status': 'Resolved', 'posts_updated': 2}
+    # Un UPDATE para report y otro para post
+    assert len(updates) == 2
+
+    assert Report.query.filter_by(status='Pending').count() == 2
+    assert _db.session.get(Post, posts[0].id).is_hidden is True
+
+    rv = client.post('/api/moderation/reports/status', headers=headers,
+                     json={'status': 'Closed', 'post_ids': [posts[2].id]})
+    assert rv.status_code == 400
+
+
+def test_deleted_posts_out_of_moderation(client, _db):
+    headers = _moderator(client, _db)
+    author = create_user(_db, username='author', name='Author', email='author@example.com')
+    gone, live = create_post(_db, author.id, text='borrado'), create_post(_db, author.id)
+    rep = _reporters(_db, 1)[0]
+    _report(_db, gone, rep)
+    _report(_db, live, rep)
+    gone.is_hidden = True
+    deletion.soft_delete_post(gone)
+    _db.session.commit()
+
+    items = client.get('/api/moderation/queue', headers=headers).get_json()['items']
+    assert [i['post_id'] for i in items] == [live.id]
+    assert client.get(f'/api/moderation/posts/{gone.id}/reports', headers=headers).get_json() == []
+
+    rv = client.post('/api/moderation/reports/status', headers=headers, json={
+        'status': 'Dismissed', 'post_ids': [gone.id, live.id], 'hide': False,
+    })
+    assert rv.get_json() == {'updated': 1, 'status': 'Dismissed', 'posts_updated': 0}
+    _db.session.expire_all()
+    assert _db.session.get(Post, gone.id).is_hidden is True
+    assert 'borrado' not in client.get('/api/posts/').get_data(as_text=True)
+
+
+def test_auto_hide_at_threshold_and_feed_filter(app, client, _db):
+    app.config['MODERATION_HIDE_THRESHOLD'] = 2
+    author = create_user(_db, username='author', name='Author', email='author@example.com')
+    post = create_post(_db, author.id, text='ocultame')
+    keep = create_post(_db, author.id, text='visible')
+    for i, u in enumerate(_reporters(_db, 2)):
+        verify_user_email(u.email)
+        rv = client.post(f'/api/posts/{post.id}/report', json={'category': 'Spam'},
+                         headers=auth_headers(client, u.email))
+        assert rv.status_code == 201
+        assert _db.session.get(Post, post.id).is_hidden is (i == 1)
+
+    feed_ids = [it['id'] for it in client.get('/api/posts/').get_json()['items']]
+    assert post.id not in feed_ids and keep.id in feed_ids
+    user_ids = [it['id'] for it in client.get(f'/api/posts/user/{author.id}').get_json()]
+    assert user_ids == [keep.id]
@@ -0,0 +1,178 @@
+"""
+US37 - Borrado de posts y cuentas por conjuntos
+Acceptance criteria tested:
+- Borrar un post es un único DELETE: likes, guardados, denuncias y reposts caen por cascada
+- Los posts populares se ocultan al momento y se purgan por lotes
+- La purga se puede retomar con purge_deleted_posts
+- Un post borrado en diferido no admite likes, guardados, reposts ni denuncias ni sale por id
+- Ni sale en feeds, perfiles, tendencias, for_you, likes ni guardados (aunque no esté oculto)
+- DELETE /api/users/me borra la cuenta (con contraseña) y ajusta los contadores ajenos
+  (desde US38, mediante un job)
+"""
+
+from sqlalchemy import event, text
+
+from conftest import create_user, create_post, auth_headers
+from app.models import Bookmark, Community, Post, PostLike, Report, Repost, User, follow
+from app.utils import deletion, trending, write_paths
+
+
+def _populate(_db, post, users):
+    for u in users:
+        write_paths.like(u.id, post.id)
+        write_paths.bookmark(u.id, post.id)
+        write_paths.repost(u.id, post.id)
+        _db.session.add(Report(post_id=post.id, reporting_user_id=u.id, category='Spam'))
+    _db.session.commit()
+
+
+def _children(_db, post_id):
+    return sum(q.count() for q in (
+        PostLike.query.filter_by(post_id=post_id),
+        Bookmark.query.filter_by(post_id=post_id),
+        Report.query.filter_by(post_id=post_id),
+        Repost.query.filter_by(original_post_id=post_id),
+    ))
+
+
+def test_sqlite_foreign_keys_enabled(_db):
+    assert _db.session.execute(text('PRAGMA foreign_keys')).scalar() == 1
+
+
+def test_delete_post_is_set_based(client, _db):
+    author = create_user(_db, username='author', name='Author', email='author@example.com')
+    users = [create_user(_db, username=f'u{i}', name=f'U{i}', email=f'u{i}@example.com') for i in range(3)]
+    post = create_post(_db, author.id)
+    post_id = post.id
+    _populate(_db, post, users)
+    headers = auth_headers(client, 'author@example.com')
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(_db.engine, 'before_cursor_execute', listener)
+    try:
+        rv = client.delete(f'/api/posts/{post_id}', headers=headers)
+    finally:
+        event.remove(_db.engine, 'before_cursor_execute', listener)
+    assert rv.status_code == 200
+    deletes = [s for s in statements if s.lstrip().upper().startswith('DELETE')]
+    assert len(deletes) == 1
+    # Los likes no se cargan: sólo aparecen en el UPDATE de user_interest
+    assert not any(s.lstrip().upper().startswith('SELECT') and 'FROM post_like' in s for s in statements)
+
+    _db.session.expunge_all()
+    assert _db.session.get(Post, post_id) is None
+    assert _children(_db, post_id) == 0
+
+
+def test_popular_post_soft_deleted_and_purged(app, client, _db):
+    app.config.update(POST_SOFT_DELETE_THRESHOLD=3, POST_PURGE_BATCH=2)
+    author = create_user(_db, username='author', name='Author', email='author@example.com')
+    users = [create_user(_db, username=f'u{i}', name=f'U{i}', email=f'u{i}@example.com') for i in range(5)]
+    post = create_post(_db, author.id)
+    post_id = post.id
+    _populate(_db, post, users)
+
+    rv = client.delete(f'/api/posts/{post_id}', headers=auth_headers(client, 'author@example.com'))
+    assert rv.status_code == 202
+    assert rv.get_json()['pending_purge'] is True
+    _db.session.expunge_all()
+    assert _db.session.get(Post, post_id) is None
+    assert _children(_db, post_id) == 0
+
+
+def test_purge_resumes_pending_posts(app, client, _db):
+    author = create_user(_db, username='author', name='Author', email='author@example.com')
+    users = [create_user(_db, username=f'u{i}', name=f'U{i}', email=f'u{i}@example.com') for i in range(2)]
+    post = create_post(_db, author.id)
+    post_id = post.id
+    _populate(_db, post, users)
+    deletion.soft_delete_post(post)
+    _db.session.commit()
+
+    feed_ids = [it['id'] for it in client.get('/api/posts/').get_json()['items']]
+    assert post_id not in feed_ids
+
+    assert deletion.purge_deleted_posts(batch_size=1) == 1
+    assert Post.query.count() == 0
+    assert _children(_db, post_id) == 0
+
+
+def test_soft_deleted_post_is_gone(client, _db):
+    author = create_user(_db, username='author', name='Author', email='author@example.com')
+    create_user(_db)
+    post = create_post(_db, author.id)
+    post_id = post.id
+    deletion.soft_delete_post(post)
+    _db.session.commit()
+    headers = auth_headers(client, 'test@example.com')
+
+    for method, path in (('post', 'like'), ('post', 'bookmark'), ('post', 'repost'), ('post', 'report')):
+        rv = getattr(client, method)(f'/api/posts/{post_id}/{path}', headers=headers, json={'category': 'Spam'})
+        assert rv.status_code == 404
+    rv = client.post('/api/posts/batch', headers=headers, json={'actions': [{'action': 'like', 'post_id': post_id}]})
+    assert rv.get_json()['results'][0]['ok'] is False
+    assert client.get(f'/api/posts/state?ids={post_id}').get_json()['states'] == {}
+
+    user_id = User.query.filter_by(email='test@example.com').one().id
+    assert write_paths.like_many(user_id, [post_id]) == []
+    assert write_paths.repost_many(user_id, {post_id: None}) == {}
+    assert _children(_db, post_id) == 0
+    assert _db.session.get(Post, post_id).like_count == 0
+
+
+def test_soft_deleted_post_leaves_every_listing(client, _db):
+    author = create_user(_db, username='author', name='Author', email='author@example.com')
+    fan = create_user(_db, username='fan', name='Fan', email='fan@example.com', preferences=['general'])
+    gone = create_post(_db, author.id, text='texto-borrado')
+    create_post(_db, author.id, text='texto-vivo')
+    write_paths.like(fan.id, gone.id)
+    write_paths.bookmark(fan.id, gone.id)
+    write_paths.repost(fan.id, gone.id)
+    _db.session.commit()
+    deletion.soft_delete_post(gone)
+    _db.session.commit()
+    trending.rebuild()
+    # is_hidden es de moderación; el borrado no depende de él
+    assert gone.is_hidden is False
+    headers = auth_headers(client, 'fan@example.com')
+
+    for path in ('/api/posts/', '/api/posts/?mode=for_you', f'/api/posts/user/{author.id}',
+                 f'/api/users/{author.id}/posts', '/api/posts/posts', '/api/posts/trending'):
+        body = client.get(path, headers=headers).get_data(as_text=True)
+        assert 'texto-vivo' in body, path
+        assert 'texto-borrado' not in body, path
+    for path in (f'/api/users/{fan.id}/posts', '/api/posts/me/likes', f'/api/users/{fan.id}/bookmarks'):
+        rv = client.get(path, headers=headers)
+        assert rv.status_code == 200
+        assert 'texto-borrado' not in rv.get_data(as_text=True), path
+
+
+def test_delete_account(client, _db):
+    gone = create_user(_db, username='gone', name='Gone', email='gone@example.com')
+    other = create_user(_db, username='other', name='Other', email='other@example.com')
+    own_post = create_post(_db, gone.id)
+    other_post = create_post(_db, other.id)
+    _populate(_db, other_post, [gone])
+    _populate(_db, own_post, [other])
+    gone.following.append(other)
+    other.following.append(gone)
+    _db.session.add(Community(name='Runners', created_by=gone.id))
+    _db.session.commit()
+    gone_id, own_post_id, other_post_id = gone.id, own_post.id, other_post.id
+
+    headers = auth_headers(client, 'gone@example.com')
+    assert client.delete('/api/users/me', headers=headers, json={'password': 'bad'}).status_code == 403
+    rv = client.delete('/api/users/me', headers=headers, json={'password': 'secret1'})
+    assert rv.status_code == 202
+    assert rv.get_json()['job']['status'] == 'done'
+
+    _db.session.expunge_all()
+    assert _db.session.get(User, gone_id) is None
+    assert _db.session.get(Post, own_post_id) is None
+    assert _children(_db, own_post_id) == 0
+    other_post = _db.session.get(Post, other_post_id)
+    assert other_post.like_count == 0 and other_post.repost_count == 0
+    assert _children(_db, other_post_id) == 0
+    assert _db.session.execute(follow.select()).all() == []
+    assert Community.query.filter_by(name='Runners').one().created_by is None
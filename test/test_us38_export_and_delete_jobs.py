@@ -0,0 +1,182 @@
+"""
+US38 - Exportación y borrado de cuenta como jobs en segundo plano
+Acceptance criteria tested:
+- POST /api/users/me/export genera un ZIP con un NDJSON por sección
+- La exportación se retoma desde la última sección terminada
+- El borrado de cuenta avanza por lotes y registra su progreso
+- Los jobs abandonados (sin latido) se retoman con run_pending
+- Un job que falla queda en estado failed con el error
+- Sólo el dueño puede consultar o descargar un job
+- Mientras se borra la cuenta sus tokens dejan de valer y no puede iniciar sesión
+- Las exportaciones caducan a las EXPORT_TTL_HOURS (410 y borrado del ZIP)
+"""
+
+import io
+import json
+import os
+import time
+import zipfile
+from datetime import datetime, timedelta
+
+from conftest import create_user, create_post, auth_headers
+from app.models import Job, Post, PostLike, User
+from app.utils import export, jobs, write_paths
+
+
+def _user_with_data(_db, name='exp'):
+    user = create_user(_db, username=name, name=name.title(), email=f'{name}@example.com')
+    other = create_user(_db, username=f'{name}_o', name='Other', email=f'{name}_o@example.com')
+    posts = [create_post(_db, user.id, text=f'p{i}') for i in range(3)]
+    other_posts = [create_post(_db, other.id, text=f'o{i}') for i in range(3)]
+    for p in other_posts:
+        write_paths.like(user.id, p.id)
+    write_paths.like(other.id, posts[0].id)
+    user.following.append(other)
+    other.following.append(user)
+    _db.session.commit()
+    return user, other, posts, other_posts
+
+
+def _read_zip(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        return {
+            name.rsplit('.', 1)[0]: [json.loads(line) for line in zf.read(name).decode().splitlines()]
+            for name in zf.namelist()
+        }
+
+
+def test_export_endpoint_produces_ndjson_zip(app, client, _db, tmp_path):
+    app.config.update(EXPORT_DIR=str(tmp_path), EXPORT_YIELD_PER=2)
+    user, other, posts, other_posts = _user_with_data(_db)
+    headers = auth_headers(client, 'exp@example.com')
+
+    rv = client.post('/api/users/me/export', headers=headers)
+    assert rv.status_code == 202
+    job = rv.get_json()['job']
+    assert job['status'] == 'done'
+    assert job['progress']['rows']['posts'] == 3
+
+    rv = client.get(f"/api/jobs/{job['id']}/download", headers=headers)
+    assert rv.status_code == 200
+    sections = _read_zip(rv.data)
+    assert sections['profile'][0]['email'] == 'exp@example.com'
+    assert [p['text'] for p in sections['posts']] == ['p0', 'p1', 'p2']
+    assert sorted(l['post_id'] for l in sections['likes']) == sorted(p.id for p in other_posts)
+    assert sections['followers'] == [{'user_id': other.id, 'created_at': sections['followers'][0]['created_at']}]
+    assert len(sections['following']) == 1
+    # Los parciales se borran al empaquetar
+    assert os.listdir(tmp_path) == [f"export_{job['id']}.zip"]
+
+
+def test_export_resumes_from_checkpoint(app, _db, tmp_path):
+    app.config['EXPORT_DIR'] = str(tmp_path)
+    user, *_ = _user_with_data(_db)
+    job = Job(kind='export_user', user_id=user.id, payload={},
+              progress={'sections_done': ['profile'], 'rows': {'profile': 1}})
+    _db.session.add(job)
+    _db.session.commit()
+    work = tmp_path / f'job_{job.id}'
+    work.mkdir()
+    (work / 'profile.ndjson').write_text('{"resumed": true}\n')
+
+    job = jobs.run_job(job.id)
+    assert job.status == 'done'
+    with zipfile.ZipFile(job.result) as zf:
+        assert json.loads(zf.read('profile.ndjson')) == {'resumed': True}
+        assert len(zf.read('posts.ndjson').splitlines()) == 3
+
+
+def test_delete_job_runs_in_batches(app, _db):
+    user, other, posts, other_posts = _user_with_data(_db, name='del')
+    user_id, other_id, other_post_ids = user.id, other.id, [p.id for p in other_posts]
+    job = jobs.enqueue('delete_user', user_id=user_id, payload={'batch_size': 2})
+
+    assert job.status == 'done'
+    assert job.progress['deleted']['likes'] == 3
+    assert job.progress['deleted']['posts'] == 3
+    assert job.progress['step'] == 'done'
+    _db.session.expunge_all()
+    assert _db.session.get(User, user_id) is None
+    assert Post.query.filter_by(user_id=user_id).count() == 0
+    assert PostLike.query.filter_by(user_id=user_id).count() == 0
+    assert all(_db.session.get(Post, pid).like_count == 0 for pid in other_post_ids)
+    assert _db.session.get(User, other_id).followers.count() == 0
+
+
+def test_stale_running_job_is_resumed(app, _db):
+    user, *_ = _user_with_data(_db, name='stale')
+    job = Job(kind='delete_user', user_id=user.id, payload={}, progress={'step': 'likes'},
+              status='running', heartbeat_at=datetime.utcnow() - timedelta(hours=1))
+    fresh = Job(kind='delete_user', user_id=user.id, payload={}, progress={},
+                status='running', heartbeat_at=datetime.utcnow())
+    _db.session.add_all([job, fresh])
+    _db.session.commit()
+
+    resumed = jobs.run_pending()
+    assert [j.id for j in resumed] == [job.id]
+    assert resumed[0].status == 'done' and resumed[0].attempts == 1
+    assert _db.session.get(Job, fresh.id).status == 'running'
+
+
+def test_failed_job_records_error(app, _db):
+    @jobs.job_handler('boom_test')
+    def _boom(job):
+        raise RuntimeError('kaput')
+    try:
+        job = jobs.enqueue('boom_test')
+    finally:
+        jobs.HANDLERS.pop('boom_test')
+    assert job.status == 'failed'
+    assert 'kaput' in job.error
+
+
+def test_jobs_are_private(app, client, _db, tmp_path):
+    app.config['EXPORT_DIR'] = str(tmp_path)
+    _user_with_data(_db, name='owner')
+    create_user(_db, username='snoop', name='Snoop', email='snoop@example.com')
+    job_id = client.post('/api/users/me/export',
+                         headers=auth_headers(client, 'owner@example.com')).get_json()['job']['id']
+    snoop = auth_headers(client, 'snoop@example.com')
+    assert client.get(f'/api/jobs/{job_id}', headers=snoop).status_code == 404
+    assert client.get(f'/api/jobs/{job_id}/download', headers=snoop).status_code == 404
+
+
+def test_deleting_account_blocks_auth(app, client, _db, monkeypatch):
+    # El job queda en cola: se comprueba el estado mientras "corre"
+    app.config['JOBS_EAGER'] = False
+    monkeypatch.setattr(jobs, '_get_executor', lambda app: type('Idle', (), {'submit': lambda *a: None})())
+    user, *_ = _user_with_data(_db, name='gone')
+    user_id = user.id
+    login = client.post('/auth/login', json={'email': 'gone@example.com', 'password': 'secret1'}).get_json()
+    headers = {'Authorization': f"Bearer {login['access_token']}"}
+
+    rv = client.delete('/api/users/me', headers=headers, json={'password': 'secret1'})
+    assert rv.status_code == 202
+    assert rv.get_json()['job']['status'] == 'queued'
+    assert _db.session.get(User, user_id).deleting_at is not None
+
+    assert client.get('/auth/me', headers=headers).status_code == 401
+    assert client.post('/api/posts/', headers=headers, json={'text': 'x', 'topic': 'general'}).status_code == 401
+    assert client.post('/auth/refresh', json={'refresh_token': login['refresh_token']}).status_code == 401
+    rv = client.post('/auth/login', json={'email': 'gone@example.com', 'password': 'secret1'})
+    assert rv.status_code == 403
+
+
+def test_expired_exports_are_purged(app, client, _db, tmp_path):
+    app.config.update(EXPORT_DIR=str(tmp_path), EXPORT_TTL_HOURS=1)
+    _user_with_data(_db)
+    headers = auth_headers(client, 'exp@example.com')
+    job_id = client.post('/api/users/me/export', headers=headers).get_json()['job']['id']
+    archive = tmp_path / f'export_{job_id}.zip'
+    assert client.get(f'/api/jobs/{job_id}/download', headers=headers).status_code == 200
+
+    job = _db.session.get(Job, job_id)
+    job.finished_at = datetime.utcnow() - timedelta(hours=2)
+    _db.session.commit()
+    assert client.get(f'/api/jobs/{job_id}/download', headers=headers).status_code == 410
+
+    old = time.time() - 2 * 3600
+    os.utime(archive, (old, old))
+    (tmp_path / 'job_99').mkdir()
+    assert export.purge_expired_exports() == 1
+    assert os.listdir(tmp_path) == ['job_99']
@@ -0,0 +1,205 @@
+"""
+US39 - Tendencias de posts y temas con decaimiento temporal
+Acceptance criteria tested:
+- Los likes y reposts suman en la tabla de tendencias de forma incremental
+- Un evento antiguo pesa menos que uno reciente (vida media configurable)
+- GET /api/posts/trending filtra por tema y ventana y excluye posts ocultos
+- GET /api/posts/trending se sirve con una única consulta
+- rebuild() recalcula lo mismo que el registro incremental
+- GET /api/posts/trending/topics ordena los temas por actividad
+- Los likes no escriben topic_trend: los temas se vuelcan por lotes tras confirmar
+- La suma en escala log no desborda con eventos lejanos entre sí
+- rebuild() borra las filas de posts fuera de su ventana
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from conftest import create_user, create_post
+from app.models import Post, PostTrend, TopicTrend
+from app.utils import trending, write_paths
+
+
+def _ids(rv):
+    assert rv.status_code == 200
+    return [item['id'] for item in rv.get_json()['items']]
+
+
+@pytest.fixture
+def users(_db):
+    return [create_user(_db, username=f'u{i}', name=f'U{i}', email=f'u{i}@example.com') for i in range(4)]
+
+
+def test_likes_and_reposts_rank_posts(client, _db, users):
+    author = users[0]
+    quiet = create_post(_db, author.id, topic='Running', text='quiet')
+    busy = create_post(_db, author.id, topic='Running', text='busy')
+    for u in users[1:]:
+        write_paths.like(u.id, busy.id)
+    write_paths.like(users[1].id, quiet.id)
+    _db.session.commit()
+
+    assert _ids(client.get('/api/posts/trending')) == [busy.id, quiet.id]
+
+    # Un repost pesa más que un like
+    write_paths.repost(users[2].id, quiet.id)
+    write_paths.repost(users[3].id, quiet.id)
+    _db.session.commit()
+    assert _ids(client.get('/api/posts/trending'))[0] == quiet.id
+
+
+def test_old_events_decay(client, _db, users):
+    author = users[0]
+    old = create_post(_db, author.id, text='old')
+    new = create_post(_db, author.id, text='new')
+    two_days_ago = datetime.utcnow() - timedelta(hours=48)
+    # 3 likes de hace dos vidas medias valen 0.75; 1 like de ahora vale 1
+    for _ in range(3):
+        trending.record([old.id], 'like', at=two_days_ago)
+    trending.record([new.id], 'like')
+    _db.session.commit()
+
+    rv = client.get('/api/posts/trending')
+    items = rv.get_json()['items']
+    assert [i['id'] for i in items] == [new.id, old.id]
+    assert items[0]['trendingScore'] == pytest.approx(1.0, rel=1e-3)
+    assert items[1]['trendingScore'] == pytest.approx(0.75, rel=1e-3)
+
+
+def test_topic_window_and_hidden_filters(client, _db, users):
+    author, fan = users[0], users[1]
+    run = create_post(_db, author.id, topic='Running')
+    yoga = create_post(_db, author.id, topic='Yoga')
+    stale = create_post(_db, author.id, topic='Running')
+    stale.created_at = datetime.utcnow() - timedelta(days=5)
+    hidden = create_post(_db, author.id, topic='Running')
+    hidden.is_hidden = True
+    _db.session.commit()
+    write_paths.like_many(fan.id, [run.id, yoga.id, stale.id, hidden.id])
+    _db.session.commit()
+
+    assert set(_ids(client.get('/api/posts/trending?topic=Running'))) == {run.id, stale.id}
+    assert _ids(client.get('/api/posts/trending?topic=Running&window=24')) == [run.id]
+    assert _ids(client.get('/api/posts/trending?topic=Yoga')) == [yoga.id]
+    assert client.get('/api/posts/trending?window=-1').status_code == 400
+    assert client.get('/api/posts/trending?limit=x').status_code == 400
+
+
+def test_trending_is_one_query(client, _db, users):
+    for i in range(5):
+        post = create_post(_db, users[0].id, text=f'p{i}')
+        write_paths.like(users[1].id, post.id)
+    _db.session.commit()
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(_db.engine, 'before_cursor_execute', listener)
+    try:
+        rv = client.get('/api/posts/trending?fields=text,user')
+    finally:
+        event.remove(_db.engine, 'before_cursor_execute', listener)
+    assert len(_ids(rv)) == 5
+    assert len(statements) == 1
+
+
+def test_rebuild_matches_incremental(client, _db, users):
+    author = users[0]
+    headers = {'Authorization': 'Bearer ' + client.post(
+        '/auth/login', json={'email': 'u0@example.com', 'password': 'secret1'}).get_json()['access_token']}
+    ids = [client.post('/api/posts/', json={'text': f't{i}', 'topic': 'Gym'}, headers=headers).get_json()['id']
+           for i in range(3)]
+    for u in users[1:]:
+        write_paths.like_many(u.id, ids[:2])
+    write_paths.repost(users[1].id, ids[0])
+    _db.session.commit()
+
+    before = {r.post_id: r.score for r in PostTrend.query}
+    assert trending.rebuild() == 3
+    _db.session.expire_all()
+    after = {r.post_id: r.score for r in PostTrend.query}
+    assert after.keys() == before.keys()
+    for pid in before:
+        assert after[pid] == pytest.approx(before[pid], abs=1e-3)
+
+
+def test_trending_topics(client, _db, users):
+    run = create_post(_db, users[0].id, topic='Running')
+    yoga = create_post(_db, users[0].id, topic='Yoga')
+    write_paths.like(users[1].id, run.id)
+    write_paths.like(users[2].id, run.id)
+    write_paths.like(users[1].id, yoga.id)
+    _db.session.commit()
+
+    rv = client.get('/api/posts/trending/topics')
+    assert rv.status_code == 200
+    topics = rv.get_json()
+    assert [t['topic'] for t in topics] == ['Running', 'Yoga']
+    assert topics[0]['trendingScore'] == pytest.approx(2.0, rel=1e-3)
+
+
+def test_deleting_post_drops_trend_row(client, _db, users):
+    post = create_post(_db, users[0].id)
+    post_id = post.id
+    write_paths.like(users[1].id, post_id)
+    _db.session.commit()
+    assert PostTrend.query.filter_by(post_id=post_id).count() == 1
+
+    _db.session.delete(Post.query.get(post_id))
+    _db.session.commit()
+    assert PostTrend.query.filter_by(post_id=post_id).count() == 0
+
+
+def test_topic_terms_are_buffered_until_flush(app, client, _db, users):
+    post = create_post(_db, users[0].id, topic='Running')
+    post_id = post.id
+    headers = {'Authorization': 'Bearer ' + client.post(
+        '/auth/login', json={'email': 'u1@example.com', 'password': 'secret1'}).get_json()['access_token']}
+    app.config['TRENDING_TOPIC_FLUSH_SECONDS'] = 3600
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(_db.engine, 'before_cursor_execute', listener)
+    try:
+        assert client.post(f'/api/posts/{post_id}/like', headers=headers).status_code == 200
+    finally:
+        event.remove(_db.engine, 'before_cursor_execute', listener)
+    assert not any('topic_trend' in s for s in statements)
+    assert TopicTrend.query.count() == 0
+
+    # Un like deshecho con rollback no llega al búfer
+    write_paths.like(users[2].id, post_id)
+    _db.session.rollback()
+
+    assert trending.flush_topics() == 1
+    assert trending.current_score(_db.session.get(TopicTrend, 'Running').score) == pytest.approx(1.0, rel=1e-3)
+    assert trending.flush_topics() == 0
+
+    app.config['TRENDING_TOPIC_FLUSH_SECONDS'] = 0
+    write_paths.like(users[3].id, post_id)
+    _db.session.commit()
+    client.get('/api/posts/trending')  # cualquier petición vuelca si toca
+    _db.session.expire_all()
+    assert trending.current_score(_db.session.get(TopicTrend, 'Running').score) == pytest.approx(2.0, rel=1e-3)
+
+
+def test_log_sum_does_not_overflow(_db):
+    _db.session.add_all([TopicTrend(topic='a', score=2000.0), TopicTrend(topic='b', score=0.0)])
+    _db.session.commit()
+    trending._accumulate(TopicTrend, 'topic', [{'topic': 'a', 'score': 0.0}, {'topic': 'b', 'score': 2000.0}])
+    _db.session.commit()
+    _db.session.expire_all()
+    assert _db.session.get(TopicTrend, 'a').score == pytest.approx(2000.0)
+    assert _db.session.get(TopicTrend, 'b').score == pytest.approx(2000.0)
+
+
+def test_rebuild_drops_posts_outside_window(_db, users):
+    old = create_post(_db, users[0].id, topic='Running')
+    old.created_at = datetime.utcnow() - timedelta(days=30)
+    _db.session.commit()
+    write_paths.like(users[1].id, old.id)
+    _db.session.commit()
+    assert PostTrend.query.count() == 1
+
+    assert trending.rebuild(days=14) == 0
+    assert PostTrend.query.count() == 0
@@ -0,0 +1,125 @@
+"""
+US40 - Feed personalizado (?mode=for_you)
+Acceptance criteria tested:
+- Los likes mantienen el vector de temas del usuario (user_interest)
+- Borrar o purgar un post resta sus likes del vector de quienes le dieron like
+- Los posts de temas preferidos y de autores seguidos suben en el ranking
+- Los posts propios y los ocultos no aparecen; los antiguos quedan fuera de los candidatos
+- Sin usuario el modo funciona (recencia y popularidad)
+- Un modo desconocido devuelve 400
+"""
+from datetime import datetime, timedelta
+
+from conftest import create_user, create_post, auth_headers
+from app.models import UserInterest
+from app.utils import deletion, write_paths
+
+
+def _ids(rv):
+    assert rv.status_code == 200
+    return [item['id'] for item in rv.get_json()['items']]
+
+
+def test_likes_maintain_topic_vector(_db):
+    me = create_user(_db, username='me', name='Me', email='me@example.com')
+    other = create_user(_db, username='other', name='Other', email='other@example.com')
+    posts = [create_post(_db, other.id, topic=t) for t in ('Yoga', 'Yoga', 'Gym')]
+    write_paths.like_many(me.id, [p.id for p in posts])
+    _db.session.commit()
+    vec = {r.topic: r.weight for r in UserInterest.query.filter_by(user_id=me.id)}
+    assert vec == {'Yoga': 2, 'Gym': 1}
+
+    write_paths.unlike(me.id, posts[0].id)
+    _db.session.commit()
+    _db.session.expire_all()
+    vec = {r.topic: r.weight for r in UserInterest.query.filter_by(user_id=me.id)}
+    assert vec == {'Yoga': 1, 'Gym': 1}
+
+
+def test_deleted_posts_leave_topic_vector(_db):
+    me = create_user(_db, username='me', name='Me', email='me@example.com')
+    fan = create_user(_db, username='fan', name='Fan', email='fan@example.com')
+    other = create_user(_db, username='other', name='Other', email='other@example.com')
+    posts = [create_post(_db, other.id, topic=t) for t in ('Yoga', 'Yoga', 'Gym')]
+    for user in (me, fan):
+        write_paths.like_many(user.id, [p.id for p in posts])
+    _db.session.commit()
+
+    deletion.delete_post(posts[0].id)
+    _db.session.commit()
+    # Purga por lotes (posts populares marcados como borrados)
+    deletion.purge_post(posts[2].id, batch_size=1)
+    _db.session.expire_all()
+    for user in (me, fan):
+        vec = {r.topic: r.weight for r in UserInterest.query.filter_by(user_id=user.id)}
+        assert vec == {'Yoga': 1, 'Gym': 0}
+
+
+def test_preferences_and_follows_rank_first(client, _db):
+    me = create_user(_db, username='me', name='Me', email='me@example.com', preferences=['Yoga'])
+    friend = create_user(_db, username='friend', name='Friend', email='friend@example.com')
+    stranger = create_user(_db, username='stranger', name='Stranger', email='stranger@example.com')
+    me.following.append(friend)
+    _db.session.commit()
+
+    yoga = create_post(_db, stranger.id, topic='Yoga', text='yoga')
+    by_friend = create_post(_db, friend.id, topic='Cycling', text='friend')
+    unrelated = create_post(_db, stranger.id, topic='Cycling', text='other')
+    mine = create_post(_db, me.id, topic='Yoga', text='mine')
+
+    ids = _ids(client.get('/api/posts/?mode=for_you', headers=auth_headers(client, 'me@example.com')))
+    assert ids[0] == yoga.id
+    assert by_friend.id in ids
+    # Sin señal (ni tema ni autor) no es candidato; los propios tampoco
+    assert unrelated.id not in ids
+    assert mine.id not in ids
+
+
+def test_liked_topics_and_authors_count(client, _db):
+    me = create_user(_db, username='me', name='Me', email='me@example.com')
+    a = create_user(_db, username='a', name='A', email='a@example.com')
+    b = create_user(_db, username='b', name='B', email='b@example.com')
+    liked = create_post(_db, a.id, topic='Gym')
+    write_paths.like(me.id, liked.id)
+    _db.session.commit()
+
+    from_a = create_post(_db, a.id, topic='Running')
+    gym_b = create_post(_db, b.id, topic='Gym')
+    other_b = create_post(_db, b.id, topic='Running')
+
+    ids = _ids(client.get('/api/posts/?mode=for_you&limit=50', headers=auth_headers(client, 'me@example.com')))
+    assert set(ids) >= {from_a.id, gym_b.id}
+    assert other_b.id not in ids
+
+
+def test_hidden_and_old_posts_excluded(client, _db):
+    me = create_user(_db, username='me', name='Me', email='me@example.com', preferences=['Yoga'])
+    other = create_user(_db, username='other', name='Other', email='other@example.com')
+    fresh = create_post(_db, other.id, topic='Yoga')
+    hidden = create_post(_db, other.id, topic='Yoga')
+    hidden.is_hidden = True
+    old = create_post(_db, other.id, topic='Yoga')
+    old.created_at = datetime.utcnow() - timedelta(days=60)
+    _db.session.commit()
+
+    ids = _ids(client.get('/api/posts/?mode=for_you', headers=auth_headers(client, 'me@example.com')))
+    assert ids == [fresh.id]
+
+
+def test_anonymous_and_pagination(client, _db):
+    author = create_user(_db, username='author', name='Author', email='author@example.com')
+    fan = create_user(_db, username='fan', name='Fan', email='fan@example.com')
+    quiet = create_post(_db, author.id, text='quiet')
+    popular = create_post(_db, author.id, text='popular')
+    write_paths.like(fan.id, popular.id)
+    _db.session.commit()
+
+    rv = client.get('/api/posts/?mode=for_you&limit=1')
+    body = rv.get_json()
+    assert _ids(rv) == [popular.id]
+    assert body['has_more'] is True and body['total'] == 2
+    assert _ids(client.get('/api/posts/?mode=for_you&limit=1&page=2')) == [quiet.id]
+
+
+def test_unknown_mode(client):
+    assert client.get('/api/posts/?mode=random').status_code == 400
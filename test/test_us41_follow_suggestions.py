@@ -0,0 +1,106 @@
+"""
+US41 - Sugerencias de a quién seguir
+Acceptance criteria tested:
+- Se ordenan por seguidos en común, comunidades compartidas y temas compartidos
+- No se sugiere a uno mismo ni a quien ya se sigue
+- Los candidatos salen de una única consulta agrupada
+- Sin grafo, se sugieren usuarios de mis temas (acotados por tema) y si no los más seguidos
+- Requiere autenticación
+"""
+from sqlalchemy import event
+
+from conftest import create_user, auth_headers
+from app.models import Community
+
+
+def _user(_db, name, **kwargs):
+    return create_user(_db, username=name, name=name.title(), email=f'{name}@example.com', **kwargs)
+
+
+def test_ranked_by_mutuals_communities_and_topics(client, _db):
+    me = _user(_db, 'me', preferences=['Yoga', 'Gym'])
+    a, b = _user(_db, 'a'), _user(_db, 'b')
+    fof = _user(_db, 'fof')
+    neighbour = _user(_db, 'neighbour', preferences=['Yoga'])
+    both = _user(_db, 'both', preferences=['Yoga', 'Gym'])
+    _user(_db, 'nobody')
+
+    me.following.extend([a, b])
+    a.following.extend([fof, both])
+    b.following.append(fof)
+    club = Community(name='Club', created_by=me.id)
+    club.members.extend([me, neighbour])
+    _db.session.add(club)
+    _db.session.commit()
+
+    rv = client.get('/api/users/suggestions', headers=auth_headers(client, 'me@example.com'))
+    assert rv.status_code == 200
+    items = rv.get_json()
+    # fof: 2 seguidos en común (6); both: 1 + 2 temas (5); neighbour: comunidad + tema (3)
+    assert [i['username'] for i in items] == ['fof', 'both', 'neighbour']
+    assert items[0]['mutual_follows'] == 2
+    assert items[1]['shared_topics'] == ['Gym', 'Yoga']
+    assert items[2]['shared_communities'] == 1
+
+
+def test_excludes_self_and_already_followed(client, _db):
+    me = _user(_db, 'me')
+    a, b = _user(_db, 'a'), _user(_db, 'b')
+    me.following.append(a)
+    a.following.extend([me, b])
+    me.following.append(b)
+    _db.session.commit()
+
+    rv = client.get('/api/users/suggestions', headers=auth_headers(client, 'me@example.com'))
+    names = [i['username'] for i in rv.get_json()]
+    assert 'me' not in names and 'a' not in names and 'b' not in names
+
+
+def test_candidates_in_one_grouped_query(client, _db):
+    me = _user(_db, 'me')
+    friends = [_user(_db, f'f{i}') for i in range(5)]
+    others = [_user(_db, f'o{i}') for i in range(5)]
+    me.following.extend(friends)
+    for f in friends:
+        f.following.extend(others)
+    _db.session.commit()
+    headers = auth_headers(client, 'me@example.com')
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(_db.engine, 'before_cursor_execute', listener)
+    try:
+        rv = client.get('/api/users/suggestions?limit=3', headers=headers)
+    finally:
+        event.remove(_db.engine, 'before_cursor_execute', listener)
+    assert [i['mutual_follows'] for i in rv.get_json()] == [5, 5, 5]
+    # candidatos agrupados + datos de los candidatos
+    assert len(statements) == 2
+
+
+def test_cold_start_suggests_popular(client, _db):
+    me = _user(_db, 'me')
+    star, fan1, fan2 = _user(_db, 'star'), _user(_db, 'fan1'), _user(_db, 'fan2')
+    fan1.following.append(star)
+    fan2.following.append(star)
+    _db.session.commit()
+
+    rv = client.get('/api/users/suggestions?limit=1', headers=auth_headers(client, 'me@example.com'))
+    assert [i['username'] for i in rv.get_json()] == ['star']
+
+
+def test_topic_fallback_is_bounded_per_topic(app, client, _db):
+    app.config.update(SUGGESTIONS_TOPIC_FANOUT=2)
+    _user(_db, 'me', preferences=['Yoga', 'Gym'])
+    yogis = [_user(_db, f'y{i}', preferences=['Yoga']) for i in range(4)]
+    _user(_db, 'both', preferences=['Yoga', 'Gym'])
+    headers = auth_headers(client, 'me@example.com')
+
+    items = client.get('/api/users/suggestions', headers=headers).get_json()
+    # Yoga aporta los 2 más recientes (both, y3); Gym sólo a both
+    assert [i['username'] for i in items] == ['both', yogis[-1].username]
+    assert items[0]['shared_topics'] == ['Gym', 'Yoga']
+
+
+def test_requires_auth(client):
+    assert client.get('/api/users/suggestions').status_code == 401
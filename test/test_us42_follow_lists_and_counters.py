@@ -0,0 +1,120 @@
+"""
+US42 - Listas de seguidores paginadas y contadores desnormalizados
+Acceptance criteria tested:
+- /followers y /following siguen devolviendo una lista, paginada por cursor (X-Next-Cursor)
+- El orden es por fecha de follow, del más reciente al más antiguo
+- Con token, cada elemento lleva isFollowing, calculado en una sola consulta
+- followers_count / following_count / posts_count se mantienen al seguir, publicar y borrar
+- Borrar una cuenta descuenta sus follows de los contadores ajenos
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from conftest import create_user, auth_headers
+from app.models import User, follow
+from app.utils import write_paths
+
+
+def _user(_db, name, **kwargs):
+    return create_user(_db, username=name, name=name.title(), email=f'{name}@example.com', **kwargs)
+
+
+def _follow_at(_db, follower, followed, at):
+    _db.session.execute(follow.insert().values(follower_id=follower.id, followed_id=followed.id, created_at=at))
+
+
+def test_followers_paginated_by_cursor(client, _db):
+    star = _user(_db, 'star')
+    fans = [_user(_db, f'fan{i}') for i in range(5)]
+    base = datetime(2026, 1, 1)
+    for i, fan in enumerate(fans):
+        _follow_at(_db, fan, star, base + timedelta(minutes=i))
+    _db.session.commit()
+
+    rv = client.get(f'/api/users/{star.id}/followers?limit=2')
+    assert rv.status_code == 200
+    assert [u['username'] for u in rv.get_json()] == ['fan4', 'fan3']
+    seen = [u['username'] for u in rv.get_json()]
+    while rv.headers.get('X-Next-Cursor'):
+        rv = client.get(f"/api/users/{star.id}/followers?limit=2&cursor={rv.headers['X-Next-Cursor']}")
+        seen += [u['username'] for u in rv.get_json()]
+    assert seen == ['fan4', 'fan3', 'fan2', 'fan1', 'fan0']
+
+    assert client.get(f'/api/users/{star.id}/followers?cursor=nope').status_code == 400
+    assert client.get('/api/users/9999/following').status_code == 404
+
+
+def test_is_following_flags_in_one_query(client, _db):
+    me = _user(_db, 'me')
+    star = _user(_db, 'star')
+    fans = [_user(_db, f'fan{i}') for i in range(4)]
+    for fan in fans:
+        fan.following.append(star)
+    me.following.extend(fans[:2])
+    _db.session.commit()
+    star_id = star.id
+    headers = auth_headers(client, 'me@example.com')
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(_db.engine, 'before_cursor_execute', listener)
+    try:
+        rv = client.get(f'/api/users/{star_id}/followers', headers=headers)
+    finally:
+        event.remove(_db.engine, 'before_cursor_execute', listener)
+    flags = {u['username']: u['isFollowing'] for u in rv.get_json()}
+    assert flags == {'fan0': True, 'fan1': True, 'fan2': False, 'fan3': False}
+    # existe el usuario + página + flags
+    assert len(statements) == 3
+
+    anon = client.get(f'/api/users/{star_id}/followers').get_json()
+    assert all('isFollowing' not in u for u in anon)
+
+
+def test_follow_counters(client, _db):
+    me, star = _user(_db, 'me'), _user(_db, 'star')
+    headers = auth_headers(client, 'me@example.com')
+
+    client.post(f'/api/users/{star.id}/follow', headers=headers)
+    client.post(f'/api/users/{star.id}/follow', headers=headers)  # idempotente
+    profile = client.get(f'/api/users/{star.id}').get_json()
+    assert profile['followersCount'] == 1
+    assert client.get(f'/api/users/{me.id}').get_json()['followingCount'] == 1
+
+    client.delete(f'/api/users/{star.id}/follow', headers=headers)
+    client.delete(f'/api/users/{star.id}/follow', headers=headers)
+    assert client.get(f'/api/users/{star.id}').get_json()['followersCount'] == 0
+    assert client.get(f'/api/users/{me.id}').get_json()['followingCount'] == 0
+
+
+def test_posts_count(client, _db, app):
+    me = _user(_db, 'me')
+    fan = _user(_db, 'fan')
+    headers = auth_headers(client, 'me@example.com')
+    ids = [client.post('/api/posts/', json={'text': f'p{i}'}, headers=headers).get_json()['id'] for i in range(3)]
+    assert client.get(f'/api/users/{me.id}').get_json()['postsCount'] == 3
+
+    assert client.delete(f'/api/posts/{ids[0]}', headers=headers).status_code == 200
+    assert client.get(f'/api/users/{me.id}').get_json()['postsCount'] == 2
+
+    # Borrado diferido: se descuenta al marcarlo, no otra vez al purgar
+    app.config.update(POST_SOFT_DELETE_THRESHOLD=1)
+    write_paths.like(fan.id, ids[1])
+    _db.session.commit()
+    assert client.delete(f'/api/posts/{ids[1]}', headers=headers).status_code == 202
+    assert client.get(f'/api/users/{me.id}').get_json()['postsCount'] == 1
+
+
+def test_account_deletion_adjusts_follow_counters(client, _db):
+    me, star, fan = _user(_db, 'me'), _user(_db, 'star'), _user(_db, 'fan')
+    write_paths.follow_user(me.id, star.id)
+    write_paths.follow_user(fan.id, me.id)
+    _db.session.commit()
+    star_id, fan_id = star.id, fan.id
+
+    rv = client.delete('/api/users/me', json={'password': 'secret1'}, headers=auth_headers(client, 'me@example.com'))
+    assert rv.status_code == 202
+    _db.session.expire_all()
+    assert _db.session.get(User, star_id).followers_count == 0
+    assert _db.session.get(User, fan_id).following_count == 0
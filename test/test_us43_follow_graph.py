@@ -0,0 +1,138 @@
+"""
+US43 - Grafo de follows en memoria
+Acceptance criteria tested:
+- is_following / mutuals / followers_of se resuelven con una consulta por fallo de caché
+- Seguir y dejar de seguir invalidan las entradas afectadas al confirmarse (no con rollback)
+- Borrar una cuenta invalida sus entradas y las de sus seguidores y seguidos
+- La LRU está acotada y las entradas caducan (TTL)
+- El perfil y el ranking de amigos usan el grafo
+"""
+from conftest import create_user, auth_headers, count_queries
+from app.models import City, follow
+from app.utils import deletion, follow_graph, jobs, write_paths
+from app.utils.follow_graph import FollowGraph
+
+
+def _user(_db, name):
+    return create_user(_db, username=name, name=name.title(), email=f'{name}@example.com')
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_helpers_hit_db_once_per_set(_db):
+    a, b, c = _user(_db, 'a'), _user(_db, 'b'), _user(_db, 'c')
+    for follower, followed in ((a, b), (a, c), (b, a)):
+        write_paths.follow_user(follower.id, followed.id)
+    _db.session.commit()
+    a_id, b_id, c_id = a.id, b.id, c.id
+
+    assert count_queries(_db, lambda: follow_graph.is_following(a_id, b_id)) == (True, 1)
+    assert count_queries(_db, lambda: follow_graph.is_following(a_id, c_id)) == (True, 0)
+    assert count_queries(_db, lambda: follow_graph.is_following(a_id, a_id)) == (False, 0)
+    assert follow_graph.followers_of(a_id) == {b_id}
+    assert count_queries(_db, lambda: follow_graph.mutuals(a_id)) == ({b_id}, 0)
+
+
+def test_follow_and_unfollow_invalidate(_db):
+    a, b = _user(_db, 'a'), _user(_db, 'b')
+    a_id, b_id = a.id, b.id
+    assert not follow_graph.is_following(a_id, b_id)
+    assert follow_graph.followers_of(b_id) == frozenset()
+
+    write_paths.follow_user(a_id, b_id)
+    _db.session.commit()
+    assert follow_graph.is_following(a_id, b_id)
+    assert follow_graph.followers_of(b_id) == {a_id}
+
+    write_paths.unfollow_user(a_id, b_id)
+    _db.session.commit()
+    assert not follow_graph.is_following(a_id, b_id)
+
+
+def test_invalidation_waits_for_commit(_db):
+    a, b = _user(_db, 'a'), _user(_db, 'b')
+    a_id, b_id = a.id, b.id
+    graph = follow_graph.graph()
+    assert not follow_graph.is_following(a_id, b_id)
+
+    # Sin commit la entrada sigue en caché; con rollback no se olvida
+    write_paths.follow_user(a_id, b_id)
+    assert ('following', a_id) in graph._entries
+    _db.session.rollback()
+    assert ('following', a_id) in graph._entries
+    assert not _db.session.info.get('follow_graph')
+
+    write_paths.follow_user(a_id, b_id)
+    _db.session.commit()
+    assert ('following', a_id) not in graph._entries
+    assert follow_graph.is_following(a_id, b_id)
+
+
+def _follow_triangle(_db):
+    a, b, c = _user(_db, 'a'), _user(_db, 'b'), _user(_db, 'c')
+    write_paths.follow_user(a.id, b.id)
+    write_paths.follow_user(c.id, a.id)
+    _db.session.commit()
+    ids = a.id, b.id, c.id
+    assert follow_graph.followers_of(ids[1]) == {ids[0]}
+    assert follow_graph.following_of(ids[2]) == {ids[0]}
+    return ids
+
+
+def test_deleting_user_invalidates_neighbours(_db):
+    a_id, b_id, c_id = _follow_triangle(_db)
+    deletion.delete_user(a_id)
+    _db.session.commit()
+    assert follow_graph.followers_of(b_id) == frozenset()
+    assert follow_graph.following_of(c_id) == frozenset()
+
+
+def test_delete_user_job_invalidates_neighbours(_db):
+    a_id, b_id, c_id = _follow_triangle(_db)
+    jobs.enqueue('delete_user', user_id=a_id, payload={'batch_size': 1})
+    assert follow_graph.followers_of(b_id) == frozenset()
+    assert follow_graph.following_of(c_id) == frozenset()
+
+
+def test_lru_bound_and_ttl(_db):
+    users = [_user(_db, f'u{i}') for i in range(4)]
+    ids = [u.id for u in users]
+    clock = _Clock()
+    graph = FollowGraph(max_users=2, ttl=10, clock=clock)
+
+    for uid in ids:
+        graph.following(uid)
+        graph.followers(uid)
+    assert len(graph._entries) == 4
+    assert ('following', ids[0]) not in graph._entries
+
+    # Cambio hecho "en otro proceso": se ve al caducar la entrada
+    _db.session.execute(follow.insert().values(follower_id=ids[3], followed_id=ids[0]))
+    _db.session.commit()
+    assert not graph.is_following(ids[3], ids[0])
+    clock.now = 11
+    assert graph.is_following(ids[3], ids[0])
+
+
+def test_profile_and_leaderboard_use_graph(client, _db):
+    me, friend, fan = _user(_db, 'me'), _user(_db, 'friend'), _user(_db, 'fan')
+    write_paths.follow_user(me.id, friend.id)
+    write_paths.follow_user(friend.id, me.id)
+    write_paths.follow_user(fan.id, me.id)
+    city = City(name='Barcelona')
+    _db.session.add(city)
+    _db.session.commit()
+    headers = auth_headers(client, 'me@example.com')
+
+    assert client.get(f'/api/users/{friend.id}', headers=headers).get_json()['is_following'] is True
+    assert client.get(f'/api/users/{fan.id}', headers=headers).get_json()['is_following'] is False
+
+    rv = client.get(f'/api/cities/{city.id}/friends-leaderboard', headers=headers)
+    assert rv.status_code == 200
+    assert {r['username'] for r in rv.get_json()} == {'me', 'friend'}
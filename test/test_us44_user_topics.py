@@ -0,0 +1,85 @@
+"""
+US44 - Preferencias normalizadas en user_topic
+Acceptance criteria tested:
+- User.preferences sigue siendo una lista (orden conservado, sin duplicados)
+- El registro y PATCH /auth/me guardan las preferencias en user_topic
+- POST /api/users/<id>/preferences sólo inserta los temas nuevos
+- Y rechaza con 400 temas vacíos, no textuales o de más de 50 caracteres, o un cuerpo no JSON
+- "Quién sigue el tema X" usa el índice (topic, user_id)
+- Borrar la cuenta borra sus temas
+"""
+from datetime import datetime
+
+from sqlalchemy import delete, text
+
+from conftest import create_user, auth_headers
+from app.models import EmailVerification, User, UserTopic
+
+
+def _topics(user_id):
+    return [t.topic for t in UserTopic.query.filter_by(user_id=user_id).order_by(UserTopic.position)]
+
+
+def test_preferences_property_is_backed_by_user_topic(_db):
+    user = create_user(_db, preferences=['Yoga', 'Gym', 'Yoga'])
+    assert user.preferences == ['Yoga', 'Gym']
+    assert _topics(user.id) == ['Yoga', 'Gym']
+
+    user.preferences = ['Gym', 'Running']
+    _db.session.commit()
+    _db.session.expire_all()
+    assert _db.session.get(User, user.id).preferences == ['Gym', 'Running']
+    assert _topics(user.id) == ['Gym', 'Running']
+
+
+def test_register_and_patch_me(client, _db):
+    rv = client.post('/auth/register', json={
+        'username': 'newbie', 'name': 'Newbie', 'email': 'newbie@example.com',
+        'password': 'secret1', 'topics': ['Running', 'Nutrition'],
+    })
+    assert rv.status_code == 201
+    user = User.query.filter_by(username='newbie').first()
+    assert _topics(user.id) == ['Running', 'Nutrition']
+
+    EmailVerification.query.filter_by(user_id=user.id).update({'verified_at': datetime.utcnow()})
+    _db.session.commit()
+    rv = client.patch('/auth/me', json={'preferences': ['Yoga']}, headers=auth_headers(client, 'newbie@example.com'))
+    assert rv.status_code == 200
+    assert rv.get_json()['user']['preferences'] == ['Yoga']
+    assert _topics(user.id) == ['Yoga']
+
+
+def test_add_preferences_appends_new_topics_only(client, _db):
+    user = create_user(_db, preferences=['Gym'])
+    rv = client.post(f'/api/users/{user.id}/preferences', json={'preferences': ['Yoga', 'Gym', 'Yoga']})
+    assert rv.status_code == 200
+    assert client.get(f'/api/users/{user.id}/preferences').get_json()['preferences'] == ['Gym', 'Yoga']
+
+
+
+def test_add_preferences_rejects_invalid_topics(client, _db):
+    user = create_user(_db, preferences=['Gym'])
+    url = f'/api/users/{user.id}/preferences'
+    for prefs in (['Yoga', ''], ['  '], [42], [None], [['Yoga']], ['x' * 51]):
+        assert client.post(url, json={'preferences': prefs}).status_code == 400
+    assert client.post(url, data='no json', content_type='text/plain').status_code == 200
+    assert client.post(url, json={'preferences': ['x' * 50]}).status_code == 200
+    assert _topics(user.id) == ['Gym', 'x' * 50]
+
+def test_audience_query_uses_topic_index(_db):
+    a = create_user(_db, username='a', email='a@example.com', preferences=['Yoga'])
+    b = create_user(_db, username='b', email='b@example.com', preferences=['Gym', 'Yoga'])
+    create_user(_db, username='c', email='c@example.com', preferences=['Gym'])
+
+    assert set(_db.session.scalars(UserTopic.audience('Yoga'))) == {a.id, b.id}
+    sql = str(UserTopic.audience('Yoga').compile(compile_kwargs={'literal_binds': True}))
+    plan = ' '.join(str(r) for r in _db.session.execute(text(f'EXPLAIN QUERY PLAN {sql}')))
+    assert 'ix_user_topic_topic_user_id' in plan
+
+
+def test_account_deletion_cascades_topics(_db):
+    user = create_user(_db, preferences=['Yoga'])
+    user_id = user.id
+    _db.session.execute(delete(User).where(User.id == user_id))
+    _db.session.commit()
+    assert UserTopic.query.filter_by(user_id=user_id).count() == 0
@@ -0,0 +1,108 @@
+"""
+US45 - Actividades cercanas (geohash)
+Acceptance criteria tested:
+- Activity.geohash se calcula al fijar lat/lng
+- GET /api/activities/nearby devuelve las activas dentro del radio, de la más cercana a la más lejana, en cualquier ciudad
+- Filtro por tipo y validación de parámetros
+- La consulta usa el índice ix_activity_geohash y sólo carga las de dentro del radio
+- Si hay más candidatos que MAX_CANDIDATES se quedan los más cercanos
+"""
+from sqlalchemy import event
+
+from app.models import Activity, City
+from app.utils import geo, geohash
+
+
+def _city(_db, name):
+    city = City(name=name, country='España', slug=name.lower())
+    _db.session.add(city)
+    _db.session.commit()
+    return city
+
+
+def _activity(_db, city, name, lat, lng, type_='run', is_active=True):
+    act = Activity(city_id=city.id, name=name, type=type_, lat=lat, lng=lng, is_active=is_active)
+    _db.session.add(act)
+    _db.session.commit()
+    return act
+
+
+def test_geohash_encode_and_sync(_db):
+    assert geohash.encode(57.64911, 10.40744, 11) == 'u4pruydqqvj'
+    city = _city(_db, 'Barcelona')
+    act = _activity(_db, city, 'Montjuïc', 41.3636, 2.1583)
+    assert act.geohash == geohash.encode(41.3636, 2.1583)
+    act.lat = None
+    assert act.geohash is None
+
+
+def test_nearby_sorted_across_cities(client, _db):
+    bcn, bdn, mad = _city(_db, 'Barcelona'), _city(_db, 'Badalona'), _city(_db, 'Madrid')
+    _activity(_db, bcn, 'Rambla', 41.3809, 2.1730)           # ~1 km
+    _activity(_db, bcn, 'Montjuïc', 41.3636, 2.1583)         # ~3 km
+    _activity(_db, bcn, 'Cerrada', 41.3880, 2.1690, is_active=False)
+    _activity(_db, bdn, 'Pont del Petroli', 41.4419, 2.2398, type_='bike')  # ~8.5 km
+    _activity(_db, mad, 'Retiro', 40.4153, -3.6845)
+
+    rv = client.get('/api/activities/nearby?lat=41.3874&lng=2.1686&radius_km=5')
+    assert rv.status_code == 200
+    data = rv.get_json()
+    assert [a['name'] for a in data] == ['Rambla', 'Montjuïc']
+    assert data[0]['distance_from_km'] < data[1]['distance_from_km'] < 5
+
+    wide = client.get('/api/activities/nearby?lat=41.3874&lng=2.1686&radius_km=15').get_json()
+    assert [a['name'] for a in wide] == ['Rambla', 'Montjuïc', 'Pont del Petroli']
+    assert wide[2]['city_id'] == bdn.id
+
+    bikes = client.get('/api/activities/nearby?lat=41.3874&lng=2.1686&radius_km=15&type=bike').get_json()
+    assert [a['name'] for a in bikes] == ['Pont del Petroli']
+
+
+def test_nearby_across_antimeridian(client, _db):
+    city = _city(_db, 'Fiji')
+    _activity(_db, city, 'East', 0.0, 179.99)
+    rv = client.get('/api/activities/nearby?lat=0&lng=-179.99&radius_km=5')
+    assert [a['name'] for a in rv.get_json()] == ['East']
+
+
+def test_nearby_validation(client):
+    assert client.get('/api/activities/nearby?lng=2').status_code == 400
+    assert client.get('/api/activities/nearby?lat=x&lng=2').status_code == 400
+    assert client.get('/api/activities/nearby?lat=91&lng=2').status_code == 400
+    assert client.get('/api/activities/nearby?lat=41&lng=2&radius_km=0').status_code == 400
+    assert client.get('/api/activities/nearby?lat=41&lng=2&radius_km=500').status_code == 400
+
+
+def test_nearby_uses_geohash_index(client, _db):
+    city = _city(_db, 'Barcelona')
+    _activity(_db, city, 'Rambla', 41.3809, 2.1730)
+    _activity(_db, city, 'Fuera', 41.3800, 2.2400)  # en la caja, fuera del radio
+
+    statements = []
+    listener = lambda conn, cursor, stmt, params, *args: statements.append((stmt, params))
+    event.listen(_db.engine, 'before_cursor_execute', listener)
+    try:
+        rv = client.get('/api/activities/nearby?lat=41.3874&lng=2.1686&radius_km=2')
+    finally:
+        event.remove(_db.engine, 'before_cursor_execute', listener)
+    assert [a['name'] for a in rv.get_json()] == ['Rambla']
+    # candidatos + carga de las de dentro del radio
+    assert len(statements) == 2
+
+    stmt, params = statements[0]
+    with _db.engine.connect() as conn:
+        plan = ' '.join(str(r) for r in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {stmt}', params))
+    assert 'ix_activity_geohash' in plan
+
+
+def test_candidate_limit_keeps_closest(client, _db, monkeypatch):
+    monkeypatch.setattr(geo, 'MAX_CANDIDATES', 2)
+    city = _city(_db, 'Barcelona')
+    # Las lejanas van antes en id y en geohash: sin ORDER BY saldrían primero
+    _activity(_db, city, 'Sants', 41.3300, 2.1000)             # ~8.6 km
+    _activity(_db, city, 'Collserola', 41.3874, 2.0700)        # ~8.2 km
+    _activity(_db, city, 'Montjuïc', 41.3636, 2.1583)          # ~3 km
+    _activity(_db, city, 'Rambla', 41.3809, 2.1730)            # ~1 km
+
+    rv = client.get('/api/activities/nearby?lat=41.3874&lng=2.1686&radius_km=15')
+    assert [a['name'] for a in rv.get_json()] == ['Rambla', 'Montjuïc']
@@ -0,0 +1,132 @@
+"""
+US46 - Clusters del mapa de actividades de una ciudad
+Acceptance criteria tested:
+- GET /api/cities/<id>/activities/clusters agrupa por rejilla según el zoom
+- bbox filtra los clusters visibles
+- Con token, cada cluster lleva completed / completion_ratio del usuario
+- Los clusters se precalculan una vez por ciudad (caché con TTL e invalidación)
+- Crear, desactivar o mover una actividad invalida su ciudad al confirmar; un rollback no
+"""
+from conftest import create_user, auth_headers, count_queries
+from app.models import Activity, City
+from app.utils import clusters
+from app.utils.clusters import ClusterCache
+
+
+def _barcelona(_db):
+    city = City(name='Barcelona', country='España', slug='barcelona')
+    _db.session.add(city)
+    _db.session.flush()
+    coords = [
+        ('Rambla', 41.3809, 2.1730), ('Liceu', 41.3805, 2.1734), ('Boqueria', 41.3817, 2.1716),
+        ('Montjuïc', 41.3636, 2.1583), ('Tibidabo', 41.4225, 2.1186),
+    ]
+    acts = [Activity(city_id=city.id, name=n, type='run', lat=lat, lng=lng) for n, lat, lng in coords]
+    acts.append(Activity(city_id=city.id, name='Cerrada', type='run', lat=41.38, lng=2.17, is_active=False))
+    _db.session.add_all(acts)
+    _db.session.commit()
+    return city, acts
+
+
+def test_clusters_by_zoom(client, _db):
+    city, acts = _barcelona(_db)
+
+    far = client.get(f'/api/cities/{city.id}/activities/clusters?zoom=5').get_json()
+    assert far['zoom'] == 5
+    assert [c['count'] for c in far['clusters']] == [5]
+
+    near = client.get(f'/api/cities/{city.id}/activities/clusters?zoom=14').get_json()['clusters']
+    assert sorted(c['count'] for c in near) == [1, 1, 3]
+    singles = {c['activity_id'] for c in near if c['count'] == 1}
+    assert singles == {acts[3].id, acts[4].id}
+    assert all('completed' not in c for c in near)
+
+
+def test_clusters_bbox_and_validation(client, _db):
+    city, _ = _barcelona(_db)
+    rv = client.get(f'/api/cities/{city.id}/activities/clusters?zoom=14&bbox=2.16,41.37,2.18,41.39')
+    assert [c['count'] for c in rv.get_json()['clusters']] == [3]
+
+    base = f'/api/cities/{city.id}/activities/clusters'
+    assert client.get(base).status_code == 400
+    assert client.get(f'{base}?zoom=25').status_code == 400
+    assert client.get(f'{base}?zoom=3&bbox=1,2,3').status_code == 400
+    assert client.get('/api/cities/999/activities/clusters?zoom=3').status_code == 404
+
+
+def test_completion_ratio_for_viewer(client, _db):
+    city, acts = _barcelona(_db)
+    create_user(_db)
+    headers = auth_headers(client, 'test@example.com')
+    client.post(f'/api/activities/{acts[0].id}/complete', headers=headers)
+    client.post(f'/api/activities/{acts[0].id}/complete', headers=headers)
+    client.post(f'/api/activities/{acts[3].id}/complete', headers=headers)
+
+    data = client.get(f'/api/cities/{city.id}/activities/clusters?zoom=14', headers=headers).get_json()
+    by_count = {c['count']: c for c in data['clusters'] if c['count'] > 1}
+    assert by_count[3]['completed'] == 1
+    assert by_count[3]['completion_ratio'] == round(1 / 3, 4)
+    singles = {c['activity_id']: c['completion_ratio'] for c in data['clusters'] if c['count'] == 1}
+    assert singles == {acts[3].id: 1.0, acts[4].id: 0.0}
+
+
+def test_levels_cached_per_city(app, _db):
+    city, _ = _barcelona(_db)
+    city_id = city.id
+    _db.session.expunge_all()
+    _, first = count_queries(_db, lambda: clusters.clusters(city_id, 10))
+    assert first == 2  # ciudad + actividades
+    _, again = count_queries(_db, lambda: clusters.clusters(city_id, 14))
+    assert again == 0
+
+    _db.session.add(Activity(city_id=city_id, name='Nueva', lat=41.39, lng=2.16))
+    _db.session.commit()
+    clusters.invalidate(city_id)
+    total = sum(c['count'] for c in clusters.clusters(city_id, 0))
+    assert total == 6
+
+
+def test_cluster_cache_ttl_and_bound(app, _db):
+    city, _ = _barcelona(_db)
+    now = [0.0]
+    cache = ClusterCache(max_cities=1, ttl=10, clock=lambda: now[0])
+    levels = cache.levels(city.id)
+    assert cache.levels(city.id) is levels
+    now[0] = 11
+    assert cache.levels(city.id) is not levels
+    assert cache.levels(999) is None
+    assert len(cache._entries) == 1
+
+
+def test_activity_writes_invalidate_after_commit(app, _db):
+    city, acts = _barcelona(_db)
+    other = City(name='Girona', country='España', slug='girona')
+    _db.session.add(other)
+    _db.session.commit()
+
+    def total(city_id):
+        return sum(c['count'] for c in clusters.clusters(city_id, 0))
+
+    assert total(city.id) == 5 and total(other.id) == 0
+    _db.session.add(Activity(city_id=city.id, name='Nueva', lat=41.39, lng=2.16))
+    _db.session.flush()
+    assert total(city.id) == 5  # sin confirmar, la caché no cambia
+    _db.session.commit()
+    assert total(city.id) == 6
+
+    acts[0].is_active = False
+    _db.session.commit()
+    assert total(city.id) == 5
+
+    acts[1].city_id = other.id
+    _db.session.commit()
+    assert total(city.id) == 4 and total(other.id) == 1
+
+    city_id = city.id
+    acts[2].is_active = False
+    _db.session.flush()
+    _db.session.rollback()
+    _db.session.add(City(name='Lleida', country='España', slug='lleida'))
+    _db.session.commit()  # la cola descartada no se aplica al siguiente commit
+    _, queries = count_queries(_db, lambda: total(city_id))
+    assert queries == 0
@@ -0,0 +1,141 @@
+"""
+US47 - Importar entrenamientos GPX
+Acceptance criteria tested:
+- POST /api/activities/imports guarda el fichero y encola el job import_workout (202)
+- El job calcula distancia, duración y desnivel de la traza leída en streaming
+- Se registra una completación por cada actividad activa que recorre la traza;
+  la distancia y la duración de la traza se reparten entre ellas
+- Ficheros no válidos hacen fallar el job; formatos no soportados devuelven 400
+- Los ficheros mayores que WORKOUT_IMPORT_MAX_MB se rechazan con 413
+"""
+import io
+import os
+from datetime import datetime, timedelta
+
+from conftest import create_user, auth_headers
+from app.models import Activity, City, Job, UserActivity
+from app.utils import workouts
+
+
+def _gpx(n=2500, start=datetime(2026, 5, 1, 8, 0, 0)):
+    """Traza recta hacia el norte: 0.01º de latitud (~1.11 km), 1 s y 1 cm de subida por punto."""
+    pts = ''.join(
+        f'<trkpt lat="{41.38 + 0.01 * i / (n - 1):.7f}" lon="2.1700000">'
+        f'<ele>{100 + i * 0.01:.2f}</ele><time>{(start + timedelta(seconds=i)).isoformat()}Z</time></trkpt>'
+        for i in range(n)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<gpx version="1.1" creator="test" xmlns="http://www.topografix.com/GPX/1/1">'
+        f'<trk><name>Carrera</name><trkseg>{pts}</trkseg></trk></gpx>'
+    ).encode()
+
+
+def _activities(_db):
+    city = City(name='Barcelona', country='España', slug='barcelona')
+    _db.session.add(city)
+    _db.session.flush()
+    on_route = Activity(city_id=city.id, name='En la ruta', lat=41.385, lng=2.1701)
+    off_route = Activity(city_id=city.id, name='Lejos', lat=41.385, lng=2.18)
+    closed = Activity(city_id=city.id, name='Cerrada', lat=41.386, lng=2.17, is_active=False)
+    _db.session.add_all([on_route, off_route, closed])
+    _db.session.commit()
+    return on_route
+
+
+def test_import_gpx_records_completion(client, _db, app, tmp_path):
+    app.config['WORKOUT_IMPORT_DIR'] = str(tmp_path)
+    user = create_user(_db)
+    activity_id = _activities(_db).id
+    headers = auth_headers(client, 'test@example.com')
+
+    rv = client.post('/api/activities/imports', headers=headers, content_type='multipart/form-data',
+                     data={'file': (io.BytesIO(_gpx()), 'carrera.gpx')})
+    assert rv.status_code == 202
+    job = rv.get_json()['job']
+    assert job['status'] == 'done'
+    summary = job['progress']['summary']
+    assert summary['points'] == 2500
+    assert summary['duration_sec'] == 2499
+    assert abs(summary['distance_km'] - 1.112) < 0.01
+    assert summary['elevation_gain_m'] == 25
+    assert summary['matched_activity_ids'] == [activity_id]
+
+    rows = UserActivity.query.filter_by(user_id=user.id).all()
+    assert [r.activity_id for r in rows] == [activity_id]
+    assert rows[0].duration_sec == 2499
+    assert abs(float(rows[0].distance_km) - 1.11) < 0.01
+    assert rows[0].elevation_gain_m == 25
+    assert rows[0].done_at == datetime(2026, 5, 1, 8, 0, 0)
+    assert os.listdir(tmp_path) == []
+
+    assert client.get(f"/api/jobs/{job['id']}", headers=headers).get_json()['status'] == 'done'
+
+
+def test_track_over_two_activities_splits_distance(client, _db, app, tmp_path):
+    app.config['WORKOUT_IMPORT_DIR'] = str(tmp_path)
+    user = create_user(_db)
+    first = _activities(_db)
+    second = Activity(city_id=first.city_id, name='También en la ruta', lat=41.388, lng=2.1699)
+    _db.session.add(second)
+    _db.session.commit()
+    headers = auth_headers(client, 'test@example.com')
+
+    rv = client.post('/api/activities/imports', headers=headers, content_type='multipart/form-data',
+                     data={'file': (io.BytesIO(_gpx()), 'carrera.gpx')})
+    summary = rv.get_json()['job']['progress']['summary']
+    assert summary['matched_activity_ids'] == [first.id, second.id]
+
+    rows = UserActivity.query.filter_by(user_id=user.id).order_by(UserActivity.activity_id).all()
+    assert len(rows) == 2
+    # La traza cuenta una vez: las dos filas suman su distancia y su duración
+    assert abs(sum(float(r.distance_km) for r in rows) - 1.11) < 0.01
+    assert all(abs(float(r.distance_km) - 0.555) < 0.01 for r in rows)
+    assert sum(r.duration_sec for r in rows) == 2499
+
+
+def test_stats_do_not_depend_on_chunk_size(tmp_path):
+    path = tmp_path / 'track.gpx'
+    path.write_bytes(_gpx(n=300))
+    whole = workouts.read_track(str(path), 'gpx').to_dict()
+
+    stats = workouts.TrackStats()
+    with open(path, 'rb') as f:
+        for cols in workouts.chunks(workouts.iter_gpx(f), size=7):
+            stats.add(*cols)
+    assert stats.to_dict() == whole
+
+
+def test_invalid_file_fails_job(client, _db, app, tmp_path):
+    app.config['WORKOUT_IMPORT_DIR'] = str(tmp_path)
+    create_user(_db)
+    headers = auth_headers(client, 'test@example.com')
+
+    rv = client.post('/api/activities/imports', headers=headers, content_type='multipart/form-data',
+                     data={'file': (io.BytesIO(b'<gpx><trk>'), 'roto.gpx')})
+    assert rv.status_code == 202
+    job = _db.session.get(Job, rv.get_json()['job']['id'])
+    assert job.status == 'failed'
+    assert 'GPX' in job.error
+    assert os.listdir(tmp_path) == []
+
+
+def test_import_validation(client, _db):
+    create_user(_db)
+    headers = auth_headers(client, 'test@example.com')
+    assert client.post('/api/activities/imports', headers=headers).status_code == 400
+    rv = client.post('/api/activities/imports', headers=headers, content_type='multipart/form-data',
+                     data={'file': (io.BytesIO(b'x'), 'notas.txt')})
+    assert rv.status_code == 400
+    assert client.post('/api/activities/imports').status_code == 401
+
+
+def test_upload_size_limit(client, _db, app, tmp_path):
+    app.config.update(WORKOUT_IMPORT_DIR=str(tmp_path), WORKOUT_IMPORT_MAX_MB=0.01)
+    create_user(_db)
+    headers = auth_headers(client, 'test@example.com')
+    rv = client.post('/api/activities/imports', headers=headers, content_type='multipart/form-data',
+                     data={'file': (io.BytesIO(_gpx()), 'carrera.gpx')})
+    assert rv.status_code == 413
+    assert os.listdir(tmp_path) == []
+    assert Job.query.count() == 0
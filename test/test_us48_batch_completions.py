@@ -0,0 +1,119 @@
+"""
+US48 - Lote de completaciones (sincronización de wearables)
+Acceptance criteria tested:
+- POST /api/activities/completions:batch registra varias completaciones en una petición
+- Reenviar el lote con las mismas idempotency_key no duplica (duplicate=true, mismo id)
+- Actividades inexistentes o inactivas se reportan por elemento sin abortar el lote
+- Elementos mal formados devuelven 400 sin escribir nada
+- Se usa un único INSERT para todo el lote
+"""
+from datetime import datetime
+
+from sqlalchemy import event
+
+from conftest import create_user, auth_headers
+from app.models import Activity, City, UserActivity
+
+
+def _activities(_db):
+    city = City(name='Barcelona', country='España', slug='barcelona')
+    _db.session.add(city)
+    _db.session.flush()
+    acts = [Activity(city_id=city.id, name=f'A{i}') for i in range(3)]
+    acts.append(Activity(city_id=city.id, name='Cerrada', is_active=False))
+    _db.session.add_all(acts)
+    _db.session.commit()
+    return [a.id for a in acts]
+
+
+def _batch(ids):
+    return {'completions': [
+        {'activity_id': ids[0], 'done_at': '2026-05-01T08:00:00Z', 'duration_sec': 1800,
+         'notes': 'mañana', 'idempotency_key': 'watch-1'},
+        {'activity_id': ids[1], 'done_at': '2026-05-02T10:00:00+02:00', 'idempotency_key': 'watch-2'},
+        {'activity_id': ids[1], 'done_at': '2026-05-02T10:00:00+02:00', 'idempotency_key': 'watch-2'},
+        {'activity_id': ids[2], 'done_at': '2026-05-03T07:30:00'},
+        {'activity_id': ids[3], 'done_at': '2026-05-03T07:30:00', 'idempotency_key': 'watch-3'},
+        {'activity_id': 9999, 'done_at': '2026-05-03T07:30:00'},
+    ]}
+
+
+def test_batch_records_and_dedupes_retries(client, _db):
+    user = create_user(_db)
+    user_id = user.id
+    ids = _activities(_db)
+    headers = auth_headers(client, 'test@example.com')
+
+    rv = client.post('/api/activities/completions:batch', headers=headers, json=_batch(ids))
+    assert rv.status_code == 200
+    data = rv.get_json()
+    assert data['recorded'] == 3
+    results = data['results']
+    assert [r['ok'] for r in results] == [True, True, True, True, False, False]
+    assert [r.get('duplicate') for r in results[:4]] == [False, False, True, False]
+    assert results[1]['id'] == results[2]['id']
+    assert results[4]['error'] == 'Actividad no encontrada'
+
+    row = _db.session.get(UserActivity, results[0]['id'])
+    assert row.duration_sec == 1800
+    assert row.done_at == datetime(2026, 5, 1, 8, 0, 0)
+    assert _db.session.get(UserActivity, results[1]['id']).done_at == datetime(2026, 5, 2, 8, 0, 0)
+
+    # El reloj reintenta el mismo lote
+    again = client.post('/api/activities/completions:batch', headers=headers, json=_batch(ids)).get_json()
+    assert again['recorded'] == 1  # sólo la que no tiene clave
+    assert again['results'][0] == {**results[0], 'duplicate': True}
+    assert again['results'][1]['id'] == results[1]['id']
+    assert UserActivity.query.filter_by(user_id=user_id).count() == 4
+
+
+def test_keys_are_per_user(client, _db):
+    create_user(_db)
+    create_user(_db, username='other', email='other@example.com')
+    ids = _activities(_db)
+    body = {'completions': [{'activity_id': ids[0], 'done_at': '2026-05-01T08:00:00', 'idempotency_key': 'k'}]}
+    first = client.post('/api/activities/completions:batch', headers=auth_headers(client, 'test@example.com'), json=body)
+    second = client.post('/api/activities/completions:batch', headers=auth_headers(client, 'other@example.com'), json=body)
+    assert first.get_json()['recorded'] == second.get_json()['recorded'] == 1
+
+
+def test_batch_validation(client, _db):
+    create_user(_db)
+    ids = _activities(_db)
+    headers = auth_headers(client, 'test@example.com')
+    url = '/api/activities/completions:batch'
+
+    assert client.post(url, headers=headers, json={}).status_code == 400
+    assert client.post(url, headers=headers, json={'completions': []}).status_code == 400
+    bad = [
+        {'activity_id': 'x', 'done_at': '2026-05-01T08:00:00'},
+        {'activity_id': ids[0]},
+        {'activity_id': ids[0], 'done_at': 'ayer'},
+        {'activity_id': ids[0], 'done_at': '2026-05-01T08:00:00', 'duration_sec': -1},
+        {'activity_id': ids[0], 'done_at': '2026-05-01T08:00:00', 'idempotency_key': 'k' * 65},
+    ]
+    for item in bad:
+        ok = {'activity_id': ids[0], 'done_at': '2026-05-01T08:00:00'}
+        rv = client.post(url, headers=headers, json={'completions': [ok, item]})
+        assert rv.status_code == 400
+        assert 'posición 1' in rv.get_json()['error']
+    assert UserActivity.query.count() == 0
+
+
+def test_single_insert_per_batch(client, _db):
+    create_user(_db)
+    ids = _activities(_db)
+    headers = auth_headers(client, 'test@example.com')
+    body = {'completions': [
+        {'activity_id': ids[i % 3], 'done_at': '2026-05-01T08:00:00', 'idempotency_key': f'k{i}'}
+        for i in range(50)
+    ]}
+    inserts = []
+    listener = lambda conn, cursor, stmt, *args: inserts.append(stmt) if stmt.startswith('INSERT INTO user_activity ') else None
+    event.listen(_db.engine, 'before_cursor_execute', listener)
+    try:
+        rv = client.post('/api/activities/completions:batch', headers=headers, json=body)
+    finally:
+        event.remove(_db.engine, 'before_cursor_execute', listener)
+    assert rv.get_json()['recorded'] == 50
+    assert len(inserts) == 1
@@ -0,0 +1,133 @@
+"""
+US49 - Estadísticas de entrenamiento por periodo
+Acceptance criteria tested:
+- Cada completación suma en activity_stat (día, semana ISO y mes, por tipo)
+- Un lote actualiza cada periodo una sola vez; los reintentos no suman
+- GET /api/users/<id>/stats devuelve los periodos pedidos (también vacíos) en una consulta
+- rebuild() reconstruye las mismas cifras desde user_activity
+"""
+from datetime import date, datetime
+
+from sqlalchemy import event
+
+from conftest import create_user, auth_headers
+from app.models import Activity, ActivityStat, City
+from app.utils import activity_stats, write_paths
+
+
+def _activities(_db):
+    city = City(name='Barcelona', country='España', slug='barcelona')
+    _db.session.add(city)
+    _db.session.flush()
+    run = Activity(city_id=city.id, name='Carrera', type='run', distance_km=5)
+    bike = Activity(city_id=city.id, name='Bici', type='bike', distance_km=20)
+    _db.session.add_all([run, bike])
+    _db.session.commit()
+    return run.id, bike.id
+
+
+def _sync(client, headers, run, bike):
+    return client.post('/api/activities/completions:batch', headers=headers, json={'completions': [
+        # lunes y miércoles de la misma semana ISO
+        {'activity_id': run, 'done_at': '2026-05-04T08:00:00', 'duration_sec': 1500, 'idempotency_key': 'a'},
+        {'activity_id': run, 'done_at': '2026-05-06T08:00:00', 'duration_sec': 1700, 'idempotency_key': 'b'},
+        {'activity_id': bike, 'done_at': '2026-05-06T18:00:00', 'duration_sec': 3600, 'idempotency_key': 'c'},
+        # semana siguiente
+        {'activity_id': run, 'done_at': '2026-05-12T08:00:00', 'duration_sec': 1600, 'idempotency_key': 'd'},
+    ]})
+
+
+def _snapshot(_db):
+    return sorted(
+        (s.user_id, s.granularity, s.bucket, s.type, s.count, round(s.distance_km, 2), s.duration_sec)
+        for s in ActivityStat.query.all()
+    )
+
+
+def test_stats_by_week_and_type(client, _db):
+    user = create_user(_db)
+    user_id = user.id
+    run, bike = _activities(_db)
+    headers = auth_headers(client, 'test@example.com')
+    assert _sync(client, headers, run, bike).status_code == 200
+    _sync(client, headers, run, bike)  # reintento: no suma
+
+    rv = client.get(f'/api/users/{user_id}/stats?granularity=week&from=2026-04-27&to=2026-05-17')
+    assert rv.status_code == 200
+    data = rv.get_json()
+    assert [b['bucket'] for b in data['buckets']] == ['2026-04-27', '2026-05-04', '2026-05-11']
+    empty, first, second = data['buckets']
+    assert (empty['count'], empty['by_type']) == (0, [])
+    assert (first['count'], first['distance_km'], first['duration_sec']) == (3, 30.0, 6800)
+    assert first['by_type'] == [
+        {'type': 'bike', 'count': 1, 'distance_km': 20.0, 'duration_sec': 3600},
+        {'type': 'run', 'count': 2, 'distance_km': 10.0, 'duration_sec': 3200},
+    ]
+    assert (second['count'], second['distance_km']) == (1, 5.0)
+
+    month = client.get(f'/api/users/{user_id}/stats?granularity=month&from=2026-05-01&to=2026-05-31').get_json()
+    assert [(b['bucket'], b['count']) for b in month['buckets']] == [('2026-05-01', 4)]
+    day = client.get(f'/api/users/{user_id}/stats?granularity=day&from=2026-05-06&to=2026-05-06').get_json()
+    assert day['buckets'][0]['count'] == 2
+
+
+def test_imported_distance_overrides_activity(_db):
+    user = create_user(_db)
+    run, _ = _activities(_db)
+    write_paths.record_completions(user.id, [
+        {'activity_id': run, 'done_at': datetime(2026, 5, 4, 8), 'distance_km': 7.5, 'duration_sec': 2400},
+    ])
+    _db.session.commit()
+    stats = activity_stats.user_stats(user.id, 'day', date(2026, 5, 4), date(2026, 5, 4))
+    assert stats[0]['distance_km'] == 7.5
+
+
+def test_stats_read_is_one_query(client, _db):
+    user = create_user(_db)
+    user_id = user.id
+    run, bike = _activities(_db)
+    _sync(client, auth_headers(client, 'test@example.com'), run, bike)
+    _db.session.expunge_all()
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(_db.engine, 'before_cursor_execute', listener)
+    try:
+        rv = client.get(f'/api/users/{user_id}/stats?granularity=week&from=2026-01-01&to=2026-12-31')
+    finally:
+        event.remove(_db.engine, 'before_cursor_execute', listener)
+    assert rv.status_code == 200
+    assert len(rv.get_json()['buckets']) == 53
+    # existe el usuario + rollup; nunca user_activity
+    assert len(statements) == 2
+    assert not any('user_activity' in s for s in statements)
+
+
+def test_stats_defaults_and_validation(client, _db):
+    user = create_user(_db)
+    rv = client.get(f'/api/users/{user.id}/stats')
+    assert rv.status_code == 200
+    data = rv.get_json()
+    assert data['granularity'] == 'week'
+    assert len(data['buckets']) == 12
+    assert data['to'] == date.today().isoformat()
+
+    assert len(client.get(f'/api/users/{user.id}/stats?granularity=month').get_json()['buckets']) == 12
+    assert client.get(f'/api/users/{user.id}/stats?granularity=year').status_code == 400
+    assert client.get(f'/api/users/{user.id}/stats?from=ayer').status_code == 400
+    assert client.get(f'/api/users/{user.id}/stats?from=2026-05-02&to=2026-05-01').status_code == 400
+    assert client.get(f'/api/users/{user.id}/stats?granularity=day&from=2020-01-01&to=2026-01-01').status_code == 400
+    assert client.get('/api/users/999/stats').status_code == 404
+
+
+def test_rebuild_matches_incremental(client, _db):
+    create_user(_db)
+    run, bike = _activities(_db)
+    _sync(client, auth_headers(client, 'test@example.com'), run, bike)
+    incremental = _snapshot(_db)
+    assert incremental
+
+    _db.session.query(ActivityStat).delete()
+    _db.session.commit()
+    assert activity_stats.rebuild() == 4
+    assert _snapshot(_db) == incremental
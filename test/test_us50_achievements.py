@@ -0,0 +1,172 @@
+"""
+US50 - Rachas y logros
+Acceptance criteria tested:
+- Cada completación nueva actualiza la racha (días consecutivos) y la más larga
+- Hitos de km, actividades difíciles, todas las dificultades y ciudades completadas
+- Las insignias se guardan como máscara de bits y no se pierden; los reintentos no suman
+- rebuild() llega al mismo estado desde user_activity y conserva las insignias ya ganadas
+- GET /api/users/<id>/achievements devuelve insignias y rachas
+"""
+from datetime import date, datetime
+
+from conftest import create_user, auth_headers
+from app.models import Activity, City, UserAchievement, UserActivity
+from app.utils import achievements, write_paths
+
+
+def _activities(_db):
+    city = City(name='Girona', country='España', slug='girona')
+    other = City(name='Lleida', country='España', slug='lleida')
+    _db.session.add_all([city, other])
+    _db.session.flush()
+    acts = [
+        Activity(city_id=city.id, name='Paseo', difficulty='easy', distance_km=4),
+        Activity(city_id=city.id, name='Subida', difficulty='hard', distance_km=8),
+        Activity(city_id=city.id, name='Cerrada', difficulty='medium', is_active=False),
+        Activity(city_id=other.id, name='Ruta', difficulty='medium', distance_km=3),
+        Activity(city_id=other.id, name='Otra', difficulty='medium', distance_km=3),
+    ]
+    _db.session.add_all(acts)
+    _db.session.commit()
+    return [a.id for a in acts]
+
+
+def _record(_db, user_id, *completions):
+    write_paths.record_completions(user_id, [
+        {'activity_id': c[0], 'done_at': c[1], **(c[2] if len(c) > 2 else {})} for c in completions
+    ])
+    _db.session.commit()
+    return _db.session.get(UserAchievement, user_id)
+
+
+def _snapshot(_db):
+    return sorted(
+        (s.user_id, s.badges, s.completions, round(s.total_km, 2), s.hard_count, s.difficulties,
+         s.current_streak, s.longest_streak, s.last_active_day, tuple(s.cities))
+        for s in UserAchievement.query.all()
+    )
+
+
+def test_streak_over_consecutive_days(_db):
+    user_id = create_user(_db).id
+    easy = _activities(_db)[0]
+
+    state = _record(_db, user_id, (easy, datetime(2026, 5, 1, 8)), (easy, datetime(2026, 5, 1, 19)))
+    assert (state.current_streak, state.longest_streak) == (1, 1)
+    state = _record(_db, user_id, (easy, datetime(2026, 5, 2, 8)), (easy, datetime(2026, 5, 3, 8)))
+    assert (state.current_streak, state.longest_streak) == (3, 3)
+    assert 'streak_3' in achievements.decode(state.badges)
+
+    # Un hueco reinicia la racha, pero la más larga y la insignia se quedan
+    state = _record(_db, user_id, (easy, datetime(2026, 5, 10, 8)))
+    assert (state.current_streak, state.longest_streak) == (1, 3)
+    assert 'streak_3' in achievements.decode(state.badges)
+    assert state.completions == 5
+
+
+def test_km_difficulty_and_city_badges(_db):
+    user_id = create_user(_db).id
+    easy, hard, _, medium, medium2 = _activities(_db)
+
+    state = _record(_db, user_id, (easy, datetime(2026, 5, 1, 8)))
+    assert achievements.decode(state.badges) == ['first_activity']
+
+    # Completar las dos activas de Girona (la cerrada no cuenta)
+    state = _record(_db, user_id, (hard, datetime(2026, 5, 1, 10)))
+    badges = achievements.decode(state.badges)
+    assert {'km_10', 'hard_1', 'city_1'} <= set(badges)
+    assert 'all_difficulties' not in badges
+    assert state.total_km == 12
+
+    # Distancia real importada en lugar de la de la actividad
+    state = _record(_db, user_id, (medium, datetime(2026, 5, 2, 8), {'distance_km': 90}))
+    badges = achievements.decode(state.badges)
+    assert {'km_100', 'all_difficulties'} <= set(badges)
+    assert len(state.cities) == 1
+    state = _record(_db, user_id, (medium2, datetime(2026, 5, 2, 9)))
+    assert len(state.cities) == 2
+
+
+def test_retries_do_not_count(_db):
+    user_id = create_user(_db).id
+    easy = _activities(_db)[0]
+    completion = (easy, datetime(2026, 5, 1, 8), {'idempotency_key': 'k'})
+    _record(_db, user_id, completion)
+    state = _record(_db, user_id, completion)
+    assert (state.completions, state.total_km) == (1, 4)
+
+
+def test_rebuild_matches_incremental(_db):
+    user_id = create_user(_db).id
+    other_id = create_user(_db, username='other', email='other@example.com').id
+    easy, hard, _, medium, medium2 = _activities(_db)
+    _record(_db, user_id, (easy, datetime(2026, 5, 1, 8)), (hard, datetime(2026, 5, 2, 8)))
+    _record(_db, user_id, (medium, datetime(2026, 5, 3, 8)), (medium2, datetime(2026, 5, 5, 8)))
+    _record(_db, other_id, (hard, datetime(2026, 5, 1, 8)))
+    incremental = _snapshot(_db)
+    assert len(incremental) == 2
+
+    _db.session.query(UserAchievement).delete()
+    _db.session.commit()
+    assert achievements.rebuild() == 2
+    _db.session.expunge_all()
+    assert _snapshot(_db) == incremental
+
+
+def test_rebuild_fixes_backdated_streak(_db):
+    user_id = create_user(_db).id
+    easy = _activities(_db)[0]
+    _record(_db, user_id, (easy, datetime(2026, 5, 1, 8)), (easy, datetime(2026, 5, 3, 8)))
+    # Sincronización atrasada del día que faltaba
+    state = _record(_db, user_id, (easy, datetime(2026, 5, 2, 8)))
+    assert state.longest_streak == 1
+
+    achievements.rebuild([user_id])
+    _db.session.expunge_all()
+    state = _db.session.get(UserAchievement, user_id)
+    assert (state.current_streak, state.longest_streak) == (3, 3)
+
+
+def test_rebuild_keeps_earned_badges(_db):
+    user_id = create_user(_db).id
+    other_id = create_user(_db, username='other', email='other@example.com').id
+    easy = _activities(_db)[0]
+    days = [datetime(2026, 5, d, 8) for d in (1, 2, 3)]
+    _record(_db, user_id, *((easy, d) for d in days))
+    _record(_db, other_id, (easy, days[0]))
+
+    # El historial ya no justifica la racha (ni, para other, nada)
+    UserActivity.query.filter(UserActivity.done_at == days[1]).delete()
+    UserActivity.query.filter_by(user_id=other_id).delete()
+    _db.session.commit()
+    achievements.rebuild()
+    _db.session.expunge_all()
+
+    state = _db.session.get(UserAchievement, user_id)
+    assert state.longest_streak == 1
+    assert 'streak_3' in achievements.decode(state.badges)
+    state = _db.session.get(UserAchievement, other_id)
+    assert state.completions == 0
+    assert achievements.decode(state.badges) == ['first_activity']
+
+
+def test_achievements_endpoint(client, _db):
+    user_id = create_user(_db).id
+    easy = _activities(_db)[0]
+    headers = auth_headers(client, 'test@example.com')
+
+    rv = client.get(f'/api/users/{user_id}/achievements')
+    assert rv.status_code == 200
+    assert rv.get_json()['badges'] == []
+    assert rv.get_json()['current_streak'] == 0
+
+    today = datetime.utcnow().date().isoformat()
+    client.post(f'/api/activities/{easy}/complete', headers=headers)
+    data = client.get(f'/api/users/{user_id}/achievements').get_json()
+    assert data['badges'] == ['first_activity']
+    assert (data['current_streak'], data['longest_streak'], data['last_active_day']) == (1, 1, today)
+
+    # Una racha ya rota se muestra como 0
+    _record(_db, user_id, (easy, datetime(2030, 1, 1, 8)))
+    assert achievements.summary(user_id, today=date(2030, 1, 5))['current_streak'] == 0
+    assert client.get('/api/users/999/achievements').status_code == 404